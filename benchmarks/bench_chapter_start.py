@@ -0,0 +1,55 @@
+"""
+bench_chapter_start.py:
+Time-to-first-frame of every adventure chapter: AdventureModel() construction plus the first go() frame,
+and how many frames the in-game prefetch needs until all five areas exist.
+Run from the repository root:  python benchmarks/bench_chapter_start.py [repeat]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+from headless import HeadlessRunner, ScriptedInput
+
+
+def firstFrame(runner, stg):
+    start = time.perf_counter()
+    mod = runner.build("adv", stg)
+    build = time.perf_counter() - start
+    runner.run(ScriptedInput(runner.setManager.keyDic1), 1)
+    total = time.perf_counter() - start
+    return mod, build, total
+
+def settleFrames(runner, mod, limit=600):
+    '''Frames (paused, no input) until every area is built; None for trees without lazy areas.'''
+    areaList = getattr(mod, "areaList", None)
+    if areaList is None or not hasattr(mod, "_prefetch"):
+        return None
+    inputs = ScriptedInput(runner.setManager.keyDic1)
+    for frame in range(limit):
+        if all(areaList):
+            return frame
+        runner.run(inputs, 1)
+    return limit
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv)>1 else 3
+    runner = HeadlessRunner(0)
+    firstFrame(runner, 1)           # 预热：字体、图片缓存
+    print( "%-6s %10s %12s %8s" % ("stg", "build(ms)", "1st frame(ms)", "settle") )
+    totalBuild = totalFirst = 0
+    for stg in range(1, 8):
+        builds, firsts = [], []
+        for _ in range(repeat):
+            mod, build, total = firstFrame(runner, stg)
+            builds.append(build)
+            firsts.append(total)
+        settle = settleFrames(runner, mod)
+        tBuild, tFirst = min(builds), min(firsts)
+        totalBuild += tBuild
+        totalFirst += tFirst
+        print( "%-6d %10.1f %12.1f %8s" % (stg, tBuild*1000, tFirst*1000, "-" if settle is None else settle) )
+    print( "%-6s %10.1f %12.1f" % ("TOTAL", totalBuild*1000, totalFirst*1000) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+bench_coins.py:
+Per-frame cost of 500 live coins and gems flying to one target: the former Coin (gem images reloaded for every gem,
+a new mask from_surface on every frame shift, collide_mask on every homing step) against a CoinSwarm (pooled Coins,
+shared image/shadow/mask frames per type, one batched update with the target's geometry computed once and a rect
+test before the pixel check). Arrived coins are replaced at once, so the swarm stays at `live` members.
+Run from the repository root:  python benchmarks/bench_coins.py [frames] [live]
+"""
+import os
+import sys
+import time
+from random import seed, randint, choice
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+pygame.init()
+bg_size = (1280, 720)
+screen = pygame.display.set_mode(bg_size)
+
+from util import InanimSprite, getPos, generateShadow
+from mapElems import CoinSwarm
+
+TYPES = ("coin", "coin", "coin", "gem", "gem")
+
+
+class Target(pygame.sprite.Sprite):
+    '''A hero-sized target with a round mask, standing in the middle of the screen.'''
+    def __init__(self):
+        pygame.sprite.Sprite.__init__(self)
+        self.image = pygame.Surface( (60, 80), pygame.SRCALPHA )
+        pygame.draw.ellipse( self.image, (200, 160, 40, 255), self.image.get_rect() )
+        self.mask = pygame.mask.from_surface(self.image)
+        self.rect = self.image.get_rect( center=(bg_size[0]//2, bg_size[1]//2) )
+        self.received = 0
+
+    def receiveExp(self, num, typ):
+        self.received += num
+
+
+class LegacyCoin(InanimSprite):
+    '''The original mapElems.Coin, kept here as reference.'''
+    imgList = []
+    shadList = []
+
+    def __init__(self, pos, cnt, speed, tgt, typ="coin"):
+        if not self.imgList:
+            LegacyCoin.imgList = [ pygame.image.load("image/coin"+str(i)+".png").convert_alpha() for i in range(6) ]
+            LegacyCoin.shadList = [ generateShadow(img) for img in LegacyCoin.imgList ]
+        InanimSprite.__init__(self, "coin")
+        self.typ = "coin"
+        if typ=="gem":
+            self.imgList = [ pygame.image.load("image/gem"+str(i)+".png").convert_alpha() for i in range(4) ]
+            self.shadList = [ generateShadow(img) for img in self.imgList ]
+            self.typ = "gem"
+        self.imgIndx = 0
+        self.image = self.imgList[self.imgIndx]
+        self.mask = pygame.mask.from_surface(self.image)
+        self.rect = self.image.get_rect()
+        self.rect.left = pos[0]-self.rect.width//2
+        self.rect.top = pos[1]-self.rect.height//2
+        self.cnt = cnt
+        self.speed = speed
+        self.tgt = tgt
+
+    def move(self, delay):
+        self.rect.left += self.speed[0]
+        self.rect.top += self.speed[1]
+        if not delay%2:
+            self._shiftImg()
+        if self.cnt > 0:
+            self.cnt -= 1
+        else:
+            if pygame.sprite.collide_mask(self, self.tgt):
+                self.tgt.receiveExp(1, self.typ)
+                self.kill()
+                return True
+            myPos = getPos(self, 0.5, 0.5)
+            tgtPos = getPos(self.tgt, 0.5, 0.5)
+            for i in range(2):
+                self.speed[i] = ( tgtPos[i] - myPos[i] ) // 12
+                if i==1:
+                    continue
+                if self.speed[i]>0 and self.speed[i]<=3:
+                    self.speed[i] = 4
+                elif self.speed[i]<0 and self.speed[i]>=-3:
+                    self.speed[i] = -4
+
+    def _shiftImg(self):
+        prePos = [self.rect.left+self.rect.width//2, self.rect.top+self.rect.height//2]
+        self.imgIndx = (self.imgIndx+1) % len(self.imgList)
+        self.image = self.imgList[self.imgIndx]
+        self.mask = pygame.mask.from_surface(self.image)
+        self.rect = self.image.get_rect()
+        self.rect.left = prePos[0]-self.rect.width//2
+        self.rect.top = prePos[1]-self.rect.height//2
+
+
+def launch():
+    '''Position, spreading frames and speed of a coin thrown from a random spot, as tower.addCoins() draws them.'''
+    pos = [ randint(40, bg_size[0]-40), randint(40, bg_size[1]-40) ]
+    return pos, choice( (20, 22, 24) ), [ randint(-2, 2), randint(-5, -2) ], choice(TYPES)
+
+def legacyRun(frames, live):
+    tgt = Target()
+    coins = pygame.sprite.Group()
+    created = 0
+    start = time.perf_counter()
+    for delay in range(frames):
+        while len(coins)<live:
+            pos, cnt, speed, typ = launch()
+            coins.add( LegacyCoin(pos, cnt, speed, tgt, typ) )
+            created += 1
+        for coin in coins:
+            coin.move(delay)
+    return time.perf_counter()-start, tgt.received, created
+
+def swarmRun(frames, live):
+    tgt = Target()
+    coins = CoinSwarm()
+    start = time.perf_counter()
+    for delay in range(frames):
+        while len(coins)<live:
+            pos, cnt, speed, typ = launch()
+            coins.spawn(pos, cnt, speed, tgt, typ)
+        coins.update(delay)
+    return time.perf_counter()-start, tgt.received, coins.created
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv)>1 else 300
+    live = int(sys.argv[2]) if len(sys.argv)>2 else 500
+    seed(live)
+    tOld, recOld, made = legacyRun(frames, live)
+    seed(live)
+    tNew, recNew, created = swarmRun(frames, live)
+    print( "%-10s %8s %10s %12s %12s %8s" % ("live", "frames", "arrived", "legacy(ms)", "swarm(ms)", "speedup") )
+    print( "%-10d %8d %10d %12.3f %12.3f %7.1fx" % (live, frames, recNew, tOld/frames*1000, tNew/frames*1000, tOld/max(tNew, 1e-9)) )
+    print( "coins created: legacy %d, swarm %d (same arrivals: %s)" % (made, created, recOld==recNew) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+bench_hpbar.py:
+Per-frame cost of painting HP bars of several sizes, with the value changing every `every` frames:
+the former block-by-block draw.rect() path against the cached HPBar surface.
+Run from the repository root:  python benchmarks/bench_hpbar.py [frames]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+pygame.init()
+bg_size = (1080, 720)
+screen = pygame.display.set_mode(bg_size)
+
+from util import HPBar
+
+
+class Owner():
+    def __init__(self, health):
+        self.health = health
+        self.rect = pygame.Rect(400, 300, 80, 80)
+
+def legacyPaint(bar, owner, surface):
+    '''The original HPBar.paint(), kept here as reference.'''
+    health = max( owner.health, 0 )
+    x = owner.rect.left+owner.rect.width//2 -bar.barLen/2
+    y = owner.rect.top-bar.barH-bar.barOffset
+    surface.blit( bar.barBG, (x,y) )
+    bar._drawBlocks( surface, x, y, health )
+
+def measure(full, blockVol, every, frames):
+    owner = Owner(full)
+    bar = HPBar(full, blockVol=blockVol)
+    best = []
+    for paint in (legacyPaint, lambda bar, owner, surface: bar.paint(owner, surface)):
+        owner.health = full
+        start = time.perf_counter()
+        for frame in range(frames):
+            if every and not frame%every:
+                owner.health = (owner.health-7) % full
+            for _ in range(20):     # 每帧约20条血条（怪物+英雄）
+                paint(bar, owner, screen)
+        best.append( (time.perf_counter()-start)/frames )
+    return best
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv)>1 else 600
+    print( "%-24s %12s %12s %8s" % ("case", "draw(ms)", "cache(ms)", "speedup") )
+    for full, blockVol in ( (300, 100), (1200, 100), (4400, 200) ):
+        for every in (0, 10, 1):
+            tOld, tNew = measure(full, blockVol, every, frames)
+            label = "%d HP, %s" % (full, "hit every %d" % every if every else "no hits")
+            print( "%-24s %12.3f %12.3f %7.1fx" % (label, tOld*1000, tNew*1000, tOld/max(tNew, 1e-9)) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+bench_media.py:
+Startup and per-frame cost of the menu's wallpapers and chapter covers: decoding every wallpaper (unconverted) and
+every cover with its thumbnail up front, against MediaLibrary indexing the files and decoding only the current
+wallpaper and the current chapter's covers; then one full-screen wallpaper blit, unconverted against convert()ed.
+Run from the repository root:  python benchmarks/bench_media.py [blits]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+pygame.init()
+bg_size = (1280, 720)
+screen = pygame.display.set_mode(bg_size)
+
+from util import MediaLibrary
+
+PAPERS = "image/titleBG"
+CHAPTERS = 7
+
+
+def legacyLoad():
+    '''The original Settings/StgManager loading, kept here as reference.'''
+    papers = [ pygame.image.load(f"{PAPERS}/{jpg}") for jpg in os.listdir(PAPERS) if os.path.splitext(jpg)[-1]==".jpg" ]
+    covers = [ pygame.image.load(f"image/cover{stg}.jpg").convert() for stg in range(1, CHAPTERS+1) ]
+    endless = pygame.image.load("image/coverEndless.jpg").convert()
+    thumbs = [ pygame.transform.smoothscale( each, (90, 120) ) for each in covers ]
+    return papers, covers+[endless]+thumbs
+
+def libraryLoad(stg=1):
+    '''What Settings/StgManager/God now do at startup: index everything, decode the wallpaper in use and one chapter.'''
+    papers = MediaLibrary(keep=2)
+    for jpg in os.listdir(PAPERS):
+        if os.path.splitext(jpg)[-1]==".jpg":
+            papers.add(jpg, f"{PAPERS}/{jpg}")
+    covers = MediaLibrary(keep=4)
+    for each in range(1, CHAPTERS+1):
+        covers.add(each, f"image/cover{each}.jpg")
+    covers.add(0, "image/coverEndless.jpg")
+    papers.get( next(iter(papers.paths)) )
+    for each in (stg-1, stg+1, stg):
+        if 1 <= each <= CHAPTERS:
+            covers.get(each)
+            covers.get(each, (90, 120))
+    return papers, covers
+
+def timeit(func, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter()-start)/n
+
+def surfBytes(surfs):
+    return sum( img.get_width()*img.get_height()*img.get_bytesize() for img in surfs )
+
+def main():
+    blits = int(sys.argv[1]) if len(sys.argv)>1 else 200
+    tOld = timeit(legacyLoad, 3)
+    tNew = timeit(libraryLoad, 3)
+    papers, others = legacyLoad()
+    libPapers, libCovers = libraryLoad()
+    memOld = surfBytes(papers+others)
+    memNew = libPapers.stats()["bytes"] + libCovers.stats()["bytes"]
+    print( "%-22s %12s %12s %8s" % ("startup", "eager", "library", "speedup") )
+    print( "%-22s %12.1f %12.1f %7.1fx" % ("decode (ms)", tOld*1000, tNew*1000, tOld/max(tNew, 1e-9)) )
+    print( "%-22s %12.1f %12.1f" % ("decoded (MB)", memOld/2**20, memNew/2**20) )
+    raw = papers[0]
+    kept = libPapers.get( next(iter(libPapers.paths)) )
+    pos = ( (bg_size[0]-raw.get_width())//2, (bg_size[1]-raw.get_height())//2 )
+    bOld = timeit( lambda: screen.blit(raw, pos), blits )
+    bNew = timeit( lambda: screen.blit(kept, pos), blits )
+    print( "%-22s %12s %12s %8s" % ("per frame", "unconverted", "converted", "speedup") )
+    print( "%-22s %12.3f %12.3f %7.1fx" % ("wallpaper blit (ms)", bOld*1000, bNew*1000, bOld/max(bNew, 1e-9)) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+bench_menu.py:
+CPU cost of sitting in each main menu page (index, stgChoosing, collection, heroBook, settings, bazaar) without touching
+the mouse or keyboard: flipped frames per second and process CPU time over a few seconds of wall time,
+with God.retained switched off (every frame redrawn at 60 FPS) and on (kept scene, idle wait),
+once with the wallpaper's weather effect and once without it.
+Run from the repository root:  python benchmarks/bench_menu.py [seconds]
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import pygame
+from headless import _caseInsensitive
+
+pygame.image.load = _caseInsensitive(pygame.image.load)
+
+from main import God
+
+PAGES = ("index", "stgChoosing", "collection", "heroBook", "settings", "bazaar")
+
+
+def measure(page, weather, retained, seconds):
+    '''Run God.go() on `page` for `seconds`, then post QUIT. Returns (flipped frames, cpu seconds, wall seconds).'''
+    flips = [0]
+    saved = [ (pygame.display, "flip"), (pygame.mouse, "set_cursor"),
+                (pygame.mixer.music, "load"), (pygame.mixer.music, "play"), (pygame.mixer.music, "get_busy") ]
+    saved = [ (obj, name, getattr(obj, name)) for (obj, name) in saved ]
+    flip = pygame.display.flip
+    def counted():
+        flips[0] += 1
+        flip()
+    pygame.display.flip = counted
+    pygame.mouse.set_cursor = lambda *args: None             # dummy驱动不支持光标
+    pygame.mixer.music.load = lambda *args, **kw: None     # 部分BGM不随仓库发布
+    pygame.mixer.music.play = lambda *args, **kw: None
+    pygame.mixer.music.get_busy = lambda: True
+    try:
+        god = God()
+        if not weather:
+            god.nature = None
+        god.retained = retained
+        god.page = page
+        if page!="index":
+            god.embed = god.embedFinal
+        timer = threading.Timer( seconds, lambda: pygame.event.post(pygame.event.Event(pygame.QUIT)) )
+        cpu, wall = time.process_time(), time.perf_counter()
+        timer.start()
+        try:
+            god.go()
+        except SystemExit:
+            pass
+        return flips[0], time.process_time()-cpu, time.perf_counter()-wall
+    finally:
+        for (obj, name, func) in saved:
+            setattr(obj, name, func)
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv)>1 else 3
+    print( "%-12s %8s %10s %10s %10s %10s %8s" % ("page", "weather", "full fps", "full cpu", "kept fps", "kept cpu", "saving") )
+    for page in PAGES:
+        for weather in (True, False):
+            fOld, cOld, wOld = measure(page, weather, False, seconds)
+            fNew, cNew, wNew = measure(page, weather, True, seconds)
+            print( "%-12s %8s %10.1f %9.0f%% %10.1f %9.0f%% %7.1fx" % (page, "on" if weather else "off", fOld/wOld, cOld/wOld*100,
+                        fNew/wNew, cNew/wNew*100, (cOld/wOld)/max(cNew/wNew, 1e-9)) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+bench_mist.py:
+Per-frame cost of painting the chapter-3 mist with 4/6 blobs and 0/1/3 light sources:
+the former copy-every-blob paint() against MistGenerator.paint() (off-screen blobs are skipped, blobs without a light
+are blitted as they are, only lit blobs are copied). A screen-sized lightmap (blobs stamped with BLEND_RGBA_MAX,
+halos applied with BLEND_RGBA_MULT, the covered area blitted once) is measured as well for comparison.
+Run from the repository root:  python benchmarks/bench_mist.py [frames]
+"""
+import os
+import sys
+import time
+from random import seed, randint
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+pygame.init()
+bg_size = (1280, 720)
+screen = pygame.display.set_mode(bg_size)
+
+from enemy import MistGenerator
+
+
+def legacyPaint(gen, canvas):
+    '''The original MistGenerator.paint(), kept here as reference.'''
+    for each in gen.darks:
+        surf_copy = each[0].copy()
+        for lumi in gen.lumis:
+            lumi_x = lumi[0][0]-each[1].left
+            lumi_y = lumi[0][1]-each[1].top
+            pygame.draw.circle( surf_copy, (0,0,0,60), (lumi_x,lumi_y), lumi[1], 0 )
+            pygame.draw.circle( surf_copy, (0,0,0,0), (lumi_x,lumi_y), lumi[1]-10, 0 )
+        canvas.blit(surf_copy, each[1])
+
+class Lightmap():
+    '''One reusable darkness buffer for all blobs (overlaps keep the denser blob; the halo ring scales alpha to 60/255).'''
+    def __init__(self):
+        self.buffer = pygame.Surface(bg_size).convert_alpha()
+        self.halos = {}
+
+    def halo(self, rad):
+        if rad not in self.halos:
+            halo = pygame.Surface( (rad*2+2, rad*2+2) ).convert_alpha()
+            halo.fill( (255,255,255,255) )
+            pygame.draw.circle( halo, (255,255,255,60), (rad+1,rad+1), rad, 0 )
+            pygame.draw.circle( halo, (255,255,255,0), (rad+1,rad+1), rad-10, 0 )
+            self.halos[rad] = halo
+        return self.halos[rad]
+
+    def paint(self, gen, canvas):
+        self.buffer.fill( (0,0,0,0) )
+        for each in gen.darks:
+            self.buffer.blit( each[0], each[1], special_flags=pygame.BLEND_RGBA_MAX )
+        for lumi in gen.lumis:
+            self.buffer.blit( self.halo(lumi[1]), (lumi[0][0]-lumi[1]-1, lumi[0][1]-lumi[1]-1), special_flags=pygame.BLEND_RGBA_MULT )
+        area = gen.darks[0][1].unionall( [each[1] for each in gen.darks[1:]] )
+        canvas.blit( self.buffer, area, area )
+
+def build(mists, lights):
+    seed(mists*10+lights)
+    gen = MistGenerator(bg_size)
+    for _ in range(mists):
+        gen.generateMist()
+        gen.darks[-1][1].center = ( randint(150, bg_size[0]-150), randint(150, bg_size[1]-150) )
+    lumis = [ [randint(200, bg_size[0]-200), randint(200, bg_size[1]-200)] for _ in range(lights) ]
+    return gen, lumis
+
+def measure(gen, lumis, paint, frames, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for frame in range(frames):
+            # 光圈随帧摇曳，与renew()相同
+            gen.lumis = [ (ctr, 120+(2 if frame%2 else -2)) for ctr in lumis ]
+            paint(gen, screen)
+        t = (time.perf_counter()-start)/frames
+        best = t if best is None else min(best, t)
+    return best
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv)>1 else 300
+    lightmap = Lightmap()
+    print( "%-18s %12s %12s %12s %8s" % ("case", "copy(ms)", "lightmap(ms)", "paint(ms)", "speedup") )
+    for mists in (4, 6):
+        for lights in (0, 1, 3):
+            gen, lumis = build(mists, lights)
+            tOld = measure(gen, lumis, legacyPaint, frames)
+            tMap = measure(gen, lumis, lightmap.paint, frames)
+            tNew = measure(gen, lumis, MistGenerator.paint, frames)
+            label = "%d mists, %d lights" % (mists, lights)
+            print( "%-18s %12.3f %12.3f %12.3f %7.1fx" % (label, tOld*1000, tMap*1000, tNew*1000, tOld/max(tNew, 1e-9)) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+bench_monsters.py:
+Per-frame cost of updating mons0/mons1/mons2/dec1 with 200+ live monsters spread over a chapter-1 tower:
+the former per-item moveMons() chain (category comparisons, getTop() for every item) against Specifier.moveGroup()
+(dispatch table, cached layer tops, off-screen monsters parked in the sleeping set).
+Run from the repository root:  python benchmarks/bench_monsters.py [frames]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.getcwd())
+from headless import HeadlessRunner, ScriptedInput
+from database import GRAVITY
+import enemy
+from util import CAMERA
+
+
+def legacyMoveMons(model, item, heroes):
+    '''The original Stg1Specifier.moveMons(), kept here as reference.'''
+    if item.category == "infernoFire":
+        item.update( model.delay, heroes, model.spurtCanvas )
+    elif item.category == "fire":
+        vib = item.update(model.delay, model.tower.groupList["0"], model.tower.groupList[str(item.onlayer)], model.tower.getTop(item.onlayer)+model.blockSize, heroes, model.spurtCanvas, model.bg_size )
+        if vib == "vib":
+            model._addVib(6)
+    elif item.category == "CrimsonDragon":
+        if item.activated:
+            model.spurtCanvas.addHalo( "monsHalo", 0 )
+            fire = item.update( model.delay, heroes, model.spurtCanvas )
+            if fire:
+                model.tower.allElements["mons1"].add(fire)
+        elif ( CAMERA.toScreen(item.rect).bottom >= 0 ) and ( CAMERA.toScreen(item.rect).top <= model.bg_size[1] ):
+            item.activated = True
+            model.msgManager.addMsg( ("Danger Coming !","危险来临！"), type="ctr", duration=120 )
+    elif ( CAMERA.toScreen(item.rect).bottom >= 0 ) and ( CAMERA.toScreen(item.rect).top <= model.bg_size[1] ):
+        if item.category == "tizilla":
+            item.move(model.delay, heroes)
+            item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
+        elif item.category=="megaTizilla":
+            item.move(model.delay, heroes, model.spurtCanvas)
+            item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY)
+        elif item.category == "dragon":
+            fire = item.move(model.delay)
+            if fire:
+                model.tower.allElements["mons1"].add(fire)
+        elif item.category == "dragonEgg":
+            if item.health>0:
+                fire = item.move(model.delay, heroes)
+                if fire:
+                    model.tower.allElements["mons1"].add(fire)
+            else:
+                dragon = enemy.Dragon(model.tower.heightList[str(item.onlayer)], str(item.onlayer), model.tower.boundaries)
+                dragon.rect.left = item.rect.left
+                item.kill()
+                model.tower.monsters.add( dragon )
+                model.tower.allElements["mons1"].add( dragon )
+        elif item.category == "blockFire":
+            item.burn(model.delay, heroes, model.spurtCanvas)
+        elif item.category == "hellHound":
+            vib = item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
+            if vib:
+                model._addVib(8)
+            item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
+
+def legacyGroups(model):
+    '''The original loops of AdventureModel.go().'''
+    for item in model.tower.allElements["mons0"]:
+        legacyMoveMons(model, item, model.heroes)
+    for item in model.tower.allElements["mons1"]:
+        legacyMoveMons(model, item, model.heroes)
+        if item.category=="bullet":
+            item.move(model.tower.monsters, model.spurtCanvas, model.bg_size)
+        elif item.category=="bulletPlus":
+            item.move(model.delay, model.tower.monsters, model.spurtCanvas, model.bg_size)
+        elif item.category == "tracker":
+            item.move(model.spurtCanvas)
+    for item in model.tower.allElements["mons2"]:
+        legacyMoveMons(model, item, model.heroes)
+    for item in model.tower.allElements["dec1"]:
+        if item.category=="coin":
+            item.move( model.delay )
+        else:
+            legacyMoveMons(model, item, model.heroes)
+
+def populate(runner, seed, per):
+    '''Chapter 1, area 0, plus `per` extra monsters of each ordinary kind over the whole tower.'''
+    import model
+    random.seed(seed)
+    mod = runner.build("adv", 1)
+    runner.run(ScriptedInput(runner.setManager.keyDic1), 1)     # go()的初始化
+    tower = mod.tower
+    for mType in (1, 2, 3, 4, 5):
+        for minion in model.makeMons(1, tower.layer-1, per, mType, tower, join=False):
+            tower.monsters.add(minion)
+            if minion.category in model.MONS2:
+                tower.allElements["mons2"].add(minion)
+            elif minion.category in model.MONS0:
+                tower.allElements["mons0"].add(minion)
+            else:
+                tower.allElements["mons1"].add(minion)
+    return mod
+
+def measure(runner, per, frames, step, away=0, repeat=3):
+    best = {"legacy": None, "table": None}
+    for _ in range(repeat):
+        for path in best:
+            mod = populate(runner, 5, per)
+            CAMERA.pan(0, away)
+            live = len(mod.tower.monsters)
+            start = time.perf_counter()
+            for frame in range(frames):
+                mod.delay = (mod.delay+1) % 360
+                if path=="legacy":
+                    legacyGroups(mod)
+                else:
+                    mod._moveGroups()
+                if step and not frame%step:     # 视野偶尔纵向移动，唤醒所有休眠的怪物
+                    CAMERA.pan(0, 1)
+            t = (time.perf_counter()-start)/frames
+            best[path] = t if best[path] is None else min(best[path], t)
+    return live, len(mod.specifier.sleeping), (best["legacy"], best["table"])
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv)>1 else 120
+    runner = HeadlessRunner(0)
+    print( "%-26s %8s %8s %12s %12s %8s" % ("case", "live", "asleep", "legacy(ms)", "table(ms)", "speedup") )
+    for per in (40, 80, 160):
+        for step, away in ( (0, 0), (10, 0), (0, 2400) ):
+            live, asleep, (tOld, tNew) = measure(runner, per, frames, step, away)
+            label = "%d/kind, %s" % (per, "scroll every %d" % step if step else "all off-screen" if away else "still view")
+            print( "%-26s %8d %8d %12.2f %12.2f %7.2fx" % (label, live, asleep, tOld*1000, tNew*1000, tOld/max(tNew, 1e-9)) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+bench_nature.py:
+Per-frame cost of Nature.update() for the chapter presets of GameModel._initNature() and for 200 drops:
+the former path (full-screen colorkeyed canvas fill, one draw call per drop, full-screen blit) against
+the batched move + one blits() call of pre-drawn stamps.
+Run from the repository root:  python benchmarks/bench_nature.py [frames]
+"""
+import os
+import sys
+import time
+from random import seed
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+pygame.init()
+bg_size = (1280, 720)
+screen = pygame.display.set_mode(bg_size)
+
+from canvas import Nature
+
+
+def legacyUpdate(nature, canvas, screen):
+    '''The original update path (fill, per-drop draw, full blit), kept here as reference. Moves with the batched step.'''
+    nature._moveDrops()
+    drops = nature.drops
+    canvas.fill( (0,0,0,0) )
+    for x, y, r, length in zip( drops.x[:drops.top].tolist(), drops.y[:drops.top].tolist(), drops.r[:drops.top].tolist(), drops.length[:drops.top].tolist() ):
+        if length:
+            pygame.draw.line( canvas, nature.color, (x,y), (x-nature.wind,y-length), r )
+        else:
+            pygame.draw.circle( canvas, nature.color, (x,y), r )
+    screen.blit( canvas, (0,0) )
+
+def measure(stg, num, wind, frames):
+    canvas = pygame.Surface(bg_size).convert_alpha()
+    canvas.set_colorkey( (0,0,0) )
+    seed(stg)
+    nature = Nature(bg_size, stg, num, wind)
+    start = time.perf_counter()
+    for _ in range(frames):
+        legacyUpdate(nature, canvas, screen)
+    tOld = (time.perf_counter()-start)/frames
+    seed(stg)
+    nature = Nature(bg_size, stg, num, wind)
+    nature.adapt = lambda: None     # 固定为全部绘制
+    start = time.perf_counter()
+    for _ in range(frames):
+        nature.update(screen)
+    tNew = (time.perf_counter()-start)/frames
+    return tOld, tNew
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv)>1 else 300
+    print( "%-16s %12s %12s %8s" % ("case", "canvas(ms)", "stamps(ms)", "speedup") )
+    presets = [ (1, 8, 1), (2, 4, 0), (3, 8, 1), (4, 18, 0), (5, 10, -1), (6, 8, 1), (7, 18, 0), (4, 200, 0), (5, 200, -1) ]
+    for stg, num, wind in presets:
+        tOld, tNew = measure(stg, num, wind, frames)
+        print( "%-16s %12.3f %12.3f %7.1fx" % ("stg%d, %d drops" % (stg, num), tOld*1000, tNew*1000, tOld/max(tNew, 1e-9)) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+bench_particles.py:
+Per-frame cost of SpurtCanvas.update() with 1k/5k/10k live spatters, spread over the screen or in one burst:
+the former sprite-per-particle path (Spatter group + full-screen canvas fill/blit) against the ParticlePool path.
+Run from the repository root:  python benchmarks/bench_particles.py [frames]
+"""
+import os
+import sys
+import time
+from random import seed
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+pygame.init()
+bg_size = (1280, 720)
+screen = pygame.display.set_mode(bg_size)
+
+from canvas import SpurtCanvas, Spatter
+
+
+def spritesUpdate(canvas, group, screen):
+    '''The original update path, kept here as reference.'''
+    canvas.fill( (0,0,0,0) )
+    for each in group:
+        each.move()
+        each.paint(canvas)
+    screen.blit( canvas, (0,0) )
+
+def fill(spurt, num, frames, area):
+    '''num spatters spread over an area (w, h) at the screen center, living longer than the measured frames.'''
+    per = 10
+    for i in range(num//per):
+        pos = [ (bg_size[0]-area[0])//2 + (i*37)%area[0], (bg_size[1]-area[1])//2 + (i*53)%area[1] ]
+        spurt.addSpatters( per, [2,3,4], [frames+10], (200,10,10,220), pos )
+
+def measure(num, area, frames):
+    # 旧路径：用同样的随机数生成同样的质点，再转成Spatter精灵
+    seed(num)
+    spurt = SpurtCanvas(bg_size)
+    fill(spurt, num, frames, area)
+    dots = spurt.dots
+    group = pygame.sprite.Group()
+    for i in range(dots.top):
+        group.add( Spatter( int(dots.r[i]), tuple(dots.color[i].tolist()), [dots.x[i].item(), dots.y[i].item()], int(dots.cnt[i]), [dots.vx[i].item(), dots.vy[i].item()] ) )
+    canvas = pygame.Surface(bg_size).convert_alpha()
+    start = time.perf_counter()
+    for _ in range(frames):
+        spritesUpdate(canvas, group, screen)
+    tOld = (time.perf_counter()-start)/frames
+    start = time.perf_counter()
+    for _ in range(frames):
+        spurt.update(screen)
+    tNew = (time.perf_counter()-start)/frames
+    assert len(spurt)==num
+    return tOld, tNew
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv)>1 else 60
+    print( "%-16s %12s %12s %8s" % ("num", "sprite(ms)", "pool(ms)", "speedup") )
+    for label, area in ( ("screen", (1200, 640)), ("burst", (240, 240)) ):
+        for num in (1000, 5000, 10000):
+            tOld, tNew = measure(num, area, frames)
+            print( "%-16s %12.2f %12.2f %7.1fx" % ("%d %s" % (num, label), tOld*1000, tNew*1000, tOld/max(tNew, 1e-9)) )
+    # 无质点时
+    spurt = SpurtCanvas(bg_size)
+    canvas = pygame.Surface(bg_size).convert_alpha()
+    start = time.perf_counter()
+    for _ in range(frames):
+        spritesUpdate(canvas, pygame.sprite.Group(), screen)
+    tOld = (time.perf_counter()-start)/frames
+    start = time.perf_counter()
+    for _ in range(frames):
+        spurt.update(screen)
+    tNew = (time.perf_counter()-start)/frames
+    print( "%-16s %12.2f %12.3f" % ("empty", tOld*1000, tNew*1000) )
+
+if __name__ == "__main__":
+    main()
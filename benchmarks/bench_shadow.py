@@ -0,0 +1,77 @@
+"""
+bench_shadow.py:
+Compare the old per-pixel util.generateShadow() with the current bulk version,
+for the frames of every monster class in enemy.py.
+Run from the repository root:  python benchmarks/bench_shadow.py
+"""
+import os
+import sys
+import ast
+import time
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+pygame.init()
+pygame.display.set_mode((1, 1))
+
+from util import generateShadow, loadImg
+
+
+def shadowPerPixel(img, color=(10,10,10,80)):
+    '''The original implementation, kept here as reference.'''
+    shad = img.copy()
+    shad.lock()
+    for x in range(shad.get_width()):
+        for y in range(shad.get_height()):
+            if shad.get_at((x,y))[3]>0:
+                shad.set_at( (x,y), color )
+    shad.unlock()
+    return shad
+
+def collectFrames(src="enemy.py"):
+    '''Statically collect the literal paths passed to createImgList() inside each class body.'''
+    with open(src, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    frames = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        paths = []
+        for call in ast.walk(node):
+            if isinstance(call, ast.Call) and getattr(call.func, "id", None)=="createImgList":
+                paths += [ arg.value for arg in call.args if isinstance(arg, ast.Constant) and isinstance(arg.value, str) ]
+        if paths:
+            frames[node.name] = paths
+    return frames
+
+def timeit(func, imgs):
+    start = time.perf_counter()
+    for img in imgs:
+        func(img)
+    return time.perf_counter() - start
+
+def main():
+    totalOld = totalNew = totalHit = 0
+    print( "%-16s %6s %10s %10s %10s %8s" % ("class", "frames", "old(ms)", "new(ms)", "cached(ms)", "speedup") )
+    for name, paths in collectFrames().items():
+        imgs = []
+        for path in paths:
+            if os.path.exists(path):
+                imgs += [ loadImg(path), loadImg(path, True) ]
+        if not imgs:
+            continue
+        for img in imgs:
+            assert pygame.image.tobytes(shadowPerPixel(img), "RGBA")==pygame.image.tobytes(generateShadow(img), "RGBA"), name
+        tOld = timeit(shadowPerPixel, imgs)
+        # 绕开缓存，测量真正的生成耗时
+        tNew = timeit(lambda img: generateShadow(img.copy()), imgs)
+        tHit = timeit(generateShadow, imgs)
+        totalOld += tOld
+        totalNew += tNew
+        totalHit += tHit
+        print( "%-16s %6d %10.2f %10.2f %10.3f %7.1fx" % (name, len(imgs), tOld*1000, tNew*1000, tHit*1000, tOld/max(tNew, 1e-9)) )
+    print( "%-16s %6s %10.2f %10.2f %10.3f %7.1fx" % ("TOTAL", "", totalOld*1000, totalNew*1000, totalHit*1000, totalOld/max(totalNew, 1e-9)) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+bench_targets.py:
+Per-frame cost of the heroes' target picking with 50/200/800 monsters in the tower: the former scans of tower.monsters
+(the wizard's strongest monster in view, the servant's on-screen pool, the follower's same-row check) against
+TargetIndex queries on one snapshot per frame. Each frame moves the monsters, wounds a few of them and runs `queries`
+picks of each kind, as several servants/followers and the wizard's lightnings would.
+Run from the repository root:  python benchmarks/bench_targets.py [frames] [queries]
+"""
+import os
+import sys
+import time
+from random import seed, randint, choice
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+from util import getPos, TrackedGroup, TargetIndex
+
+HEIGHT = 720
+EXCLUDE = ("blockStone", "fan", "webWall")
+
+
+class Dummy(pygame.sprite.Sprite):
+    def __init__(self):
+        pygame.sprite.Sprite.__init__(self)
+        self.rect = pygame.Rect( randint(100, 1180), randint(-1500, 1500), randint(30, 120), randint(30, 120) )
+        self.health = randint(50, 600)
+        self.category = choice( ("gozilla", "dragon", "spider", "fan", "bat", "golem") )
+
+
+def legacyPick(monsters, lastTgt, y):
+    '''The original scans of SuperPowerManagerWizard.run(), Servant.decideAction() and Follower.decideAction(), kept here as reference.'''
+    tmpM = None
+    for m in monsters:
+        if (0<getPos(m,0,0.5)[1]<HEIGHT) and (m!=lastTgt) and (tmpM==None or m.health>=tmpM.health):
+            tmpM = m
+    pool = []
+    for mons in monsters:
+        if not mons.category in ["blockStone","fan","webWall"] and ( mons.rect.bottom >= 0 ) and ( mons.rect.top <= HEIGHT ):
+            pool.append(mons)
+    row = [ mons for mons in monsters if mons.rect.bottom > y > mons.rect.top ]
+    return tmpM, pool, row
+
+def indexPick(targets, lastTgt, y):
+    tmpM = targets.strongest( test=lambda m: 0<getPos(m,0,0.5)[1]<HEIGHT, exclude=lastTgt )
+    return tmpM, targets.visible(exclude=EXCLUDE), targets.inRow(y)
+
+def measure(num, frames, queries):
+    seed(num)
+    monsters = TrackedGroup( *[ Dummy() for _ in range(num) ] )
+    targets = TargetIndex(monsters, HEIGHT)
+    times = [0, 0]
+    for frame in range(frames):
+        # 怪物移动、部分受伤
+        for m in monsters:
+            m.rect.top += randint(-2, 2)
+        targets.refresh()
+        wounded = [ choice(monsters.sprites()) for _ in range(3) ]
+        ys = [ randint(0, HEIGHT) for _ in range(queries) ]
+        for (k, pick) in enumerate( (lambda last, y: legacyPick(monsters, last, y), lambda last, y: indexPick(targets, last, y)) ):
+            for m in wounded:
+                m.health -= 1
+            last = None
+            start = time.perf_counter()
+            for y in ys:
+                res = pick(last, y)
+                last = res[0]
+            times[k] += time.perf_counter()-start
+    return times[0]/frames, times[1]/frames
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv)>1 else 300
+    queries = int(sys.argv[2]) if len(sys.argv)>2 else 4
+    print( "%-10s %8s %12s %12s %8s" % ("monsters", "queries", "scan(ms)", "index(ms)", "speedup") )
+    for num in (50, 200, 800):
+        tOld, tNew = measure(num, frames, queries)
+        print( "%-10d %8d %12.3f %12.3f %7.1fx" % (num, queries, tOld*1000, tNew*1000, tOld/max(tNew, 1e-9)) )
+
+if __name__ == "__main__":
+    main()
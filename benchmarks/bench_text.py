@@ -0,0 +1,75 @@
+"""
+bench_text.py:
+Per-frame cost of drawing the floating damage numbers (GameModel.showMsg) with 60/120/240 numbers alive:
+the former list + Font.render() every frame against FloatMsgs + the TextCache/glyph path.
+Run from the repository root:  python benchmarks/bench_text.py [frames]
+"""
+import os
+import sys
+import time
+from random import seed, randint
+
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+pygame.init()
+bg_size = (1080, 720)
+screen = pygame.display.set_mode(bg_size)
+
+from util import FloatMsgs, TextCache
+
+font = pygame.font.Font("font/UnDinaru.ttf", 14)
+
+
+def addTXT(txt, x, y):
+    rect = txt.get_rect()
+    rect.left = (bg_size[0] - rect.width) // 2 + x
+    rect.top = (bg_size[1] - rect.height) // 2 + y
+    screen.blit( txt, rect )
+
+def listShowMsg(msgList):
+    '''The original showMsg(), kept here as reference.'''
+    for msg in msgList:
+        if msg[2] == 0:
+            msgList.remove(msg)
+            continue
+        ctr = ( msg[0][0]-bg_size[0]//2, msg[0][1]-bg_size[1]//2-(60-msg[2]) )
+        addTXT( font.render(msg[1], True, (255,255,255)), ctr[0], ctr[1] )
+        msg[2] -= 1
+
+def poolShowMsg(msgList, texts):
+    msgList.expire()
+    for msg in msgList:
+        ctr = ( msg[0][0]-bg_size[0]//2, msg[0][1]-bg_size[1]//2-(msgList.life-msg[2]) )
+        addTXT( texts.render(font, msg[1], True, msg[3]), ctr[0], ctr[1] )
+        msg[2] -= 1
+
+def measure(per, frames):
+    '''`per` new hits every frame; each number lives 60 frames.'''
+    seed(per)
+    hits = [ [ ((randint(100,980), randint(100,620)), str(randint(5,300))) for _ in range(per) ] for _ in range(frames) ]
+    msgList = []
+    start = time.perf_counter()
+    for frame in range(frames):
+        for (pos, txt) in hits[frame]:
+            msgList.append( [pos, txt, 60] )
+        listShowMsg(msgList)
+    tOld = (time.perf_counter()-start)/frames
+    pool, texts = FloatMsgs(), TextCache()
+    start = time.perf_counter()
+    for frame in range(frames):
+        for (pos, txt) in hits[frame]:
+            pool.add(pos, txt)
+        poolShowMsg(pool, texts)
+    tNew = (time.perf_counter()-start)/frames
+    return len(pool), tOld, tNew, texts.stats()
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv)>1 else 600
+    print( "%-10s %8s %12s %12s %8s %8s" % ("hits/frame", "live", "render(ms)", "cache(ms)", "speedup", "renders") )
+    for per in (1, 2, 4):
+        live, tOld, tNew, stats = measure(per, frames)
+        print( "%-10d %8d %12.3f %12.3f %7.1fx %8d" % (per, live, tOld*1000, tNew*1000, tOld/max(tNew, 1e-9), stats["renders"]) )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+suite.py:
+Microbenchmarks of the engine's hot paths, run headless (SDL dummy drivers) with a fixed seed per case:
+tower generation, makeMons, Hero construction, shadow libraries, collision sweeps, SpurtCanvas.update and a full paint frame.
+Each case is timed `repeat` times; the best and the median per-call milliseconds are written as JSON.
+Run from the repository root:
+    python benchmarks/suite.py                                    # all cases, results in bench_results.json
+    python benchmarks/suite.py --only tower,mons --repeat 3       # name prefixes
+    python benchmarks/suite.py --out base.json                    # keep a baseline on this machine ...
+    python benchmarks/suite.py --baseline base.json --threshold 0.15   # ... and exit 1 if any case got slower
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import statistics
+
+sys.path.insert(0, os.getcwd())
+from headless import HeadlessRunner, ScriptedInput, bg_size
+import pygame
+# 先建立runner：它修补了pygame.image.load，必须在各游戏模块 from pygame.image import load 之前
+runner = HeadlessRunner(0)
+from database import CB, GRAVITY
+from canvas import SpurtCanvas
+import enemy
+import myHero
+from mapTowers import AdventureTower
+
+SEED = 2024
+CHAPTERS = range(1, 8)
+SWEEP = (10, 40, 160)           # makeMons amount per mType: 50/200/800 monsters in the collision sweep
+PARTICLES = (1000, 5000)
+MIN_MS = 0.02                   # 差值小于此值的用例不判定为退步（计时噪声）
+
+
+class Context():
+    '''Shared, lazily built fixtures: one runner, and per chapter the model plan, a generated area-0 tower and a running model.'''
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.runner = runner
+        self.plans = {}
+        self.towers = {}
+        self.models = {}
+        self.monsLoaded = False
+
+    def plan(self, stg):
+        '''The AdventureTower arguments of area 0, as AdventureModel._areaSteps() would pass them.'''
+        if stg not in self.plans:
+            random.seed(self.seed)
+            mod = self.runner.build("adv", stg)
+            oriPos, diameter, layer, specialOn = mod.areaPlans[0]
+            self.plans[stg] = (oriPos, mod.blockSize, diameter, layer, stg, 0, specialOn, mod.doubleP, mod.fntSet[1], mod.language, mod.bgColors, mod.bgShape, mod.bg_size)
+        return self.plans[stg]
+
+    def tower(self, stg):
+        if stg not in self.towers:
+            random.seed(self.seed)
+            tower = AdventureTower(*self.plan(stg))
+            tower.generateMap()
+            self.towers[stg] = tower
+        return self.towers[stg]
+
+    def model(self, stg, tag=""):
+        '''An adventure model right after go() has set up its first frame. Cases that modify the model use their own `tag`.'''
+        if (stg, tag) not in self.models:
+            random.seed(self.seed)
+            self.runner.build("adv", stg)
+            self.runner.run(ScriptedInput(self.runner.setManager.keyDic1), 1)
+            self.models[(stg, tag)] = self.runner.mod
+        return self.models[(stg, tag)]
+
+    def loadMonsters(self):
+        '''Instantiate every monster kind once so that their class-level imgLibs are filled.'''
+        if not self.monsLoaded:
+            random.seed(self.seed)
+            for stg in CHAPTERS:
+                tower = self.tower(stg)
+                for mType in mTypes(stg):
+                    makeMons(tower, 1, mType)
+            self.monsLoaded = True
+
+
+def mTypes(stg):
+    return sorted( { entry[0] for plan in CB[stg].values() for entry in plan if entry } )
+
+def makeMons(tower, amount, mType):
+    import model
+    return model.makeMons(1, tower.layer-1, amount, mType, tower, join=False)
+
+def copyLib(imgLib):
+    '''Fresh copies of the frames, so that util.generateShadow()'s cache is bypassed.'''
+    return { name: { dir: [ img.copy() for img in imgs ] for (dir, imgs) in lib.items() } for (name, lib) in imgLib.items() }
+
+
+# ======================================================================
+# 每个用例为 (name, setup, step, number)：setup()在计时外执行，其返回值传给step()；每个样本计时number次step()。
+def towerCases(ctx):
+    for stg in CHAPTERS:
+        yield ( "tower.construct/stg%d" % stg, lambda stg=stg: ctx.plan(stg),
+                    lambda plan: AdventureTower(*plan)._constructTower(), 3 )
+        yield ( "tower.generateMap/stg%d" % stg, lambda stg=stg: ctx.plan(stg),
+                    lambda plan: AdventureTower(*plan).generateMap(), 3 )
+
+def monsCases(ctx):
+    for stg in CHAPTERS:
+        for mType in mTypes(stg):
+            amount = 1 if mType==6 else 8
+            yield ( "mons.makeMons/stg%d/m%d" % (stg, mType), lambda stg=stg: ctx.tower(stg),
+                        lambda tower, mType=mType, amount=amount: makeMons(tower, amount, mType), 3 )
+
+def heroCases(ctx):
+    runner = ctx.runner
+    for VHero in runner.heroBook.heroList:
+        yield ( "hero.construct/%s" % VHero.name[0], lambda: None,
+                    lambda _, VHero=VHero: myHero.Hero(VHero, 1, runner.fntSet[1], 0, keyDic=runner.setManager.keyDic1), 5 )
+
+def shadowCases(ctx):
+    ctx.loadMonsters()
+    for name in sorted(vars(enemy)):
+        cls = getattr(enemy, name)
+        if not isinstance(cls, type):
+            continue
+        for attr, imgLib in sorted(vars(cls).items()):
+            if attr.startswith("imgLib") and isinstance(imgLib, dict) and imgLib:
+                label = name if attr=="imgLib" else name+"."+attr[6:]
+                yield ( "shadow.getShadLib/%s" % label, lambda imgLib=imgLib: copyLib(imgLib), enemy.getShadLib, 1 )
+
+def collideCases(ctx):
+    def sweep(per):
+        '''Chapter 1 with `per` extra monsters of each ordinary kind, and an arrow that meets none of them.'''
+        mod = ctx.model(1, "sweep")
+        tower = mod.tower
+        for minion in list(tower.monsters):
+            minion.kill()
+        for mType in (1, 2, 3, 4, 5):
+            for minion in makeMons(tower, per, mType):
+                tower.monsters.add(minion)
+        hero = mod.heroes[0]
+        ammo = myHero.Ammo(hero, (-2000, -2000), [1, 0])
+        return (hero, ammo, tower)
+    def fall(args):
+        hero, ammo, tower = args
+        hero.fall( tower.getTop(hero.onlayer-1), tower.groupList[str(hero.onlayer-1)], tower.heightList, GRAVITY )
+    for per in SWEEP:
+        yield ( "collide.heroFall/%d" % (5*per), lambda per=per: sweep(per), fall, 50 )
+        yield ( "collide.hitMonster/%d" % (5*per), lambda per=per: sweep(per),
+                    lambda args: args[1].hitMonster(args[2].monsters), 50 )
+
+def spurtCases(ctx):
+    def fill(num):
+        spurt = SpurtCanvas(bg_size)
+        for i in range(num//10):
+            pos = [ 100 + (i*37)%(bg_size[0]-200), 100 + (i*53)%(bg_size[1]-200) ]
+            spurt.addSpatters( 10, [2,3,4], [120], (200,10,10,220), pos )
+        return spurt
+    for num in PARTICLES:
+        yield ( "spurt.update/%d" % num, lambda num=num: fill(num), lambda spurt: spurt.update(ctx.runner.screen), 20 )
+
+def modelCases(ctx):
+    for stg in CHAPTERS:
+        yield ( "model.paint/stg%d" % stg, lambda stg=stg: ctx.model(stg), lambda mod: mod.paint(mod.heroes), 20 )
+
+GROUPS = (towerCases, monsCases, heroCases, shadowCases, collideCases, spurtCases, modelCases)
+
+
+# ======================================================================
+def timeCase(name, setup, step, number, repeat, seed):
+    samples = []
+    # 先空跑一次，让图片、字体等资源的首次加载不计入样本
+    random.seed("%d:%s" % (seed, name))
+    step(setup())
+    for _ in range(repeat):
+        # 每个用例各自以 (seed, name) 播种，结果不受 --only 和用例顺序影响
+        random.seed("%d:%s" % (seed, name))
+        arg = setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            step(arg)
+        samples.append( (time.perf_counter()-start)/number*1000 )
+    return { "best": min(samples), "median": statistics.median(samples), "number": number, "samples": samples }
+
+def runSuite(only=None, repeat=5, seed=SEED, verbose=True):
+    ctx = Context(seed)
+    results = {}
+    for group in GROUPS:
+        prefix = group.__name__[:-5]
+        if only and not any( prefix.startswith(each.split(".")[0]) for each in only ):
+            continue
+        for (name, setup, step, number) in group(ctx):
+            if only and not any( name.startswith(each) for each in only ):
+                continue
+            results[name] = timeCase(name, setup, step, number, repeat, seed)
+            if verbose:
+                print( "%-36s %10.3f %10.3f" % (name, results[name]["best"], results[name]["median"]) )
+    return results
+
+def compare(results, baseline, threshold, key="best"):
+    '''Returns the names of the cases that are slower than the baseline by more than `threshold`.'''
+    slower = []
+    print( "%-36s %10s %10s %8s" % ("case", "base(ms)", "now(ms)", "ratio") )
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        old, new = baseline[name][key], results[name][key]
+        ratio = new/max(old, 1e-9)
+        bad = ratio>1+threshold and new-old>MIN_MS
+        if bad:
+            slower.append(name)
+        print( "%-36s %10.3f %10.3f %7.2fx%s" % (name, old, new, ratio, "  <- slower" if bad else "") )
+    missing = sorted( set(baseline)-set(results) )
+    if missing:
+        print( "not measured: %s" % ", ".join(missing) )
+    return slower
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless microbenchmark suite.")
+    parser.add_argument("--only", help="comma separated case name prefixes, e.g. tower,collide.hitMonster")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--out", default="bench_results.json", help="JSON file for the results")
+    parser.add_argument("--baseline", help="JSON file written by an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown, 0.15 = 15%%")
+    args = parser.parse_args(argv)
+
+    only = args.only.split(",") if args.only else None
+    print( "%-36s %10s %10s" % ("case", "best(ms)", "median(ms)") )
+    results = runSuite(only, args.repeat, args.seed)
+    meta = { "seed": args.seed, "repeat": args.repeat, "python": platform.python_version(), "pygame": pygame.version.ver,
+                "platform": platform.platform(), "time": time.strftime("%Y-%m-%d %H:%M:%S") }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump( {"meta": meta, "results": results}, f, indent=2 )
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if only:
+            baseline = { name: base for (name, base) in baseline.items() if any( name.startswith(each) for each in only ) }
+        slower = compare(results, baseline, args.threshold)
+        if slower:
+            print( "%d case(s) slower than the baseline by more than %d%%" % (len(slower), round(args.threshold*100)) )
+            status = 1
+    pygame.quit()
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,11 +7,14 @@ Spurt_Canvas는 주로 세 가지 시각 효과를 다루는 보다 포괄적인
     2. 후광을 표시합니다(영웅이 초능력을 시전하거나 공격을 받을 때 등).
     3. 특정 몬스터와 영웅에 대해 입자 같은 총알을 생성합니다.
 """
+import math
 import pygame
+import numpy as np
+from heapq import heappop, heapify
 from random import random, randint, choice
 
 from database import DMG_FREQ
-from util import getPos
+from util import getPos, CAMERA
 
 
 # =========================================================================
@@ -19,21 +22,23 @@ from util import getPos
 # =========================================================================
 class Nature():
 
-    drops = []     # 储存运动的单个对象（雨、雪、雾团等）
+    drops = None   # 储存运动的单个对象（雨、雪、灰烬、火花），存于ParticlePool
     wind = 0       # 风向（速）
     bg_size = ()   # 窗口的宽高
-    canvas = None  # 实际绘制对象的透明画布
+    stamps = {}    # 预先画好的单个对象：(半径或粗细, 长度, 风, 颜色) -> Surface，各Nature共享
+    quality = 1.0  # 实际绘制的对象比例，随实测的帧时长自动调整。只影响绘制，不影响运动和随机数的抽取
+    FRAME_MS = 1000/60
+    MIN_QUALITY = 0.25
 
     def __init__(self, bg_size, stg, num, wind):
-        self.drops = []
+        # x/y为位置（雨为雨线的头部），vx/vy为速度，r为半径（雨为雨线的粗细），length为雨线长度
+        self.drops = ParticlePool( max(num, 1), x="i4", y="i4", vx="i4", vy="i4", r="i4", length="i4" )
         self.bg_size = bg_size
         self.wind = wind                     # 自由变量，可以用作多种用途。
-
-        self.canvas = pygame.Surface(bg_size).convert_alpha()
-        self.canvas.set_colorkey( (0,0,0) )  # set black as transparent color, generally make the canvas transparent
-        self.rect = self.canvas.get_rect()
-        self.rect.left = 0
-        self.rect.top = 0
+        self.quality = 1.0
+        self.lastTick = None
+        self.frameMs = self.FRAME_MS         # 帧时长的滑动平均
+        self.frames = 0
         if stg==1:
             self.addAsh( num, (250,200,0,200), False )
             self.dropType = "ash"
@@ -58,39 +63,144 @@ class Nature():
             self.dropType = "ash"
 
     def rainDrop(self, num):
+        self.color = (255,255,255,160)
         for i in range(0, num, 1):
             thickness = choice( [1, 2] )
             length = choice( [24, 34, 44] )
             startPos = [ randint( 0, self.bg_size[0] ), randint(-self.bg_size[1], 0) ]
             speed = choice( [30, 36, 42] )
-            drop = Rain( thickness, length, startPos, speed, self.bg_size )
-            self.drops.append( drop )
+            self.drops.spawn( x=startPos[0], y=startPos[1], vy=speed, r=thickness, length=length )
 
     def snowDrop(self, num, color, spdList):
+        self.color = color
         for i in range(0, num, 1):
             radius = choice( [3, 6, 9] )
             startPos = [ randint( 0, self.bg_size[0] ), randint(-self.bg_size[1], 0) ]
             speed = choice( spdList )
-            drop = Snow( radius, startPos, speed, color, self.bg_size )
-            self.drops.append( drop )
+            self.drops.spawn( x=startPos[0], y=startPos[1], vy=speed, r=radius )
 
     # spark should be a boolean.
     def addAsh(self, num, color, spark):
+        self.color = color
+        self.sparkFrom = self.wind          # 火花的出发点
         for i in range(0, num, 1):
             if spark:
-                radius = choice( [2, 4, 6] )
-                drop = Spark( radius, color, self.wind, self.bg_size )
+                i = self.drops.spawn( r=choice( [2, 4, 6] ) )
+                self.resetSpark(i)
             else:
-                radius = choice( [2, 4, 5] )
-                drop = Ash( radius, color, self.bg_size  )
-            self.drops.append( drop )
+                i = self.drops.spawn( r=choice( [2, 4, 5] ) )
+                self.resetAsh(i)
+
+    def resetAsh(self, i):      # 初始化第i个ash的所有状态
+        drops = self.drops
+        # 随机选择一条出现的边：
+        newFrom = randint( 0, 3 )        # 0表示从上，1表示从左，2表示从下，3表示从右
+        if newFrom == 0:
+            drops.x[i] = randint( 0, self.bg_size[0] )
+            drops.y[i] = randint( -10, 0 )
+            drops.vx[i], drops.vy[i] = randint(-2,2), randint(1,2)
+        elif newFrom == 1:
+            drops.x[i] = randint( -10, 0 )
+            drops.y[i] = randint( 0, self.bg_size[1] )
+            drops.vx[i], drops.vy[i] = randint(1,2), randint(-2,2)
+        elif newFrom == 2:
+            drops.x[i] = randint( 0, self.bg_size[0] )
+            drops.y[i] = randint( self.bg_size[1], self.bg_size[1]+10 )
+            drops.vx[i], drops.vy[i] = randint(-2,2), randint(-2,-1)
+        elif newFrom == 3:
+            drops.x[i] = randint( self.bg_size[0], self.bg_size[0]+10 )
+            drops.y[i] = randint( 0, self.bg_size[1] )
+            drops.vx[i], drops.vy[i] = randint(-2,-1), randint(-2,2)
+
+    def resetSpark(self, i):    # 初始化第i个spark的所有状态
+        drops = self.drops
+        drops.x[i] = self.sparkFrom[0]
+        drops.y[i] = randint(self.sparkFrom[1]-2, self.sparkFrom[1]+2)
+        if self.sparkFrom[0] <= 0:
+            drops.vx[i], drops.vy[i] = choice([2, 3, 4, 5, 6]), choice( range(-8,4,1) )
+        elif self.sparkFrom[0] >= self.bg_size[0]:
+            drops.vx[i], drops.vy[i] = choice([-2, -3, -4, -5, -6]), choice( range(-8,4,1) )
+
+    def _moveDrops(self):
+        '''Batched move of all drops, with the rules of the former Rain/Snow/Ash/Spark sprites.
+            Drops are reset in index order, so random numbers are drawn in the same order as before.'''
+        drops = self.drops
+        top = drops.top
+        x, y, vx, vy = drops.x[:top], drops.y[:top], drops.vx[:top], drops.vy[:top]
+        w, h = self.bg_size
+        if self.dropType == "rain":
+            fall = y<h                      # 尚在屏幕内，继续下落
+            y[fall] += vy[fall]
+            x[fall] += self.wind
+            for i in np.flatnonzero(~fall).tolist():
+                y[i] = 0                    # 触底则重置到顶端
+                x[i] = randint( 0, w )
+        elif self.dropType == "snow":
+            fall = (y<w) & (0<x) & (x<h)    # 与原先的Snow一致：纵坐标与宽比较，横坐标与高比较
+            y[fall] += vy[fall]
+            x[fall] += self.wind
+            for i in np.flatnonzero(~fall).tolist():
+                y[i] = 0                    # 出界则重置到顶端
+                x[i] = randint( 0, w )
+        elif self.dropType == "spark":
+            if self.wind:
+                self.sparkFrom = self.wind
+                for i in range(top):
+                    self.resetSpark(i)
+            else:
+                x += vx
+                y += vy
+                vy[vy<24] += 1              # 竖直速度增加，以实现下落效果
+        else:
+            inside = (-10<x) & (x<w+10) & (-10<y) & (y<h+10)    # 尚在屏幕内，继续滚动
+            x[inside] += vx[inside]
+            y[inside] += vy[inside]
+            for i in np.flatnonzero(~inside).tolist():
+                self.resetAsh(i)
+
+    def _stamp(self, r, length, wind):
+        '''A drop drawn once on its own small transparent surface; returns (surface, offset of the drop position).'''
+        key = (r, length, wind, self.color)
+        if key not in self.stamps:
+            if length:
+                # 雨线：头部(head)在下，尾部减掉了风速，以保持雨丝倾斜
+                pad = r+1
+                head = ( pad+max(wind,0), pad+length )
+                stamp = pygame.Surface( (abs(wind)+pad*2+1, length+pad*2+1), pygame.SRCALPHA )
+                pygame.draw.line( stamp, self.color, head, (head[0]-wind, head[1]-length), r )
+            else:
+                head = (r+1, r+1)
+                stamp = pygame.Surface( (2*r+2, 2*r+2), pygame.SRCALPHA )
+                pygame.draw.circle( stamp, self.color, head, r )
+            self.stamps[key] = (stamp, head)
+        return self.stamps[key]
+
+    def adapt(self):
+        '''Measure the frame time between two updates and scale the quality: lower it when frames run long, raise it back when there is room.'''
+        tick = pygame.time.get_ticks()
+        if self.lastTick is not None and tick-self.lastTick<250:    # 暂停、切换界面等长间隔不计
+            self.frameMs += ( tick-self.lastTick-self.frameMs )*0.05
+        self.lastTick = tick
+        self.frames += 1
+        if not self.frames%30:
+            if self.frameMs>self.FRAME_MS*1.15:
+                self.quality = max( self.quality-0.1, self.MIN_QUALITY )
+            elif self.frameMs<self.FRAME_MS*1.02:
+                self.quality = min( self.quality+0.1, 1.0 )
 
     # 供外部调用的更新drops对象的接口
     def update(self, screen):
-        self.canvas.fill( (0,0,0,0) )        # 填充透明的黑色（覆盖上一次的绘画记录）
-        for each in self.drops:
-            each.move( self.wind )
-            each.paint( self.canvas )
+        drops = self.drops
+        if drops.num:
+            self._moveDrops()
+            self.adapt()
+            num = math.ceil( drops.top*self.quality )
+            wind = self.wind if self.dropType=="rain" else 0
+            stamps = []
+            for x, y, r, length in zip( drops.x[:num].tolist(), drops.y[:num].tolist(), drops.r[:num].tolist(), drops.length[:num].tolist() ):
+                stamp, head = self._stamp(r, length, wind)
+                stamps.append( (stamp, (x-head[0], y-head[1])) )
+            screen.blits( stamps, doreturn=False )
         if self.dropType == "spark":
             self.count -= 1
             if self.count <= 0:
@@ -101,122 +211,81 @@ class Nature():
                 self.wind = 0
         elif self.dropType == "snow" and random()<0.01:
             self.wind = -self.wind
-        screen.blit( self.canvas, self.rect )
 
-# ----------------------------------------------------------
-class Rain(pygame.sprite.Sprite):
-    def __init__(self, thickness, length, startPos, speed, bg_size):  # 参数：雨线的粗细；雨线的长度；雨滴的起始位置
-        pygame.sprite.Sprite.__init__(self)
-        self.thickness = thickness
-        self.length = length
-        self.speed = speed
-        self.head = startPos
-        self.bg_size = bg_size
 
-    def move(self, wind):
-        if self.head[1] < self.bg_size[1]:  # 尚在屏幕内，继续下落
-            self.head[1] += self.speed
-            self.head[0] += wind
+# =========================================================================
+# ============================ Particle Pool ==============================
+# =========================================================================
+class ParticlePool():
+    '''Structure-of-arrays storage for short-lived particles: each field is one numpy array, a particle is one slot index.
+        fields: {name: dtype}, e.g. {"x":"f8", "color":"(4,)i4"}. Slots of dead particles go to a free-list and are reused.'''
+
+    def __init__(self, capacity=256, **fields):
+        self.fields = fields
+        self.capacity = 0
+        self.live = np.zeros(0, bool)
+        for name, dtype in fields.items():
+            setattr( self, name, np.zeros(0, dtype) )
+        self.free = []       # 空闲槽位（小根堆，优先复用靠前的槽位，使活动区间[0,top)保持紧凑）
+        self.top = 0         # 曾使用过的最高槽位+1，批量运算只针对[0,top)
+        self.num = 0
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        self.live = np.concatenate( (self.live, np.zeros(capacity-self.capacity, bool)) )
+        for name, dtype in self.fields.items():
+            arr = getattr(self, name)
+            setattr( self, name, np.concatenate( (arr, np.zeros(capacity-self.capacity, dtype)) ) )
+        self.capacity = capacity
+
+    def spawn(self, **values):
+        '''Take a slot and fill it. Fields not given are reset to 0.'''
+        if self.free:
+            i = heappop(self.free)
         else:
-            self.head[1] = 0       # 触底则重置到顶端
-            self.head[0] = randint( 0, self.bg_size[0] )
-        self.tail = [self.head[0]-wind, self.head[1]-self.length] # 尾部减掉了风速，以保持雨丝倾斜
-    
-    def paint(self, surface):
-        pygame.draw.line( surface, (255,255,255,160), self.head, self.tail, self.thickness )  # 抗锯齿的单个线段
+            if self.top>=self.capacity:
+                self._grow(self.capacity*2)
+            i = self.top
+            self.top += 1
+        self.live[i] = True
+        for name in self.fields:
+            getattr(self, name)[i] = values.get(name, 0)
+        self.num += 1
+        return i
+
+    def release(self, mask):
+        '''mask: boolean array over [0,top). Frees those slots.'''
+        idx = np.flatnonzero(mask & self.live[:self.top])
+        if not len(idx):
+            return
+        self.live[idx] = False
+        self.num -= len(idx)
+        if self.num<=0:
+            self.num = self.top = 0
+            self.free = []
+            return
+        self.top = int( np.flatnonzero(self.live[:self.top])[-1] ) + 1
+        self.free = [ i for i in self.free+idx.tolist() if i<self.top ]
+        heapify(self.free)
 
-# ----------------------------------------------------------
-class Snow(pygame.sprite.Sprite):
-    def __init__(self, radius, startPos, speed, color, bg_size):  # 参数：雪花的半径；雪花的起始位置
-        pygame.sprite.Sprite.__init__(self)
-        self.r = radius
-        self.speed = speed
-        self.pos = startPos
-        self.color = color
-        self.bg_size = bg_size
+    def alive(self):
+        return self.live[:self.top]
 
-    def move(self, wind):
-        if (self.pos[1] < self.bg_size[0]) and (0 < self.pos[0] < self.bg_size[1]):  # 尚在屏幕内，继续下落
-            self.pos[1] += self.speed
-            self.pos[0] += wind
-        else:
-            self.pos[1] = 0       # 出界则重置到顶端
-            self.pos[0] = randint( 0, self.bg_size[0] )
-    
-    def paint(self, surface):
-        pygame.draw.circle( surface, self.color, self.pos, self.r)
+    def __len__(self):
+        return self.num
 
-# ----------------------------------------------------------
-class Ash(pygame.sprite.Sprite):
-    def __init__(self, radius, color, bg_size):  # 参数color:推荐带上透明度RGBA；参数speed:为一个二元组
-        pygame.sprite.Sprite.__init__(self)
-        self.r = radius
-        self.color = color
-        self.bg_size = bg_size
-        self.pos = [0,0]
-        self.reset()
-    
-    def move(self, wind):
-        if (-10 < self.pos[0] < self.bg_size[0]+10) and (-10 < self.pos[1] < self.bg_size[1]+10):  # 尚在屏幕内，继续滚动
-            self.pos[0] += self.speed[0]
-            self.pos[1] += self.speed[1]
-        else:
-            self.reset()
-    
-    def reset(self):      # 初始化本ash的所有状态
-        # 随机选择一条出现的边：
-        newFrom = randint( 0, 3 )        # 0表示从上，1表示从左，2表示从下，3表示从右
-        if newFrom == 0:
-            self.pos[0] = randint( 0, self.bg_size[0] )
-            self.pos[1] = randint( -10, 0 )
-            self.speed = [ randint(-2,2), randint(1,2) ]
-        elif newFrom == 1:
-            self.pos[0] = randint( -10, 0 )
-            self.pos[1] = randint( 0, self.bg_size[1] )
-            self.speed = [ randint(1,2), randint(-2,2) ]
-        elif newFrom == 2:
-            self.pos[0] = randint( 0, self.bg_size[0] )
-            self.pos[1] = randint( self.bg_size[1], self.bg_size[1]+10 )
-            self.speed = [ randint(-2,2), randint(-2,-1) ]
-        elif newFrom == 3:
-            self.pos[0] = randint( self.bg_size[0], self.bg_size[0]+10 )
-            self.pos[1] = randint( 0, self.bg_size[1] )
-            self.speed = [ randint(-2,-1), randint(-2,2) ]
-            
-    def paint(self, surface):
-        pygame.draw.circle( surface, self.color, self.pos, self.r)
-
-# ----------------------------------------------------------
-class Spark(Ash):
-    def __init__(self, radius, color, startPos, bg_size):
-        self.newPos = startPos
-        Ash.__init__(self, radius, color, bg_size)
-    
-    def move(self, newPos):
-        if newPos:
-            self.newPos = newPos
-            self.reset()
-        else:
-            self.pos[0] += self.speed[0]
-            self.pos[1] += self.speed[1]
-            if self.speed[1]<24:
-                self.speed[1] += 1       # 竖直速度增加，以实现下落效果            
-    
-    def reset(self):             # 初始化本spark的所有状态
-        self.pos = [ self.newPos[0], randint(self.newPos[1]-2, self.newPos[1]+2) ]
-        if self.newPos[0] <= 0:
-            self.speed = [ choice([2, 3, 4, 5, 6]), choice( range(-8,4,1) ) ]
-        elif self.newPos[0] >= self.bg_size[0]:
-            self.speed = [ choice([-2, -3, -4, -5, -6]), choice( range(-8,4,1) ) ]
 
+# =========================================================================
+# ============================ Spurt Canvas ===============================
+# =========================================================================
+# SpurtCanvas.dots 中质点的种类
+SPATTER, FALLING, BACK, SMOKE, WAVE, FLAKE = range(6)
 
-# ========================================================================
-# ============================ Spurt Canvas ==============================
-# ========================================================================
 class SpurtCanvas():
 
-    spatters = None   # 储存运动的单个血滴，或冲击波边界圆
-    pebbles = []
+    dots = None       # 单纯的视觉质点（血滴、烟雾、冲击波、拖尾、雪花），存于ParticlePool
+    spatters = None   # 具有攻击判定的质点（AirAtom、Vomitus），仍为sprite
+    pebbles = None    # 碎石，同样存于ParticlePool
     canvas = None     # 实际绘制对象的透明画布
     rect = None
     halos = None      # boss出现时的全屏阴影画布，包括英雄的受伤反馈、冰冻效果等。
@@ -224,8 +293,11 @@ class SpurtCanvas():
 
     def __init__(self, bg_size):
         # Initialize the spurtCanvas part.
+        # cnt的含义随种类而变：SPATTER/FALLING/BACK为移动帧数，SMOKE为每帧透明度衰减，WAVE为半径增速；
+        # fade为WAVE的环宽衰减。oriCnt仅BACK使用。
+        self.dots = ParticlePool( 512, x="f8", y="f8", vx="f8", vy="f8", r="i4", width="i4",
+                                    cnt="i4", oriCnt="i4", fade="i4", kind="u1", color="(4,)i4" )
         self.spatters = pygame.sprite.Group()
-        self.pebbles = []
         self.pebbleImg = {
             "pebble": pygame.image.load("image/stg2/pebble.png").convert_alpha(),
             "jadeDebri": pygame.image.load("image/stg0/jadeDebri.png").convert_alpha(),
@@ -233,10 +305,22 @@ class SpurtCanvas():
             "metalDebri": pygame.image.load("image/stg6/metalDebri.png").convert_alpha(),
             "boneDebri": pygame.image.load("image/stg3/boneDebri.png").convert_alpha()
         }
+        # 碎石只引用图片，不再逐个复制：偶数号为原图，奇数号为翻转图
+        self.pebbleSurf = []
+        self.pebbleKey = {}
+        for key, img in self.pebbleImg.items():
+            self.pebbleKey[key] = len(self.pebbleSurf)
+            self.pebbleSurf += [ img, pygame.transform.flip(img, True, False) ]
+        # x/y为rect的left/top, floor为掉落下限, bounce为剩余弹起次数, seq为加入顺序
+        self.pebbles = ParticlePool( 64, x="i4", y="i4", vx="i4", vy="i4", h="i4", floor="i4", bounce="i4", img="i4", seq="i8" )
+        self.pebbleSeq = 0
         self.canvas = pygame.Surface(bg_size).convert_alpha()
+        self.canvas.fill( (0,0,0,0) )
         self.rect = self.canvas.get_rect()
         self.rect.left = 0
         self.rect.top = 0
+        self.dirty = None   # 上一帧在canvas上画过的区域，下一帧只需清空这一块
+        self.discs = {}     # 各 (半径,环宽) 圆形的像素偏移
 
         self.txtList = []
 
@@ -277,10 +361,20 @@ class SpurtCanvas():
             # radRat should be a List that contains 4 numbers (pixls), indicating 4 different layers of halos.
             # fadeSpd can be either positive or negative, indicating how should overall alpha value of the halo changes.
             self.halos[each] = [False, 0, fadeSpd, fadeSpd, rgb]
+
+    def __len__(self):
+        return len(self.dots) + len(self.spatters) + len(self.pebbles)
+
+    def _addDot(self, kind, radius, rgba, pos, cnt, speed, width=0, fade=0):
+        if len(rgba)<=3:
+            rgba = ( rgba[0], rgba[1], rgba[2], 255 )
+        self.dots.spawn( x=pos[0], y=pos[1], vx=speed[0], vy=speed[1], r=radius, width=width,
+                        cnt=cnt, oriCnt=cnt, fade=fade, kind=kind, color=rgba )
     
     def addSpatters(self, num, rList, cList, rgba, pos, falling=False, xspd=[], yspd=[], back=False):
         '''This method provide a encapsuled way to represent a spattering effect from a center point to all directions.
          Falling decides whether using normal spatters or falling spatters.'''
+        kind = BACK if back else (FALLING if falling else SPATTER)
         for i in range(0, num, 1):
             radius = choice( rList )
             cnt = choice( cList ) #[10, 12, 14] )
@@ -296,8 +390,7 @@ class SpurtCanvas():
                     speed = [ choice(xspd), choice(yspd) ]
                 else:
                     speed = [ choice([-2, -1, 0, 1, 2]), choice([-4, -3, -2, -1]) ]
-            spatter = Spatter( radius, rgba, randPos, cnt, speed, falling=falling, back=back )
-            self.spatters.add( spatter )
+            self._addDot( kind, radius, rgba, randPos, cnt, speed )
 
     def addSmoke(self, num, rList, fade, rgba, pos, xRange, speed=[0,-1]):
         for i in range(0, num, 1):
@@ -305,12 +398,11 @@ class SpurtCanvas():
             randPos = [ randint(pos[0]-xRange, pos[0]+xRange), randint(pos[1]-2, pos[1]+2) ]
             if len(rgba)<=3:
                 rgba = [ rgba[0], rgba[1], rgba[2], 240 ]
-            smoke = Smoke( radius, rgba, randPos, fade, speed )
-            self.spatters.add( smoke )
+            self._addDot( SMOKE, radius, rgba, randPos, fade, speed )
     
     def addWaves(self, pos, color, initR, initW, rInc=1, wFade=1):
-        wave = Wave( initR, color, list(pos), rInc, wFade ) # 最后两项：半径增长速度&圆环变细速度
-        self.spatters.add( wave )
+        # 环宽的初值与半径相同（initW并未被使用）；cnt为半径增长速度，fade为圆环变细速度
+        self._addDot( WAVE, initR, color, pos, rInc, (0,0), width=initR, fade=wFade )
 
     def addAirAtoms(self, owner, num, pos, speed, sprites, cate, btLine=0):
         if cate=="fire":
@@ -354,34 +446,33 @@ class SpurtCanvas():
                 speed = (-2,7)
             r = choice( [6,8,10,12] )
             posY = randint(-self.rect.height,0)
-            flake = Flake( r, [posX, posY], speed, (250,250,250,250), (self.rect.width,self.rect.height) )
-            self.spatters.add(flake)
+            self._addDot( FLAKE, r, (250,250,250,250), CAMERA.toWorld( (posX, posY) ), 0, speed )
     
     def addPebbles(self, item, num, type="pebble"):
         ##type: "pebble", "eggDebri", "metalDebri", "boneDebri"
         cent_x, cent_y = getPos(item,0.5,0.3)
+        img = self.pebbleKey[type]
+        width, height = self.pebbleImg[type].get_size()
         for i in range(num):
             # 默认向右
-            pebble = self.pebbleImg[type].copy()
             speed = [ randint(0,2), randint(-12,-7) ]
             start_x = randint(cent_x, item.rect.right )
             start_y = randint(cent_y, item.rect.bottom)
             # 一半概率转向左
+            flip = 0
             if random()<0.5:
-                pebble = pygame.transform.flip(pebble, True, False)
+                flip = 1
                 speed[0] = -speed[0]
                 start_x = cent_x*2 - start_x
-            rect = pebble.get_rect()
-            rect.left = start_x - rect.width//2
-            rect.top = start_y - rect.height//2
-            # surf, rect, speed, 掉落下限, 弹起次数
-            self.pebbles.append( [pebble, rect, speed, item.rect.bottom+5, 1] )
+            # 掉落下限, 弹起次数
+            self.pebbles.spawn( x=start_x-width//2, y=start_y-height//2, vx=speed[0], vy=speed[1], h=height,
+                                floor=item.rect.bottom+5, bounce=1, img=img+flip, seq=self.pebbleSeq )
+            self.pebbleSeq += 1
 
     def addTrails(self, rList, cList, rgba, pos):
         radius = choice( rList )
         cnt = choice( cList )
-        spatter = Spatter( radius, rgba, list(pos), cnt, [0,0] )
-        self.spatters.add( spatter )
+        self._addDot( SPATTER, radius, rgba, pos, cnt, (0,0) )
 
     def addExplosion(self, pos, initR, initW, rInc=1, wFade=1, waveColor=(255,160,30,250), spatColor=(2,2,2,220), dotD=(16,18,20), smoke=True):
         '''Specially for explosive flame effect. A formulation
@@ -391,25 +482,144 @@ class SpurtCanvas():
         if smoke:
             self.addSmoke(3, (4,5,6), 1, (40,20,20,120), pos, 4)
 
-    def update(self, screen):
-        self.canvas.fill( (0,0,0,0) )           # refill transparent black to overwrite former paints.
+    def _moveDots(self):
+        '''Batched move of all dots. Returns (paint mask, dead mask) over [0,top).
+            Dots dying this frame are still painted once, as the former sprites were.'''
+        dots = self.dots
+        top = dots.top
+        live = dots.alive()
+        kind, cnt, r, width = dots.kind[:top], dots.cnt[:top], dots.r[:top], dots.width[:top]
+        x, y, vx, vy = dots.x[:top], dots.y[:top], dots.vx[:top], dots.vy[:top]
+        alpha = dots.color[:top, 3]
+        dead = np.zeros(top, bool)
+        # 普通/下落质点：若还有cnt，则进行移动，且减cnt；否则半径减1，减至0则删除
+        spat = live & (kind<=FALLING)
+        mv = spat & (cnt>0)
+        x[mv] += vx[mv]
+        y[mv] += vy[mv]
+        cnt[mv] -= 1
+        fall = mv & (kind==FALLING) & (vy<4) & (cnt%4==0)
+        vy[fall] += 1               # 竖直速度增加，以实现下落效果
+        shrink = spat & ~mv & (r>0)
+        r[shrink] -= 1
+        dead |= spat & ~mv & ~shrink
+        # back类型：先前进cnt帧，再原路返回
+        back = live & (kind==BACK)
+        fwd = back & (cnt>0)
+        ret = back & ~fwd & (cnt>-dots.oriCnt[:top])
+        x[fwd] += vx[fwd]
+        y[fwd] += vy[fwd]
+        x[ret] -= vx[ret]
+        y[ret] -= vy[ret]
+        cnt[fwd|ret] -= 1
+        dead |= back & ~fwd & ~ret
+        # 烟雾：质点移动且颜色淡化，颜色消失则删除
+        smoke = live & (kind==SMOKE)
+        gone = smoke & (alpha<=0)
+        fade = smoke & ~gone
+        alpha[fade] -= cnt[fade]
+        x[fade] += vx[fade]
+        y[fade] += vy[fade]
+        dead |= gone
+        # 冲击波：半径增大，圆环变细
+        wave = live & (kind==WAVE)
+        grow = wave & (width>0)
+        r[grow] += cnt[grow]
+        width[grow] -= dots.fade[:top][grow]
+        dead |= wave & ~grow
+        # 雪花：尚在屏幕内，继续下落
+        flake = live & (kind==FLAKE)
+        sx, sy = CAMERA.scroll
+        inside = flake & (y+sy<self.rect.height) & (0<x+sx) & (x+sx<self.rect.width)
+        x[inside] += vx[inside]
+        y[inside] += vy[inside]
+        dead |= flake & ~inside
+        paint = live & ~gone & ~(wave & (width<=0))
+        np.maximum(alpha, 0, out=alpha)
+        return paint, dead
+
+    def _movePebbles(self):
+        '''Batched move of the pebbles. Returns (paint mask, dead mask) over [0,top).'''
+        pebs = self.pebbles
+        top = pebs.top
+        live = pebs.alive()
+        x, y, vy = pebs.x[:top], pebs.y[:top], pebs.vy[:top]
+        x[live] += pebs.vx[:top][live]
+        y[live] += vy[live]
+        landed = live & (y+pebs.h[:top]>=pebs.floor[:top])
+        bounce = landed & (pebs.bounce[:top]>0)
+        vy[live & ~landed] = np.minimum( vy[live & ~landed]+1, 5 )  # fall状态，速度+1
+        if bounce.any():
+            pebs.bounce[:top][bounce] -= 1
+            # 随机数按原先逐个处理的顺序（后加入的先处理）抽取
+            idx = np.flatnonzero(bounce)
+            for i in idx[ np.argsort(-pebs.seq[idx], kind="stable") ].tolist():
+                vy[i] = randint(-9, -6)
+        dead = landed & ~bounce
+        return live & ~dead, dead
+
+    def _disc(self, key):
+        '''Pixel offsets (dx, dy) of pygame.draw.circle(radius, width) around its center. key = radius<<12 | width.'''
+        if key not in self.discs:
+            rad, wid = key>>12, key&0xFFF
+            stamp = pygame.Surface( (2*rad+2, 2*rad+2), pygame.SRCALPHA )
+            pygame.draw.circle( stamp, (255,255,255,255), (rad+1, rad+1), rad, wid )
+            dx, dy = np.nonzero( pygame.surfarray.array_alpha(stamp) )
+            self.discs[key] = ( dx-rad-1, dy-rad-1 )
+        return self.discs[key]
+
+    def _paintDots(self, paint, offset):
+        '''Write the pixels of all dots into the canvas at once, grouped by (radius, width), shifted by the camera offset.
+            Same pixels as one pygame.draw.circle() per dot: colors are written, not blended, the later dot wins.'''
+        dots = self.dots
+        top = dots.top
+        idx = np.flatnonzero( paint & (dots.r[:top]>0) )
+        if not len(idx):
+            return []
+        r = dots.r[idx].astype(np.intp)
+        x = dots.x[idx].astype(np.intp) + offset[0]
+        y = dots.y[idx].astype(np.intp) + offset[1]
+        c = dots.color[idx].astype(np.uint32)
+        sh = self.canvas.get_shifts()
+        color = (c[:,0]<<sh[0]) | (c[:,1]<<sh[1]) | (c[:,2]<<sh[2]) | (c[:,3]<<sh[3])
+        keys, group = np.unique( (r<<12) | dots.width[idx], return_inverse=True )
+        pixels = pygame.surfarray.pixels2d(self.canvas).T      # (h, w)，行优先
+        height, width = pixels.shape
+        for k, key in enumerate(keys.tolist()):
+            dx, dy = self._disc(key)
+            m = np.flatnonzero(group==k)
+            xs = ( x[m,None]+dx ).ravel()
+            ys = ( y[m,None]+dy ).ravel()
+            inside = (0<=xs) & (xs<width) & (0<=ys) & (ys<height)
+            pixels[ ys[inside], xs[inside] ] = np.repeat( color[m], len(dx) )[inside]
+        del pixels      # 释放对canvas的锁定
+        x0, y0 = int((x-r-1).min()), int((y-r-1).min())
+        return [ pygame.Rect( x0, y0, int((x+r+1).max())-x0, int((y+r+1).max())-y0 ).clip(self.rect) ]
+
+    def update(self, screen, offset=(0,0)):
+        '''质点、碎石等都在世界坐标中，画到canvas上时加上镜头偏移量offset；文字按屏幕居中。'''
+        if not (self.dirty or self.dots.num or self.spatters or self.pebbles.num or self.txtList):
+            return
+        if self.dirty:
+            self.canvas.fill( (0,0,0,0), self.dirty )   # 只清除上一帧画过的区域
+        drawn = []
+        if self.dots.num:
+            paint, dead = self._moveDots()
+            drawn += self._paintDots(paint, offset)
+            self.dots.release(dead)
         for each in self.spatters:
             each.move()
-            each.paint(self.canvas)
+            drawn.append( each.paint(self.canvas, offset) )
         # 处理pebble
-        for peb in self.pebbles[::-1]:
-            peb[1].left += peb[2][0]
-            peb[1].top += peb[2][1]
-            if peb[1].bottom >= peb[3]:  # 落地
-                if peb[4]>0:    # 弹起
-                    peb[4] = peb[4]-1
-                    peb[2] = [ peb[2][0], randint(-9, -6) ]
-                else:           # 删除
-                    self.pebbles.remove(peb)
-                    continue
-            else:
-                peb[2] = [ peb[2][0], min(peb[2][1]+1,5) ]  # fall状态，速度+1
-            self.canvas.blit( peb[0], peb[1] )
+        if self.pebbles.num:
+            paint, dead = self._movePebbles()
+            pebs = self.pebbles
+            idx = np.flatnonzero(paint)
+            idx = idx[ np.argsort(-pebs.seq[idx], kind="stable") ]
+            surf = self.pebbleSurf
+            ox, oy = offset
+            drawn += self.canvas.blits( [ (surf[img], (x+ox,y+oy)) for x, y, img in zip( pebs.x[idx].tolist(), pebs.y[idx].tolist(), pebs.img[idx].tolist() ) ] )
+            pebs.release(dead)
         # 显示文字
         for txt, pos in self.txtList:
             rect = txt.get_rect()
@@ -418,10 +628,13 @@ class SpurtCanvas():
                 rect.top = self.rect.height-30
             elif pos=="TOP":
                 rect.bottom = 30
-            self.canvas.blit( txt, rect )
+            drawn.append( self.canvas.blit( txt, rect ) )
         self.txtList.clear()
-        # Paint the whole canvas
-        screen.blit( self.canvas, self.rect )
+        drawn = [ rect for rect in drawn if rect ]
+        self.dirty = drawn[0].unionall(drawn[1:]) if drawn else None
+        # Paint the painted part of canvas
+        if self.dirty:
+            screen.blit( self.canvas, self.dirty, area=self.dirty )
     
     def addHalo(self, haloType, startAlpha):
         if haloType not in self.halos:  # Check to ensure type is in self.halos.
@@ -461,11 +674,17 @@ class SpurtCanvas():
                 pair[0].fill( (r, g, b, self.halos[each][1]) )
                 screen.blit( pair[0], pair[1])
 
+    # level()/lift()：切换塔楼时，将所有质点和碎石平移到新区域的世界坐标中
     def level(self, dist):
+        self.dots.x[:self.dots.top] += dist
+        self.pebbles.x[:self.pebbles.top] += dist
         for each in self.spatters:
             each.level(dist)
 
     def lift(self, dist):
+        self.dots.y[:self.dots.top] += dist
+        self.pebbles.y[:self.pebbles.top] += dist
+        self.pebbles.floor[:self.pebbles.top] += dist
         for each in self.spatters:
             each.lift(dist)
 
@@ -525,8 +744,8 @@ class Spatter(pygame.sprite.Sprite):
             del self
             return True
     
-    def paint(self, canvas):
-        pygame.draw.circle(canvas, self.color, self.pos, self.r)
+    def paint(self, canvas, offset=(0,0)):
+        return pygame.draw.circle(canvas, self.color, (self.pos[0]+offset[0], self.pos[1]+offset[1]), self.r)
 
     def level(self, dist):
         self.pos[0] += dist
@@ -534,50 +753,6 @@ class Spatter(pygame.sprite.Sprite):
     def lift(self, dist):
         self.pos[1] += dist
     
-# ----------------------------------------------------------
-class Smoke(Spatter):
-    # 参数color:推荐带上透明度RGBA；参数speed:为一个二元组；fade是颜色淡化的度，初始化时将被设为cnt。
-    def __init__(self, radius, color, pos, fade, speed):
-        Spatter.__init__(self, radius, color, pos, fade, speed)
-    
-    def move(self):
-        # 若颜色消失，则删除
-        if self.color[3]<=0:
-            self.kill()
-            del self
-            return True
-        # 否则，质点移动且颜色淡化
-        elif self.color[3]>0:
-            self.color = (self.color[0], self.color[1], self.color[2], self.color[3]-self.cnt)
-            self.pos[0] += self.speed[0]
-            self.pos[1] += self.speed[1]
-
-# ----------------------------------------------------------
-class Wave(Spatter):
-    # increm是半径增大的幅度，capR是半径的最大值。
-    def __init__(self, initR, color, pos, rInc, wFade):
-        """
-        self.cnt = rInc
-        self.speed = wFade
-        """
-        Spatter.__init__(self, initR, color, pos, rInc, wFade)
-        self.width = initR
-    
-    def move(self):
-        # 如果在最大半径以下，则r继续增大。
-        # 需要修改
-        if self.width>0:
-            self.r += self.cnt
-            self.width -= self.speed
-        else:
-            self.kill()
-            del self
-            return True
-
-    def paint(self, canvas):
-        if self.width>0:
-            pygame.draw.circle(canvas, self.color, self.pos, self.r, width=self.width)
-
 # particles as attacks for certain monsters and heroes
 class AirAtom(Spatter):
 
@@ -643,18 +818,3 @@ class Vomitus(Spatter):
     def lift(self, dist):
         self.pos[1] += dist
         self.btLine += dist
-
-# for CP5: blizzard
-class Flake(Spatter):
-    # 参数：雪花的半径；雪花的起始位置；这里将屏幕范围range赋给spatter的cnt变量。
-    def __init__(self, radius, startPos, speed, color, range):
-        Spatter.__init__( self, radius, color, startPos, range, speed )
-
-    def move(self):
-        if (self.pos[1] < self.cnt[1]) and (0 < self.pos[0] < self.cnt[0]):  # 尚在屏幕内，继续下落
-            self.pos[1] += self.speed[1]
-            self.pos[0] += self.speed[0]
-        else:
-            self.kill()
-            del self
-            return True
@@ -3,6 +3,9 @@ database.py:
 Manage game records, and define all statistics and values for game items,
 including monsters, tasks, runestones.
 """
+import os
+import time
+import threading
 from copy import deepcopy   # 深度复制字典
 import pickle
 
@@ -16,7 +19,14 @@ RANGE = {
 
 # ========================================
 # 1. 记录管理
+# 存档格式的版本号。每次给存档结构增删字段时加1，并在REC_MIGRATIONS末尾追加一个把上一版本升到这一版本的函数
+REC_VERSION = 4
+REC_PATH = './record.sav'
+SAVE_DELAY = 0.3    # 秒。写盘线程收到存档请求后再等这么久，期间的多次保存合并为一次写入
+EXIT_TIMEOUT = 5    # 秒。退出时最多等待写盘线程这么久
+
 example_rec_strucure = {
+        "VERSION": REC_VERSION,
         "NICK_NAME": "player0",
         "GAME_ID": 1,
 
@@ -66,65 +76,153 @@ example_rec_strucure = {
         }
     }
 
-def load_rec_data():
+def _mig_gem(rec):      # 1: new rec item: gem number
+    rec.setdefault( "GEM", 0 )
+
+def _mig_task(rec):     # 2: new rec item: task obj
+    rec.setdefault( "TASK", ["A-1", 0] )    # tag & prog
+
+def _mig_stone(rec):    # 3: new rec item: runestones
+    rec.setdefault( "STONE", {} )           # "stone_tag": number
+
+def _mig_chapter(rec):  # 4: rec update: 第一章总是解锁的
+    if rec["CHAPTER_REC"][0]<0:
+        rec["CHAPTER_REC"][0] = 0
+
+# REC_MIGRATIONS[i] 把第i版的存档升为第i+1版。没有"VERSION"的旧存档视为第0版
+REC_MIGRATIONS = [ _mig_gem, _mig_task, _mig_stone, _mig_chapter ]
+
+def migrate_rec(rec):
+    '''Bring a loaded record up to REC_VERSION in place. Keys missing from an older or damaged record are filled from the example.'''
+    for mig in REC_MIGRATIONS[ rec.get("VERSION", 0): ]:
+        mig(rec)
+    for key, val in example_rec_strucure.items():
+        if key not in rec:
+            rec[key] = deepcopy(val)
+        elif isinstance(val, dict):
+            for sub in val:
+                rec[key].setdefault( sub, deepcopy(val[sub]) )
+    rec["VERSION"] = REC_VERSION
+    return rec
+
+def read_rec(path=REC_PATH):
+    '''Read and migrate one record file. Raises OSError/pickle errors/ValueError if it is missing or unusable.'''
+    with open(path, 'rb') as f:
+        rec = pickle.load(f)
+    if not isinstance(rec, dict) or rec.get("VERSION", 0)>REC_VERSION:
+        raise ValueError(f"{path}: not a record of version <= {REC_VERSION}")
+    return migrate_rec(rec)
+
+def write_rec(rec, path=REC_PATH):
+    '''Atomic write: dump into a temp file next to the record, then replace it. The previous record is kept as .bak.'''
+    tmp = path+'.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(rec, f)
+        f.flush()
+        os.fsync(f.fileno())
+    if os.path.exists(path):
+        os.replace(path, path+'.bak')
+    os.replace(tmp, path)
+
+def load_rec_data(path=REC_PATH):
     # Record Data Structure
     try:
-        with open('./record.sav', 'rb') as f:
-            REC_DATA = pickle.load(f)
-            # new rec item: gem number
-            if "GEM" not in REC_DATA:
-                REC_DATA["GEM"] = 0
-            # new rec item: task obj
-            if "TASK" not in REC_DATA:
-                REC_DATA["TASK"] = ["A-1", 0]   # tag & prog
-            # new rec item: runestones
-            if "STONE" not in REC_DATA:
-                REC_DATA["STONE"] = {}      # "stone_tag": number
-            # rec update:
-            if REC_DATA["CHAPTER_REC"][0]<0:
-                REC_DATA["CHAPTER_REC"][0] = 0
-            #REC_DATA["SYS_SET"]["TUTOR"] = 1
+        return read_rec(path)
     except FileNotFoundError:
+        pass
+    except Exception as err:
+        # 存档损坏（例如写入中途崩溃）：留下损坏的文件以便查看，改用上一次的备份
+        print("Record damaged:", err)
+        os.replace(path, path+'.corrupt')
+    try:
+        rec = read_rec(path+'.bak')
+    except Exception:
         # create an empty one
-        with open('./record.sav', 'wb') as f:
-            pickle.dump(example_rec_strucure, f)
-        # read again
-        with open('./record.sav', 'rb') as f:
-            REC_DATA = pickle.load(f)
-    return REC_DATA
+        rec = deepcopy(example_rec_strucure)
+    write_rec(rec, path)
+    return rec
 
 def clear_rec_data():
     for key in REC_DATA:
-        if key!="SYS_SET":
+        if key not in ("SYS_SET", "VERSION"):
             REC_DATA[key] = deepcopy( example_rec_strucure[key] )
 
-def reload_rec_data():
-    with open(f'./record.sav', 'rb') as f:
-        new_REC_DATA = pickle.load(f)
-        for key in new_REC_DATA:
-            if key!="SYS_SET":
-                REC_DATA[key] = deepcopy( new_REC_DATA[key] )
-        # new rec item: gem number
-        if "GEM" not in REC_DATA:
-            REC_DATA["GEM"] = 0
-        #REC_DATA["GEM"] -= 640
-        # new rec item: task obj
-        if "TASK" not in REC_DATA:
-            REC_DATA["TASK"] = ["A-1", 0]   # tag & prog
-        # new rec item: runestones
-        if "STONE" not in REC_DATA:
-            REC_DATA["STONE"] = {}
-        # rec update:
-        if REC_DATA["CHAPTER_REC"][0]<0:
-            REC_DATA["CHAPTER_REC"][0] = 0
-        #REC_DATA["SYS_SET"]["TUTOR"] = 1
-        #REC_DATA["CHAPTER_REC"][1] = REC_DATA["CHAPTER_REC"][2] = -1
+def reload_rec_data(path=REC_PATH):
+    new_REC_DATA = load_rec_data(path)
+    for key in new_REC_DATA:
+        if key!="SYS_SET":
+            REC_DATA[key] = deepcopy( new_REC_DATA[key] )
     
 def data2sav():
     with open('./record.data', 'rb') as fd:
         REC_DATA = pickle.load(fd)
-    with open('./record.sav', 'wb') as fs:
-        pickle.dump(REC_DATA, fs)
+    write_rec( migrate_rec(REC_DATA) )
+
+
+class RecWriter():
+    '''Background writer of the record: save() only takes a snapshot and returns; a daemon thread writes the latest snapshot
+    with write_rec(). Snapshots arriving within SAVE_DELAY of each other are coalesced into one write.'''
+    def __init__(self, path=REC_PATH, delay=SAVE_DELAY):
+        self.path = path
+        self.delay = delay
+        self.pending = None     # 尚未写入的最新快照
+        self.busy = False       # 写盘线程正在写入
+        self.urgent = False     # flush()中：不再等待合并，立即写入
+        self.writes = 0
+        self.coalesced = 0
+        self.error = None
+        self.cond = threading.Condition()
+        self.thread = None
+
+    def save(self, rec):
+        snap = deepcopy(rec)    # 游戏线程之后对REC_DATA的修改不影响这一次的写入
+        with self.cond:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = snap
+            if not self.thread:
+                self.thread = threading.Thread( target=self._run, name="RecWriter", daemon=True )
+                self.thread.start()
+            self.cond.notify()
+
+    def flush(self, timeout=None):
+        '''Block until everything saved so far is on disk (used on exit). Returns False on timeout.'''
+        with self.cond:
+            self.urgent = True
+            self.cond.notify_all()
+            done = self.cond.wait_for( lambda: self.pending is None and not self.busy, timeout )
+            self.urgent = False
+            return done
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for( lambda: self.pending is not None )
+                # 等待合并：期间到来的新快照直接覆盖pending。flush()会提前结束等待
+                deadline = time.monotonic()+self.delay
+                while not self.urgent and time.monotonic()<deadline:
+                    self.cond.wait( deadline-time.monotonic() )
+                snap, self.pending = self.pending, None
+                self.busy = True
+            try:
+                write_rec(snap, self.path)
+                self.writes += 1
+            except Exception as err:
+                # 任何异常都不能让线程退出：否则busy停留在True，flush()将永远等待
+                self.error = err
+                print("Record not saved:", err)
+            with self.cond:
+                self.busy = False
+                self.cond.notify_all()
+
+REC_WRITER = RecWriter()
+
+def save_rec_data(block=False, timeout=None):
+    '''Save REC_DATA without blocking the game loop. block=True waits until it is on disk, or at most `timeout` seconds.'''
+    REC_WRITER.save(REC_DATA)
+    if block:
+        return REC_WRITER.flush(timeout)
+    return True
 
 # 模块加载时，自动导入数据
 
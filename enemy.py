@@ -12,7 +12,8 @@ from random import choice, random, randint
 
 from database import MB, NB, DMG_FREQ
 from util import InanimSprite, HPBar
-from util import getPos, rot_center, generateShadow, getCld
+from util import getPos, generateShadow, getCld, landingShift, loadImg, getMask, rotImg, ROT_STEPS, CAMERA
+from soundBank import loadSnd
 
 
 # -------------------------------------------------
@@ -42,9 +43,8 @@ def createImgList(*paths):
     imgDic = { "left":[], "right":[] }
     # 先建立left图片列表，再依次变换至right图片列表
     for path in paths:
-        imgDic["left"].append( load(path).convert_alpha() )
-    for img in imgDic["left"]:
-        imgDic["right"].append( flip(img, True, False) )
+        imgDic["left"].append( loadImg(path) )
+        imgDic["right"].append( loadImg(path, True) )
     return imgDic
 
 def getShadLib(imgLib):
@@ -57,6 +57,14 @@ def getShadLib(imgLib):
                 shadLib[name][dir].append( generateShadow(img) )
     return shadLib
 
+def getMaskLib(imgLib):
+    '''与getShadLib对应：为imgLib中的每张图预先生成碰撞mask，结构同样为 name -> direction -> [Mask]。
+    Monster.setImg()从中取出与图片对应的mask；mask经由getMask缓存，对同一张图的getMask(self.image)也只是查表。'''
+    maskLib = {}
+    for name in imgLib:
+        maskLib[name] = { dir: [ getMask(img) for img in imgLib[name][dir] ] for dir in imgLib[name] }
+    return maskLib
+
 
 # ========================================================================
 # Basic class for all monsters: 
@@ -133,9 +141,15 @@ class Monster(InanimSprite):
         if self.gravity<GRAVITY:
             self.gravity += 1
         self.rect.bottom += self.gravity
-        while ( pygame.sprite.spritecollide(self, self.wallList, False, collide_mask) ):  # 如果和参数中的物体相撞，则尝试纵坐标-1
-            self.rect.bottom -= 1
+        cldList = pygame.sprite.spritecollide(self, self.wallList, False, collide_mask)
+        if cldList:
             self.gravity = 0
+            # 砖块直接求出需要回退的高度；其余形状不规则的物体（如小屋）仍逐像素回退
+            walls = [ each for each in cldList if each.category in ("lineWall","baseWall","specialWall","sideWall") ]
+            self.rect.bottom -= landingShift(self, walls)
+            if len(walls) < len(cldList):
+                while ( pygame.sprite.spritecollide(self, self.wallList, False, collide_mask) ):  # 如果和参数中的物体相撞，则尝试纵坐标-1
+                    self.rect.bottom -= 1
         if self.rect.top >= keyLine:
             self.onlayer  = max(self.onlayer-2, -1)
             self.initLayer( groupList[str(self.onlayer)], groupList["0"], wallChosen=True )
@@ -227,17 +241,19 @@ class Monster(InanimSprite):
         if self.stun_time>0:
             self.stun_time -= 1
     
-    def setImg(self, name, indx=0):  # 根据状态名称切换图片。如果是列表，应给出indx值。
+    def setImg(self, name, indx=0):  # 根据状态名称切换图片（及阴影、mask）。如果是列表，应给出indx值。
         self.image = self.imgLib[name][self.direction][indx]
         self.shad = self.shadLib[name][self.direction][indx]
+        self.mask = self.maskLib[name][self.direction][indx]
     
-    def drawHealth(self, surface):
+    def drawHealth(self, surface, offset=(0,0)):
+        '''offset: 镜头的绘制偏移量（见util.Camera.offset）。'''
         if self.bar:
-            self.bar.paint(self, surface)
+            self.bar.paint(self, surface, offset=offset)
         # 画眩晕
         if self.stun_time > 0:
-            self.stun_rect.bottom = self.rect.top
-            self.stun_rect.left = self.rect.left +self.rect.width//2 -self.stun_rect.width//2
+            self.stun_rect.bottom = self.rect.top +offset[1]
+            self.stun_rect.left = self.rect.left +self.rect.width//2 -self.stun_rect.width//2 +offset[0]
             surface.blit(self.stun_img[self.stun_time//3%4], self.stun_rect)
         
     def assignGoalie(self, HPInc):
@@ -250,7 +266,7 @@ class Monster(InanimSprite):
         # decrease health
         true_dmg = round(damage*self.realDmgRate)
         self.health -= true_dmg
-        self.msgList.append( [getPos(self,0.5,0.5), str(true_dmg), 60] )
+        self.msgList.add( getPos(self,0.5,0.5), str(true_dmg) )
         if self.health <= 0:        # dead
             self.health = 0
             if self.debri:
@@ -267,7 +283,7 @@ class Monster(InanimSprite):
             return
         #self.spurtCanvas.addSpatters(8, (2,3,4), (20,22,24), (10,240,10), getPos(self,0.5,0.4) )
         self.health += heal
-        self.msgList.append( [getPos(self,0.5,0.5), "+"+str(heal), 60, "green"] )
+        self.msgList.add( getPos(self,0.5,0.5), "+"+str(heal), (0,255,0) )
         if (self.health > self.full):
             self.health = self.full
 
@@ -281,11 +297,12 @@ class Boss(Monster):
         self.bar = HPBar(self.full, blockVol=200, barH=12)
 
     def _tipPosition(self, canvas):
-        if (self.rect.top > canvas.rect.height):
-            txt = self.font.render( "▼ "+str(self.rect.top-canvas.rect.height), True, (255,255,255) )
+        rect = CAMERA.toScreen(self.rect)
+        if (rect.top > canvas.rect.height):
+            txt = self.font.render( "▼ "+str(rect.top-canvas.rect.height), True, (255,255,255) )
             canvas.txtList.append( [txt, "BOTTOM"] )
-        elif (self.rect.bottom < 0):
-            txt = self.font.render( "▲ "+str(-self.rect.bottom), True, (255,255,255) )
+        elif (rect.bottom < 0):
+            txt = self.font.render( "▲ "+str(-rect.bottom), True, (255,255,255) )
             canvas.txtList.append( [txt, "TOP"] )
 
     def initLayer(self, groupList):
@@ -331,7 +348,7 @@ class Ajunction(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.left = pos[0] - self.rect.width//2
         self.rect.bottom = pos[1] - self.rect.height//2
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
 
     def updatePos(self, pos):
         self.rect.left = pos[0] - self.rect.width//2
@@ -343,7 +360,7 @@ class Ajunction(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.left = trPos[0]-self.rect.width//2
         self.rect.bottom = trPos[1]
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
 
 
 # ========================================================================
@@ -352,6 +369,7 @@ class Ajunction(pygame.sprite.Sprite):
 class BiteChest(Monster): 
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, wallGroup, sideGroup, onlayer):
         if not self.imgLib:
@@ -361,6 +379,7 @@ class BiteChest(Monster):
                     "image/stg0/biteChest1.png")
             }
             BiteChest.shadLib = getShadLib(BiteChest.imgLib)
+            BiteChest.maskLib = getMaskLib(BiteChest.imgLib)
         # calculate its position
         Monster.__init__(self, "biteChest", (250,210,160), 4, 3, onlayer, sideGroup)
         wall = self.initLayer(wallGroup, sideGroup)
@@ -369,7 +388,6 @@ class BiteChest(Monster):
         # initialize the sprite
         self.imgIndx = 0
         self.setImg("iList",0)
-        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.bottom = wall.rect.top
@@ -391,7 +409,6 @@ class BiteChest(Monster):
                 trPos = [ self.rect.left + self.rect.width//2, self.rect.bottom-self.rise[self.imgIndx] ]  # 为保证图片位置正确，临时存储之前的位置信息
                 self.imgIndx += 1
                 self.setImg("iList",self.imgIndx)
-                self.mask = pygame.mask.from_surface(self.image)
                 self.rect = self.image.get_rect()
                 self.rect.left = trPos[0]-self.rect.width//2
                 self.rect.bottom = trPos[1] + self.rise[self.imgIndx]
@@ -416,10 +433,6 @@ class BiteChest(Monster):
     def reset(self):
         self.coolDown = 0
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-
 
 # ========================================================================
 # --------------------------------- CP 1 ---------------------------------
@@ -427,10 +440,10 @@ class BiteChest(Monster):
 class InfernoFire(InanimSprite):
     def __init__(self, bg_size):
         InanimSprite.__init__(self, "infernoFire")
-        self.ori_imgList = [load("image/stg1/infernoFire0.png").convert_alpha(), 
-            load("image/stg1/infernoFire1.png").convert_alpha(), 
-            load("image/stg1/infernoFire2.png").convert_alpha()]
-        self.snd = pygame.mixer.Sound("audio/infernoFire.wav")
+        self.ori_imgList = [loadImg("image/stg1/infernoFire0.png"), 
+            loadImg("image/stg1/infernoFire1.png"), 
+            loadImg("image/stg1/infernoFire2.png")]
+        self.snd = loadSnd("audio/infernoFire.wav", "ambience")
         self.width = bg_size[0]
         self.height = bg_size[1]
         self.damage = NB["infernoFire"]["damage"]
@@ -438,7 +451,7 @@ class InfernoFire(InanimSprite):
         self._reset()
 
     def update(self, delay, sprites, canvas):
-        if self.rect.top<self.height:
+        if self.rect.top+CAMERA.scroll[1]<self.height:     # 尚未落出屏幕
             self.rect.left += self.speed[0]
             self.rect.top += self.speed[1]
             color = choice( [(60,10,0,210), (120,40,0,210)] )
@@ -458,27 +471,30 @@ class InfernoFire(InanimSprite):
         if not (delay % 5):              # 切换图片
             self.imgIndx = ( self.imgIndx+1 ) % len(self.imgList)
             self.image = self.imgList[self.imgIndx]
-            self.mask = pygame.mask.from_surface(self.image)
+            self.mask = getMask(self.image)
     
     def _reset(self):
         self.snd.play(0)
         self.speed = [choice([-5, 5]), 3]
         rot = -115 if self.speed[0]<0 else 115
-        self.imgList = [pygame.transform.rotate(each, -rot) for each in self.ori_imgList]
+        self.imgList = [rotImg(each, -rot, self.rotSteps, subsurf=False) for each in self.ori_imgList]
         self.image = self.imgList[0]
         self.imgIndx = 0
         self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
+        # 从屏幕的一侧出现
         if self.speed[0]<0:
             self.rect.left = self.width
         else:
             self.rect.right = 0
         self.rect.bottom = randint(-60, self.height//2)
+        self.rect = CAMERA.toWorld(self.rect)
 
 # -----------------------------------
 class Tizilla(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
         if not self.imgLib:
@@ -491,13 +507,14 @@ class Tizilla(Monster):
                     "image/stg1/tizillaAtt4.png")
             }
             Tizilla.shadLib = getShadLib(Tizilla.imgLib)
+            Tizilla.maskLib = getMaskLib(Tizilla.imgLib)
         
         # calculate its position
         Monster.__init__(self, "tizilla", (255,0,0,240), 6, 1, onlayer, sideGroup)
         wall = self.initLayer(wallGroup, sideGroup)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.bottom = wall.rect.top
@@ -541,7 +558,6 @@ class Tizilla(Monster):
                 cldList( self, sprites )
         trPos = [ self.rect.left + self.rect.width//2, self.rect.bottom ]
         self.setImg("attList",self.attIndx)
-        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = trPos[0]-self.rect.width//2
         self.rect.bottom = trPos[1]
@@ -552,14 +568,11 @@ class Tizilla(Monster):
         self.setImg("iList",0)
         self.coolDown = 0
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-
 # -----------------------------------
 class MegaTizilla(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
     fireSnd = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
@@ -571,14 +584,15 @@ class MegaTizilla(Monster):
                 "alarm": createImgList("image/stg1/megaTizillaAlarm.png")
             }
             MegaTizilla.shadLib = getShadLib(MegaTizilla.imgLib)
-            MegaTizilla.fireSnd = pygame.mixer.Sound("audio/megaTizFire.wav")
+            MegaTizilla.maskLib = getMaskLib(MegaTizilla.imgLib)
+            MegaTizilla.fireSnd = loadSnd("audio/megaTizFire.wav")
         
         # calculate its position
         Monster.__init__(self, "megaTizilla", (255,0,0,240), 6, 3, onlayer, sideGroup)
         wall = self.initLayer(wallGroup, sideGroup)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.bottom = wall.rect.top
@@ -644,15 +658,12 @@ class MegaTizilla(Monster):
         self.attIndx = 0
         self.setImg("iList",0)
         self.airCnt = 0           # indicate if spitting!
-
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
     
 # -----------------------------------
 class Dragon(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
     fireSnd = None
 
     def __init__(self, wallHeight, onlayer, boundaries):
@@ -663,14 +674,15 @@ class Dragon(Monster):
                     "image/stg1/dragonLeft2.png","image/stg1/dragonLeft1.png")
             }
             Dragon.shadLib = getShadLib(Dragon.imgLib)
-            Dragon.fireSnd = pygame.mixer.Sound("audio/dragonFire.wav")
+            Dragon.maskLib = getMaskLib(Dragon.imgLib)
+            Dragon.fireSnd = loadSnd("audio/dragonFire.wav")
         
         # calculate its position
         Monster.__init__(self, "dragon", (255,0,0,240), 0, 1, onlayer)
         self.boundaries = boundaries
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = randint(boundaries[0], boundaries[1]-self.rect.width)
         self.rect.top = wallHeight - 190
@@ -703,20 +715,16 @@ class Dragon(Monster):
         self.setImg("iList",0)
         self.coolDown = randint(240,480)
         self.upDown = 2
-
-    def level(self, dist):
-        self.rect.left += dist
-        self.boundaries = (self.boundaries[0]+dist, self.boundaries[1]+dist)
     
 class Fire(InanimSprite):
     def __init__(self, pos, layer, speed, iniG):
         InanimSprite.__init__(self, "fire")
-        self.ori_image = load("image/stg1/fire.png").convert_alpha()
-        self.image = self.ori_image.copy()
+        self.ori_image = loadImg("image/stg1/fire.png")
+        self.image = self.ori_image
         self.rect = self.image.get_rect()
         self.rect.left = pos[0]
         self.rect.bottom = pos[1]
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.damage = MB["dragon"].damage
         self.dmgType = MB["dragon"].dmgType
         self.onlayer = int(layer)
@@ -735,7 +743,8 @@ class Fire(InanimSprite):
         if cldList( self, sprites ):      # 命中英雄
             self._explode(canvas)
             return None
-        if ( pygame.sprite.spritecollide(self, downWalls, False, collide_mask) ) or ( pygame.sprite.spritecollide(self, sideWalls, False, collide_mask) ) or self.rect.top>=bg_size[1] or self.rect.right<=0 or self.rect.left>=bg_size[0]:
+        rect = CAMERA.toScreen(self.rect)
+        if ( pygame.sprite.spritecollide(self, downWalls, False, collide_mask) ) or ( pygame.sprite.spritecollide(self, sideWalls, False, collide_mask) ) or rect.top>=bg_size[1] or rect.right<=0 or rect.left>=bg_size[0]:
             self._explode(canvas)
             return None
         if not (delay % 6):
@@ -743,7 +752,7 @@ class Fire(InanimSprite):
                 self.angle = (self.angle+40) % 360
             else:
                 self.angle = (self.angle-40) % 360
-            self.image = rot_center(self.ori_image, self.angle)
+            self.image = rotImg(self.ori_image, self.angle, self.rotSteps)
             if (self.gravity < 5):
                 self.gravity += 1
         if ( self.rect.top >= keyLine ):  # 因为只有大于检查，因此只有初始行之下的砖块会与之碰撞
@@ -760,6 +769,7 @@ class Fire(InanimSprite):
 class DragonEgg(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
     fireSnd = None
     crushSnd = None
 
@@ -770,8 +780,9 @@ class DragonEgg(Monster):
                 "baby": createImgList("image/stg1/eggBaby.png", "image/stg1/eggBabyAtt.png")
             }
             DragonEgg.shadLib = getShadLib(DragonEgg.imgLib)
-            DragonEgg.fireSnd = pygame.mixer.Sound("audio/dragonFire.wav")
-            DragonEgg.crushSnd = pygame.mixer.Sound("audio/wizard/hit.wav")
+            DragonEgg.maskLib = getMaskLib(DragonEgg.imgLib)
+            DragonEgg.fireSnd = loadSnd("audio/dragonFire.wav")
+            DragonEgg.crushSnd = loadSnd("audio/wizard/hit.wav")
         
         # calculate its position
         Monster.__init__(self, "dragonEgg", (250,0,80,240), 0, 4, onlayer, sideGroup)
@@ -784,7 +795,6 @@ class DragonEgg(Monster):
         self.imgIndx = 0
         self.setImg("iList",0)
         self.attCnt = 0
-        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.bottom = wall.rect.top
@@ -839,7 +849,7 @@ class DragonEgg(Monster):
             return False
         true_dmg = round(damage*self.realDmgRate)
         self.health -= true_dmg
-        self.msgList.append( [getPos(self,0.5,0.5), str(true_dmg), 60] )
+        self.msgList.add( getPos(self,0.5,0.5), str(true_dmg) )
         if self.health <= 0:        # broken
             self.health = 0
             self.crushSnd.play(0)
@@ -863,6 +873,7 @@ class DragonEgg(Monster):
 class HellHound(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
         if not self.imgLib:
@@ -872,8 +883,9 @@ class HellHound(Monster):
                 "knock": createImgList("image/stg1/hellHound_Land.png")
             }
             HellHound.shadLib = getShadLib(HellHound.imgLib)
-            HellHound.mockSnd = pygame.mixer.Sound("audio/wolf.wav")
-            HellHound.knockSnd = pygame.mixer.Sound("audio/chichengKnock.wav")
+            HellHound.maskLib = getMaskLib(HellHound.imgLib)
+            HellHound.mockSnd = loadSnd("audio/wolf.wav")
+            HellHound.knockSnd = loadSnd("audio/chichengKnock.wav")
         
         # calculate its position
         Monster.__init__(self, "hellHound", (255,0,0,240), 6, 3, onlayer, sideGroup, bar=True)
@@ -881,7 +893,7 @@ class HellHound(Monster):
         wall = self.initLayer(wallGroup, sideGroup)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.bottom = wall.rect.top
@@ -922,7 +934,7 @@ class HellHound(Monster):
                 if not (self.cnt % 10):
                     self.imgIndx = (self.imgIndx+1) % len(self.imgLib["iList"]["left"])
                     self.setImg("iList",self.imgIndx)
-            self.mask = pygame.mask.from_surface(self.image)
+            self.mask = getMask(self.image)
         # flickering yellow
         canvas.addSmoke( 1, (1,2,4), 5, (210,140,20,210), getPos(self,0.5,random()), 60 )
         # count down for rage actions.
@@ -1015,9 +1027,9 @@ class CrimsonDragon(Boss):
             "body": createImgList("image/stg1/DragonBody.png")
         }
         self.shadLib = getShadLib(self.imgLib)
+        self.maskLib = getMaskLib(self.imgLib)
         # ----- body part (the core of the CrimsonDragon) ------
         self.setImg("body")
-        self.mask = pygame.mask.from_surface(self.image)
         # calculate its position
         self.rect = self.image.get_rect()
         self.rect.left = x
@@ -1046,8 +1058,8 @@ class CrimsonDragon(Boss):
         # ----------- other attributes -------------------------
         self.reset()
         self.nxt = getPos(self, 0.5, 0.5)
-        self.growlSnd = pygame.mixer.Sound("audio/redDragonGrowl.wav")
-        self.moanSnd = pygame.mixer.Sound("audio/redDragonMoan.wav")
+        self.growlSnd = loadSnd("audio/redDragonGrowl.wav")
+        self.moanSnd = loadSnd("audio/redDragonMoan.wav")
         self.upDown = 3      # 悬停状态身体上下振幅
         self.cnt = 1500      # count for the loop of shift position & rage. should not be stunned!
 
@@ -1072,7 +1084,7 @@ class CrimsonDragon(Boss):
                 self.head.updateImg( self.headRight[self.headIndx] )
                 self.wing.updateImg( self.wingRight[self.wingIndx] )
                 self.tail.updateImg( self.tailRight[self.tailIndx] )
-            self.mask = pygame.mask.from_surface(self.image)
+            self.mask = getMask(self.image)
             self.head.updatePos( getPos(self, self.headR[self.direction][self.headIndx][0], self.headR[self.direction][self.headIndx][1]) )
             self.wing.updatePos( getPos(self, self.wingR[self.direction][self.wingIndx][0], self.wingR[self.direction][self.wingIndx][1]) )
             self.tail.updatePos( getPos(self, self.tailR[self.direction][self.tailIndx][0], self.tailR[self.direction][self.tailIndx][1]) )
@@ -1084,10 +1096,10 @@ class CrimsonDragon(Boss):
                 self.cnt = 1700
             elif self.cnt>=240:
                 if not self.cnt%60:
-                    self.nxt = ( randint(100,640), randint(80,520) )   # randomize a new position
+                    self.nxt = CAMERA.toWorld( (randint(100,640), randint(80,520)) )   # randomize a new position on the screen
                     self.direction = "left" if ( self.nxt[0] < getPos(self, 0.5, 0.5)[0] ) else "right"
             else:
-                self.nxt = ( 520, 80 )
+                self.nxt = CAMERA.toWorld( (520, 80) )
                 self.direction = "left"
                 if not self.cnt%8:
                     return self.makeFire( sprites )
@@ -1182,14 +1194,14 @@ class CrimsonDragon(Boss):
 class RedDragonFire(InanimSprite):
     def __init__(self, pos, spd, layer, degree):   # 参数pos为本对象初始的位置
         InanimSprite.__init__(self, "fire")
-        self.imageList = [ pygame.transform.rotate( load("image/stg1/fire.png").convert_alpha(), -degree ), 
-            pygame.transform.rotate( load("image/stg1/fire.png").convert_alpha(), degree ) ]
+        self.imageList = [ rotImg( loadImg("image/stg1/fire.png"), -degree, self.rotSteps, subsurf=False ), 
+            rotImg( loadImg("image/stg1/fire.png"), degree, self.rotSteps, subsurf=False ) ]
         self.imgIndx = 0
         self.image = self.imageList[0]
         self.rect = self.image.get_rect()
         self.rect.left = pos[0]-self.rect.width//2
         self.rect.top = pos[1]-self.rect.height//2
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.speed = spd
         if spd[0]>0:
             self.push = 9
@@ -1197,7 +1209,7 @@ class RedDragonFire(InanimSprite):
             self.push = -9
         self.damage = MB["CrimsonDragon"].damage
         self.dmgType = MB["CrimsonDragon"].dmgType
-        self.blastSnd = pygame.mixer.Sound("audio/wizard/hit.wav")
+        self.blastSnd = loadSnd("audio/wizard/hit.wav")
         self.onlayer = layer
 
     def update(self, delay, sideWalls, downWalls, keyLine, sprites, canvas, bg_size):
@@ -1209,7 +1221,7 @@ class RedDragonFire(InanimSprite):
         if not delay%4:
             self.imgIndx = (self.imgIndx+1) % len(self.imageList)
             self.image = self.imageList[self.imgIndx]
-            self.mask = pygame.mask.from_surface(self.image)
+            self.mask = getMask(self.image)
             canvas.addTrails( [4,5,6], [10,12,14], (120,90,30,190), getPos(self,0.5,0.5) )
         if cldList(self, sprites):
             self._explode(canvas)
@@ -1240,7 +1252,7 @@ class Column(InanimSprite):
             load("image/stg2/alarm4.png").convert_alpha(), load("image/stg2/alarm5.png").convert_alpha() ]
         self.alarmRect = None
         self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.width = bg_size[0]
         self.height = bg_size[1]
         self.damage = NB["column"]["damage"]
@@ -1253,7 +1265,7 @@ class Column(InanimSprite):
         self.delay = self.t-30 # index that controll the fall and wait (there would be 0.5 sec before the first fall)
         self.dustCnt = -1
         self.status = None
-        self.hitSnd = pygame.mixer.Sound("audio/crush.wav")
+        self.hitSnd = loadSnd("audio/crush.wav")
 
     def update(self, sprites, frnLayer, groupList, spurtCanvas):
         self.delay = ( self.delay + 1 ) % self.t
@@ -1285,7 +1297,7 @@ class Column(InanimSprite):
             if ( frnLayer >= 30 and self.t >= 260 ) or ( frnLayer >= 60 and self.t >= 240 ) or ( frnLayer >= 90 and self.t >= 220 ):
                 self.t -= 20
             self.rect.left = self.aim[0] - self.rect.width//2
-            self.rect.bottom = 0
+            self.rect.bottom = -CAMERA.scroll[1]   # 从屏幕顶端落下
             self.status = "falling"
             return
         # 下落中（34时刻以后首先进入falling状态）
@@ -1322,22 +1334,16 @@ class Column(InanimSprite):
             surface.blit( self.image, self.rect )
         # 特殊阶段额外paint
         if self.status == "alarm":
-            pygame.draw.line( surface, (0,160,210), (self.aim[0],0), (self.aim[0],self.aim[1]), randint(1,4))
+            x, y = surface.pos(self.aim)
+            pygame.draw.line( surface.surface, (0,160,210), (x,0), (x,y), randint(1,4))
         elif self.status == "ash" and self.alarmRect:
             surface.blit( self.alarmList[ (self.dustCnt)//8 ], self.alarmRect )
 
-    def lift(self, dist, limit=False):
-        self.rect.bottom += dist
-        self.aim[1] += dist
-
-    def level(self, dist):
-        self.rect.left += dist
-        self.aim[0] += dist
-
 # -----------------------------------
 class Bat(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, wallGroup, onlayer):
         if not self.imgLib:
@@ -1346,6 +1352,7 @@ class Bat(Monster):
                 "flyList": createImgList("image/stg2/bat0.png","image/stg2/bat1.png")
             }
             Bat.shadLib = getShadLib(Bat.imgLib)
+            Bat.maskLib = getMaskLib(Bat.imgLib)
         
         # calculate its position
         Monster.__init__(self, "bat", (80,10,80,240), 3, 1, onlayer)
@@ -1364,7 +1371,6 @@ class Bat(Monster):
         # initialize the sprite ---------------
         self.imgIndx = 0
         self.setImg("hang")
-        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left + (wall.rect.width-self.rect.width) // 2
         self.rect.top = self.foot
@@ -1443,7 +1449,7 @@ class Bat(Monster):
                     self.rect = self.image.get_rect()
                     self.rect.left = trPos[0]-self.rect.width//2
                     self.rect.bottom = trPos[1]
-                    self.mask = pygame.mask.from_surface(self.image)    # 更新mask，使得与hero重合的判断更加精确
+                    self.mask = getMask(self.image)    # 更新mask，使得与hero重合的判断更加精确
                     self.imgIndx = (self.imgIndx+1) % len(self.imgLib["flyList"])
             # deal damage.
             if self.stun_time==0:
@@ -1456,14 +1462,11 @@ class Bat(Monster):
                         cldList( self, sprites )
                     self.coolDown -= 1
 
-    def lift(self, dist):
-        self.rect.bottom += dist
-        self.foot += dist
-
 # -----------------------------------
 class Golem(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
         if not self.imgLib:
@@ -1473,13 +1476,14 @@ class Golem(Monster):
                 "crushList": createImgList("image/stg2/crush0.png", "image/stg2/crush1.png", "image/stg2/crush2.png")
             }
             Golem.shadLib = getShadLib(Golem.imgLib)
+            Golem.maskLib = getMaskLib(Golem.imgLib)
         
         # calculate its position
         Monster.__init__(self, "golem", (240,240,255,240), 8, 4, onlayer, sideGroup)
         wall = self.initLayer(wallGroup, sideGroup)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.bottom = wall.rect.top
@@ -1551,20 +1555,17 @@ class Golem(Monster):
         if self.health>0:
             true_dmg = round(damage*self.realDmgRate)
             self.health -= true_dmg
-            self.msgList.append( [getPos(self,0.5,0.5), str(true_dmg), 60] )
+            self.msgList.add( getPos(self,0.5,0.5), str(true_dmg) )
             if self.health <= 0:
                 self.health = 0
                 return True
         else:
             return False    # 处于分裂小哥伦的状态，此时不应计算伤害
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-
 class Golemite(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, rect, scope, direct, onlayer, sideGroup):
         if not self.imgLib:
@@ -1572,6 +1573,7 @@ class Golemite(Monster):
                 "iList": createImgList("image/stg2/golemiteLeft0.png","image/stg2/golemiteLeft1.png","image/stg2/golemiteLeft0.png","image/stg2/golemiteLeft2.png")
             }
             Golemite.shadLib = getShadLib(Golemite.imgLib)
+            Golemite.maskLib = getMaskLib(Golemite.imgLib)
         
         Monster.__init__(self, "golemite", (240,240,255,240), 4, 2, onlayer, sideGroup, debri=("pebble",2))
         self.category = "golem"
@@ -1581,7 +1583,7 @@ class Golemite(Monster):
             self.alterSpeed(-1)
         else:
             self.alterSpeed(1)
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = rect.left+ rect.width//2 - self.rect.width//2
         self.rect.bottom = rect.bottom
@@ -1614,14 +1616,11 @@ class Golemite(Monster):
         self.setImg("iList",0)
         self.coolDown = 0
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-
 # -----------------------------------
 class Bowler(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, wallGroup, sideGroup, onlayer):
         if not self.imgLib:
@@ -1630,6 +1629,7 @@ class Bowler(Monster):
                 "throw": createImgList("image/stg2/bowlerThrow.png")
             }
             Bowler.shadLib = getShadLib(Bowler.imgLib)
+            Bowler.maskLib = getMaskLib(Bowler.imgLib)
         
         # calculate its position
         Monster.__init__(self, "bowler", (10,60,80,240), 0, 4, onlayer, sideGroup)
@@ -1640,7 +1640,7 @@ class Bowler(Monster):
         wall = choice(self.wallList)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.bottom = wall.rect.top
@@ -1680,17 +1680,17 @@ class Stone(InanimSprite):
 
     def __init__(self, pos, onlayer, direction):
         if not Stone.crushSnd:
-            Stone.crushSnd = pygame.mixer.Sound("audio/wizard/hit.wav")
+            Stone.crushSnd = loadSnd("audio/wizard/hit.wav")
         InanimSprite.__init__(self, "stone")
         self.coin = 0
         self.bldColor = (160,160,180,240)
         self.weight = 1
 
-        self.image = load("image/stg2/stone.png").convert_alpha()
+        self.image = loadImg("image/stg2/stone.png")
         self.oriImage = self.image
         self.deg = 0
         self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.damage = MB["stone"].damage
         self.rect.left = pos[0]
         self.rect.bottom = pos[1]
@@ -1711,7 +1711,7 @@ class Stone(InanimSprite):
             return
         if not (delay % 4):
             self.deg = (self.deg+20) % 360
-            self.image = rot_center(self.oriImage, self.deg) if self.speed <= 0 else rot_center(self.oriImage, -self.deg)
+            self.image = rotImg(self.oriImage, self.deg, self.rotSteps) if self.speed <= 0 else rotImg(self.oriImage, -self.deg, self.rotSteps)
         # 水平撞击
         if not delay%DMG_FREQ:
             for each in sprites:
@@ -1758,13 +1758,14 @@ class Stone(InanimSprite):
             self.hitBack = min( pushed+self.weight, 0 )
         self.health -= damage
     
-    def drawHealth(self, surface):
+    def drawHealth(self, surface, offset=(0,0)):
         pass
 
 # -----------------------------------
 class Spider(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, y, onlayer, boundaries_x, boundaries_y):
         if not self.imgLib:
@@ -1772,6 +1773,7 @@ class Spider(Monster):
                 "body": createImgList("image/stg2/miniSpider0.png", "image/stg2/miniSpider1.png")
             }
             Spider.shadLib = getShadLib(Spider.imgLib)
+            Spider.maskLib = getMaskLib(Spider.imgLib)
         
         # calculate its position
         Monster.__init__(self, "spider", (180,10,80,240), 3, 1, onlayer, shadOffset=4)
@@ -1780,7 +1782,6 @@ class Spider(Monster):
         self.scope_y = boundaries_y
         self.reset()
         self.setImg("body",0)
-        self.mask = pygame.mask.from_surface(self.image)
         # calculate its position
         self.rect = self.image.get_rect()
         self.rect.left = randint(self.scope_x[0], self.scope_x[1]-self.rect.width)
@@ -1788,7 +1789,7 @@ class Spider(Monster):
         self.speed = [-3,3]     # initial: left, down
         # ----------- other attributes -------------------------
         self.doom = 0
-        self.webSnd = pygame.mixer.Sound("audio/spitWeb.wav")
+        self.webSnd = loadSnd("audio/spitWeb.wav")
         self.upDown = 1
         self.haltCnt = randint(20,60)
 
@@ -1825,12 +1826,12 @@ class Spider(Monster):
                     self.setImg("body", indx=self.imgIndx)
                     tmpPos = getPos(self, 0.5, 0.5)
                     degree = math.degrees( math.atan2(self.speed[0], self.speed[1]) )
-                    self.image = pygame.transform.rotate( self.image, degree )
+                    self.image = rotImg( self.image, degree, self.rotSteps, subsurf=False )
                     self.rect = self.image.get_rect()
                     self.rect.left = tmpPos[0]-self.rect.width//2
                     self.rect.top = tmpPos[1]-self.rect.height//2
-                    self.shad = pygame.transform.rotate( self.shad, degree )
-                    self.mask = pygame.mask.from_surface(self.image)
+                    self.shad = rotImg( self.shad, degree, self.rotSteps, subsurf=False )
+                    self.mask = getMask(self.image)
             if self.speed[0]>0:
                 self.direction = "right"
             elif self.speed[0]<0:
@@ -1850,14 +1851,6 @@ class Spider(Monster):
     def reset(self):
         self.imgIndx = 0
         self.coolDown = 0    # count for attack coolDown
-
-    def lift(self, dist):
-        self.rect.bottom += dist
-        self.scope_y = (self.scope_y[0]+dist, self.scope_y[1]+dist)
-
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope_x = (self.scope_x[0]+dist, self.scope_x[1]+dist)
     
 # Boss ------------------------------
 class GiantSpider(Boss):
@@ -1873,9 +1866,9 @@ class GiantSpider(Boss):
             "bite": createImgList("image/stg2/spiderBite.png")
         }
         self.shadLib = getShadLib(self.imgLib)
+        self.maskLib = getMaskLib(self.imgLib)
         self.imgIndx = 0
         self.setImg("body")
-        self.mask = pygame.mask.from_surface(self.image)
         # calculate its position
         self.rect = self.image.get_rect()
         self.rect.left = randint(self.scope_x[0], self.scope_x[1]-self.rect.width)
@@ -1896,8 +1889,8 @@ class GiantSpider(Boss):
         # ----------- other attributes -------------------------
         self.doom = False
         self.reset()
-        self.webSnd = pygame.mixer.Sound("audio/spitWeb.wav")
-        self.moanSnd = pygame.mixer.Sound("audio/redDragonMoan.wav")
+        self.webSnd = loadSnd("audio/spitWeb.wav")
+        self.moanSnd = loadSnd("audio/redDragonMoan.wav")
         self.upDown = 1
         self.parti = None
         self.haltCnt = 0
@@ -1970,18 +1963,18 @@ class GiantSpider(Boss):
                             self.setImg("body")
                         tmpPos = getPos(self, 0.5, 0.5)
                         degree = math.degrees( math.atan2(self.speed[0], self.speed[1]) )
-                        self.image = pygame.transform.rotate( self.image, degree )
+                        self.image = rotImg( self.image, degree, self.rotSteps, subsurf=False )
                         self.rect = self.image.get_rect()
                         self.rect.left = tmpPos[0]-self.rect.width//2
                         self.rect.top = tmpPos[1]-self.rect.height//2
-                        self.shad = pygame.transform.rotate( self.shad, degree )
-                        self.mask = pygame.mask.from_surface(self.image)
+                        self.shad = rotImg( self.shad, degree, self.rotSteps, subsurf=False )
+                        self.mask = getMask(self.image)
                         # deal legs:
                         self.legIndx = (self.legIndx+1) % len(self.legLeft)
                         if self.direction == "left":
-                            self.leg.updateImg( pygame.transform.rotate( self.legLeft[self.legIndx], degree) )
+                            self.leg.updateImg( rotImg( self.legLeft[self.legIndx], degree, self.rotSteps, subsurf=False ) )
                         elif self.direction == "right":
-                            self.leg.updateImg( pygame.transform.rotate( self.legRight[self.legIndx], degree ) )
+                            self.leg.updateImg( rotImg( self.legRight[self.legIndx], degree, self.rotSteps, subsurf=False ) )
             # Set relative position.
             if self.speed[1]>0:
                 theR = self.legR[self.direction]["down"][self.legIndx]
@@ -2019,7 +2012,7 @@ class GiantSpider(Boss):
         # decrease health
         true_dmg = round(damage*self.realDmgRate)
         self.health -= true_dmg
-        self.msgList.append( [getPos(self,0.5,0.5), str(true_dmg), 60] )
+        self.msgList.add( getPos(self,0.5,0.5), str(true_dmg) )
         if self.health <= 0:                # dead。
             self.doom = True
             self.health = 0
@@ -2039,14 +2032,6 @@ class GiantSpider(Boss):
         # 画打击阴影
         if self.hitBack:
             screen.blit( self.shad, self.rect )
-    
-    def lift(self, dist):                   # 所有monster都应可以响应model主函数的调用而竖直方向上移动。
-        self.rect.top += dist
-        self.scope_y = (self.scope_y[0]+dist, self.scope_y[1]+dist)
-    
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope_x = (self.scope_x[0]+dist, self.scope_x[1]+dist)
 
 
 # ========================================================================
@@ -2063,6 +2048,7 @@ class MistGenerator():
         # 用两个列表分别存储团状黑雾的中心点坐标、半径和移动速度；光亮物中点坐标和范围。
         self.darks = []
         self.lumis = []      # [ (centerPos, InnerRange), (...) ]
+        self.screenRect = pygame.Rect( (0,0), bg_size )
     
     def renew(self, delay, sprites):        
         # 定时检查数量，错开添加以造成错开的效果
@@ -2081,11 +2067,11 @@ class MistGenerator():
                     each[1] = rect
                 else:
                     rect.top -= 2
-        # 更新光亮物范围。
+        # 更新光亮物范围。雾团在屏幕坐标中，光亮物的中心需要换算
         self.lumis.clear()
         for each in sprites:
             if hasattr(each, "lumi") and each.lumi>20:
-                ctr = getPos(each, 0.5, 0.5)
+                ctr = CAMERA.toScreen( getPos(each, 0.5, 0.5) )
                 # 营造视野圆圈摇曳效果
                 if delay%2:
                     gap = 2
@@ -2115,19 +2101,28 @@ class MistGenerator():
     
     def paint(self, canvas):
         for each in self.darks:
-            surf_copy = each[0].copy()   # 复制。对于有lumi覆盖的要加上lumi
-            for lumi in self.lumis:
+            rect = each[1]
+            if not rect.colliderect(self.screenRect):
+                continue
+            # 只有光圈与雾团相交时才需要复制后挖出光圈，否则直接贴原图
+            lumis = [ lumi for lumi in self.lumis if rect.colliderect( (lumi[0][0]-lumi[1], lumi[0][1]-lumi[1], lumi[1]*2+1, lumi[1]*2+1) ) ]
+            if not lumis:
+                canvas.blit(each[0], rect)
+                continue
+            surf_copy = each[0].copy()
+            for lumi in lumis:
                 # 计算光亮点的相对坐标
-                lumi_x = lumi[0][0]-each[1].left
-                lumi_y = lumi[0][1]-each[1].top
+                lumi_x = lumi[0][0]-rect.left
+                lumi_y = lumi[0][1]-rect.top
                 pygame.draw.circle( surf_copy, (0,0,0,60), (lumi_x,lumi_y), lumi[1], 0 )
                 pygame.draw.circle( surf_copy, (0,0,0,0), (lumi_x,lumi_y), lumi[1]-10, 0 )
-            canvas.blit(surf_copy, each[1])
+            canvas.blit(surf_copy, rect)
         
 # -----------------------------------
 class Skeleton(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
         if not self.imgLib:
@@ -2139,6 +2134,7 @@ class Skeleton(Monster):
                 "att": createImgList("image/stg3/attLeft.png")
             }
             Skeleton.shadLib = getShadLib(Skeleton.imgLib)
+            Skeleton.maskLib = getMaskLib(Skeleton.imgLib)
         
         # calculate its position
         Monster.__init__(self, "skeleton", (255,255,255,240), 3, 1, onlayer, sideGroup, debri=("boneDebri",4))
@@ -2170,7 +2166,6 @@ class Skeleton(Monster):
         self.imgIndx = 0
         self.setImg("popList",0)
         self.coolDown = 0
-        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.bottom = wall.rect.top
@@ -2195,7 +2190,6 @@ class Skeleton(Monster):
                         # update image
                         tmpPos = getPos(self, 0.5, 1)
                         self.setImg("iList",self.imgIndx)
-                        self.mask = pygame.mask.from_surface(self.image)
                         self.rect = self.image.get_rect()
                         self.rect.bottom = tmpPos[1]
                         self.rect.left = tmpPos[0]- self.rect.width//2
@@ -2226,15 +2220,6 @@ class Skeleton(Monster):
         self.imgIndx = 0
         self.setImg("iList",0)
         self.coolDown = 0
-    
-    def lift(self, dist):
-        self.rect.bottom += dist
-        self.birth[1] += dist
-
-    def level(self, dist):
-        self.rect.left += dist
-        self.birth[0] += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
 
 # -----------------------------------
 class Dead(Monster):
@@ -2242,6 +2227,8 @@ class Dead(Monster):
     imgLibFemale = None
     shadLibMale = None
     shadLibFemale = None
+    maskLibMale = None
+    maskLibFemale = None
     snd = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
@@ -2258,7 +2245,9 @@ class Dead(Monster):
             }
             Dead.shadLibMale = getShadLib(Dead.imgLibMale)
             Dead.shadLibFemale = getShadLib(Dead.imgLibFemale)
-            Dead.snd = pygame.mixer.Sound("audio/vomiSplash.wav")
+            Dead.maskLibMale = getMaskLib(Dead.imgLibMale)
+            Dead.maskLibFemale = getMaskLib(Dead.imgLibFemale)
+            Dead.snd = loadSnd("audio/vomiSplash.wav")
         
         # calculate its position
         Monster.__init__(self, "dead", (10,10,10,240), 0, 2, onlayer, sideGroup)
@@ -2268,11 +2257,13 @@ class Dead(Monster):
         if random()<0.5:
             self.imgLib = self.imgLibMale
             self.shadLib = self.shadLibMale
+            self.maskLib = self.maskLibMale
         else:
             self.imgLib = self.imgLibFemale
             self.shadLib = self.shadLibFemale
+            self.maskLib = self.maskLibFemale
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left + (wall.rect.width-self.rect.width) // 2
         self.rect.bottom = wall.rect.top
@@ -2292,7 +2283,7 @@ class Dead(Monster):
                     self.alterSpeed(-self.speed)
                 if not (delay % 12):
                     self.setImg("iList",self.imgIndx)
-                    self.mask = pygame.mask.from_surface(self.image)  # 更新rect，使得与hero重合的判断更加精确
+                    self.mask = getMask(self.image)  # 更新rect，使得与hero重合的判断更加精确
                     self.imgIndx = (self.imgIndx+1) % len(self.imgLib["iList"]["left"])
                 if random()<0.04:
                     for hero in sprites:
@@ -2328,14 +2319,11 @@ class Dead(Monster):
             hero.infect()
         hero.hitted( self.damage, 0, self.dmgType )
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-
 # -----------------------------------
 class Ghost(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, XRange, y, onlayer):
         if not self.imgLib:
@@ -2344,12 +2332,13 @@ class Ghost(Monster):
                 "extraList": createImgList("image/stg3/ghost_extra0.png","image/stg3/ghost_extra1.png")
             }
             Ghost.shadLib = getShadLib( Ghost.imgLib )
-            Ghost.snd = pygame.mixer.Sound("audio/ghost_resurrect.wav")
+            Ghost.maskLib = getMaskLib( Ghost.imgLib )
+            Ghost.snd = loadSnd("audio/ghost_resurrect.wav")
 
         # initialize the sprite
         Monster.__init__(self, "ghost", (255,120,190,120), 6, 0, onlayer)
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         # calculate its position
         self.rect = self.image.get_rect()
         self.rect.left = randint( XRange[0], XRange[1] )
@@ -2440,7 +2429,7 @@ class Ghost(Monster):
         # decrease health
         true_dmg = round(damage*self.realDmgRate)
         self.health -= true_dmg
-        self.msgList.append( [getPos(self,0.5,0.5), str(true_dmg), 60] )
+        self.msgList.add( getPos(self,0.5,0.5), str(true_dmg) )
         if self.health <= 0:        # dead。但是有可能复活
             if self.extraLife>0:
                 self.snd.play(0)
@@ -2469,14 +2458,6 @@ class Ghost(Monster):
             if self.hitBack:
                 surface.blit( self.shad, self.rect )
     
-    def level(self, dist):
-        self.rect.left += dist
-        self.nxt[0] += dist
-    
-    def lift(self, dist):
-        self.rect.top += dist
-        self.nxt[1] += dist
-    
 # Boss ------------------------------
 class Vampire(Boss):
     sycthe = None
@@ -2493,8 +2474,9 @@ class Vampire(Boss):
             "summon": createImgList( "image/stg3/VampireSummon.png" )
         }
         self.shadLib = getShadLib(self.imgLib)
+        self.maskLib = getMaskLib(self.imgLib)
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         # calculate its position
         self.rect = self.image.get_rect()
         self.rect.left = self.initPos[0]-self.rect.width//2  # 位于砖块居中
@@ -2506,8 +2488,8 @@ class Vampire(Boss):
         self.scytheAttImg = createImgList( "image/stg3/scytheAtt0.png", "image/stg3/scytheAtt1.png", "image/stg3/scytheAtt2.png" )
         self.scythe = Ajunction( self.scytheImg["left"][0], getPos(self, self.scytheR["left"][0], self.scytheR["left"][1]) )
         # ----------- other attributes -------------------------
-        self.snd = pygame.mixer.Sound("audio/vampireAtt.wav")
-        self.laughSnd = pygame.mixer.Sound("audio/vampire_laugh.wav")
+        self.snd = loadSnd("audio/vampireAtt.wav")
+        self.laughSnd = loadSnd("audio/vampire_laugh.wav")
         self.alterSpeed( choice([-1,0,1]) )
         self.status = "wandering"          # wandering表示闲逛的状态，alarming表示发现英雄的状态
         self.wpPos = (0, 0, 0)
@@ -2684,15 +2666,6 @@ class Vampire(Boss):
         self.scope = (leftMax, rightMax)
         return wall
 
-    def lift(self, dist):
-        self.rect.bottom += dist
-        self.initPos[1] += dist
-
-    def level(self, dist):
-        self.rect.left += dist
-        self.initPos[0] += dist
-        self.boundaries = (self.boundaries[0]+dist, self.boundaries[1]+dist)
-
     # 鉴于本对象的构造非常复杂，因此提供一个专门的绘制接口。给此函数传递一个surface参数，即可在该surface上绘制（blit）完整的本对象
     def paint(self, screen):
         # 画残影
@@ -2720,6 +2693,7 @@ class Vampire(Boss):
 class Snake(Monster): 
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, wallGroup, sideGroup, onlayer):
         if not self.imgLib:
@@ -2728,13 +2702,14 @@ class Snake(Monster):
                 "dash": createImgList("image/stg4/snakeDash0.png", "image/stg4/snakeDash1.png")
             }
             Snake.shadLib = getShadLib(Snake.imgLib)
+            Snake.maskLib = getMaskLib(Snake.imgLib)
         
         # calculate its position
         Monster.__init__(self, "snake", (250,160,120), 4, 1, onlayer, sideGroup)
         wall = self.initLayer(wallGroup, sideGroup)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.bottom = wall.rect.top
@@ -2784,19 +2759,16 @@ class Snake(Monster):
 
     def fitImg(self):
         trPos = [ self.rect.left + self.rect.width//2, self.rect.bottom ]   # 为保证图片位置正确，临时存储之前的位置信息
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = trPos[0]-self.rect.width//2
         self.rect.bottom = trPos[1]
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-
 # -----------------------------------
 class Slime(Monster):  
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
         if not self.imgLib:
@@ -2805,6 +2777,7 @@ class Slime(Monster):
                     "image/stg4/slime3.png","image/stg4/slime4.png","image/stg4/slime5.png", "image/stg4/slime6.png")
             }
             Slime.shadLib = getShadLib(Slime.imgLib)
+            Slime.maskLib = getMaskLib(Slime.imgLib)
 
         # calculate its position
         Monster.__init__(self, "slime", (0,255,0,240), 4, 1, onlayer, sideGroup)
@@ -2813,7 +2786,6 @@ class Slime(Monster):
         self.imgIndx = 0
         self.setImg("iList",0)
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.bottom = wall.rect.top
@@ -2845,7 +2817,6 @@ class Slime(Monster):
             trPos = [ self.rect.left + self.rect.width//2, self.rect.bottom-self.rise[self.imgIndx] ]  # 为保证图片位置正确，临时存储之前的位置信息
             self.imgIndx = (self.imgIndx+1) % len(self.imgLib["iList"]["left"])
             self.setImg("iList",self.imgIndx)
-            self.mask = pygame.mask.from_surface(self.image)
             self.rect = self.image.get_rect()
             self.rect.left = trPos[0]-self.rect.width//2
             self.rect.bottom = trPos[1] + self.rise[self.imgIndx]
@@ -2867,7 +2838,7 @@ class Slime(Monster):
             self.hitBack = min( pushed+self.weight, 0 )
         true_dmg = round(damage*self.realDmgRate)
         self.health -= true_dmg
-        self.msgList.append( [getPos(self,0.5,0.5), str(true_dmg), 60] )
+        self.msgList.add( getPos(self,0.5,0.5), str(true_dmg) )
         if self.health <= 0:   # dead
             self.health = 0
             self.kill()
@@ -2889,14 +2860,11 @@ class Slime(Monster):
                 slime.rect.bottom = self.rect.bottom  # 位置相同
                 self.newSlime = slime         # 挂到本对象的newSlime变量上，等待下一次刷新调用move的时候上报给model。
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-
 # -----------------------------------
 class Nest(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, wallGroup, onlayer):
         if not self.imgLib:
@@ -2904,6 +2872,7 @@ class Nest(Monster):
                 "eggList": createImgList("image/stg4/nest0.png","image/stg4/nest1.png")
             }
             Nest.shadLib = getShadLib(Nest.imgLib)
+            Nest.maskLib = getMaskLib(Nest.imgLib)
 
         # calculate its position
         Monster.__init__(self, "nest", (255,255,80,240), 0, 0, onlayer)
@@ -2916,7 +2885,6 @@ class Nest(Monster):
         # initialize the sprite
         self.imgIndx = 0
         self.setImg("eggList",0)
-        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
         self.rect.top = wall.rect.bottom-8  # link more tight with the block (block bottom is not even)
@@ -2946,7 +2914,7 @@ class Nest(Monster):
     def hitted(self, damage, pushed, dmgType):
         true_dmg = round(damage*self.realDmgRate)
         self.health -= true_dmg
-        self.msgList.append( [getPos(self,0.5,0.5), str(true_dmg), 60] )
+        self.msgList.add( getPos(self,0.5,0.5), str(true_dmg) )
         if self.health <= 0:
             self.health = 0
             return True
@@ -2954,6 +2922,7 @@ class Nest(Monster):
 class Worm(Monster):  
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, x, y, onlayer):  
         if not self.imgLib:
@@ -2962,13 +2931,13 @@ class Worm(Monster):
                     "image/stg4/worm2.png","image/stg4/worm3.png","image/stg4/worm4.png")
             }
             Worm.shadLib = getShadLib(Worm.imgLib)
+            Worm.maskLib = getMaskLib(Worm.imgLib)
         
         Monster.__init__(self, "worm", (255,255,10,240), 1, 0, onlayer-2)# 由于掉落下来一定要减一层，所以传入onlayer-2。
         # initialize the sprite
         self.imgIndx = 0
         self.attIndx = 0
         self.setImg("iList",0)
-        self.mask = pygame.mask.from_surface( self.image )
         self.rect = self.image.get_rect()
         self.rect.left = x-self.rect.width//2
         self.rect.top = y
@@ -3024,18 +2993,19 @@ class Worm(Monster):
     def hitted(self, damage, pushed, dmgType):
         true_dmg = round(damage*self.realDmgRate)
         self.health -= true_dmg
-        self.msgList.append( [getPos(self,0.5,0.5), str(true_dmg), 60] )
+        self.msgList.add( getPos(self,0.5,0.5), str(true_dmg) )
         if self.health <= 0:
             self.health = 0
             return True    # dead
 
-    def drawHealth(self, surface):
+    def drawHealth(self, surface, offset=(0,0)):
         pass
 
 # -----------------------------------
 class Fly(Monster):  
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, XRange, y, onlayer):
         if not self.imgLib:
@@ -3045,12 +3015,13 @@ class Fly(Monster):
                 "att": createImgList("image/stg4/flyAtt.png")
             }
             Fly.shadLib = getShadLib(Fly.imgLib)
-            Fly.snd = pygame.mixer.Sound("audio/flapper.wav")
+            Fly.maskLib = getMaskLib(Fly.imgLib)
+            Fly.snd = loadSnd("audio/flapper.wav", "ambience")
 
         # initialize the sprite
         Monster.__init__(self, "fly", (0,255,10,240), 6, 1, onlayer)
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         # calculate its position
         self.rect = self.image.get_rect()
         self.leftBd = XRange[0]
@@ -3068,7 +3039,7 @@ class Fly(Monster):
         # find new position
         if self.cnt == 0:
             self.cnt = 60
-            self.nxt = [ randint(self.leftBd, self.rightBd), randint(20, 580) ]  # randomize a new position
+            self.nxt = [ randint(self.leftBd, self.rightBd), randint(20, 580)-CAMERA.scroll[1] ]  # randomize a new position on the screen
             self.direction = "left" if ( self.nxt[0] < self.rect.left + self.rect.width/2 ) else "right"
         if self.stun_time==0:
             # charging motion
@@ -3125,16 +3096,6 @@ class Fly(Monster):
         self.kill()
         del self
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.nxt[0] += dist
-        self.leftBd += dist
-        self.rightBd += dist
-    
-    def lift(self, dist):
-        self.rect.top += dist
-        self.nxt[1] += dist
-
 # Boss ------------------------------
 class MutatedFungus(Boss):
     def __init__(self, xRange, y, onlayer, font):
@@ -3146,8 +3107,9 @@ class MutatedFungus(Boss):
             "body": createImgList("image/stg4/fungus.png")
         }
         self.shadLib = getShadLib(self.imgLib)
+        self.maskLib = getMaskLib(self.imgLib)
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         # calculate its position
         self.rect = self.image.get_rect()
         self.rect.left = randint(xRange[0], xRange[1])
@@ -3158,8 +3120,8 @@ class MutatedFungus(Boss):
         self.tentR = { "left":[ (0.5,1.1), (0.5,1.1) ], "right":[ (0.5,1.1), (0.5,1.1) ] }
         self.tent = Ajunction( self.tentLeft[0], getPos(self, self.tentR[self.direction][0][0], self.tentR[self.direction][0][1]) )
         # ----------- other attributes -------------------------
-        #self.fireSnd = pygame.mixer.Sound("audio/MachineGrenade.wav")
-        #self.moanSnd = pygame.mixer.Sound("audio/MachineCollapse.wav")
+        #self.fireSnd = loadSnd("audio/MachineGrenade.wav")
+        #self.moanSnd = loadSnd("audio/MachineCollapse.wav")
         self.cnt = 1020      # count for the loop of shift position
         self.alterSpeed(0)
         self.upDown = 1
@@ -3183,12 +3145,11 @@ class MutatedFungus(Boss):
             self.cnt = 1420
         else:
             if not self.cnt%60:
-                self.nxt = ( randint( self.xRange[0], self.xRange[1] ), randint(40,520) )   # randomize a new position
+                self.nxt = ( randint( self.xRange[0], self.xRange[1] ), randint(40,520)-CAMERA.scroll[1] )   # randomize a new position on the screen
                 self.direction = "left" if ( self.nxt[0] < getPos(self, 0.5, 0.5)[0] ) else "right"
         if not ( delay % 8 ):
             # 更新各组件的图像
             self.setImg("body", self.imgIndx)
-            self.mask = pygame.mask.from_surface(self.image)
             self.tentIndx = (self.tentIndx+1) % len(self.tentLeft)
             if self.direction == "left":
                 self.tent.updateImg( self.tentLeft[self.tentIndx] )
@@ -3280,10 +3241,8 @@ class MiniFungus(InanimSprite):
         self.dmgType = MB["miniFungus"].dmgType
         self.manner = MB["miniFungus"].manner
 
-        self.image = load("image/stg4/miniFungus.png").convert_alpha()
-        if random()<0.5:
-            self.image = flip(self.image, True, False)
-        self.mask = pygame.mask.from_surface(self.image)
+        self.image = loadImg("image/stg4/miniFungus.png", random()<0.5)
+        self.mask = getMask(self.image)
         # calculate its position
         self.rect = self.image.get_rect()
         self.rect.left = randint( XRange[0], XRange[1] )
@@ -3300,7 +3259,8 @@ class MiniFungus(InanimSprite):
         if not delay%8:
             spurtCanvas.addTrails([2,3,4], [20,22,24], self.bldColor, getPos(self,random(),0.6))
         # 检查出界
-        if self.rect.right<0 or self.rect.left>spurtCanvas.rect.width or self.rect.bottom<0 or self.rect.top>spurtCanvas.rect.height:
+        rect = CAMERA.toScreen(self.rect)
+        if rect.right<0 or rect.left>spurtCanvas.rect.width or rect.bottom<0 or rect.top>spurtCanvas.rect.height:
             self.health = 0
             self.kill()
         # 千里送人头
@@ -3317,7 +3277,7 @@ class MiniFungus(InanimSprite):
             self.health = 0
             return True
 
-    def drawHealth(self, surface):
+    def drawHealth(self, surface, offset=(0,0)):
         pass
 
 
@@ -3356,6 +3316,7 @@ class blizzardGenerator():
 class Wolf(Monster):  
     imgLib = None
     shadLib = None
+    maskLib = None
     snd = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
@@ -3365,7 +3326,8 @@ class Wolf(Monster):
                     "image/stg5/wolf3.png","image/stg5/wolf4.png","image/stg5/wolf5.png")
             }
             Wolf.shadLib = getShadLib(Wolf.imgLib)
-            Wolf.snd = pygame.mixer.Sound("audio/wolf.wav")
+            Wolf.maskLib = getMaskLib(Wolf.imgLib)
+            Wolf.snd = loadSnd("audio/wolf.wav")
         
         # calculate its position
         Monster.__init__(self, "wolf", (255,0,0,240), 8, 1, onlayer, sideGroup)
@@ -3411,7 +3373,6 @@ class Wolf(Monster):
         # initialize the sprite
         self.imgIndx = 0
         self.setImg("iList",0)
-        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left+wall.rect.width//2-self.rect.width//2
         self.rect.bottom = wall.rect.top
@@ -3505,17 +3466,11 @@ class Wolf(Monster):
         self.coolDown = 0
         self.tgt = None             # 指示要攻击的英雄
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-        for scp in self.scopeList:
-            scp[0] += dist
-            scp[1] += dist
-
 # -----------------------------
 class IceTroll(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
     snd = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
@@ -3529,14 +3484,15 @@ class IceTroll(Monster):
                 "alarm": createImgList("image/stg5/alarmLeft.png")
             }
             IceTroll.shadLib = getShadLib(IceTroll.imgLib)
-            IceTroll.snd = pygame.mixer.Sound("audio/iceTroll.wav")
+            IceTroll.maskLib = getMaskLib(IceTroll.imgLib)
+            IceTroll.snd = loadSnd("audio/iceTroll.wav")
         
         # calculate its position
         Monster.__init__(self, "iceTroll", (255,0,0,240), 5, 3, onlayer, sideGroup)
         wall = self.initLayer(wallGroup, sideGroup)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.damage = MB["iceTroll"].damage
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left
@@ -3570,7 +3526,7 @@ class IceTroll(Monster):
                         self.alterSpeed(-self.speed)
                 if not (delay % 8):
                     self.setImg("iList",self.imgIndx)
-                    self.mask = pygame.mask.from_surface(self.image)    # 更新rect，使得与hero重合的判断更加精确
+                    self.mask = getMask(self.image)    # 更新rect，使得与hero重合的判断更加精确
                     self.imgIndx = (self.imgIndx+1) % len(self.imgLib["iList"]["left"])
             elif (self.airCnt > 0):
                 self.airCnt -= 1
@@ -3599,14 +3555,11 @@ class IceTroll(Monster):
         self.setImg("iList",0)
         self.airCnt = 0           # indicate if spitting!
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-
 # -----------------------------------
 class IceSpirit(Monster):  
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, XRange, y, onlayer):
         if not self.imgLib:
@@ -3614,12 +3567,12 @@ class IceSpirit(Monster):
                 "iList": createImgList("image/stg5/iceSpirit.png")
             }
             IceSpirit.shadLib = getShadLib(IceSpirit.imgLib)
+            IceSpirit.maskLib = getMaskLib(IceSpirit.imgLib)
 
         # initialize the sprite
         Monster.__init__(self, "iceSpirit", (160,220,255,200), 0, 1, onlayer)
         self.setImg("iList",0)
-        self.ori_image = self.image.copy()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.ori_image = self.image
         # calculate its position
         self.rect = self.image.get_rect()
         self.rect.left = randint( XRange[0], XRange[1] )
@@ -3636,8 +3589,8 @@ class IceSpirit(Monster):
         self.count_stun()
         if not (delay % 5 ):
             self.angle = (self.angle+20) % 360
-            self.image = rot_center(self.ori_image, self.angle)
-            self.mask = pygame.mask.from_surface(self.image)
+            self.image = rotImg(self.ori_image, self.angle, self.rotSteps)
+            self.mask = getMask(self.image)
         # 漂浮移动
         self.rect.left += self.speed[0]
         self.rect.top += self.speed[1]
@@ -3668,7 +3621,7 @@ class IceSpirit(Monster):
         # decrease health
         true_dmg = round(damage*self.realDmgRate)
         self.health -= true_dmg
-        self.msgList.append( [getPos(self,0.5,0.5), str(true_dmg), 60] )
+        self.msgList.add( getPos(self,0.5,0.5), str(true_dmg) )
         if self.health <= 0:                # dead。
             self.health = 0
             self.spurtCanvas.addExplosion( getPos(self,0.5,0.5), 28, 12, waveColor=(180,180,240,240), spatColor=(150,150,220,240) )
@@ -3683,6 +3636,7 @@ class IceSpirit(Monster):
 class Eagle(Monster):  
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, XRange, y, onlayer):
         if not self.imgLib:
@@ -3691,12 +3645,13 @@ class Eagle(Monster):
                 "att": createImgList("image/stg5/eagleAtt.png")
             }
             Eagle.shadLib = getShadLib(Eagle.imgLib)
-            Eagle.snd = pygame.mixer.Sound("audio/eagle.wav")
+            Eagle.maskLib = getMaskLib(Eagle.imgLib)
+            Eagle.snd = loadSnd("audio/eagle.wav")
 
         # initialize the sprite
         Monster.__init__(self, "eagle", (255,0,0,240), 8, 1, onlayer)
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         # calculate its position
         self.rect = self.image.get_rect()
         self.leftBd, self.rightBd= XRange
@@ -3726,7 +3681,7 @@ class Eagle(Monster):
                 if abs(aim[0]-myPos[0])<140:
                     pos1 = randint(self.leftBd-10,self.leftBd+200)
                     pos2 = randint(self.rightBd-200,self.rightBd+10)
-                    self.nxt = [choice([pos1, pos2]), randint(40,180)]
+                    self.nxt = [choice([pos1, pos2]), randint(40,180)-CAMERA.scroll[1]]
                     self.direction = "left" if ( self.nxt[0] < self.rect.left + self.rect.width/2 ) else "right"
                 # 否则，就可以冲冲冲
                 else:
@@ -3745,7 +3700,7 @@ class Eagle(Monster):
                     self.rect = self.image.get_rect()
                     self.rect.left = myPos[0]-self.rect.width//2
                     self.rect.top = myPos[1]-self.rect.height//2
-                    self.mask = pygame.mask.from_surface(self.image)
+                    self.mask = getMask(self.image)
             # Adjusting position.
             self.shift( self.nxt[0], self.nxt[1] )
             self.cnt -= 1
@@ -3767,7 +3722,7 @@ class Eagle(Monster):
             self.rect = self.image.get_rect()
             self.rect.left = myPos[0]-self.rect.width//2
             self.rect.top = myPos[1]-self.rect.height//2
-            self.mask = pygame.mask.from_surface(self.image)
+            self.mask = getMask(self.image)
         if (x < final_x):
             dist = math.ceil( (final_x - x)/spd )
             if dist > maxSpan:
@@ -3800,16 +3755,6 @@ class Eagle(Monster):
         self.snd.stop()
         self.kill()
         del self
-
-    def level(self, dist):
-        self.rect.left += dist
-        self.nxt[0] += dist
-        self.leftBd += dist
-        self.rightBd += dist
-
-    def lift(self, dist):
-        self.rect.top += dist
-        self.nxt[1] += dist
     
 # Boss ------------------------------
 class FrostTitan(Boss):
@@ -3824,8 +3769,9 @@ class FrostTitan(Boss):
             "summon": createImgList("image/stg5/FrostTitanSummon.png")
         }
         self.shadLib = getShadLib(self.imgLib)
+        self.maskLib = getMaskLib(self.imgLib)
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.xRange = xRange
         # calculate its position
         self.rect = self.image.get_rect()
@@ -3854,7 +3800,7 @@ class FrostTitan(Boss):
                         self.setImg("body", self.imgIndx)
                     else:           # 召唤状态
                         self.setImg("summon")
-                    self.mask = pygame.mask.from_surface(self.image)
+                    self.mask = getMask(self.image)
         
         if self.stun_time==0:
             # count down for rage actions.
@@ -3863,7 +3809,7 @@ class FrostTitan(Boss):
                 self.cnt = 1580
             else:
                 if not delay%60:
-                    self.nxt = ( randint( self.xRange[0], self.xRange[1] ), randint(40,520) )   # randomize a new position
+                    self.nxt = ( randint( self.xRange[0], self.xRange[1] ), randint(40,520)-CAMERA.scroll[1] )   # randomize a new position on the screen
                     self.direction = "left" if ( self.nxt[0] < getPos(self, 0.5, 0.5)[0] ) else "right"
             # deal regular snowball attack:
             if not (self.cnt % 12) and (self.coolDown<=0) and (self.cnt>self.summonAct) and random()<0.2:
@@ -3938,19 +3884,21 @@ class FrostTitan(Boss):
         return False    # 表示未到目标
 
 class SnowBall(pygame.sprite.Sprite):
+    rotSteps = ROT_STEPS
+
     def __init__(self, pos, layer, spd, main=True):   # 参数pos为本对象初始的位置
         pygame.sprite.Sprite.__init__(self)
         self.main = main    # 为True表示是大雪球，还可以分成小雪球
         if self.main==True:
-            self.oriImage = load("image/stg5/snowball.png").convert_alpha()
+            self.oriImage = loadImg("image/stg5/snowball.png")
         else:
-            self.oriImage = pygame.transform.smoothscale( load("image/stg5/snowball.png").convert_alpha(), (45,45) )
+            self.oriImage = loadImg("image/stg5/snowball.png", scale=(45,45))
         
         self.image = self.oriImage
         self.rect = self.image.get_rect()
         self.rect.left = pos[0]-self.rect.width//2
         self.rect.top = pos[1]-self.rect.height//2
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.speed = list(spd)
         self.deg = 0
         if spd[0]>0:
@@ -3960,7 +3908,7 @@ class SnowBall(pygame.sprite.Sprite):
         self.damage = MB["FrostTitan"].damage
         self.dmgType = MB["FrostTitan"].dmgType
         self.category = "snowball"
-        self.blastSnd = pygame.mixer.Sound("audio/wizard/hit.wav")
+        self.blastSnd = loadSnd("audio/wizard/hit.wav")
         self.onlayer = layer
         self.colorSet = [(200,200,255,240), (180,180,240,240), (150,150,220,240)]
 
@@ -3970,8 +3918,8 @@ class SnowBall(pygame.sprite.Sprite):
         # generate some sparks
         if not delay%2:
             self.deg = (self.deg+20) % 360
-            self.image = rot_center(self.oriImage, self.deg) if self.speed[0]<=0 else rot_center(self.oriImage, -self.deg)
-            self.mask = pygame.mask.from_surface(self.image)
+            self.image = rotImg(self.oriImage, self.deg, self.rotSteps) if self.speed[0]<=0 else rotImg(self.oriImage, -self.deg, self.rotSteps)
+            self.mask = getMask(self.image)
             canvas.addTrails( [4,5,6], [12,16,20,24,28], choice(self.colorSet), getPos(self, 0.3+random()*0.4, 0.3+random()*0.4) )
         if cldList(self, sprites):
             return self.explode(canvas)
@@ -4001,12 +3949,6 @@ class SnowBall(pygame.sprite.Sprite):
     def paint(self, surface):
         surface.blit( self.image, self.rect )
     
-    def lift(self, dist):
-        self.rect.bottom += dist
-
-    def level(self, dist):
-        self.rect.left += dist
-    
 
 # ========================================================================
 # --------------------------------- CP 6 ---------------------------------
@@ -4014,6 +3956,7 @@ class SnowBall(pygame.sprite.Sprite):
 class Dwarf(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
     snd = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
@@ -4022,14 +3965,15 @@ class Dwarf(Monster):
                 "iList": createImgList("image/stg6/dwarf0.png","image/stg6/dwarf1.png","image/stg6/dwarf2.png","image/stg6/dwarf1.png")
             }
             Dwarf.shadLib = getShadLib(Dwarf.imgLib)
-            Dwarf.snd = pygame.mixer.Sound("audio/wolf.wav")
+            Dwarf.maskLib = getMaskLib(Dwarf.imgLib)
+            Dwarf.snd = loadSnd("audio/wolf.wav")
         
         # calculate its position
         Monster.__init__(self, "dwarf", (255,0,0,240), 5, 1, onlayer, sideGroup)
         wall = self.initLayer(wallGroup, sideGroup)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left+wall.rect.width//2-self.rect.width//2
         self.rect.bottom = wall.rect.top
@@ -4100,14 +4044,11 @@ class Dwarf(Monster):
         self.coolDown = 0
         self.tgt = None                    # 指示要攻击的英雄
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-
 # ------------------------------------
 class Gunner(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
     fireSnd = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
@@ -4117,19 +4058,20 @@ class Gunner(Monster):
                 "fire": createImgList("image/stg6/gunnerFire.png")
             }
             Gunner.shadLib = getShadLib(Gunner.imgLib)
-            Gunner.fireSnd = pygame.mixer.Sound("audio/gunner.wav")
+            Gunner.maskLib = getMaskLib(Gunner.imgLib)
+            Gunner.fireSnd = loadSnd("audio/gunner.wav")
         
         # calculate its position
         Monster.__init__(self, "gunner", (20,20,20,240), 0, 2, onlayer, sideGroup, debri=("metalDebri",6))
         wall = self.initLayer(wallGroup, sideGroup)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left+wall.rect.width//2-self.rect.width//2
         self.rect.bottom = wall.rect.top
         self.eyePos = getPos(self, 0.5, 0.2)
-        self.snd = pygame.mixer.Sound("audio/wolf.wav")
+        self.snd = loadSnd("audio/wolf.wav")
         self.insp = self.inspRange = 360   # inspRange是原始参数，insp是不断变化的参数
         self.alterSpeed( choice( [-1, 1] ) )
         self.status = "wandering"          # wandering表示闲逛的状态，alarming表示发现英雄的状态
@@ -4165,7 +4107,9 @@ class Gunner(Monster):
             self.rect.bottom = trPos[1]
         # inspecting line
         self.eyePos = getPos(self, 0.5, 0.2)
-        pygame.draw.line( screen, (255,0,0), self.eyePos, (self.eyePos[0]+self.insp,self.eyePos[1]), choice([1,2]) )
+        ox, oy = CAMERA.offset      # 与sprite本身的绘制偏移量（含震动）一致
+        x, y = self.eyePos[0]+ox, self.eyePos[1]+oy
+        pygame.draw.line( screen, (255,0,0), (x,y), (x+self.insp,y), choice([1,2]) )
 
     def patrol(self, delay):
         if (self.speed):                        # speed!=0，在运动。
@@ -4199,10 +4143,6 @@ class Gunner(Monster):
         self.imgIndx = 0
         self.setImg("iList",0)
         self.coolDown = 0
-    
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
 
 class GunBullet(InanimSprite): 
     imgList = None
@@ -4231,7 +4171,7 @@ class GunBullet(InanimSprite):
         self.shade = self.shadList[self.direction]
         self.dmgType = MB["gunner"].dmgType
         self.damage = MB["gunner"].damage
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = pos[0]-self.rect.width//2
         self.rect.top = pos[1]-self.rect.height//2
@@ -4242,7 +4182,8 @@ class GunBullet(InanimSprite):
             if ( collide_mask(self,each) ):  # 撞墙
                 self._explode(canvas)
                 return
-        if self.rect.left>=screenWidth or self.rect.right<=0: # 出界
+        rect = CAMERA.toScreen(self.rect)
+        if rect.left>=screenWidth or rect.right<=0: # 出界
             self._explode(canvas)
             return
         elif cldList(self, tgts):
@@ -4265,6 +4206,7 @@ class GunBullet(InanimSprite):
 class Lasercraft(Monster):  
     imgLib = None
     shadLib = None
+    maskLib = None
 
     def __init__(self, align, y, onlayer):
         if not self.imgLib:
@@ -4272,7 +4214,8 @@ class Lasercraft(Monster):
                 "iList": createImgList("image/stg6/lasercraft0.png","image/stg6/lasercraft1.png", "image/stg6/lasercraft2.png","image/stg6/lasercraft1.png")
             }
             Lasercraft.shadLib = getShadLib(Lasercraft.imgLib)
-            Lasercraft.sparkySnd = pygame.mixer.Sound("audio/sparky.wav")
+            Lasercraft.maskLib = getMaskLib(Lasercraft.imgLib)
+            Lasercraft.sparkySnd = loadSnd("audio/sparky.wav", "ambience")
 
         # initialize the sprite
         Monster.__init__(self, "lasercraft", (110,250,10,240), 6, 1, onlayer, debri=("metalDebri",6))
@@ -4287,7 +4230,7 @@ class Lasercraft(Monster):
         self.reset()
         # calculate its position
         self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect.left = self.align - self.rect.width//2
         self.rect.top = y
         if self.direction == "left":
@@ -4366,12 +4309,12 @@ class Lasercraft(Monster):
         if self.coolDown<40:
             if self.coolDown>=15:
                 for each in self.chargeList:   # 绘制并移动粒子
-                    pygame.draw.circle( surface, each[2], each[1], each[0] )  # 充能粒子
+                    pygame.draw.circle( surface.surface, each[2], surface.pos(each[1]), each[0] )  # 充能粒子
                     each[1][0] += (self.muzzle[0]-each[1][0]) // 8
                     each[1][1] += (self.muzzle[1]-each[1][1]) // 8
             else:
-                pygame.draw.line( surface, (120,120,250), self.muzzle, (self.limitX,self.muzzle[1]), choice([4,6,8]))   # 开炮！！
-            pygame.draw.circle( surface, (120,120,250), self.muzzle, randint(14,20) )   #聚能中心
+                pygame.draw.line( surface.surface, (120,120,250), surface.pos(self.muzzle), surface.pos((self.limitX,self.muzzle[1])), choice([4,6,8]))   # 开炮！！
+            pygame.draw.circle( surface.surface, (120,120,250), surface.pos(self.muzzle), randint(14,20) )   #聚能中心
     
     def reset(self):
         self.imgIndx = 0
@@ -4380,17 +4323,6 @@ class Lasercraft(Monster):
         self.coolDown = 160  # count for attack coolDown
         self.chargeList = [] # 用于存放电磁炮蓄力充能时的充能粒子信息 
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.align += dist
-        self.muzzle[0] += dist
-        self.limitX += dist
-
-    def lift(self, dist):
-        self.rect.top += dist
-        self.nxt += dist
-        self.muzzle[1] += dist
-
 # Boss ------------------------------
 class WarMachine(Boss):
     arm = None        # 是一个单独的sprite
@@ -4405,9 +4337,9 @@ class WarMachine(Boss):
             "bodyList": createImgList("image/stg6/WarMachine0.png","image/stg6/WarMachine1.png")
         }
         self.shadLib = getShadLib(self.imgLib)
+        self.maskLib = getMaskLib(self.imgLib)
         self.imgIndx = 0
         self.setImg("bodyList",0)
-        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = self.initPos[0]-self.rect.width//2
         self.rect.bottom = self.initPos[1]
@@ -4428,8 +4360,8 @@ class WarMachine(Boss):
         # ----------- other attributes -------------------------
         self.cnt = 0         # count for the loop of shift position
         self.coolDown = 0    # count for attack coolDown
-        self.fireSnd = pygame.mixer.Sound("audio/MachineGrenade.wav")
-        self.moanSnd = pygame.mixer.Sound("audio/MachineCollapse.wav")
+        self.fireSnd = loadSnd("audio/MachineGrenade.wav")
+        self.moanSnd = loadSnd("audio/MachineCollapse.wav")
         self.jetting = False
         self.jetImg = [ pygame.image.load("image/stg6/jet0.png").convert_alpha(), pygame.image.load("image/stg6/jet1.png").convert_alpha() ]
         self.jetIndx = 0
@@ -4468,11 +4400,11 @@ class WarMachine(Boss):
             # 更新各组件的图像
             self.setImg("bodyList", self.imgIndx)
             if self.direction == "left":
-                self.mask = pygame.mask.from_surface(self.image)
+                self.mask = getMask(self.image)
                 self.packet.updateImg( self.pktLeft[self.pktIndx] )
                 self.arm.updateImg( self.armLeft[self.armIndx] )
             elif self.direction == "right":
-                self.mask = pygame.mask.from_surface(self.image)
+                self.mask = getMask(self.image)
                 self.packet.updateImg( self.pktRight[self.pktIndx] )
                 self.arm.updateImg( self.armRight[self.armIndx] )
         # Anyway we should 及时更新ajunction的位置（还有击退）
@@ -4502,15 +4434,6 @@ class WarMachine(Boss):
     def stun(self, duration):
         pass
 
-    def lift(self, dist):
-        self.rect.bottom += dist
-        self.initPos[1] += dist
-    
-    def level(self, dist):
-        self.rect.left += dist
-        self.initPos[0] += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-
     def paint(self, screen):
         # 画阴影
         shadRect = self.rect.copy()
@@ -4546,8 +4469,8 @@ class Missle(InanimSprite):
         if not Missle.oriImg["left"]:
             Missle.oriImg = { "left": load("image/stg6/missle.png").convert_alpha(),
                 "right":flip(load("image/stg6/missle.png").convert_alpha(), True, False) }
-            Missle.blastSnd = pygame.mixer.Sound("audio/wizard/hit.wav")
-            Missle.launchSnd = pygame.mixer.Sound("audio/missle.wav")
+            Missle.blastSnd = loadSnd("audio/wizard/hit.wav")
+            Missle.launchSnd = loadSnd("audio/missle.wav")
 
         InanimSprite.__init__(self, "missle")
         self.launchSnd.play(0)
@@ -4561,7 +4484,7 @@ class Missle(InanimSprite):
         self.rect = self.image.get_rect()
         self.rect.left = pos[0]-self.rect.width//2
         self.rect.top = pos[1]-self.rect.height//2
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.damage = damage
         self.health = MB["missle"].health
         self.dmgType = MB["missle"].dmgType
@@ -4583,7 +4506,7 @@ class Missle(InanimSprite):
         elif self.speed[0]<0:
             self.image = self.oriImg["left"]
             canvas.addTrails( [4,6,8], [12,15,18], (200,120,80,220), getPos(self,0.9,0.4+random()*0.3) )
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         # adjust speed
         if not delay%8:
             my_ctr = getPos(self,0.5,0.5)
@@ -4619,7 +4542,7 @@ class Missle(InanimSprite):
         canvas.addSmoke( 6, (4, 6, 8), 2, (2,2,2,240), getPos(self,0.5,0.5), 4 )
         self.kill()
 
-    def drawHealth(self, surface):
+    def drawHealth(self, surface, offset=(0,0)):
         pass
 
     def stun(self, duration):
@@ -4644,8 +4567,8 @@ class Drip(InanimSprite):
         if not Drip.oriImg["left"]:
             Drip.oriImg = { "left": load("image/stg6/drip.png").convert_alpha(),
                 "right":flip(load("image/stg6/drip.png").convert_alpha(), True, False) }
-            Drip.blastSnd = pygame.mixer.Sound("audio/wizard/hit.wav")
-            Drip.launchSnd = pygame.mixer.Sound("audio/missle.wav")
+            Drip.blastSnd = loadSnd("audio/wizard/hit.wav")
+            Drip.launchSnd = loadSnd("audio/missle.wav")
 
         InanimSprite.__init__(self, "drip")
         #self.launchSnd.play(0)
@@ -4659,7 +4582,7 @@ class Drip(InanimSprite):
         self.rect = self.image.get_rect()
         self.rect.left = pos[0]-self.rect.width//2
         self.rect.top = pos[1]-self.rect.height//2
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.damage = NB["drip"]["damage"]
         self.health = NB["drip"]["health"]
         self.dmgType = "physical"
@@ -4676,11 +4599,11 @@ class Drip(InanimSprite):
                 canvas.addTrails( [5], [12], (240,210,150,240), getPos(self,0.9,0.5) )
             # adjust speed
             if not delay%8:
-                my_ctr = getPos(self,0.5,0.5)
+                my_ctr = CAMERA.toScreen( getPos(self,0.5,0.5) )
                 if ( self.speed[0]>0 and my_ctr[0]>=canvas.rect.width+100 ) or ( self.speed[0]<0 and my_ctr[0]<=-100 ):
                     # lift one layer
                     self.rect.top -= 144
-                    if self.rect.bottom<0:
+                    if self.rect.bottom+CAMERA.scroll[1]<0:
                         self.kill()
                         return
                     self.speed[0] = -self.speed[0]
@@ -4689,7 +4612,7 @@ class Drip(InanimSprite):
                         self.image = self.oriImg["right"]
                     elif self.speed[0]<0:
                         self.image = self.oriImg["left"]
-                        self.mask = pygame.mask.from_surface(self.image)
+                        self.mask = getMask(self.image)
                 #tgt_ctr = getPos(self.tgt,0.5,0.5)
                 # if my_ctr[0]>tgt_ctr[0] and self.speed[0]>-self.fullSpd:
                 #     self.speed[0] -= 1
@@ -4710,7 +4633,7 @@ class Drip(InanimSprite):
                             each.hitted( self.damage, self.push, self.dmgType )
                             self.blastSnd.play(0)
 
-    def drawHealth(self, surface):
+    def drawHealth(self, surface, offset=(0,0)):
         pass
 
     def stun(self, duration):
@@ -4737,20 +4660,20 @@ class Log(InanimSprite):
 
     def __init__(self, bg_size, layer, pos):
         InanimSprite.__init__(self, "log")
-        self.imgList = { -1:[ load("image/stg7/log0.png").convert_alpha(), load("image/stg7/log1.png").convert_alpha() ],
-            1:[flip(load("image/stg7/log0.png").convert_alpha(), True, False), flip(load("image/stg7/log1.png").convert_alpha(), True, False)] }
+        self.imgList = { -1:[ loadImg("image/stg7/log0.png"), loadImg("image/stg7/log1.png") ],
+            1:[ loadImg("image/stg7/log0.png", True), loadImg("image/stg7/log1.png", True) ] }
         self.speed = [ choice([-1,1]), randint(0,self.fullSpd) ]
         self.imgIndx = 0
         self.image = self.imgList[self.speed[0]][self.imgIndx]
         self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect.left = pos[0]-self.rect.width//2
         self.rect.bottom = pos[1]
         self.onlayer = int(layer)
         self.bg_size = bg_size
         self.damage = NB["log"]["damage"]
         self.dmgType = "physical"
-        self.hitSnd = pygame.mixer.Sound("audio/log.wav")
+        self.hitSnd = loadSnd("audio/log.wav", "ambience")
         
     def update(self, delay, sprites, groupList, keyline, boundaries, canvas):
         # 造成伤害
@@ -4777,7 +4700,8 @@ class Log(InanimSprite):
         if ( str(self.onlayer) in groupList ) and pygame.sprite.spritecollide(self, groupList[str(self.onlayer)], False, collide_mask):
             self.speed[1] = (-self.fullSpd+3)
             self.onlayer -= 2
-            if self.rect.bottom>0 and self.rect.top<self.bg_size[1]:
+            rect = CAMERA.toScreen(self.rect)
+            if rect.bottom>0 and rect.top<self.bg_size[1]:
                 self.hitSnd.play(0)
                 canvas.addPebbles( self, 4 )
                 return "vib"
@@ -4793,6 +4717,7 @@ class Log(InanimSprite):
 class Guard(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
     snd = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
@@ -4803,13 +4728,14 @@ class Guard(Monster):
                 "attList": createImgList("image/stg7/att0.png","image/stg7/att1.png","image/stg7/att0.png")
             }
             Guard.shadLib = getShadLib(Guard.imgLib)
-            Guard.snd = pygame.mixer.Sound("audio/guardAtt.wav")
+            Guard.maskLib = getMaskLib(Guard.imgLib)
+            Guard.snd = loadSnd("audio/guardAtt.wav")
 
         Monster.__init__(self, "guard", (255,0,0,240), 6, 1, onlayer, sideGroup)
         wall = self.initLayer(wallGroup, sideGroup)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left+wall.rect.width//2-self.rect.width//2
         self.rect.bottom = wall.rect.top
@@ -4917,12 +4843,6 @@ class Guard(Monster):
         if self.hitBack:
             screen.blit( self.shad, self.rect )
     
-    def level(self, dist):
-        self.rect.left += dist
-        self.spear.rect.left += dist
-        self.shield.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-    
     def hitted(self, damage, pushed, dmgType):
         if pushed>0:   # 向右击退
             self.hitBack = max( pushed-self.weight, 0 )
@@ -4933,7 +4853,7 @@ class Guard(Monster):
             self.bldColor = (200,200,200,240)
             damage = round(damage*self.realDmgRate)       # 原来的20%
         self.health -= damage
-        self.msgList.append( [getPos(self,0.5,0.5), str(damage), 60] )
+        self.msgList.add( getPos(self,0.5,0.5), str(damage) )
         if self.health <= 0:       # dead
             self.health = 0
             self.kill()
@@ -4943,6 +4863,7 @@ class Guard(Monster):
 class Flamen(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
     snd = None
 
     def __init__(self, wallGroup, sideGroup, blockSize, onlayer):
@@ -4953,13 +4874,14 @@ class Flamen(Monster):
                 "attList": createImgList("image/stg7/flamenAtt0.png","image/stg7/flamenAtt1.png")
             }
             Flamen.shadLib = getShadLib(Flamen.imgLib)
-            Flamen.snd = pygame.mixer.Sound("audio/flamenSummon.wav")
+            Flamen.maskLib = getMaskLib(Flamen.imgLib)
+            Flamen.snd = loadSnd("audio/flamenSummon.wav")
 
         Monster.__init__(self, "flamen", (255,0,0,240), 0, 1, onlayer, sideGroup)
         wall = self.initLayer(wallGroup, sideGroup)
         # initialize the sprite
         self.reset()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.rect = self.image.get_rect()
         self.rect.left = wall.rect.left+wall.rect.width//2-self.rect.width//2
         self.rect.bottom = wall.rect.top-10
@@ -5018,26 +4940,18 @@ class Flamen(Monster):
         self.ctr = [0,0]
         self.tgt = None         # 指示要攻击的英雄
         self.chargeList = []
-
-    def level(self, dist):
-        self.rect.left += dist
-        self.scope = (self.scope[0]+dist, self.scope[1]+dist)
-    
-    def lift(self, dist):
-        self.rect.bottom += dist
-        self.ctr[1] += dist
     
 class SoulBlast(InanimSprite):
     
     def __init__(self, pos, layer, cnt):
         InanimSprite.__init__(self, "soulBlast")
-        self.imgList = [load("image/stg7/soulBlast0.png").convert_alpha(), load("image/stg7/soulBlast1.png").convert_alpha()]
+        self.imgList = [loadImg("image/stg7/soulBlast0.png"), loadImg("image/stg7/soulBlast1.png")]
         self.image = self.imgList[0]
         self.imgIndx = 0
         self.rect = self.image.get_rect()
         self.rect.left = pos[0]-self.rect.width//2
         self.rect.bottom = pos[1]+self.rect.height//2
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = getMask(self.image)
         self.damage = MB["flamen"].damage
         self.dmgType = MB["flamen"].dmgType
         self.onlayer = int(layer)
@@ -5046,7 +4960,7 @@ class SoulBlast(InanimSprite):
         self.ctr = pos
         self.cnt = cnt      # 预警倒计时
         self.chargeList = []
-        self.snd = pygame.mixer.Sound("audio/priest/hit.wav")
+        self.snd = loadSnd("audio/priest/hit.wav")
     
     def update(self, delay, sideWalls, downWalls, keyLine, sprites, canvas, bg_size):
         # 蓄力阶段
@@ -5091,10 +5005,10 @@ class SoulBlast(InanimSprite):
     def paint(self, surface):
         if self.cnt>0:
             for each in self.chargeList:  # 绘制并移动粒子
-                pygame.draw.circle( surface, each[2], each[1], each[0] )  # 充能粒子
+                pygame.draw.circle( surface.surface, each[2], surface.pos(each[1]), each[0] )  # 充能粒子
                 each[1][0] += (self.ctr[0]-each[1][0]) // 8
                 each[1][1] += (self.ctr[1]-each[1][1]) // 8
-            pygame.draw.circle( surface, (100,240,100), self.ctr, min(60-self.cnt, 30) )   # 聚能中心
+            pygame.draw.circle( surface.surface, (100,240,100), surface.pos(self.ctr), min(60-self.cnt, 30) )   # 聚能中心
         else:
             surface.blit( self.image, self.rect )
 
@@ -5102,6 +5016,7 @@ class SoulBlast(InanimSprite):
 class Assassin(Monster):
     imgLib = None
     shadLib = None
+    maskLib = None
     dashSnd = None
     cldSnd = None
 
@@ -5114,8 +5029,9 @@ class Assassin(Monster):
                 "dash": createImgList("image/stg7/assassinAtt.png")
             }
             Assassin.shadLib = getShadLib(Assassin.imgLib)
-            Assassin.dashSnd = pygame.mixer.Sound("audio/assassinDash.wav")
-            Assassin.cldSnd = pygame.mixer.Sound("audio/assassinCld.wav")
+            Assassin.maskLib = getMaskLib(Assassin.imgLib)
+            Assassin.dashSnd = loadSnd("audio/assassinDash.wav")
+            Assassin.cldSnd = loadSnd("audio/assassinCld.wav")
         
         # Search both sidewalls of the given layer
         layerwall = []
@@ -5136,7 +5052,6 @@ class Assassin(Monster):
         # initialize the sprite
         self._reset()
         self.setImg(self.status,0)
-        self.mask = pygame.mask.from_surface(self.image)
         self.rect = self.image.get_rect()
         if wall.coord[0] == 0:  # left side wall
             self.direction = "right"
@@ -5245,10 +5160,6 @@ class Assassin(Monster):
         if self.hitBack:
             surface.blit( self.shad, self.rect )
 
-    def level(self, dist):
-        self.rect.left += dist
-        self.XRange = (self.XRange[0]+dist, self.XRange[1]+dist)
-
 # Boss ------------------------------
 class Chicheng(Boss):
 
@@ -5262,9 +5173,9 @@ class Chicheng(Boss):
             "knock": createImgList("image/stg7/ccKnock.png")
         }
         self.shadLib = getShadLib(self.imgLib)
+        self.maskLib = getMaskLib(self.imgLib)
         # ----- body part (the core of General Chicheng) ------
         self.setImg("body")
-        self.mask = pygame.mask.from_surface(self.image)
         # calculate its position
         self.rect = self.image.get_rect()
         self.rect.left = self.initPos[0]-self.rect.width//2
@@ -5290,9 +5201,9 @@ class Chicheng(Boss):
         self.reset()
         self.knockCnt = 0
         self.dealt = False
-        self.mockSnd = pygame.mixer.Sound("audio/chichengMock.wav")
-        self.knockSnd = pygame.mixer.Sound("audio/chichengKnock.wav")
-        self.threatSnd1 = pygame.mixer.Sound("audio/ccSilent.wav")
+        self.mockSnd = loadSnd("audio/chichengMock.wav")
+        self.knockSnd = loadSnd("audio/chichengKnock.wav")
+        self.threatSnd1 = loadSnd("audio/ccSilent.wav")
         self.jumping = False
         self.max_spd = 6
         # ---------- silent particle --------------------------
@@ -5354,7 +5265,7 @@ class Chicheng(Boss):
             elif self.direction == "right":
                 self.cloak.updateImg( self.cloakRight[self.cloakIndx] )
                 self.weapon.updateImg( self.weaponRight[self.weaponIndx] )
-            self.mask = pygame.mask.from_surface(self.image)
+            self.mask = getMask(self.image)
             if not self.cnt%6:
                 self.cloakIndx = (self.cloakIndx+1) % len(self.cloakLeft)
         self.cloak.updatePos( getPos(self, self.cloakR[self.direction][self.cloakIndx][0], self.cloakR[self.direction][self.cloakIndx][1]) )
@@ -5456,7 +5367,7 @@ class Chicheng(Boss):
             screen.blit( self.shad, self.rect )
         # draw particle 
         if self.parti:
-            pygame.draw.circle(screen, (190,30,30), self.parti[0], randint(6,8))
+            pygame.draw.circle(screen.surface, (190,30,30), screen.pos(self.parti[0]), randint(6,8))
        
     def reset(self):
         self.alarmTime = 0
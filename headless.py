@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+headless.py:
+Run AdventureModel.go() / EndlessModel.go() without a window, a frame cap or a real keyboard.
+Used for profiling and regression checks of the pure simulation:
+    python headless.py adv 1 --frames 600 --seed 7 --dump state.json
+    python headless.py end 1 --frames 600 --script inputs.json --profile frames.csv
+    python headless.py menu --startup trace.json --target 400       # time to the main menu's first frame
+The driver never writes ./record.sav (only main.py does that on exit).
+"""
+import os
+# SDL 的 dummy 驱动必须在 import pygame 之前设定
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import sys
+import json
+import time
+import random
+import argparse
+from contextlib import contextmanager
+import pygame
+
+# 与 main.py 相同的屏幕大小
+bg_size = 1280, 720
+FPS = 60        # 用于换算虚拟时钟：每帧推进 1000/FPS 毫秒
+
+
+# ======================================================================
+class ScriptedInput():
+    '''Replaces the keyboard. `taps` posts one KEYDOWN at a given frame; `holds` keeps a key pressed over [start, end).
+    Keys are given by their keyDic name ("jumpKey", "leftKey" ...) or by pygame key name ("return", "space" ...).'''
+
+    def __init__(self, keyDic, taps=None, holds=None):
+        self.keyDic = keyDic
+        self.taps = {}
+        for frame, names in (taps or {}).items():
+            self.taps[int(frame)] = [self._code(nm) for nm in names]
+        self.holds = [ (int(start), int(end), self._code(nm)) for (start, end, nm) in (holds or []) ]
+        self.frame = 0
+
+    @classmethod
+    def default(cls, keyDic, period=40):
+        '''Unpause at frame 1, then keep walking right, jumping and shooting every `period` frames.'''
+        taps = {1: ["return"]}
+        for frame in range(period, 100000, period):
+            taps[frame] = ["jumpKey", "shootKey"]
+        return cls(keyDic, taps=taps, holds=[(2, 100000, "rightKey")])
+
+    @classmethod
+    def fromFile(cls, keyDic, path):
+        with open(path, encoding="utf-8") as f:
+            script = json.load(f)
+        return cls(keyDic, taps=script.get("taps"), holds=script.get("holds"))
+
+    def _code(self, name):
+        if name in self.keyDic:
+            return self.keyDic[name]
+        return pygame.key.key_code(name)
+
+    def step(self, frame):
+        '''Called once per flipped frame: post this frame's KEYDOWN events.'''
+        self.frame = frame
+        for code in self.taps.get(frame, []):
+            pygame.event.post( pygame.event.Event(pygame.KEYDOWN, key=code, mod=0, unicode="", scancode=0) )
+
+    def get_pressed(self):
+        return _KeyState( code for (start, end, code) in self.holds if start<=self.frame<end )
+
+
+class _KeyState(frozenset):
+    '''Looks like the ScancodeWrapper returned by pygame.key.get_pressed().'''
+    def __getitem__(self, code):
+        return code in self
+
+
+class _Finished(Exception):
+    pass
+
+
+def _caseInsensitive(load):
+    '''The assets were authored on Windows and some names differ from the code only in case (stg1/Wing0.png, stg2/Spider_All.PNG).
+    Resolve such paths (file or folder names, e.g. image/Princess/) on case-sensitive file systems.'''
+    def resolve(path):
+        if not path or os.path.exists(path):
+            return path
+        folder, name = os.path.split(path)
+        folder = resolve(folder)
+        if os.path.isdir(folder or "."):
+            for each in os.listdir(folder or "."):
+                if each.lower()==name.lower():
+                    return os.path.join(folder, each)
+        return os.path.join(folder, name)
+    def wrapper(path, *args):
+        if isinstance(path, str):
+            path = resolve(path)
+        return load(path, *args)
+    return wrapper
+
+
+# ======================================================================
+class HeadlessRunner():
+    '''Builds the same managers as main.God.initGameData(), minus menus, cursor and record saving.'''
+
+    def __init__(self, seed=0):
+        random.seed(seed)       # 各模块 from random import ... 绑定的都是这一全局实例
+        pygame.init()
+        pygame.image.load = _caseInsensitive(pygame.image.load)
+        self.screen = pygame.display.set_mode(bg_size)
+        import model, plotManager
+        from soundBank import loadSnd
+        self.model = model
+        self.fntSet = [ ( pygame.font.Font("font/UnDinaru.ttf", size), pygame.font.Font("font/UnDinaru.ttf", size) ) for size in (14, 18, 24, 32) ]
+        self.soundList = [ loadSnd("audio/victoryHorn.wav", "ui"), loadSnd("audio/gameOver.wav", "ui"), loadSnd("audio/click.wav", "ui") ]
+        self.setManager = plotManager.Settings( 684, bg_size[1]-180, self.fntSet[2] )
+        self.stgManager = plotManager.StgManager(580, 160, self.fntSet[1])
+        self.heroBook = plotManager.HeroBook(704, bg_size[1]-120, self.fntSet[1])
+        model.GameModel.VServant = self.heroBook.servantVHero
+        self.collection = plotManager.Collection( 684, bg_size[1]-190, self.stgManager.nameList, self.fntSet[1] )
+        self.bazaar = plotManager.Bazaar(692, bg_size[1]-140, self.fntSet)
+        self.frames = 0
+        self.mod = None
+
+    def build(self, mode, stg):
+        keyDic = self.setManager.keyDic1
+        if mode=="adv":
+            hb = self.heroBook
+            playerList = [ (hb.heroList[hb.curHero[0]], keyDic, "p1") ]
+            VHostage = hb.heroList[min(stg,6)] if stg<7 else None
+            self.mod = self.model.AdventureModel(stg, playerList, self.screen, 0, self.fntSet, 1, self.collection.monsList[stg], VHostage)
+        else:
+            self.mod = self.model.EndlessModel(stg, keyDic, self.screen, 0, self.fntSet, self.collection.monsList[stg], self.heroBook.heroList[0])
+        self.mode = mode
+        return self.mod
+
+    @contextmanager
+    def _patched(self, inputs, frames):
+        '''Swap keyboard, display flip, clock and music for the scripted/virtual ones; restore everything afterwards.'''
+        saved = [ (pygame.key, "get_pressed"), (pygame.display, "flip"), (pygame.time, "get_ticks"),
+                    (pygame.mixer.music, "load"), (pygame.mixer.music, "play") ]
+        saved = [ (obj, name, getattr(obj, name)) for (obj, name) in saved ]
+        tick = self.model.TICK
+        mod = self.mod
+
+        def flip():
+            # 游戏结束后进入结算画面，不再属于模拟部分
+            if self.frames>=frames or not mod.gameOn:
+                raise _Finished()
+            self.frames += 1
+            inputs.step(self.frames)
+
+        pygame.key.get_pressed = inputs.get_pressed
+        pygame.display.flip = flip
+        pygame.time.get_ticks = lambda: self.frames*1000//FPS
+        pygame.mixer.music.load = lambda *args, **kw: None     # 无声卡，且部分BGM不随仓库发布
+        pygame.mixer.music.play = lambda *args, **kw: None
+        self.model.TICK = 0         # Clock.tick(0) 不限帧
+        try:
+            yield
+        finally:
+            self.model.TICK = tick
+            for (obj, name, func) in saved:
+                setattr(obj, name, func)
+
+    def run(self, inputs, frames):
+        '''Run the built model for at most `frames` frames. Returns (frames, seconds).'''
+        self.frames = 0
+        start = time.perf_counter()
+        with self._patched(inputs, frames):
+            try:
+                if self.mode=="adv":
+                    self.mod.go(self.soundList, self.heroBook, self.stgManager, 1, 0, self.bazaar.task)
+                else:
+                    self.mod.go(self.soundList, self.heroBook, self.stgManager, self.setManager, 0, self.bazaar.task)
+            except _Finished:
+                pass
+        return self.frames, time.perf_counter()-start
+
+    def state(self):
+        '''A JSON-friendly snapshot of the model.'''
+        mod = self.mod
+        heroes = mod.heroes if self.mode=="adv" else [mod.hero]
+        monsters = {}
+        for mons in mod.tower.monsters:
+            monsters[mons.category] = monsters.get(mons.category, 0) + 1
+        state = {
+            "mode": self.mode, "stg": mod.stg, "frames": self.frames, "gameOn": mod.gameOn,
+            "area": getattr(mod, "curArea", 0), "wave": getattr(mod, "wave", None),
+            "heroes": [ { "name": getattr(hero, "name", hero.category), "health": hero.health, "coins": getattr(hero, "coins", 0),
+                        "onlayer": hero.onlayer, "rect": list(mod.camera.toScreen(hero.rect)) } for hero in heroes ],
+            "monsters": dict(sorted(monsters.items())),
+            "stat": dict(sorted(mod.stat.items()))
+        }
+        return state
+
+
+def firstFrame(path=None):
+    '''Start main.God as `python main.py` would, under startup.TRACE, and quit right after its first flipped frame.
+    Returns the trace.'''
+    pygame.image.load = _caseInsensitive(pygame.image.load)
+    from startup import TRACE
+    TRACE.enabled = True
+    TRACE.path = path
+    TRACE.begin()
+    saved = [ (pygame.display, "flip"), (pygame.mouse, "set_cursor"),
+                (pygame.mixer.music, "load"), (pygame.mixer.music, "play"), (pygame.mixer.music, "get_busy") ]
+    saved = [ (obj, name, getattr(obj, name)) for (obj, name) in saved ]
+    flip = pygame.display.flip
+    def flipOnce():
+        flip()
+        # God.go() 在这次flip之后结束追踪；下一轮循环处理QUIT并退出
+        pygame.event.post( pygame.event.Event(pygame.QUIT) )
+    pygame.display.flip = flipOnce
+    pygame.mouse.set_cursor = lambda *args: None             # dummy驱动不支持光标
+    pygame.mixer.music.load = lambda *args, **kw: None     # 部分BGM不随仓库发布
+    pygame.mixer.music.play = lambda *args, **kw: None
+    pygame.mixer.music.get_busy = lambda: True
+    try:
+        from main import God
+        try:
+            God().go()
+        except SystemExit:
+            pass
+    finally:
+        for (obj, name, func) in saved:
+            setattr(obj, name, func)
+    return TRACE
+
+
+# ======================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless simulation driver for Knight Throde.")
+    parser.add_argument("mode", choices=("adv", "end", "menu"))
+    parser.add_argument("stg", type=int, nargs="?", default=1)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--script", help='JSON file: {"taps": {"frame": [keys]}, "holds": [[start, end, key]]}')
+    parser.add_argument("--dump", help="write the final state to this JSON file ('-' for stdout)")
+    parser.add_argument("--profile", help="record per-stage frame times into this .csv/.json file (see model.PROFILE)")
+    parser.add_argument("--startup", help="menu: write the startup trace into this .csv/.json file (see startup.STARTUP)")
+    parser.add_argument("--target", type=float, help="menu: time-to-first-frame budget in ms, exit 1 if exceeded (default startup.TARGET_MS)")
+    args = parser.parse_args(argv)
+
+    if args.mode=="menu":
+        from startup import TARGET_MS
+        trace = firstFrame(args.startup)
+        target = TARGET_MS if args.target is None else args.target
+        print( trace.report() )
+        total = trace.total()
+        print( "first frame after %.1f ms (target %.0f ms)%s" % (total, target, "  <- too slow" if total>target else "") )
+        return 1 if total>target else 0
+
+    runner = HeadlessRunner(args.seed)
+    if args.profile:
+        runner.model.PROFILE = args.profile
+    t = time.perf_counter()
+    runner.build(args.mode, args.stg)
+    build = time.perf_counter()-t
+    keyDic = runner.setManager.keyDic1
+    inputs = ScriptedInput.fromFile(keyDic, args.script) if args.script else ScriptedInput.default(keyDic)
+    frames, secs = runner.run(inputs, args.frames)
+    print( "%s stg%d: build %.2fs, %d frames in %.2fs (%.1f fps)" % (args.mode, args.stg, build, frames, secs, frames/max(secs, 1e-9)) )
+    if args.profile:
+        # 循环被中途打断，不会走到 go() 末尾的 dump
+        runner.mod.profiler.dump(args.profile)
+        for name, pct in runner.mod.profiler.summary().items():
+            print( "  %-10s p50 %6.2f  p95 %6.2f  p99 %6.2f ms" % (name, pct["p50"], pct["p95"], pct["p99"]) )
+        for name, total in runner.mod.profiler.counts().items():
+            print( "  %-10s %d in %d frames" % (name, total, frames) )
+        stats = runner.model.ASSETS.stats()
+        print( "  rotations  %d frames, %.1f MB" % (stats["rotFrames"], stats["rotBytes"]/2**20) )
+    if args.dump:
+        text = json.dumps(runner.state(), ensure_ascii=False, indent=2)
+        if args.dump=="-":
+            print(text)
+        else:
+            with open(args.dump, "w", encoding="utf-8") as f:
+                f.write(text)
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,38 +14,47 @@ import time
 from random import randint, choice
 import pygame
 from pygame.locals import *
-import pickle
 
-from database import REC_DATA   # 载入这一module的同时则会读取本地./record.sav
+from startup import TRACE      # 启动追踪须在导入其余游戏模块之前开始：它包装了pygame加载图片、声音和字体的函数
+TRACE.begin()
+from database import REC_DATA, save_rec_data, EXIT_TIMEOUT   # 载入这一module的同时则会读取本地./record.sav
 import model
-from mapElems import Coin
+from mapElems import CoinSwarm
 from canvas import SpurtCanvas, Nature
 import plotManager
-from util import ImgButton, TextButton, RichButton, Panel, MsgManager, ImgSwitcher, RichText
+from util import ImgButton, TextButton, RichButton, Panel, MsgManager, ImgSwitcher, RichText, TextCache, drawRect
+from soundBank import loadSnd
+TRACE.mark("modules imported")
 
 
 # ======================================================================
 bg_size = width, height = 1280, 720  #或1280*800(均为16:10)
+FPS = 60
+IDLE_FPS = 10       # 菜单画面完全静止时，每秒醒来照看背景音乐的次数（有输入事件则立即醒来）
 
 
 # ======================================================================
 class God():
 
+    retained = True     # 页面没有输入和动画时沿用上一帧；设为False则每帧完整重绘（供benchmarks/bench_menu.py对比）
+
     def __init__(self):
         '''====initialize window, screen and read records.======'''
-        pygame.init()
-        pygame.mouse.set_cursor(*pygame.cursors.tri_left)        # arrow(default), diamond, broken_x, tri_left, tri_right
-        # Check display mode
-        self.setDisplay()
-        pygame.display.set_caption(f"Knight Throde {plotManager.VERSION.split('_')[-1]}")
+        with TRACE.section("display"):
+            pygame.init()
+            pygame.mouse.set_cursor(*pygame.cursors.tri_left)        # arrow(default), diamond, broken_x, tri_left, tri_right
+            # Check display mode
+            self.setDisplay()
+            pygame.display.set_caption(f"Knight Throde {plotManager.VERSION.split('_')[-1]}")
 
         '''====font set========'''
-        self.fntSet = [ ( pygame.font.Font("font/UnDinaru.ttf", 14), pygame.font.Font("font/UnDinaru.ttf", 14) ), 
-            ( pygame.font.Font("font/UnDinaru.ttf", 18), pygame.font.Font("font/UnDinaru.ttf", 18) ), 
-            ( pygame.font.Font("font/UnDinaru.ttf", 24), pygame.font.Font("font/UnDinaru.ttf", 24) ), 
-            ( pygame.font.Font("font/UnDinaru.ttf", 32), pygame.font.Font("font/UnDinaru.ttf", 32) ) ]
-        # music and sound -----------------------------------------------
-        self.soundList = [ pygame.mixer.Sound("audio/victoryHorn.wav"), pygame.mixer.Sound("audio/gameOver.wav"), pygame.mixer.Sound("audio/click.wav") ]
+        with TRACE.section("fonts & sounds"):
+            self.fntSet = [ ( pygame.font.Font("font/UnDinaru.ttf", 14), pygame.font.Font("font/UnDinaru.ttf", 14) ), 
+                ( pygame.font.Font("font/UnDinaru.ttf", 18), pygame.font.Font("font/UnDinaru.ttf", 18) ), 
+                ( pygame.font.Font("font/UnDinaru.ttf", 24), pygame.font.Font("font/UnDinaru.ttf", 24) ), 
+                ( pygame.font.Font("font/UnDinaru.ttf", 32), pygame.font.Font("font/UnDinaru.ttf", 32) ) ]
+            # music and sound -----------------------------------------------
+            self.soundList = [ loadSnd("audio/victoryHorn.wav", "ui"), loadSnd("audio/gameOver.wav", "ui"), loadSnd("audio/click.wav", "ui") ]
         # 返回按钮 & 界面选项等控件 --------------------------------------
         self.mainTitle = [ pygame.image.load("image/titleE.png").convert_alpha(), pygame.image.load("image/titleC.png").convert_alpha() ]
 
@@ -54,12 +63,18 @@ class God():
         self.embedSpd = 6               # 左右滑动的比例系数，作分母，越小越快
 
         # 初始化游戏的数据和管理对象
-        self.initGameData()
+        with TRACE.section("initGameData"):
+            self.initGameData()
         self.page = "index"
         
         self.backPosY = 56      # 返回按钮的纵坐标 
         self.setNature( self.setManager.paperList[REC_DATA["SYS_SET"]["PAPERNO"]]["e"] )    # 关卡的特殊自然装饰（雨雪等）
         self.spurtCanvas = SpurtCanvas(bg_size)
+        # 保留式绘制：scene为最近一次绘制完成的页面（不含宝石、天气和消息），sceneKept表示它仍与当前状态一致
+        self.texts = TextCache()
+        self.backdrop = (None, None)    # (壁纸号, 页脚颜色), 壁纸与页脚合成的底图
+        self.scene = None
+        self.sceneKept = False
     
     def initGameData(self):
         # 三大用户交互管理助手
@@ -67,30 +82,55 @@ class God():
         self.msgManager = MsgManager(self.fntSet[1], 1)  # stg=1
         # ===============================================================
         # =========== 宏观关卡信息、英雄书、图鉴、设置管理大类 =============
-        self.setManager = plotManager.Settings( bg_size[0]-self.embedFinal-20, bg_size[1]-180, self.fntSet[2] )
-
-        self.stgManager = plotManager.StgManager(580, 160, self.fntSet[1])
-        self.heroBook = plotManager.HeroBook(bg_size[0]-self.embedFinal, bg_size[1]-120, self.fntSet[1])
-        model.GameModel.VServant = self.heroBook.servantVHero    # Set the gamemodel's VServant.
-        self.collection = plotManager.Collection(
-                            bg_size[0]-self.embedFinal-20, bg_size[1]-190, self.stgManager.nameList, self.fntSet[1]
-                        )
+        # 主页用到壁纸(设置)和任务栏(市集)，这两者在此建立；选关、英雄书和图鉴在第一次访问时才建立（见下方的property）
+        self.managers = {}
+        with TRACE.section("Settings"):
+            self.setManager = plotManager.Settings( bg_size[0]-self.embedFinal-20, bg_size[1]-180, self.fntSet[2] )
         # Bazaar ========================================================
-        self.bazaar = plotManager.Bazaar(bg_size[0]-self.embedFinal-12, bg_size[1]-140, self.fntSet)
+        with TRACE.section("Bazaar"):
+            self.bazaar = plotManager.Bazaar(bg_size[0]-self.embedFinal-12, bg_size[1]-140, self.fntSet)
 
         self.curStg = REC_DATA["SYS_SET"]["STG_STOP"]    # 当前关卡标记，默认为1
-        self.choosable = self.stgManager.checkChoosable(self.curStg)
         # Account & ID part =============================================
+        total_level = plotManager.HeroBook.countLevel( plotManager.HeroBook.checkAcc() )
         self.accPanel = Panel(180, 150, self.fntSet[1], title=("Personal Account","个人账号"))
-        self.accPanel.addItem( (f"Total Level: {self.heroBook.total_level}",f"英雄总等级：{self.heroBook.total_level}") )
+        self.accPanel.addItem( (f"Total Level: {total_level}",f"英雄总等级：{total_level}") )
+
+    def built(self, name):
+        '''The manager `name` ("stgManager", "heroBook" or "collection") if it has been built already, else None.'''
+        return self.managers.get(name)
 
-        self.shiftChapter(0)
+    @property
+    def stgManager(self):
+        if "stgManager" not in self.managers:
+            with TRACE.section("StgManager"):
+                self.managers["stgManager"] = plotManager.StgManager(580, 160, self.fntSet[1])
+                self.checkChapter()
+        return self.managers["stgManager"]
+
+    @property
+    def heroBook(self):
+        if "heroBook" not in self.managers:
+            with TRACE.section("HeroBook"):
+                self.managers["heroBook"] = plotManager.HeroBook(bg_size[0]-self.embedFinal, bg_size[1]-120, self.fntSet[1])
+            model.GameModel.VServant = self.managers["heroBook"].servantVHero    # Set the gamemodel's VServant.
+        return self.managers["heroBook"]
+
+    @property
+    def collection(self):
+        if "collection" not in self.managers:
+            with TRACE.section("Collection"):
+                self.managers["collection"] = plotManager.Collection(
+                            bg_size[0]-self.embedFinal-20, bg_size[1]-190, plotManager.StgManager.nameList, self.fntSet[1]
+                        )
+        return self.managers["collection"]
     
     def go(self):
         clock = pygame.time.Clock()
         edge = 1
         edgePlus = 1
 
+        TRACE.mark("managers built")
         self.indexButtons = {
             # -- 主游戏按钮.
             "advt": RichButton(150, 150, pygame.image.load("image/menu5.png").convert_alpha(), 
@@ -115,7 +155,7 @@ class God():
         # 主界面是否展开账户栏
         accShow = False
         
-        self.gemList = pygame.sprite.Group()
+        self.gemList = CoinSwarm()
         
         self.imgButtons = {
             "back": ImgButton( {"default":pygame.image.load("image/back.png").convert_alpha()}, "default", self.fntSet[0], labelPos="top" ),
@@ -123,7 +163,9 @@ class God():
             "switch": ImgButton( {"default":pygame.image.load("image/switch.png").convert_alpha()}, "default", self.fntSet[0], labelPos="top" ),
             "practice": ImgButton( {"default":pygame.image.load("image/camp.png").convert_alpha()}, "default", self.fntSet[0], labelPos="top" )
         }
+        self.taskIcon = pygame.image.load("image/menu.png")
         self.slide_status = ""
+        TRACE.mark("menu widgets built")
 
         while True:
 
@@ -131,12 +173,27 @@ class God():
                 pygame.mixer.music.load("audio/stg7BG.wav")  # Play bgm
                 pygame.mixer.music.set_volume(REC_DATA["SYS_SET"]["VOL"]/100)
                 pygame.mixer.music.play(loops=-1)
+
+            # 页面自上次绘制以来没有变化，且没有待处理的输入：不必重新走一遍下面的绘制
+            if self.sceneKept and not pygame.event.peek():
+                if self.overlayAnimating():
+                    self.screen.blit( self.scene, (0,0) )
+                    self.paintOverlay()
+                    pygame.display.flip()
+                    clock.tick(FPS)
+                else:
+                    # 整个画面静止：不重绘也不flip，等待下一个事件
+                    event = pygame.event.wait(1000//IDLE_FPS)
+                    if event.type!=NOEVENT:
+                        pygame.event.post(event)
+                continue
+            busy = self.sceneAnimating()
+            # 各页面先绘制、后读取输入：处理输入的这一帧画的还是输入之前的状态，不能留作底图
+            hadInput = bool(pygame.event.peek())
             
-            # wall paper
-            self.addSymm(self.setManager.paperList[REC_DATA["SYS_SET"]["PAPERNO"]]["p"], 0, 0)
-            # 上下页眉页脚
+            # wall paper & 上下页眉页脚
             #self.drawRect( 0, 0, bg_size[0], 60, self.stgManager.themeColor[0] )
-            self.drawRect( 0, bg_size[1]-60, bg_size[0], 60, self.stgManager.themeColor[0] )
+            self.paintBackdrop()
             ctrX = self.embed//2-bg_size[0]//2
             # Game Name Title
             self.addSymm(self.mainTitle[REC_DATA["SYS_SET"]["LGG"]], ctrX, -230 )
@@ -190,13 +247,11 @@ class God():
                 task_upd = self.bazaar.taskPanel.paint(self.screen, width-120,140, pos)
                 # 任务图标
                 bazRect = self.bazaar.taskPanel.rect
-                self.addSymm(pygame.image.load("image/menu.png"), bazRect.left+10-width//2, bazRect.top+12-height//2)
+                self.addSymm(self.taskIcon, bazRect.left+10-width//2, bazRect.top+12-height//2)
 
                 # 英雄可分配SP
-                for each in self.heroBook.heroList:
-                    if each.SP>0:
-                        self.indexButtons["left2"].add_prompt(("Unused SP","点数可分配"))
-                        break
+                if plotManager.HeroBook.unusedSP():
+                    self.indexButtons["left2"].add_prompt(("Unused SP","点数可分配"))
                 # 显示章节剧情进度
                 but = self.indexButtons["advt"].rect
                 # only count those chapters have been passed at any difficulty
@@ -248,7 +303,8 @@ class God():
                             sys.exit()
                         elif self.indexButtons["account"].hover_on(pos):
                             accShow = True
-                            self.heroBook.update_total_level()
+                            if self.built("heroBook"):
+                                self.heroBook.update_total_level()
             # =================================================
             # =================== 选关界面 =====================
             elif ( self.page == "stgChoosing" ):
@@ -284,18 +340,18 @@ class God():
                         if len(self.imgSwitcher.SSList)==0:
                             # 左
                             if not (self.curStg == 1):
-                                leftC = self.addSymm(self.stgManager.coverAbb[self.curStg-2], mid-140, 0 )
+                                leftC = self.addSymm(self.stgManager.cover(self.curStg-1, thumb=True), mid-140, 0 )
                                 if ( leftC.left < pos[0] < leftC.right ) and ( leftC.top < pos[1] < leftC.bottom ):
                                     self.drawRect( leftC.left, leftC.top, leftC.width, leftC.height, (255,255,255,60) )
                                 pygame.draw.rect( self.screen, (20,20,20), leftC, 1 )
                             # 右
                             if not ( self.curStg == len(self.stgManager.nameList) ):
-                                rightC = self.addSymm(self.stgManager.coverAbb[self.curStg], mid+140, 0 )
+                                rightC = self.addSymm(self.stgManager.cover(self.curStg+1, thumb=True), mid+140, 0 )
                                 if ( rightC.left < pos[0] < rightC.right ) and ( rightC.top < pos[1] < rightC.bottom ):
                                     self.drawRect( rightC.left, rightC.top, rightC.width, rightC.height, (255,255,255,60) )
                                 pygame.draw.rect( self.screen, (20,20,20), rightC, 1 )
                             # 中
-                            coverRect = self.drawCover(self.stgManager.coverList[self.curStg-1], self.stgManager.nameList[self.curStg-1], pos, mid, edge)
+                            coverRect = self.drawCover(self.stgManager.cover(self.curStg), self.stgManager.nameList[self.curStg-1], pos, mid, edge)
                             # draw 3 stars
                             if self.choosable:
                                 for i in range(1,4):
@@ -323,7 +379,7 @@ class God():
                         r1 = self.addSymm(self.stgManager.windowLeft, mid-145, bg_size[1]//2-62-90)
                         r2 = self.addSymm(self.stgManager.windowRight, mid+145, bg_size[1]//2-62-90)
 
-                        coverRect = self.drawCover(self.stgManager.endlessCover, ("Statue Guardian","石像守卫者"), pos, mid, edge)
+                        coverRect = self.drawCover(self.stgManager.cover(0), ("Statue Guardian","石像守卫者"), pos, mid, edge)
                         # 其他呈现的信息
                         self.drawRect( coverRect.left, coverRect.top, coverRect.width, 24, (255,255,255,120) )
                         self.addTXT( 
@@ -349,7 +405,7 @@ class God():
                                                     pos, label=self.stgManager.get_stone_name())
                     
                     # compass wave
-                    if len(self.spurtCanvas.spatters)<=0:
+                    if len(self.spurtCanvas)<=0:
                         ctr = r1.left+r1.width//2
                         self.spurtCanvas.addWaves( (ctr,580), (255,255,255,250), 16, 14 )
                     # natural decoration:
@@ -650,14 +706,18 @@ class God():
                                     for label in self.indexButtons:
                                         if not label=="account":
                                             self.indexButtons[label].draw_text()
-                                    # 所有panel内部button的文字替换
-                                    for pan in [self.stgManager.panel, self.stgManager.panelEndless, self.heroBook.panel, self.collection.panel, 
-                                                self.bazaar.taskPanel, self.accPanel]:
+                                    # 所有panel内部button的文字替换（尚未建立的页面，建立时即为当前语言）
+                                    panels = [self.bazaar.taskPanel, self.accPanel]+self.bazaar.stonePanels
+                                    if self.built("stgManager"):
+                                        panels += [self.stgManager.panel, self.stgManager.panelEndless]
+                                        # 一个单独textbutton的文字替换
+                                        self.stgManager.unlock_button.draw_text()
+                                    if self.built("heroBook"):
+                                        panels.append(self.heroBook.panel)
+                                    if self.built("collection"):
+                                        panels.append(self.collection.panel)
+                                    for pan in panels:
                                         pan.updateButton()
-                                    for each in self.bazaar.stonePanels:
-                                        each.updateButton()
-                                    # 一个单独textbutton的文字替换
-                                    self.stgManager.unlock_button.draw_text()
                                 elif self.setManager.chosenKey == "volume":
                                     if ( event.key == pygame.K_a ) and ( REC_DATA["SYS_SET"]["VOL"]> 0 ):
                                         REC_DATA["SYS_SET"]["VOL"] -= 10
@@ -749,30 +809,63 @@ class God():
                                             self.addStones(tag=self.bazaar.currentKey, pos=pos, tgt=self.bazaar.myStonePanel)
                                         elif res=="lackGem":
                                             self.msgManager.alert("lackGem")
-            
-            # move flying gems
-            for gem in self.gemList:
-                gem.move( delay=0 )
-                gem.paint(self.screen)
-            # Nature Effect.
-            self.nature.update(self.screen)
-            # Message Window.
-            self.msgManager.run()
-            self.msgManager.paint(self.screen)
+
+            # 本帧没有处理输入，且开始和结束时都没有动画，画出的页面才是稳定的，留作后续帧的底图
+            self.sceneKept = self.retained and not hadInput and not busy and not self.sceneAnimating()
+            if self.sceneKept:
+                if not self.scene:
+                    self.scene = pygame.Surface(bg_size).convert()
+                self.scene.blit( self.screen, (0,0) )
+            self.paintOverlay()
             pygame.display.flip()
-            clock.tick(60)
+            TRACE.end("first frame")    # 仅第一帧有效，之后直接返回
+            clock.tick(FPS)
+
+    def sceneAnimating(self):
+        '''Whether the page changes by itself from frame to frame (input is handled separately: any event redraws the page).'''
+        return ( self.slide_status!="" or self.page=="stgChoosing"      # 选关页的罗盘、波纹和封面边框一直在动
+                    or (self.built("heroBook") and self.heroBook.bkCnt!=0)     # 翻页
+                    or len(self.gemList)>0 )        # 飞向账户栏的宝石会改变账户栏
+
+    def overlayAnimating(self):
+        return bool( self.nature or self.gemList or self.msgManager.busy() )
+
+    def paintOverlay(self):
+        '''The layers drawn over the page every frame: flying gems, nature effect and messages.'''
+        # move flying gems
+        self.gemList.update( delay=0 )
+        for gem in self.gemList:
+            gem.paint(self.screen)
+        # Nature Effect.
+        if self.nature:
+            self.nature.update(self.screen)
+        # Message Window.
+        self.msgManager.run()
+        self.msgManager.paint(self.screen)
+
+    def paintBackdrop(self):
+        '''Wallpaper and footer, composed once per wallpaper/theme color.'''
+        key = ( REC_DATA["SYS_SET"]["PAPERNO"], plotManager.StgManager.themeColor[0] )
+        if self.backdrop[0]!=key:
+            paper = self.setManager.paper(key[0])
+            surf = pygame.Surface(bg_size).convert()
+            surf.blit( paper, ( (width-paper.get_width())//2, (height-paper.get_height())//2 ) )
+            drawRect( 0, bg_size[1]-60, bg_size[0], 60, key[1], surf )
+            self.backdrop = (key, surf)
+        self.screen.blit( self.backdrop[1], (0,0) )
     
     def paint_right_panel(self, pos, color_n, title=(), bg=None, bg_pos=()):
         mid = self.embed//2
         # left and right side panel
         #self.drawRect( 0, 0, self.embed, bg_size[1], (60,60,60,120) )
-        self.drawRect( self.embed, 60, max(bg_size[0]-self.embed, 0), bg_size[1]-120, self.stgManager.themeColor[color_n] )
+        themeColor = plotManager.StgManager.themeColor     # 类属性：各页面的侧栏不必为此建立选关页
+        self.drawRect( self.embed, 60, max(bg_size[0]-self.embed, 0), bg_size[1]-120, themeColor[color_n] )
         # bg image
         if bg:
             self.addSymm(bg, mid, bg_pos)
         # upper and lower banner
-        self.drawRect( self.embed, 0, max(bg_size[0]-self.embed, 0), 60, self.stgManager.themeColor[0] )
-        self.drawRect( self.embed, bg_size[1]-60, max(bg_size[0]-self.embed, 0), 60, self.stgManager.themeColor[0] )
+        self.drawRect( self.embed, 0, max(bg_size[0]-self.embed, 0), 60, themeColor[0] )
+        self.drawRect( self.embed, bg_size[1]-60, max(bg_size[0]-self.embed, 0), 60, themeColor[0] )
         # title
         if title:
             self.addTXT( title, self.fntSet[2], mid, 0.03 )
@@ -797,17 +890,22 @@ class God():
         if to==-1:
             if (self.curStg == 1):
                 return
-            self.imgSwitcher.addSwitch(self.stgManager.coverList[self.curStg-1], coverRect, 0.4, 120, 30, time=6)   # 向右退位
-            self.imgSwitcher.addSwitch(self.stgManager.coverAbb[self.curStg-2], leftC, 3.1, 120, -30, time=6)       # 左侧上位
+            self.imgSwitcher.addSwitch(self.stgManager.cover(self.curStg), coverRect, 0.4, 120, 30, time=6)   # 向右退位
+            self.imgSwitcher.addSwitch(self.stgManager.cover(self.curStg-1, thumb=True), leftC, 3.1, 120, -30, time=6)       # 左侧上位
         elif to==1:
             if ( self.curStg == len(self.stgManager.nameList) ):
                 return
-            self.imgSwitcher.addSwitch(self.stgManager.coverList[self.curStg-1], coverRect, 0.4, -120, 30, time=6)  # 向左退位
-            self.imgSwitcher.addSwitch(self.stgManager.coverAbb[self.curStg], rightC, 3.1, -120, -30, time=6)       # 右侧上位
+            self.imgSwitcher.addSwitch(self.stgManager.cover(self.curStg), coverRect, 0.4, -120, 30, time=6)  # 向左退位
+            self.imgSwitcher.addSwitch(self.stgManager.cover(self.curStg+1, thumb=True), rightC, 3.1, -120, -30, time=6)       # 右侧上位
         self.curStg += to
         # save chpter stop info.
         REC_DATA["SYS_SET"]["STG_STOP"] = self.curStg
         self.setNature(self.curStg)
+        self.checkChapter()
+
+    def checkChapter(self):
+        '''Prefetch the covers around self.curStg and check whether it can be entered or unlocked.'''
+        self.stgManager.prefetchCovers(self.curStg)
         self.choosable = self.stgManager.checkChoosable(self.curStg)
         self.unlockBut = True if (REC_DATA["SYS_SET"]["MOD_STOP"]==0) and (not self.choosable) and (REC_DATA["CHAPTER_REC"][self.curStg-2]>=0) else False
 
@@ -845,6 +943,8 @@ class God():
                     del mod
                     # 结算符石数量
                     self.stgManager.decr_stone()
+                    # 每局结束都存档（后台写入，不阻塞）
+                    save_rec_data()
                 #self.setManager.changeProcessState("index")
                 #print(">>章节结束",psutil.Process(os.getpid()).memory_info().rss)
             elif REC_DATA["SYS_SET"]["MOD_STOP"] == 1:
@@ -861,6 +961,8 @@ class God():
                     del mod
                     # 结算符石数量
                     self.stgManager.decr_stone()
+                    # 每局结束都存档（后台写入，不阻塞）
+                    save_rec_data()
                 #self.setManager.changeProcessState("index")
                 #print(">>章节结束",psutil.Process(os.getpid()).memory_info().rss)
             # 每次章节结束后，都更新主界面任务栏状态
@@ -882,6 +984,7 @@ class God():
         del mod
         # 结算符石数量
         self.stgManager.decr_stone()
+        save_rec_data()
 
     def drawCover(self, cover, chpName, pos, mid, edge):
         coverRect = self.addSymm(cover, mid, -40 )
@@ -929,18 +1032,20 @@ class God():
         for i in range(0, num):
             randPos = [ randint(pos[0]-1, pos[0]+1), randint(pos[1]-1, pos[1]+1) ]
             speed = [ randint(-2,2), randint(-4,-1) ]
-            gem = Coin( randPos, choice( cList ), speed, tgt, typ="gem" )
-            self.gemList.add( gem )
+            self.gemList.spawn( randPos, choice( cList ), speed, tgt, "gem" )
     
     def addStones(self, tag, pos, tgt):
-        stone = Coin( list(pos), cnt=22, speed=[0,-4], tgt=tgt, typ=f"stone_{tag}")
-        self.gemList.add(stone)
+        self.gemList.spawn( list(pos), 22, [0,-4], tgt, f"stone_{tag}" )
     
     def setDisplay(self):
         if REC_DATA["SYS_SET"]["DISPLAY"]==0:
             self.screen = pygame.display.set_mode( (bg_size) )
         elif REC_DATA["SYS_SET"]["DISPLAY"]==1:
             self.screen = pygame.display.set_mode( (bg_size), pygame.FULLSCREEN|pygame.HWSURFACE )
+        # 换了显示模式，缓存的面按新的像素格式重建
+        self.backdrop = (None, None)
+        self.scene = None
+        self.sceneKept = False
 
     def addSymm(self, surface, x, y):       # Surface对象； x，y为正负（偏离中心点）像素值
         rect = surface.get_rect()
@@ -951,7 +1056,7 @@ class God():
 
     def addTXT(self, txt, font, x, y, rgb=(255,255,255)):
         '''txt文本内容(各语言的同义元组)；rgb（0，0，0）； x为正负（偏离中心线）像素值； y为0-1的百分数'''
-        txt = font[REC_DATA["SYS_SET"]["LGG"]].render(txt[REC_DATA["SYS_SET"]["LGG"]], True, rgb)
+        txt = self.texts.render(font[REC_DATA["SYS_SET"]["LGG"]], txt[REC_DATA["SYS_SET"]["LGG"]], True, rgb)
         rect = txt.get_rect()
         rect.left = (width - rect.width) // 2 + x
         rect.top = height * y
@@ -959,13 +1064,7 @@ class God():
         return rect                   # 返回文字的位置信息以供更多操作
         
     def drawRect(self, x, y, width, height, rgba):
-        surf = pygame.Surface( (width, height) ).convert_alpha()
-        rect = surf.get_rect()
-        rect.left = x
-        rect.top = y
-        surf.fill( rgba )
-        self.screen.blit( surf, rect )
-        return rect
+        return drawRect(x, y, width, height, rgba, self.screen)
 
 
 # ======================================================================
@@ -978,6 +1077,5 @@ if __name__ == "__main__":
         # 系统正常退出
         pass
     finally:
-        with open('./record.sav', 'wb') as f:
-            pickle.dump(REC_DATA, f)
+        save_rec_data(block=True, timeout=EXIT_TIMEOUT)
         pygame.quit()
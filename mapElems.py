@@ -7,37 +7,47 @@ import pygame
 from random import random, randint, choice
 
 from database import NB, DMG_FREQ, PB
-from util import InanimSprite, HPBar, Panel, RichButton
-from util import getPos, generateShadow
+from util import InanimSprite, HPBar, Panel, RichButton, CAMERA
+from util import getPos, maskRect, generateShadow, loadImg, loadMask, getMask
+from soundBank import loadSnd
 
 # =========================================================================
 # ============================= Coins & Chests ============================
 # =========================================================================
 class Coin(InanimSprite):
-    imgList = []
-    shadList = []
-    gemImg = None
+    frames = {}     # typ -> (图片, 阴影, 遮罩)的帧列表，同类的所有Coin共用
 
     def __init__(self, pos, cnt, speed, tgt, typ="coin"): # 参数color:推荐带上透明度RGBA；参数speed:为一个二元组
-        if not self.imgList:
-            Coin.imgList = [ pygame.image.load("image/coin"+str(i)+".png").convert_alpha() for i in range(6) ]
-            Coin.shadList = [ generateShadow(img) for img in Coin.imgList ]
-        
         InanimSprite.__init__(self, "coin")
-        self.typ = "coin"
+        self.reset(pos, cnt, speed, tgt, typ)
+
+    @classmethod
+    def getFrames(cls, typ):
+        '''typ类（coin、gem或stone_标签）的(imgList, shadList, maskList)，每类只加载和生成一次'''
+        frames = cls.frames.get(typ)
+        if frames is None:
+            if typ=="gem":
+                imgList = [ loadImg("image/gem"+str(i)+".png") for i in range(4) ]
+            elif typ.startswith("stone"):
+                tag = typ.split("_")[-1]
+                imgList = [ loadImg(f"image/runestone/{tag}.png") ] * 2
+            else:
+                imgList = [ loadImg("image/coin"+str(i)+".png") for i in range(6) ]
+            frames = cls.frames[typ] = ( imgList, [ generateShadow(img) for img in imgList ], [ getMask(img) for img in imgList ] )
+        return frames
+
+    def reset(self, pos, cnt, speed, tgt, typ="coin"):
+        '''设定类别、位置、散开的帧数、速度和目标。CoinSwarm回收的Coin也经此重新使用'''
+        self.imgList, self.shadList, self.maskList = self.getFrames(typ)
         if typ=="gem":
-            self.imgList = [ pygame.image.load("image/gem"+str(i)+".png").convert_alpha() for i in range(4) ]
-            self.shadList = [ generateShadow(img) for img in self.imgList ]
             self.typ = "gem"
         elif typ.startswith("stone"):
-            tag = typ.split("_")[-1]
-            self.imgList = [ pygame.image.load(f"image/runestone/{tag}.png").convert_alpha() ] * 2
-            self.shadList = [ generateShadow(self.imgList[0]) ] * 2
             self.typ = "stone"
-        
+        else:
+            self.typ = "coin"
         self.imgIndx = 0
         self.image = self.imgList[self.imgIndx]
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = self.maskList[self.imgIndx]
         self.rect = self.image.get_rect()
         self.rect.left = pos[0]-self.rect.width//2
         self.rect.top = pos[1]-self.rect.height//2
@@ -46,6 +56,12 @@ class Coin(InanimSprite):
         self.tgt = tgt
     
     def move(self, delay):
+        '''单独更新一枚。到达目标时返回True。成群的金币由CoinSwarm.update()整批更新'''
+        if self._drift(delay):
+            return False
+        return self._home( getPos(self.tgt, 0.5, 0.5), maskRect(self.tgt) )
+
+    def _drift(self, delay):
         self.rect.left += self.speed[0]
         self.rect.top += self.speed[1]
         if not delay%2:
@@ -53,29 +69,32 @@ class Coin(InanimSprite):
         # 若还有cnt，则进行散开移动，且减cnt。
         if self.cnt > 0:
             self.cnt -= 1
-        # 否则，该质点进入第二状态，追随self.tgt。
-        else:
-            # 当和tgt重合，将该点删除。
-            if pygame.sprite.collide_mask(self, self.tgt):
-                self.tgt.receiveExp(1, self.typ)
-                self.kill()
-                return True
-            myPos = getPos(self, 0.5, 0.5)
-            tgtPos = getPos(self.tgt, 0.5, 0.5)
-            for i in range(2):
-                self.speed[i] = ( tgtPos[i] - myPos[i] ) // 12
-                if i==1:
-                    continue
-                if self.speed[i]>0 and self.speed[i]<=3:
-                    self.speed[i] = 4
-                elif self.speed[i]<0 and self.speed[i]>=-3:
-                    self.speed[i] = -4
+            return True
+        return False
+
+    def _home(self, tgtPos, tgtRect):
+        # 否则，该质点进入第二状态，追随self.tgt。tgtPos为其中心，tgtRect为collide_mask实际检测的区域
+        # 当和tgt重合，将该点删除。先比较矩形，相交时才做逐像素的检测
+        if self.rect.colliderect(tgtRect) and pygame.sprite.collide_mask(self, self.tgt):
+            self.tgt.receiveExp(1, self.typ)
+            self.kill()
+            return True
+        myPos = getPos(self, 0.5, 0.5)
+        for i in range(2):
+            self.speed[i] = ( tgtPos[i] - myPos[i] ) // 12
+            if i==1:
+                continue
+            if self.speed[i]>0 and self.speed[i]<=3:
+                self.speed[i] = 4
+            elif self.speed[i]<0 and self.speed[i]>=-3:
+                self.speed[i] = -4
+        return False
     
     def _shiftImg(self):
         prePos = [self.rect.left+self.rect.width//2, self.rect.top+self.rect.height//2]
         self.imgIndx = (self.imgIndx+1) % len(self.imgList)
         self.image = self.imgList[self.imgIndx]
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = self.maskList[self.imgIndx]
         self.rect = self.image.get_rect()
         self.rect.left = prePos[0]-self.rect.width//2
         self.rect.top = prePos[1]-self.rect.height//2
@@ -86,6 +105,47 @@ class Coin(InanimSprite):
         canvas.blit(self.shadList[self.imgIndx], shadRect)
         canvas.blit(self.image, self.rect)
 
+# 金币群
+class CoinSwarm(pygame.sprite.Group):
+    '''
+    飞向各自目标的金币、宝石群。spawn()优先取用回收池中的Coin，到达目标的Coin回到池中；
+    update()整批推进所有成员：同一目标的中心和检测区域每批只计算一次，目标收下一枚之后（账户栏等可能因此换图）才重新计算。
+    '''
+    def __init__(self):
+        pygame.sprite.Group.__init__(self)
+        self.pool = []
+        self.created = 0        # 实际创建过的Coin数
+
+    def spawn(self, pos, cnt, speed, tgt, typ="coin", *groups):
+        '''放出一枚Coin，除本群外同时加入groups（如塔楼的dec1，以便绘制和随塔楼平移）'''
+        if self.pool:
+            coin = self.pool.pop()
+            coin.reset(pos, cnt, speed, tgt, typ)
+        else:
+            coin = Coin(pos, cnt, speed, tgt, typ)
+            self.created += 1
+        self.add(coin)
+        coin.add(*groups)
+        return coin
+
+    def update(self, delay):
+        '''所有成员前进一步，按加入的顺序。返回本批到达目标的数量'''
+        geometry = {}
+        arrived = 0
+        for coin in self.sprites():
+            if coin._drift(delay):
+                continue
+            tgt = coin.tgt
+            geo = geometry.get(tgt)
+            if geo is None:
+                geo = geometry[tgt] = ( getPos(tgt, 0.5, 0.5), maskRect(tgt) )
+            if coin._home(*geo):
+                del geometry[tgt]
+                coin.tgt = None
+                self.pool.append(coin)
+                arrived += 1
+        return arrived
+
 # --------------------------------------
 class Chest(InanimSprite):
 
@@ -113,7 +173,7 @@ class Chest(InanimSprite):
         self.bg_size = bg_size
         self.opened = False
         self.tower = tower
-        self.getItemSnd = pygame.mixer.Sound("audio/getItem.wav")
+        self.getItemSnd = loadSnd("audio/getItem.wav", "hero")
 
     def interact(self, trigger):
         self.open(trigger)
@@ -143,18 +203,10 @@ class Chest(InanimSprite):
             hero.bagpack.incItem(self.contains, self.number)
             subsImg = hero.bagpack.readItemByName( self.contains )[1]
             # deal inside substance
-            substance = ChestContent(self.contains, subsImg, self.number, getPos(self,0.5,0.8), hero.slot.slotDic["bag"][1])
+            substance = ChestContent(self.contains, subsImg, self.number, CAMERA.toScreen(getPos(self,0.5,0.8)), hero.slot.slotDic["bag"][1])
             hero.eventList.append( substance )
             return True
    
-    def lift(self, dist):
-        self.rect.bottom += dist
-        self.shadRect.bottom += dist
-
-    def level(self, dist):
-        self.rect.left += dist
-        self.shadRect.left += dist
-
     def paint(self, surface):
         surface.blit(self.shad, self.shadRect)
         surface.blit(self.image, self.rect)
@@ -162,8 +214,9 @@ class Chest(InanimSprite):
 class ChestContent(pygame.sprite.Sprite):
     category = "chestContent"
 
-    def __init__(self, name, image, number, ctr, tgtRect, spacing=10):
-        """Produce a list of imgs based on img. Their rects are arranged horrizontally with wanted spacing."""
+    def __init__(self, name, image, number, ctr, tgtRect, spacing=10, world=False):
+        """Produce a list of imgs based on img. Their rects are arranged horrizontally with wanted spacing.
+        The imgs live in screen coordinates; world=True means tgtRect is a world rect (e.g. a hero) to be seen through the camera."""
         pygame.sprite.Sprite.__init__(self)
         self.image = image
         self.mask = pygame.mask.from_surface(self.image)
@@ -176,6 +229,7 @@ class ChestContent(pygame.sprite.Sprite):
             self.rectList.append( rect )
         self.name = name
         self.tgtRect = tgtRect
+        self.world = world
         self.reached = False
         self.showCnt = 12
     
@@ -189,14 +243,15 @@ class ChestContent(pygame.sprite.Sprite):
                 surface.blit( self.image, each )
             self.showCnt -= 1
         else:
+            tgtRect = CAMERA.toScreen(self.tgtRect) if self.world else self.tgtRect
             for each in self.rectList:
-                spdX = (self.tgtRect.left+self.tgtRect.width//2-each.left) // 20
+                spdX = (tgtRect.left+tgtRect.width//2-each.left) // 20
                 if spdX>0 and spdX<=3:
                     spdX = 4
                 elif spdX<0 and spdX>=-3:
                     spdX = -4
                 
-                spdY = (self.tgtRect.top+self.tgtRect.height//2-each.top) // 20
+                spdY = (tgtRect.top+tgtRect.height//2-each.top) // 20
                 if spdX>0 and spdX<=3:
                     spdX = 4
                 elif spdX<0 and spdX>=-3:
@@ -205,19 +260,11 @@ class ChestContent(pygame.sprite.Sprite):
                 each.left += spdX
                 each.bottom += spdY
                 surface.blit( self.image, each )
-                if each.colliderect(self.tgtRect):
+                if each.colliderect(tgtRect):
                 #if spdX == 0 and spdY == 0:
                     self.rectList.remove(each)
             if len(self.rectList)<=0:
                 self.reached = True
-    
-    def lift(self, dist):
-        for each in self.rectList:
-            each.top += dist
-    
-    def level(self, dist):
-        for each in self.rectList:
-            each.left += dist
 
 
 # =========================================================================
@@ -227,8 +274,8 @@ class Wall(InanimSprite):
     def __init__(self, x, y, cate, stg, coord):
         InanimSprite.__init__(self, cate)
         src = "image/stg"+ str(stg) + "/" + cate + ".png"
-        self.image = pygame.image.load(src).convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.image = loadImg(src)
+        self.mask = loadMask(src)
         self.rect = self.image.get_rect()
         self.rect.left = x
         self.rect.top = y
@@ -323,8 +370,8 @@ class WebWall(Wall):
     def __init__(self, x, y, stg, coord, fade=False):
         Wall.__init__(self, x, y, "webWall", stg, coord)
         self.oriImage = self.image
-        self.imgBroken = pygame.image.load("image/stg2/webWallBroken.png").convert_alpha()
-        self.imgPulled = pygame.image.load("image/stg2/webPulled.png").convert_alpha()
+        self.imgBroken = loadImg("image/stg2/webWallBroken.png")
+        self.imgPulled = loadImg("image/stg2/webPulled.png")
         self.valid = True
         self.ctr = [self.rect.left+self.rect.width//2, self.rect.top+self.rect.height//3]  # 黏贴点
         self.bldColor = (255,255,255,255)
@@ -360,17 +407,9 @@ class WebWall(Wall):
         self.valid = False
         self.image = self.imgBroken
 
-    def drawHealth(self, surface):
+    def drawHealth(self, surface, offset=(0,0)):
         pass
 
-    def lift(self, dist):
-        self.rect.bottom += dist
-        self.ctr[1]
-
-    def level(self, dist):
-        self.rect.left += dist
-        self.ctr[0] += dist
-
 # -----------------------------------------------------
 class SideWall(Wall):
     def __init__(self, x, y, stg, coord, decor=True):
@@ -390,11 +429,6 @@ class SideWall(Wall):
         self.kill()
         del self
     
-    def lift(self, dist):
-        self.rect.bottom += dist
-        if self.decor:
-            self.decor.lift(dist)
-
     def level(self, dist):
         self.rect.left += dist
         if self.decor:
@@ -419,24 +453,19 @@ class Decoration(InanimSprite):
                 x = [x[0]+6, x[1]-6]
             # 有多种装饰可供选择。尾号为A或B……从options参数中选择一个。
             tail = choice( options )
-            self.imgList = [ pygame.image.load("image/stg"+str(stg)+"/"+cate+tail+"0.png").convert_alpha(), pygame.image.load("image/stg"+str(stg)+"/"+cate+tail+"1.png").convert_alpha(), \
-                pygame.image.load("image/stg"+str(stg)+"/"+cate+tail+"2.png").convert_alpha(), pygame.image.load("image/stg"+str(stg)+"/"+cate+tail+"1.png").convert_alpha() ]
+            src = "image/stg"+str(stg)+"/"+cate+tail
         elif cate == "sideDecor":
             if stg==4:
                 x = [x[0]-14+36, x[1]-58+36]
-            self.imgList = [ pygame.image.load("image/stg"+str(stg)+"/"+cate+"0.png").convert_alpha(), pygame.image.load("image/stg"+str(stg)+"/"+cate+"1.png").convert_alpha(), \
-                pygame.image.load("image/stg"+str(stg)+"/"+cate+"2.png").convert_alpha(), pygame.image.load("image/stg"+str(stg)+"/"+cate+"1.png").convert_alpha() ]
+            src = "image/stg"+str(stg)+"/"+cate
 
         # 有一半的可能性会方向相反
-        if random()>=0.5:
-            self.imgList = [ pygame.transform.flip(self.imgList[0], True, False), pygame.transform.flip(self.imgList[1], True, False),
-                pygame.transform.flip(self.imgList[2], True, False), pygame.transform.flip(self.imgList[3], True, False) ]
-            x = x[1]
-        else:
-            x = x[0]
+        flipped = (random()>=0.5)
+        self.imgList = [ loadImg(src+"0.png", flipped), loadImg(src+"1.png", flipped), loadImg(src+"2.png", flipped), loadImg(src+"1.png", flipped) ]
+        x = x[1] if flipped else x[0]
         self.image = self.imgList[0]
         self.indx = 0
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = loadMask(src+"0.png", flipped)
         self.rect = self.image.get_rect()
         self.rect.left = x - self.rect.width//2
         self.rect.top = y - self.rect.height
@@ -571,8 +600,8 @@ class Merchant(Porter):
         self.offerList = [each for each in self.offerDic]
         self.refreshCost = 2
         self.coinIcon = pygame.transform.smoothscale( pygame.image.load("image/coin0.png"), (22, 24) )
-        self.sellSnd = pygame.mixer.Sound("audio/coin.wav")
-        self.helloSnd = pygame.mixer.Sound("audio/merchantC.wav")
+        self.sellSnd = loadSnd("audio/coin.wav", "ui")
+        self.helloSnd = loadSnd("audio/merchantC.wav", "ui")
         # pos parameters.
         self.subW = 116
         self.offsetX = -60
@@ -793,7 +822,7 @@ class BlockStone(InanimSprite):
             self.rect.left = tmpPos[0]
             self.rect.bottom = tmpPos[1]
 
-    def drawHealth(self, surface):
+    def drawHealth(self, surface, offset=(0,0)):
         pass
 
 # CP4
@@ -850,7 +879,7 @@ class Totem(InanimSprite):
         self.image = pygame.image.load(f"image/stg5/{category}.png")
         self.shad = generateShadow( self.image )
         self.lightSurf = generateShadow( self.image, color=self.themeColor )
-        self.snd = pygame.mixer.Sound("audio/healing.wav")
+        self.snd = loadSnd("audio/healing.wav", "monster")
         # Monster attri part
         self.health = NB[category]["health"]
         self.bldColor = (255,200,40,240)
@@ -866,7 +895,7 @@ class Totem(InanimSprite):
     def checkExposion(self, canvas):
         if self.health <= 0:
             canvas.addPebbles(self, 4, type="metalDebri")
-            pygame.mixer.Sound("audio/wizard/hit.wav").play(0)
+            loadSnd("audio/wizard/hit.wav", "monster").play(0)
             self.kill()
     
     def run(self, monsters, spurtCanvas):
@@ -902,7 +931,7 @@ class Totem(InanimSprite):
         self.health -= damage
         # 删除自身的权限由checkExposion()实现
 
-    def drawHealth(self, surface):
+    def drawHealth(self, surface, offset=(0,0)):
         pass
     
 class Tracker(InanimSprite):
@@ -1041,19 +1070,11 @@ class Fan(InanimSprite):
             self.kill()
             return
     
-    def drawHealth(self, surface):
+    def drawHealth(self, surface, offset=(0,0)):
         pass
     
     def stun(self, duration):
         pass
-    
-    def lift(self, dist):
-        self.rect.bottom += dist
-        self.center[1] += dist
-    
-    def level(self, dist):
-        self.rect.left += dist
-        self.center[0] += dist
 
 # CP7
 class Stabber(InanimSprite):
@@ -1110,7 +1131,7 @@ class Statue(Porter):
             self.doom = True
             self.spurtCanvas.addHalo("deadHalo", 180)
             # 音效、爆炸效果
-            pygame.mixer.Sound("audio/wizard/hit.wav").play(0)
+            loadSnd("audio/wizard/hit.wav", "monster").play(0)
             self.spurtCanvas.addPebbles(self, 5, type="jadeDebri")
             self.spurtCanvas.addSmoke(1, (3,5,7), 5, (10,10,10,240), getPos(self,random(),random()), 4)
             # Image
@@ -1142,7 +1163,7 @@ class Statue(Porter):
             self.hitFeedIndx -= 1
         return 0
 
-    def drawHeads(self, screen):
+    def drawHeads(self, screen, offset=(0,0)):
         if self.health<=0:
             return
         # 画HP & loading条
@@ -1150,7 +1171,7 @@ class Statue(Porter):
             self.bar.setColor("yellow")
         else:
             self.bar.setColor("orange")
-        self.bar.paint(self, screen)
+        self.bar.paint(self, screen, offset=offset)
 
 class Pool(InanimSprite):
     bg_size = 0    # 屏幕尺寸
@@ -9,14 +9,20 @@ from random import random, randint, choice
 
 from mapElems import *
 from database import PB
-from util import getPos
+from util import getPos, loadImg, loadMask, SpatialGrid, TrackedGroup, TargetIndex, LayerGroup, CameraView
+
+
+def isLayerWall(item):
+    '''dec1中可以预渲染进砖块图层的普通砖块（SpecialWall、WebWall等子类除外）'''
+    return type(item) in (Wall, SideWall)
 
 
 # ================================================================================
 # =============================== Adventure map ==================================
 # ================================================================================
 class AdventureTower():
-    oriPos = (0,0)     # parameters about the screen (px)
+    oriPos = (0,0)     # parameters about the screen (px), also the world position of the tower
+    scroll = None      # camera translation of this tower [x, y] (px), see util.Camera.follow()
     blockSize = 0      # parameters about the block size (px)  EVEN NUMBER RECOMMENDED !
     diameter = 0       # total width of the tower (number)   MUST BE OVER 7 !
     layer = 0          # total layers of the current stage (number), should be an even number
@@ -36,6 +42,8 @@ class AdventureTower():
     chestList = None
     elemList = None
     monsters = None
+    targets = None     # TargetIndex of monsters, for heroes' target picking
+    coins = None       # CoinSwarm of the flying coins and gems
     goalieList = None  # a group to indicate all goalies in this area.
     allElements = {}
     # Constructor of MapManager
@@ -53,11 +61,14 @@ class AdventureTower():
         self.font = font
         self.lgg = lgg
         self.bg_size = bg_size
+        self.scroll = [0,0]
         
         self.groupList = {}
         self.groupList["0"] = pygame.sprite.Group()     # prepare to include left & right sideWalls & roofWalls.
         self.groupList["-2"] = pygame.sprite.Group()    # prepare to include lineDecors.
         self.heightList = {}
+        self.wallGrid = SpatialGrid(self.blockSize)     # 砖块的空间索引，供碰撞检测做初筛
+        self.wallLayer = None       # 静态砖块预渲染成的一整张图层，见_paintWalls()
         self.stg = stg
         self.area = area
         self.specialOn = specialOn
@@ -69,14 +80,16 @@ class AdventureTower():
         
         self.elemList = pygame.sprite.Group()        # Special elems attached to special walls.
         self.chestList = pygame.sprite.Group()       # Chests and hostages and alike stuffes.
-        self.monsters = pygame.sprite.Group()        # All monsters.
+        self.monsters = TrackedGroup()               # All monsters.
+        self.targets = TargetIndex(self.monsters, bg_size[1])
+        self.coins = CoinSwarm()                     # Flying coins and gems (also in dec1 for painting).
         self.goalieList = pygame.sprite.Group()      # All goalies.
         # All elements of this tower are stored in 5 groups in order to render in different shades of layer.
         self.allElements = {
             "mons0": pygame.sprite.Group(),
             "dec0": pygame.sprite.Group(),     # Including chests & most porters (and linedecors?). Static.
             "mons1": pygame.sprite.Group(),    # Including monsters & other laterly added like bullets. Dynamic.
-            "dec1": pygame.sprite.Group(),     # Including walls, column-likes, coins, blockFire-likes & decors. Dynamic.
+            "dec1": LayerGroup(isLayerWall),   # Including walls, column-likes, coins, blockFire-likes & decors. Dynamic.
             "mons2": pygame.sprite.Group()
         }
         self.merchant = None
@@ -86,7 +99,14 @@ class AdventureTower():
         self.suspendedProps = []
 
     def generateMap(self):
-        self._constructTower(addChest=True)
+        for _ in self.generateSteps():
+            pass
+        # 返回本area的极左位置值。（包括伸出的平台接口计算在内）
+        return ( self.oriPos[0]+(self.diameter+2)*self.blockSize, self.oriPos[1]-self.blockSize*self.layer )
+
+    def generateSteps(self):
+        '''generateMap()的分步版本：每铺完一行砖yield一次，供AdventureModel预取后续区域时按帧分摊。'''
+        yield from self._constructRows(addChest=True)
         # 整个area完成之后，给进出口处增加接口。不同区域的接口要求不同。
         if (self.area==4):
             # 所有章节的4号区域，最后一扇门为整局出口
@@ -99,8 +119,17 @@ class AdventureTower():
             for sideWall in self.groupList["0"]:
                 self.addInterface( sideWall, 0, "left", "back_door" )
                 self.addInterface( sideWall, self.layer, "right", "door" )
-        # 接口完成后，返回本area的极左位置值。（包括伸出的平台接口计算在内）
-        return ( self.oriPos[0]+(self.diameter+2)*self.blockSize, self.oriPos[1]-self.blockSize*self.layer )
+        self.indexWalls()
+
+    def indexWalls(self):
+        '''将groupList中的所有砖块（不含装饰）登记到wallGrid中。地图改动后调用；已登记的砖块会按当前位置重新登记。
+        同时作废静态砖块图层，下次绘制时重建。'''
+        self.wallLayer = None
+        for key in self.groupList:
+            if key=="-2":
+                continue
+            for wall in self.groupList[key]:
+                self.wallGrid.add(wall)
 
     def addChest(self, pixlX, pixlY, coord, rate):
         if random() <= rate:
@@ -110,18 +139,18 @@ class AdventureTower():
                 )
             self.chestList.add(supply)
     
-    def addCoins(self, num, pos, tgt, cList=[20,22,24], item="coin"):
+    def addCoins(self, num, pos, tgt, cList=[20,22,24], item="coin", swarm=None):
+        '''swarm: 另给的CoinSwarm（如结算时飞向HeroSlot的金币，屏幕坐标），由其所有者更新和绘制；默认为本塔楼的coins。'''
         if num==0:
             return False
         for i in range(0, num, 1):
             randPos = [ randint(pos[0]-1, pos[0]+1), randint(pos[1]-1, pos[1]+1) ]
             speed = [ randint(-2,2), randint(-5,-2) ]
-            if item=="coin":
-                coin = Coin( randPos, choice( cList ), speed, tgt )
-                self.allElements["dec1"].add( coin )
-            elif item=="gem":
-                coin = Coin( randPos, choice( cList ), speed, tgt, typ="gem" )
-                self.allElements["dec1"].add( coin )
+            if item in ("coin", "gem"):
+                if swarm:
+                    swarm.spawn( randPos, choice( cList ), speed, tgt, item )
+                else:
+                    self.coins.spawn( randPos, choice( cList ), speed, tgt, item, self.allElements["dec1"] )
     
     def addInterface(self, sideWall, layer, direction, porterCate):
         '''创造塔楼间接口。layer采用的是英雄的一套层数体系（偶数体系）。'''
@@ -217,6 +246,11 @@ class AdventureTower():
 
     def _constructTower(self, addChest=True, hollow_type="adventure"):
         '''用于建立标准的塔楼，可指定是否添加宝箱'''
+        for _ in self._constructRows(addChest, hollow_type):
+            pass
+
+    def _constructRows(self, addChest=True, hollow_type="adventure"):
+        '''_constructTower()的生成器版本，每完成一行yield一次'''
         # 从地下2层（y=-2）开始，创建各层的砖块
         # note that: y 像素设定为每个wall的 bottom 像素值
         y = -2
@@ -297,6 +331,7 @@ class AdventureTower():
                 pixlX = pixlX + self.blockSize
             y = y + 1
             pixlY = pixlY - self.blockSize
+            yield
         
     def getTop(self, layer="min"):
         '''search the wall's rect.top according to the given line number'''
@@ -309,58 +344,68 @@ class AdventureTower():
             return self.heightList[str(self.layer+3)]-self.blockSize
         return False
         
-    def paint(self, screen, heroes=[]):
-        height = screen.get_size()[1]
+    def paint(self, screen, heroes=[], offset=(0,0)):
+        '''所有元素都在世界坐标中，绘制时加上镜头偏移量offset（见util.Camera.offset）。'''
+        view = CameraView(screen, offset)
+        top = -offset[1]                        # 屏幕可见范围的世界纵坐标
+        bottom = screen.get_size()[1]-offset[1]
         # 0:背景层
-        self.towerBG.paint( screen )
+        self.towerBG.paint( view )
         # 1：怪物后层(某些特殊怪物使用，如爬墙蜘蛛)
         for item in self.allElements["mons0"]:
-            if ( item.rect.bottom>=0 ) and ( item.rect.top <= height ):
-                item.paint( screen )
+            if ( item.rect.bottom>=top ) and ( item.rect.top <= bottom ):
+                item.paint( view )
         # 2：装饰后层(宝箱+装饰B)
         for item in self.allElements["dec0"]:
-            if ( item.rect.bottom>=0 ) and ( item.rect.top <= height ):
-                item.paint( screen )
+            if ( item.rect.bottom>=top ) and ( item.rect.top <= bottom ):
+                item.paint( view )
         # 3:怪物中层
         for item in self.allElements["mons1"]:
-            if ( item.rect.bottom>=0 ) and ( item.rect.top <= height ):
-                item.paint( screen )
+            if ( item.rect.bottom>=top ) and ( item.rect.top <= bottom ):
+                item.paint( view )
         # 4：英雄层
         for hero in heroes:
-            hero.paint( screen )
-        # 5：装饰前层(砖块+装饰A)
-        for item in self.allElements["dec1"]:
-            if ( item.rect.bottom>=0 ) and ( item.rect.top <= height ):
-                item.paint( screen )
+            hero.paint( view )
+        # 5：装饰前层(砖块+装饰A)。普通砖块整体绘制，其余逐个绘制
+        self._paintWalls( view )
+        for item in self.allElements["dec1"].loose:
+            if ( item.rect.bottom>=top ) and ( item.rect.top <= bottom ):
+                item.paint( view )
         # 5-2：装饰前层额外层：边砖饰品
         for wall in self.groupList["0"]:
-            if ( wall.rect.bottom>=0 ) and ( wall.rect.top <= height ):
-                wall.paintDecor( screen )
+            if ( wall.rect.bottom>=top ) and ( wall.rect.top <= bottom ):
+                wall.paintDecor( view )
         # 6：怪物前层(某些特殊怪物使用，如飞行生物)
         for item in self.allElements["mons2"]:
-            if ( item.rect.bottom>=0 ) and ( item.rect.top <= height ):
-                item.paint( screen )
+            if ( item.rect.bottom>=top ) and ( item.rect.top <= bottom ):
+                item.paint( view )
         # 7: 怪物生命值显示层
         for item in self.monsters:
-            if (( item.rect.bottom>=0 ) and ( item.rect.top <= height )) or (hasattr(item, 'activated') and item.activated):
-                item.drawHealth( screen )
-
-    def lift(self, dist):
-        if dist:
-            for h in self.heightList:
-                self.heightList[h] = self.heightList[h] + dist
-            for grp in self.allElements:
-                for item in self.allElements[grp]:
-                    item.lift( dist )
-            self.towerBG.lift(dist)
+            if (( item.rect.bottom>=top ) and ( item.rect.top <= bottom )) or (hasattr(item, 'activated') and item.activated):
+                item.drawHealth( screen, offset )
 
-    def level(self, dist):
-        if dist:
-            self.boundaries = ( self.boundaries[0]+dist, self.boundaries[1]+dist )
-            for grp in self.allElements:
-                for item in self.allElements[grp]:
-                    item.level( dist )
-            self.towerBG.level(dist)
+    def _paintWalls(self, screen):
+        '''dec1中的普通砖块(Wall/SideWall)既无动画也不会单独移动，因此预先绘制到一张透明大图层上，每帧只blit一次。
+        SpecialWall、WebWall、金币等仍逐个绘制。图层以其中一块砖为锚点定位；
+        地图改动时由indexWalls()作废；dec1中有砖块加入或被kill()时，其version改变，图层也会重建。'''
+        dec1 = self.allElements["dec1"]
+        if self.wallLayer and self.wallLayer[3]!=dec1.version:
+            self.wallLayer = None
+        if not self.wallLayer:
+            walls = [ item for item in dec1 if isLayerWall(item) ]
+            if not walls:
+                self.wallLayer = ( None, None, None, dec1.version )
+                return
+            area = walls[0].rect.unionall( [wall.rect for wall in walls] )
+            layer = pygame.Surface( area.size, pygame.SRCALPHA )
+            for wall in walls:
+                # 砖块互不重叠，在全透明底上取MAX即原样复制像素（普通blit会把半透明边缘的alpha再乘一次）
+                layer.blit( wall.image, (wall.rect.left-area.left, wall.rect.top-area.top), special_flags=pygame.BLEND_RGBA_MAX )
+            layer.set_alpha(255, pygame.RLEACCEL)   # RLE编码后，大片全透明区域几乎不耗时
+            self.wallLayer = ( layer, walls[0], (walls[0].rect.left-area.left, walls[0].rect.top-area.top), dec1.version )
+        layer, anchor, offset, version = self.wallLayer
+        if layer:
+            screen.blit( layer, (anchor.rect.left-offset[0], anchor.rect.top-offset[1]) )
 
     chest_dic = {       # 概率分布，左闭右开
         "coin":[0,0.36],
@@ -420,6 +465,7 @@ class EndlessTower(AdventureTower):
         # 单独设置，且不加入self.chestList。无形的商人
         self.merchant = Merchant( 0, 0, self.stg, self.font, self.lgg, "endless" )
         self.statue = Statue( sum(self.boundaries)//2, self.getTop(layer=1), 2, self.font, self.lgg )
+        self.indexWalls()
 
     def rebuildMap(self, canvas, color):
         # 清理所有可能残留的怪物
@@ -463,14 +509,16 @@ class EndlessTower(AdventureTower):
                         self.groupList[ line ].add(brick)
                 x = x + 1
                 pixlX = pixlX + self.blockSize
+        self.indexWalls()
         
     def shiftChp(self, canvas, color):
         # Alter the image of hollowWall when shifting chapters.
         for wall in self.groupList["0"]:
             if wall.category=="hollowWall":
                 canvas.addSpatters(6, (2,4,5), (24,30,36), color, getPos(wall), True)
-                wall.image = pygame.image.load(f"image/stg{self.stg}/hollowWall.png").convert_alpha()
-                wall.mask = pygame.mask.from_surface(wall.image)
+                wall.image = loadImg(f"image/stg{self.stg}/hollowWall.png")
+                wall.mask = loadMask(f"image/stg{self.stg}/hollowWall.png")
+        self.wallLayer = None
 
 # ================================================================================
 # =============================== Tutorial map ===================================
@@ -485,6 +533,7 @@ class TutorialTower(AdventureTower):
 
     def generateMap(self):
         self._constructTower(addChest=False, hollow_type="practice")
+        self.indexWalls()
         #self.statue = Statue( sum(self.boundaries)//2, self.getTop(layer=1), 2, self.font, self.lgg )
         #for sideWall in self.groupList["0"]:
             # right exit
@@ -509,6 +558,7 @@ class TowerBG():
         self.color = color
         self.rimColor = rimColor
         self.patchList = []
+        self.flat = None        # surface与所有patch合成的一张不透明图(带colorkey)，见paint()
         # 绘制边框
         pygame.draw.rect( self.surface, rimColor, ((0,0),size), round(rimWidth*2) )
 
@@ -537,19 +587,19 @@ class TowerBG():
         rect.left = lbPos[0]
         rect.bottom = lbPos[1]
         self.patchList.append( [patch,rect] )
+        self.flat = None
 
     def paint(self, screen):
-        screen.blit(self.surface, self.rect)
-        for patch in self.patchList:
-            screen.blit(patch[0], patch[1])
-
-    def lift(self, dist):
-        self.rect.top += dist
-        for patch in self.patchList:
-            patch[1].top += dist
-
-    def level(self, dist):
-        self.rect.left += dist
-        for patch in self.patchList:
-            patch[1].left += dist
+        # 背景与补丁都是纯色不透明的，合成为一张无alpha的图后，每帧只需一次（RLE加速的）colorkey blit
+        if not self.flat:
+            area = self.rect.unionall( [patch[1] for patch in self.patchList] )
+            flat = pygame.Surface( area.size ).convert()
+            flat.fill( (255,0,255) )
+            flat.blit( self.surface, (self.rect.left-area.left, self.rect.top-area.top) )
+            for patch in self.patchList:
+                flat.blit( patch[0], (patch[1].left-area.left, patch[1].top-area.top) )
+            flat.set_colorkey( (255,0,255), pygame.RLEACCEL )
+            self.flat = ( flat, (area.left-self.rect.left, area.top-self.rect.top) )
+        flat, offset = self.flat
+        screen.blit( flat, (self.rect.left+offset[0], self.rect.top+offset[1]) )
 
@@ -12,14 +12,16 @@ GameModel은 이미지 렌더링, 아이템 업데이트, 충돌 확인 및 게
 GameModel 클래스는 specifier.py 모듈의 Specifiers와 긴밀하게 협력하여 작동
 """
 import sys
+import os
 import math
+import time
 from random import *
 import pygame
 from pygame.locals import *
 
 import enemy
 from mapTowers import AdventureTower, EndlessTower, TutorialTower
-from mapElems import ChestContent, Statue, Pool
+from mapElems import ChestContent, Statue, Pool, CoinSwarm
 import myHero
 from canvas import SpurtCanvas, Nature
 from plotManager import Dialogue
@@ -28,7 +30,8 @@ from specifier import * # specifier 모듈을 가져와서 각 장(chapter)에 
 
 from database import GRAVITY, MB, CB, RB, PB
 from util import ImgButton, TextButton, MsgManager, ImgSwitcher, HPBar
-from util import getPos, drawRect
+from util import getPos, drawRect, FrameProfiler, ASSETS, FloatMsgs, renderText, CAMERA, CameraView
+from soundBank import loadSnd, BANK
 
 
 """
@@ -47,6 +50,8 @@ TICK = 60
 DELAY = 240
 SCRINT = 36     # screen interval: 화면 이동 속도는 36 픽셀의 각 편차마다 1px의 속도 증가를 나타냅니다 (화면 전체 높이 720px)
 PAUSE_SEC = 30  # 짧은 일시 중지 시간의 카운트 다운 지속 시간 (권장 범위: 60 이하)
+PREFETCH_MS = 3  # 후속 구역을 미리 생성할 때 프레임당 사용할 수 있는 최대 시간(ms)
+PROFILE = os.environ.get("KT_PROFILE")   # 프레임 시간 통계: .csv/.json 경로를 지정하면 켜지고 게임 종료 시 그 파일로 저장됩니다. F3으로 오버레이 표시.
 MONS0 = ["spider", "GiantSpider"]
 MONS2 = ["CrimsonDragon", "fly", "MutatedFungus", "eagle", "iceSpirit", "FrostTitan", "assassin"]
 
@@ -61,8 +66,8 @@ class GameModel:
     stg = 1
     delay = DELAY         # 이 변수는 이미지 전환에 지연 시간을 추가하여 게임의 정상 실행에 영향을 미치지 않도록 사용됩니다
     
-    msgList = []          # 메시지를 저장하는 리스트 (리스트 내부에 리스트 포함): [ [영웅 이름, 사건, 카운트 다운 (, 스티커)], ... ]
-    vibration = 0         # 화면의 진동을 표시하는 카운트입니다.
+    msgList = None        # 지도 위에 떠오르는 피해/회복 숫자 (FloatMsgs): [ [위치, 텍스트, 카운트 다운, 색상], ... ]
+    camera = None         # 화면 이동과 진동(오프셋)을 관리하는 Camera 객체(util.CAMERA)입니다. 모든 sprite는 세계 좌표에 있습니다.
     screen = None         # 화면 객체의 참조를 저장합니다.
     screenRect = None
     clock = None
@@ -107,6 +112,7 @@ class GameModel:
         self.coinIcon = pygame.image.load("image/coin0.png").convert_alpha()
         # SpurtCanvas
         self.spurtCanvas = SpurtCanvas( self.bg_size )
+        self.msgList = FloatMsgs()
         enemy.Monster.spurtCanvas = self.spurtCanvas
         enemy.Monster.msgList = self.msgList
         # Other
@@ -115,7 +121,20 @@ class GameModel:
         self.paused = True
         self.nature = None
         self.tower = None
-        self.vibration = 0
+        self.camera = CAMERA
+        self.camera.reset()
+        self.hudCoins = CoinSwarm()     # 结算时从HeroSlot飞出的金币（屏幕坐标，不属于塔楼）
+        self.profiler = FrameProfiler(enabled=bool(PROFILE))
+        self.profiler.track( "maskBuilds", lambda: ASSETS.maskBuilds )   # 运行中新生成的碰撞mask数
+        self.profiler.track( "sndPlays", lambda: BANK.plays )
+        self.profiler.track( "sndMerged", lambda: BANK.merged+BANK.dropped )  # 被合并或超出声部上限而未播放的音效
+        # 由模型自身更新的类别（英雄的投掷物、金币等），其余类别交给specifier的调度表。见Specifier.moveGroup()
+        self.ownHandlers = {
+            "mons0": {},
+            "mons1": { "bullet":self._moveBullet, "bulletPlus":self._moveBulletPlus, "tracker":self._moveTracker },
+            "mons2": {},
+            "dec1": { "coin":self._skipCoin }
+        }
         self.tip = []
         self.translation = [0,0]
         self.comment = ("","")
@@ -128,7 +147,7 @@ class GameModel:
         self.retreatButton = TextButton(200,60, {"default":("홈","主菜单")}, "default", self.fntSet[3])
 
     def init_BG(self, stg):
-        self.BG = pygame.image.load(f"image/stg{stg}/towerBG.jpg").convert_alpha()
+        self.BG = pygame.image.load(f"image/stg{stg}/towerBG.jpg").convert()    # jpg没有透明通道，convert()后blit只是内存拷贝
         self.BGRect = self.BG.get_rect()
         self.BGRect.left = (self.bg_size[0]-self.BGRect.width) // 2   # 가운데 정렬
         self.BGRect.bottom = self.bg_size[1]                          # 초기로 하단 표
@@ -184,12 +203,32 @@ class GameModel:
             
     def _addVib(self, dura):
         # NOTE: dura should be an even number.
-        if self.vibration>dura: # 若当前的震动时长更长，则忽视本次请求
-            return
-        if self.vibration%2==0:
-            self.vibration = dura   # 当前为偶数，则直接替换
-        else:
-            self.vibration = dura+1 # 否则为奇数，则需要保持奇数，才能保证最后位置恢复
+        self.camera.addVib(dura)
+
+    # 处理投掷物：投掷物的move函数将返回三种情况：1.返回False，表示未命中；2.返回包含两个元素的元组，含义分别为投掷物的方向“right”或“left”，以及投掷物击中的坐标（x，y）；
+    # 3.返回包含三个元素的元组，第三个元组为标志命中目标是否死亡。
+    def _moveBullet(self, item):
+        item.move(self.tower.monsters, self.spurtCanvas, self.bg_size)
+
+    def _moveBulletPlus(self, item):
+        item.move(self.delay, self.tower.monsters, self.spurtCanvas, self.bg_size)
+
+    def _moveTracker(self, item):
+        item.move(self.spurtCanvas)
+
+    def _skipCoin(self, item):
+        # 金币由tower.coins整批更新，见_moveGroups()
+        pass
+
+    def _moveGroups(self):
+        # 分关卡处理所有的敌人（自然阻碍和怪兽）。
+        for grp in ("mons0", "mons1", "mons2", "dec1"):
+            self.specifier.moveGroup( self, self.tower.allElements[grp], self.heroes, self.ownHandlers[grp] )
+            self.profiler.mark(grp)
+        self.tower.coins.update(self.delay)
+        self.profiler.mark("coins")
+        # 怪物移动了位置，目标索引在下一次查询时重建
+        self.tower.targets.refresh()
     
     def _initNature(self):
         if self.stg == 1:
@@ -258,15 +297,16 @@ class GameModel:
         # Either paused or not, jobs to be done
         for each in self.supplyList:
             each.update(self.screen)
-        for item in self.tower.allElements["dec1"]:
-            if item.category=="coin":
-                item.move( self.delay )
-            else:
-                self.specifier.moveMons( self, item, self.heroes )
+        self.specifier.moveGroup( self, self.tower.allElements["dec1"], self.heroes, {"coin":self._skipCoin} )
+        self.tower.coins.update(self.delay)
+        self.hudCoins.update(self.delay)
         # 再一次单独绘制分配中的coins
+        view = CameraView(self.screen, self.camera.offset)
         for item in self.tower.allElements["dec1"]:
             if item.category=="coin":
-                item.paint( self.screen )
+                item.paint( view )
+        for coin in self.hudCoins:
+            coin.paint( self.screen )
         self.nature.update(self.screen)
         
     def _collectHitInfo(self, hero, rewardee):
@@ -294,21 +334,12 @@ class GameModel:
     
     # ---- show feedback of hero motion ----
     def showMsg(self):
+        self.msgList.expire()   # 倒计时减为0的消息出列
         for msg in self.msgList:
-            if msg[2] == 0:     # 倒计时减为0时从列表删除
-                self.msgList.remove(msg)
-                continue
-            else:
-                if self.translation[1]:
-                    msg[0] = (msg[0][0], msg[0][1]+self.translation[1])
-                elif self.translation[0]:
-                    msg[0] = (msg[0][0]+self.translation[0], msg[0][1])
-                ctr = ( msg[0][0]-self.bg_size[0]//2, msg[0][1]-self.bg_size[1]//2-(60-msg[2]) )
-                if len(msg)==4:
-                    self.addTXT( [msg[1]]*2, 0, (0,255,0), ctr[0], ctr[1])      # green
-                else:
-                    self.addTXT( [msg[1]]*2, 0, (255,255,255), ctr[0], ctr[1])  # white
-                msg[2] -= 1      # 消息显示倒计时-1
+            x, y = self.camera.toScreen(msg[0])     # 消息的位置是世界坐标
+            ctr = ( x-self.bg_size[0]//2, y-self.bg_size[1]//2-(self.msgList.life-msg[2]) )
+            self.addTXT( [msg[1]]*2, 0, msg[3], ctr[0], ctr[1])
+            msg[2] -= 1      # 消息显示倒计时-1
     
     def _addStat(self, name):
         # 计入统计数据
@@ -324,61 +355,44 @@ class GameModel:
     
     def translate(self, mode="vertical"):
         """
-        translate all elements.
+        translate the camera. All elements stay in world coordinates; only the painting offset changes.
         param mode: 'horrizontal' or 'vertical'.
         """
+        scroll = self.camera.scroll
         if mode=="horrizontal":
             # check horrizontal translation (level):
             self.translation[0] = 0
+            left, right = ( bd+scroll[0] for bd in self.tower.boundaries )   # 塔楼边界在屏幕上的位置
             if self.avgPix2<self.tower.boundaries[0]:
-                if self.tower.boundaries[0]<self.blockSize*3:
+                if left<self.blockSize*3:
                     self.translation[0] = 2
             elif self.avgPix2>self.tower.boundaries[1]:
-                if self.tower.boundaries[1]>self.bg_size[0]-self.blockSize*3:
+                if right>self.bg_size[0]-self.blockSize*3:
                     self.translation[0] = -2
             else:
-                gap = ( self.bg_size[0] - (self.tower.boundaries[0]+self.tower.boundaries[1]) ) //2
+                gap = ( self.bg_size[0] - (left+right) ) //2
                 if gap:
                     self.translation[0] = min(gap, 2) if gap>0 else max(gap, -2)
-            self.tower.level(self.translation[0])
-            self.spurtCanvas.level(self.translation[0])
-            for each in self.supplyList:
-                each.level(self.translation[0])
-            for hero in self.heroes:
-                hero.level(self.translation[0])
+            self.camera.pan(self.translation[0], 0)
         elif mode=="vertical":
             # check vertical translation (lift):
-            gap = self.bg_size[1]//2 - self.avgPix  # 中线减去英雄水平线之差
-            if (self.tower.getTop("min")+self.blockSize<=self.bg_size[1] and gap<0) or (self.tower.getTop("max")>=0 and gap>0):
+            gap = self.bg_size[1]//2 - (self.avgPix+scroll[1])  # 中线减去英雄水平线（屏幕坐标）之差
+            if (self.tower.getTop("min")+scroll[1]+self.blockSize<=self.bg_size[1] and gap<0) or (self.tower.getTop("max")+scroll[1]>=0 and gap>0):
                 # 若屏幕下侧已经触塔底还想下降，或上侧已经到塔顶还要上升，都应阻止
                 self.translation[1] = 0
             else:
                 self.translation[1] = gap//SCRINT if gap>=0 else gap//SCRINT+1
-            
-            self.tower.lift(self.translation[1])
-            self.spurtCanvas.lift(self.translation[1])
+            self.camera.pan(0, self.translation[1])
             # lift bg paper
             if self.translation[1]>0 and self.BGRect.top<0:
                 self.BGRect.top += 1
             elif self.translation[1]<0 and self.BGRect.bottom>self.bg_size[1]:
                 self.BGRect.top -= 1
-            for each in self.supplyList:
-                each.lift(self.translation[1])
-            for hero in self.heroes:
-                hero.lift(self.translation[1])
+        self.tower.targets.refresh()
         
     def checkVibrate(self):
-        if self.vibration > 0:
-            if (self.vibration % 2 == 0):
-                flunc = 4                        
-            else:
-                flunc = -4
-            self.tower.lift(flunc)
-            self.tower.level(flunc)
-            for hero in self.heroes:
-                hero.lift(flunc)
-                hero.level(flunc)
-            self.vibration -= 1
+        # 震动只改变镜头的绘制偏移量，不移动任何元素。
+        self.camera.vibrate()
         
     def checkHeroKeyDown(self, hero, key):
         if ( key == hero.keyDic["shootKey"] ):    # 射击
@@ -459,16 +473,16 @@ class GameModel:
         paint all elements according to specific order.
         param slotHeroes: a list. Contains all heroes whose slots should be painted.
         """
-        # Repaint & translate all elements
-        self.screen.blit( self.BG, self.BGRect )
-        # Repaint this tower and situate heroes
-        self.tower.paint(self.screen, heroes=self.heroes)
+        # Repaint all elements (the background only shakes with the camera)
+        self.screen.blit( self.BG, self.BGRect.move(self.camera.shake) )
+        # Repaint this tower and situate heroes, offset by the camera
+        self.tower.paint(self.screen, heroes=self.heroes, offset=self.camera.offset)
         # Repaint Natural Impediments of the stage
         self.specifier.paint(self.screen)
         self.spurtCanvas.updateHalo(self.screen)
         # draw hero status info.
         for hero in slotHeroes:
-            hero.drawHeads( self.screen )
+            hero.drawHeads( self.screen, offset=self.camera.offset )
             if hero.category == "hero":
                 hero.slot.paint(self.screen, self.effecter, self.addSymm, self.addTXT)
         
@@ -485,7 +499,7 @@ class GameModel:
     def addTXT(self, txtList, fntSize, color, x, y, base=None):
         '''x,y为正负（偏离屏幕中心点）像素值，确定了文字行的左上角坐标。这样改动是为了和addSymm()函数保持一个相对统一的系统。'''
         base = base if base else self.screen
-        txt = self.fntSet[fntSize][self.language].render( txtList[self.language], True, color )
+        txt = renderText( self.fntSet[fntSize][self.language], txtList[self.language], color )
         rect = txt.get_rect()
         baseW, baseH = base.get_size()
         rect.left = (baseW - rect.width) // 2 + x
@@ -633,122 +647,66 @@ class AdventureModel(GameModel):
         # create the map ------------------ 🏯
         self.towerD = 10
         oriPos = ( (self.bg_size[0] - self.towerD*self.blockSize) // 2, self.bg_size[1]-self.blockSize )
-        self.areaList = []
         # Determine the specialwall distribution.
         if self.stg in [1,6]:
             specialOn = (False, True, False, True, True)
         else:
             specialOn = (True, True, False, True, True) 
-        # Build 5 areas and link them as one big tower.
+        # 5 areas form one big tower. Only their parameters are fixed here; each area is built on demand (see _areaSteps()).
+        # 각 구역은 자기만의 난수 상태로 생성되므로, 언제 생성되든(미리 가져오기/즉시) 결과가 같습니다.
+        self.areaPlans = []
+        self.areaRng = []
         for i in range(0,5):
             if i==2:
                 sp_pos = (oriPos[0]+self.blockSize, oriPos[1])
-                tower = AdventureTower(sp_pos, self.blockSize, self.towerD-2, 4, self.stg, i, False, doubleP, self.fntSet[1], self.language, bgColors, bgShape, self.bg_size)
-                tower.generateMap()
-                tower.addNPC("merchant", heroList[0][1])
+                self.areaPlans.append( (sp_pos, self.towerD-2, 4, False) )
             else:
-                tower = AdventureTower(oriPos, self.blockSize, self.towerD, self.towerH, self.stg, i, specialOn[i], doubleP, self.fntSet[1], self.language, bgColors, bgShape, self.bg_size)
-                tower.generateMap()
+                self.areaPlans.append( (oriPos, self.towerD, self.towerH, specialOn[i]) )
                 self.towerH += choice( [0,2] )
-            self.areaList.append(tower)
-        
-        self.curArea = 0    # 意义为列表指针，而不是所指向的tower的area值。0即表示第一个tower。
-        self.tower = self.areaList[self.curArea]
+            self.areaRng.append( getrandbits(32) )
+        self.areaList = [None]*5
+        self.doubleP = doubleP
+        self.bgColors = bgColors
+        self.bgShape = bgShape
+        self.merchantKeys = heroList[0][1]
+        self.VHostage = VHostage
         self.hostage = None
-        # create the hero -----------------🐷
-        self.heroes = []
-        self.tomb = []
-        for each in heroList:      # 根据VHero参数信息生成hero
-            hero = myHero.Hero( each[0], dmgReduction, self.fntSet[1], self.language, keyDic=each[1] )
-            hero.spurtCanvas = self.spurtCanvas          # In case of injury.
-            hero.slot = HeroSlot(each[2], hero, each[0], self.bg_size, self.coinIcon, extBar="LDBar")
-            self.heroes.insert(0, hero)
-        self._resetHeroes(onlayer=0, side="left")
-        # Initialize towers, monsters and heroes.
-        for tower in self.areaList:
-            # add elems of each area to the allElements and hero's checkList.
-            for sup in tower.chestList:
-                if sup.category == "hostage":
-                    # 移除原Porter类型的hostage
-                    pos = (sup.rect.left, sup.rect.bottom)
-                    tower.chestList.remove(sup)
-                    # 将hostage转变为Hero类型对象，并挂在self.hostage上，等待被玩家激活
-                    sup = self.hostage = myHero.Follower(pos, VHostage, self.fntSet[1], self.language)
-                    tower.chestList.add(self.hostage)
-                tower.allElements["dec0"].add(sup)  # 加入supply
-            for key in tower.groupList:
-                if key=="-2":
-                    for brick in tower.groupList[key]:
-                        tower.allElements["dec0"].add( brick )   # 装饰
-                else:
-                    for brick in tower.groupList[key]:
-                        tower.allElements["dec1"].add( brick )   # 砖块
-            # create monsters for each area, method.
-            if tower.area in [0,1,3,4]:
-                # making chapter impediments
-                if self.stg==1:
-                    for i in range(2):
-                        f = enemy.InfernoFire(self.bg_size)
-                        tower.allElements["mons2"].add( f )
-                elif self.stg==2:
-                    c = enemy.Column(self.bg_size)
-                    tower.allElements["mons1"].add( c )
-                elif self.stg==7:
-                    pos = ( randint(tower.boundaries[0]+80, tower.boundaries[1]-80), tower.getTop("max") )
-                    l = enemy.Log(self.bg_size, tower.layer-1, pos)
-                    tower.allElements["mons1"].add( l )
-                # making monsters
-                for entry in CB[self.stg][tower.area]:
-                    if entry==None:
-                        continue
-                    if entry[0] in (5,6): #Boss or vice-Boss
-                        gl = True
-                    else:
-                        gl = False
-                    sl = entry[2] if type(entry[2])==int else tower.layer+int(entry[2])
-                    el = entry[3] if type(entry[3])==int else tower.layer+int(entry[3])
-                    makeMons( sl, el, entry[1], entry[0], tower, goalie=gl )
-            # assign monsters to correct allElements group.
-            for minion in tower.monsters:
-                if minion.category in MONS2:
-                    tower.allElements["mons2"].add(minion)
-                elif minion.category in MONS0:
-                    tower.allElements["mons0"].add(minion)
-                else:
-                    tower.allElements["mons1"].add(minion)
-            # directly unlock the porter if the area is not kept by keepers
-            if len(tower.goalieList)==0:
-                tower.porter.unlock()
-            # Special chapter items.
-            for elem in tower.elemList:
-                tower.allElements["dec1"].add(elem)
-                if self.stg in (2,6):   # 第二关的monsters加上障碍物大石头、蛛网；第六关的刀扇。
-                    tower.monsters.add(elem)
-        self.supplyList = pygame.sprite.Group()     # Store all flying supplies objects.
+        self._builder = None    # (区域序号, 生成器)：正在后台预取的区域
         
-        # 章节特殊内容管理器
+        # 章节特殊内容管理器 (需要在生成区域之前创建，各区域生成时会调用它)
         if self.stg==1:
             self.specifier = Stg1Specifier()
         elif self.stg==2:
             self.specifier = Stg2Specifier()
-            # 分配初始blasting Cap
-            for hero in self.heroes:
-                self.specifier.giveBlastingCap(hero, self.bg_size)
         elif self.stg==3:
             self.specifier = Stg3Specifier(self.bg_size)
         elif self.stg==4:
             self.specifier = Stg4Specifier()
-            for tower in self.areaList:
-                if tower.area!=2:
-                    self.specifier.altMap(tower)
         elif self.stg==5:
-            self.specifier = Stg5Specifier(self.bg_size, self.areaList)
+            self.specifier = Stg5Specifier(self.bg_size, [])
         elif self.stg==6:
             self.specifier = Stg6Specifier()
-            self.specifier.addDrip( self.areaList[choice([0,1,3,4])] )
+            self.dripArea = choice([0,1,3,4])
         elif self.stg==7:
             self.specifier = Stg7Specifier(self.VServant)
-            self.specifier.bind(self.areaList[-1].monsters)
+        
+        self.curArea = 0    # 意义为列表指针，而不是所指向的tower的area值。0即表示第一个tower。
+        self.tower = self._ensureArea(self.curArea)
+        self.camera.follow(self.tower)
+        # create the hero -----------------🐷
+        self.heroes = []
+        self.tomb = []
+        for each in heroList:      # 根据VHero参数信息生成hero
+            hero = myHero.Hero( each[0], dmgReduction, self.fntSet[1], self.language, keyDic=each[1] )
+            hero.spurtCanvas = self.spurtCanvas          # In case of injury.
+            hero.slot = HeroSlot(each[2], hero, each[0], self.bg_size, self.coinIcon, extBar="LDBar")
+            self.heroes.insert(0, hero)
+        self._resetHeroes(onlayer=0, side="left")
+        self.supplyList = pygame.sprite.Group()     # Store all flying supplies objects.
+        if self.stg==2:
+            # 分配初始blasting Cap
+            for hero in self.heroes:
+                self.specifier.giveBlastingCap(hero, self.bg_size)
         # Shopping Section. -----------------------------------
         self.shopping = False
         self.buyNum = 0     # 购买物品时的序号，可取-1,0,1
@@ -767,6 +725,129 @@ class AdventureModel(GameModel):
         self.endCnt = -1    # -1表示正常运行
 
 
+    # ---- lazy area construction ----
+    def _areaSteps(self, i):
+        '''Generator that builds area i step by step: the tower map row by row, then each batch of monsters.'''
+        oriPos, diameter, layer, specialOn = self.areaPlans[i]
+        tower = AdventureTower(oriPos, self.blockSize, diameter, layer, self.stg, i, specialOn, self.doubleP, self.fntSet[1], self.language, self.bgColors, self.bgShape, self.bg_size)
+        yield
+        yield from tower.generateSteps()
+        if i==2:
+            tower.addNPC("merchant", self.merchantKeys)
+        # add elems of the area to the allElements.
+        for sup in tower.chestList:
+            if sup.category == "hostage":
+                # 移除原Porter类型的hostage
+                pos = (sup.rect.left, sup.rect.bottom)
+                tower.chestList.remove(sup)
+                # 将hostage转变为Hero类型对象，并挂在self.hostage上，等待被玩家激活
+                sup = self.hostage = myHero.Follower(pos, self.VHostage, self.fntSet[1], self.language)
+                tower.chestList.add(self.hostage)
+            tower.allElements["dec0"].add(sup)  # 加入supply
+        for key in tower.groupList:
+            if key=="-2":
+                for brick in tower.groupList[key]:
+                    tower.allElements["dec0"].add( brick )   # 装饰
+            else:
+                for brick in tower.groupList[key]:
+                    tower.allElements["dec1"].add( brick )   # 砖块
+        yield
+        # create monsters for the area, method.
+        if tower.area in [0,1,3,4]:
+            # making chapter impediments
+            if self.stg==1:
+                for j in range(2):
+                    f = enemy.InfernoFire(self.bg_size)
+                    tower.allElements["mons2"].add( f )
+            elif self.stg==2:
+                c = enemy.Column(self.bg_size)
+                tower.allElements["mons1"].add( c )
+            elif self.stg==7:
+                pos = ( randint(tower.boundaries[0]+80, tower.boundaries[1]-80), tower.getTop("max") )
+                l = enemy.Log(self.bg_size, tower.layer-1, pos)
+                tower.allElements["mons1"].add( l )
+            # making monsters
+            for entry in CB[self.stg][tower.area]:
+                if entry==None:
+                    continue
+                if entry[0] in (5,6): #Boss or vice-Boss
+                    gl = True
+                else:
+                    gl = False
+                sl = entry[2] if type(entry[2])==int else tower.layer+int(entry[2])
+                el = entry[3] if type(entry[3])==int else tower.layer+int(entry[3])
+                makeMons( sl, el, entry[1], entry[0], tower, goalie=gl )
+                yield
+        # assign monsters to correct allElements group.
+        for minion in tower.monsters:
+            if minion.category in MONS2:
+                tower.allElements["mons2"].add(minion)
+            elif minion.category in MONS0:
+                tower.allElements["mons0"].add(minion)
+            else:
+                tower.allElements["mons1"].add(minion)
+        # directly unlock the porter if the area is not kept by keepers
+        if len(tower.goalieList)==0:
+            tower.porter.unlock()
+        # Special chapter items.
+        for elem in tower.elemList:
+            tower.allElements["dec1"].add(elem)
+            if self.stg in (2,6):   # 第二关的monsters加上障碍物大石头、蛛网；第六关的刀扇。
+                tower.monsters.add(elem)
+        if self.stg==4 and tower.area!=2:
+            self.specifier.altMap(tower)
+        elif self.stg==5:
+            self.specifier.addTotems(tower)
+        elif self.stg==6 and i==self.dripArea:
+            self.specifier.addDrip(tower)
+        elif self.stg==7 and i==4:
+            self.specifier.bind(tower.monsters)
+        self.areaList[i] = tower
+
+    def _stepArea(self, budget=None):
+        '''Advance the current builder inside its own random state. budget: seconds to spend; None means run to the end.'''
+        i, steps = self._builder
+        outer = getstate()
+        setstate(self.areaRng[i])
+        start = time.perf_counter()
+        try:
+            for _ in steps:
+                if budget is not None and time.perf_counter()-start >= budget:
+                    break
+            else:
+                self._builder = None
+        finally:
+            self.areaRng[i] = getstate()
+            setstate(outer)
+
+    def _startArea(self, i):
+        '''Create the builder of area i. Its seed is expanded into a full random state the first time.'''
+        if type(self.areaRng[i])==int:
+            outer = getstate()
+            seed(self.areaRng[i])
+            self.areaRng[i] = getstate()
+            setstate(outer)
+        self._builder = (i, self._areaSteps(i))
+
+    def _ensureArea(self, i):
+        '''Return area i, finishing (or doing) its construction right now if the prefetch has not done it yet.'''
+        if self.areaList[i] is None:
+            if self._builder and self._builder[0]!=i:
+                self._stepArea()    # 先完成正在预取的区域
+            if not self._builder:
+                self._startArea(i)
+            self._stepArea()
+        return self.areaList[i]
+
+    def _prefetch(self):
+        '''Called once per frame: spend at most PREFETCH_MS on the nearest area that is not built yet.'''
+        if not self._builder:
+            todo = [ i for i in (self.curArea+1, self.curArea-1) + tuple(range(5)) if 0<=i<5 and self.areaList[i] is None ]
+            if not todo:
+                return
+            self._startArea(todo[0])
+        self._stepArea(PREFETCH_MS/1000)
+
     def go(self, horns, heroBook, stgManager, diffi, vol, task):
         
         # Play bgm
@@ -791,6 +872,7 @@ class AdventureModel(GameModel):
         last_hp_increase_time = pygame.time.get_ticks()
 
         while self.gameOn:
+            self.profiler.startFrame()
             if not self.paused:
                 keys = pygame.key.get_pressed()  # 현재 눌려있는 키를 가져옴
                 if any(keys):  # 어떤 키라도 눌려있다면
@@ -808,6 +890,7 @@ class AdventureModel(GameModel):
                             last_hp_increase_time = pygame.time.get_ticks()  # 체력 증가 시간 갱신
             # Repaint all elements.
             self.paint(self.heroes)
+            self.profiler.mark("paint")
             
             pos = pygame.mouse.get_pos()
             pos = (pos[0]-self.screenRect.left, pos[1])     # 从实际窗口转到虚拟窗口的偏差
@@ -817,6 +900,7 @@ class AdventureModel(GameModel):
                 
                 # Check if the screen needs to be adjusted.
                 self.translate(mode="vertical")
+                self.profiler.mark("translate")
                 # check hero's ㅌ & fall, msg.
                 self.avgPix = self.avgLayer = valid_hero = 0
                 for hero in self.heroes:
@@ -868,27 +952,9 @@ class AdventureModel(GameModel):
                 valid_hero = max(valid_hero, 1)
                 self.avgPix = self.avgPix//valid_hero
                 self.avgLayer = self.avgLayer//valid_hero
+                self.profiler.mark("heroes")
                 
-                for item in self.tower.allElements["mons0"]:
-                    self.specifier.moveMons(self, item, self.heroes)
-                for item in self.tower.allElements["mons1"]:
-                    # 分关卡处理所有的敌人（自然阻碍和怪兽）。由于是覆盖的函数，需要给self参数。
-                    self.specifier.moveMons( self, item, self.heroes )
-                    # 处理投掷物：投掷物的move函数将返回三种情况：1.返回False，表示未命中；2.返回包含两个元素的元组，含义分别为投掷物的方向“right”或“left”，以及投掷物击中的坐标（x，y）；
-                    # 3.返回包含三个元素的元组，第三个元组为标志命中目标是否死亡。
-                    if item.category=="bullet":
-                        item.move(self.tower.monsters, self.spurtCanvas, self.bg_size)
-                    elif item.category=="bulletPlus":
-                        item.move(self.delay, self.tower.monsters, self.spurtCanvas, self.bg_size)
-                    elif item.category == "tracker":
-                        item.move(self.spurtCanvas)
-                for item in self.tower.allElements["mons2"]:
-                    self.specifier.moveMons( self, item, self.heroes )
-                for item in self.tower.allElements["dec1"]:
-                    if item.category=="coin":
-                        item.move( self.delay )
-                    else:
-                        self.specifier.moveMons( self, item, self.heroes )
+                self._moveGroups()
                 
                 # check big events.
                 # 事件1：区域通过。有的怪物（如戈仑石人）存在死亡延迟，故在杀死怪物的时候再判断不准确，需时刻侦听。
@@ -924,6 +990,7 @@ class AdventureModel(GameModel):
                     self.specifier.manageLogs(self.tower, self.bg_size)
 
                 self.checkVibrate()
+                self.profiler.mark("events")
                                 
             # When Paused
             else:
@@ -945,12 +1012,15 @@ class AdventureModel(GameModel):
                             self.screen, self.stg, self.buyNum, self.heroes[0], self.plotManager.propExplan, 
                             self.addSymm, self.addTXT, self.spurtCanvas
                         )
+                self.profiler.mark("pause")
             
             # Either paused or not, jobs to be done
             for each in self.supplyList:
                 each.update(self.screen)
-            self.spurtCanvas.update(self.screen)
+            self.spurtCanvas.update(self.screen, offset=self.camera.offset)
+            self.profiler.mark("spurt")
             self.nature.update(self.screen)
+            self.profiler.mark("nature")
             # Banner.
             bannerTuple = self._renderBanner(pos)
             menu = bannerTuple[-1]
@@ -958,6 +1028,7 @@ class AdventureModel(GameModel):
             self.msgManager.run(self.paused)
             self.msgManager.paint(self.screen)
             self.showMsg()
+            self.profiler.mark("msg")
 
             # 一次性的鼠标点击或按键事件
             for event in pygame.event.get():
@@ -965,6 +1036,8 @@ class AdventureModel(GameModel):
                     pygame.quit()
                     sys.exit()
                 elif ( event.type == KEYDOWN ):
+                    if ( event.key == pygame.K_F3 ):
+                        self.profiler.toggle()
                     if not self.paused:
                         for hero in self.heroes:
                             if hero.category != "hero" or hero.health<=0:
@@ -1012,13 +1085,21 @@ class AdventureModel(GameModel):
                                 self.musicOn = True
                             self.musicButton.changeKey(self.musicOn)           
 
+            self.profiler.mark("input")
+            self._prefetch()
+            self.profiler.mark("prefetch")
+            self.profiler.paint(self.screen, self.fntSet[0][self.language])
             self.trueScreen.blit(self.screen, self.screenRect)
             pygame.display.flip()   # from buffer area load the pic to the screen
+            self.profiler.mark("flip")
             self.delay = (self.delay+1) % DELAY
             self.clock.tick(TICK)
+            self.profiler.mark("idle")
+            self.profiler.endFrame()
         
         # ===================================================================
         # Game Loop ended，Render Stage Over Screen
+        self.profiler.dump(PROFILE)
         self.reportTask(task)
         self.msgManager.addMsg( (f"TASK: {task.descript[0]} ({task.progress}/{task.num})",f"任务：{task.descript[1]} ({task.progress}/{task.num})"), urgent=True )
 
@@ -1077,7 +1158,7 @@ class AdventureModel(GameModel):
                     coinRect = hero.slot.slotDic["coin"][1]
                     # 每次结算2枚coin，但是只增加1点exp
                     hero.coins -= 2
-                    self.tower.addCoins(1, [coinRect.left, coinRect.top], hero.slot, cList=[8,9,10])
+                    self.tower.addCoins(1, [coinRect.left, coinRect.top], hero.slot, cList=[8,9,10], swarm=self.hudCoins)
             
             # 结算完成，允许下一步操作
             if settled:
@@ -1152,7 +1233,12 @@ class AdventureModel(GameModel):
         for hero in self.heroes:
             hero.shiftTower(self.tower, oper="suspend")
         self.curArea += to
-        self.tower = self.areaList[self.curArea]
+        self.tower = self._ensureArea(self.curArea)    # 通常已预取完毕
+        old = self.camera.scroll
+        self.camera.follow(self.tower)
+        # 画布上的特效留在屏幕上原来的位置
+        self.spurtCanvas.level( old[0]-self.camera.scroll[0] )
+        self.spurtCanvas.lift( old[1]-self.camera.scroll[1] )
         if to==1:
             self._resetHeroes(onlayer=0, side="left")
         elif to==-1:
@@ -1166,6 +1252,8 @@ class AdventureModel(GameModel):
     # ---- clear all elements in the model ----
     def clearAll(self):
         for tower in self.areaList:
+            if not tower:       # 未生成的区域
+                continue
             #print(sys.getrefcount(tower))
             for grp in tower.allElements:
                 for each in tower.allElements[grp]:
@@ -1200,7 +1288,6 @@ class AdventureModel(GameModel):
 # =================================================================================
 class EndlessModel(GameModel):
     towerD = 11
-    msgList = []
     keyDic = []
     monsters = None
 
@@ -1234,7 +1321,7 @@ class EndlessModel(GameModel):
         
         # Other Settings
         self.keyDic = keyDic
-        self.alertSnd = pygame.mixer.Sound("audio/alert.wav")
+        self.alertSnd = loadSnd("audio/alert.wav", "ui")
         self.rebuildColor = (20,50,20)
         bgColors = ( (170,190,170), (150,180,150), (110,130,110), (100,120,100) )
         bgShape = "rect"
@@ -1247,6 +1334,7 @@ class EndlessModel(GameModel):
         self.status = "alarm"     # 4 values: alarm/前奏倒计时 -> create/生成怪物 -> battle/等待战斗完成 -> shop/购买 ->循环
         self.tower = EndlessTower(self.bg_size, self.blockSize, self.towerD, stg, self.fntSet[1], self.language, bgColors, bgShape)
         self.tower.generateMap()
+        self.camera.follow(self.tower)
         myHero.DefenseTower.siteWalls = self.tower.siteWalls
         # create the hero
         self.hero = myHero.Hero(VHero, 1, self.fntSet[1], self.language, keyDic=self.keyDic)
@@ -1263,6 +1351,9 @@ class EndlessModel(GameModel):
         self.pool = Pool(self.tower.bg_size, self.tower.blockSize*2-36, self.tower.boundaries)
         self.tower.allElements["dec1"].add(self.pool)
         self.heroes.insert(0, self.tower.statue)
+        self.ownHandlers["mons1"]["biteChest"] = self._moveBiteChest
+        self.ownHandlers["mons2"]["defenseLight"] = self._moveTracker
+        self.ownHandlers["dec1"]["pool"] = self._flowPool
         # create servant
         #initPos = [choice(self.tower.boundaries), self.tower.getTop(self.tower.extLayer+1)]
         #servant = myHero.Servant(self.hero, self.VServant, initPos, self.fntSet[1], self.language, self.hero.onlayer)
@@ -1300,12 +1391,15 @@ class EndlessModel(GameModel):
         # Give one defense tower.
         #self.hero.bagpack.incItem("defenseTower", 1)
         while self.gameOn:
+            self.profiler.startFrame()
             # repaint all elements
             self.paint(self.heroes)
 
+            view = CameraView(self.screen, self.camera.offset)
             for ball, pair in self.monsQue:
-                self.screen.blit(ball.image, ball.rect)
+                view.blit(ball.image, ball.rect)
 
+            self.profiler.mark("paint")
             pos = pygame.mouse.get_pos()
             pos = (pos[0]-self.screenRect.left, pos[1])     # 从实际窗口转到虚拟窗口的修正
 
@@ -1315,40 +1409,14 @@ class EndlessModel(GameModel):
                 self.avgLayer = self.hero.onlayer
                 # move all if the screen need to be adjusted.
                 self.translate(mode="horrizontal")
+                self.profiler.mark("translate")
                 
                 # == New Wave Generation Part::===
                 if not self.delay%60:
                     self.executeSec()
                 
-                for item in self.tower.allElements["mons0"]:
-                    self.specifier.moveMons(self, item, self.heroes)
-                for item in self.tower.allElements["mons1"]:
-                    if item.category=="biteChest":
-                        item.move( self.delay, self.heroes )
-                    elif item.category=="bullet":
-                        item.move(self.tower.monsters, self.spurtCanvas, self.bg_size)
-                    elif item.category=="bulletPlus":
-                        item.move(self.delay, self.tower.monsters, self.spurtCanvas, self.bg_size)
-                    elif item.category == "tracker":
-                        item.move(self.spurtCanvas)
-                    else:
-                        self.specifier.moveMons( self, item, self.heroes )
-                for item in self.tower.allElements["mons2"]:
-                    self.specifier.moveMons(self, item, self.heroes)
-                    if item.category=="defenseLight":
-                        item.move(self.spurtCanvas)
-                for item in self.tower.allElements["dec1"]:
-                    if item.category=="coin":
-                        item.move( self.delay )
-                    elif item.category=="pool":
-                        sprites = []
-                        for hero in self.heroes:
-                            sprites.append(hero)
-                        for each in self.tower.monsters:
-                            sprites.append(each)
-                        self.pool.flow( self.delay, sprites, self.spurtCanvas )
-                    else:
-                        self.specifier.moveMons( self, item, self.heroes )
+                self.profiler.mark("wave")
+                self._moveGroups()
                     
                 
                 # decide the image of Hero
@@ -1366,6 +1434,7 @@ class EndlessModel(GameModel):
                         if hero.category=="servant":
                             hero.decideAction(self.delay, self.tower, self.spurtCanvas)
                         
+                self.profiler.mark("heroes")
                 # 从hero的eventList事件列表中取事件信息。
                 for item in self.hero.eventList:
                     if item!="coin":
@@ -1417,6 +1486,7 @@ class EndlessModel(GameModel):
                         self.msgManager.addMsg( ("Defense Tower is desroyed!","防御塔被摧毁！") )
                 self._checkEnd()
                 self._updateMonsFall()
+                self.profiler.mark("events")
 
             # 暂停状态
             else:
@@ -1427,17 +1497,21 @@ class EndlessModel(GameModel):
                         self.screen, self.stg, self.buyNum, self.hero, self.plotManager.propExplan, 
                         self.addSymm, self.addTXT, self.spurtCanvas
                     )
+                self.profiler.mark("pause")
 
             # Job to be done regardless paused or not.
             for each in self.supplyList:
                 each.update(self.screen)
-            self.spurtCanvas.update(self.screen)
+            self.spurtCanvas.update(self.screen, offset=self.camera.offset)
+            self.profiler.mark("spurt")
             self.nature.update(self.screen)
+            self.profiler.mark("nature")
             # Render Banner and Msg.
             self._renderBanner(pos)
             self.msgManager.run(self.paused)
             self.msgManager.paint(self.screen)
             self.showMsg()
+            self.profiler.mark("msg")
             
             # 一次性的鼠标点击或按键事件
             for event in pygame.event.get():
@@ -1445,6 +1519,8 @@ class EndlessModel(GameModel):
                     pygame.quit()
                     sys.exit()
                 elif ( event.type == KEYDOWN ):
+                    if ( event.key == pygame.K_F3 ):
+                        self.profiler.toggle()
                     if not self.paused:
                         if self.hero.health>0:    # 活着才能运动！
                             self.checkHeroKeyDown(hero, event.key)
@@ -1478,13 +1554,19 @@ class EndlessModel(GameModel):
                                 self.musicOn = True
                             self.musicButton.changeKey(self.musicOn)
             
+            self.profiler.mark("input")
+            self.profiler.paint(self.screen, self.fntSet[0][self.language])
             self.trueScreen.blit(self.screen, self.screenRect)
             pygame.display.flip()   # from buffer area load the pic to the screen
+            self.profiler.mark("flip")
             self.delay = (self.delay+1) % DELAY
             self.clock.tick(TICK)
+            self.profiler.mark("idle")
+            self.profiler.endFrame()
         
         # ===================================================================
         # Game Loop 结束，渲染 Stage Over 界面。
+        self.profiler.dump(PROFILE)
         self.reportTask(task)
         self.msgManager.addMsg( (f"TASK: {task.descript[0]} ({task.progress}/{task.num})",f"任务：{task.descript[1]} ({task.progress}/{task.num})"), urgent=True )
 
@@ -1493,7 +1575,7 @@ class EndlessModel(GameModel):
             self.comment = ("New highest!","新的最高纪录！")    # 会覆盖死亡信息
         
         # 将wave转化为exp。从屏幕左上角发出。
-        self.tower.addCoins(self.wave, [60, 40], self.hero.slot, cList=[8,9,10])
+        self.tower.addCoins(self.wave, [60, 40], self.hero.slot, cList=[8,9,10], swarm=self.hudCoins)
         
         while True:
             # Repaint all elements.
@@ -1542,9 +1624,20 @@ class EndlessModel(GameModel):
             pygame.display.flip()   # from buffer area load the pic to the screen
             self.clock.tick(60)
 
+    def _moveBiteChest(self, item):
+        item.move( self.delay, self.heroes )
+
+    def _flowPool(self, item):
+        sprites = []
+        for hero in self.heroes:
+            sprites.append(hero)
+        for each in self.tower.monsters:
+            sprites.append(each)
+        self.pool.flow( self.delay, sprites, self.spurtCanvas )
+
     def bondSpecif(self):
         self.plotManager = Dialogue(self.stg)
-        # Select and overlap the moveMons() method & Add Natural Impediments for different stages.
+        # Select the Specifier (with its moveGroup() dispatch table) & Add Natural Impediments for different stages.
         if self.stg==1:
             self.specifier = Stg1Specifier()
             for i in range(2):
@@ -1649,10 +1742,8 @@ class EndlessModel(GameModel):
                     ended = False
                     break
             if ended==True: # check active coins if no monsters are found
-                for item in self.tower.allElements["dec1"]:
-                    if item.category=="coin":
-                        ended = False
-                        break
+                if self.tower.coins:
+                    ended = False
             if ended:
                 self.tower.merchant.helloSnd.play(0)
                 self.paused = True
@@ -1672,7 +1763,7 @@ class EndlessModel(GameModel):
                     self.tower.shiftChp(self.spurtCanvas, self.rebuildColor)
     
     def _makeMonsFall(self, mons):
-        pygame.mixer.Sound("audio/ccSilent.wav").play()
+        loadSnd("audio/ccSilent.wav", "monster").play()
         ball = pygame.sprite.Sprite()
         # show 3 sizes according to different build
         ball.image = pygame.image.load("image/stg5/battleLight.png")
@@ -1682,7 +1773,7 @@ class EndlessModel(GameModel):
             ball.image = pygame.transform.smoothscale(ball.image, (38,39))
         ball.rect = ball.image.get_rect()
         ball.rect.left = getPos(mons,0.5,0)[0]
-        ball.rect.bottom = 0
+        ball.rect.bottom = -self.camera.scroll[1]     # 从屏幕上沿落下
         return ball
 
     def _updateMonsFall(self):
@@ -1811,6 +1902,7 @@ class TutorialModel(GameModel):
         self.areaList.append( tut_tower )
         
         self.tower = self.areaList[0]
+        self.camera.follow(self.tower)
         # create the hero -----------------
         self.heroes = []
         self.tomb = []
@@ -1944,26 +2036,7 @@ class TutorialModel(GameModel):
                 self.avgPix = self.avgPix//valid_hero
                 self.avgLayer = self.avgLayer//valid_hero
                 
-                for item in self.tower.allElements["mons0"]:
-                    self.specifier.moveMons(self, item, self.heroes)
-                for item in self.tower.allElements["mons1"]:
-                    # 分关卡处理所有的敌人（自然阻碍和怪兽）。由于是覆盖的函数，需要给self参数。
-                    self.specifier.moveMons( self, item, self.heroes )
-                    # 处理投掷物：投掷物的move函数将返回三种情况：1.返回False，表示未命中；2.返回包含两个元素的元组，含义分别为投掷物的方向“right”或“left”，以及投掷物击中的坐标（x，y）；
-                    # 3.返回包含三个元素的元组，第三个元组为标志命中目标是否死亡。
-                    if item.category=="bullet":
-                        item.move(self.tower.monsters, self.spurtCanvas, self.bg_size)
-                    elif item.category=="bulletPlus":
-                        item.move(self.delay, self.tower.monsters, self.spurtCanvas, self.bg_size)
-                    elif item.category == "tracker":
-                        item.move(self.spurtCanvas)
-                for item in self.tower.allElements["mons2"]:
-                    self.specifier.moveMons( self, item, self.heroes )
-                for item in self.tower.allElements["dec1"]:
-                    if item.category=="coin":
-                        item.move( self.delay )
-                    else:
-                        self.specifier.moveMons( self, item, self.heroes )
+                self._moveGroups()
                 
                 # check big events.
                 # 事件：区域通过。有的怪物（如戈仑石人）存在死亡延迟，故在杀死怪物的时候再判断不准确，需时刻侦听。
@@ -2009,7 +2082,7 @@ class TutorialModel(GameModel):
             # Either paused or not, jobs to be done
             for each in self.supplyList:
                 each.update(self.screen)
-            self.spurtCanvas.update(self.screen)
+            self.spurtCanvas.update(self.screen, offset=self.camera.offset)
             self.nature.update(self.screen)
             # Banner.
             bannerTuple = self._renderBanner(pos)
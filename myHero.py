@@ -6,8 +6,7 @@ Hero class, 총알이나 슈퍼파워 관리하는 클래스
 """
 
 import pygame
-# 在myHero模块中，load、flip和collide_mask三个函数使用很频繁，这里导入这两个函数以方便使用（enemy同样）
-from pygame.image import load
+# 在myHero模块中，flip和collide_mask两个函数使用很频繁，这里导入这两个函数以方便使用。图片统一通过util.loadImg()缓存加载
 from pygame.transform import flip
 from pygame.sprite import collide_mask
 from random import random, randint, choice
@@ -17,8 +16,9 @@ import enemy
 from mapElems import ChestContent   # will be used in Javelin class
 from props import *
 from database import GRAVITY, DMG_FREQ, RANGE
-from util import InanimSprite, HPBar
-from util import getPos, rot_center, generateShadow, getCld
+from util import InanimSprite, HPBar, GridGroup, renderText, CAMERA
+from util import getPos, maskRect, generateShadow, getCld, landingShift, loadImg, loadMask, getMask, rotImg, ROT_STEPS
+from soundBank import loadSnd
 
 
 # ==========================================================
@@ -34,6 +34,7 @@ class Hero(InanimSprite):
     full = 960
     arrow = 15
     fruit = 1
+    ldArcs = {}       # (원의 크기, 각도) -> 장전 진행 호(arc)를 미리 그린 Surface. 모든 영웅이 공유합니다
 
     speed = 3         # 계산에 사용되는 영웅의 이동 속도(특정 요인에 의해 느려질 수 있음)
     shootNum = 1      # 발사당 발사되는 발사체 수를 나타내는 데 사용됩니다(일부 영웅의 경우 다를 수 있으며 기본값은 1입니다).
@@ -210,11 +211,11 @@ class Hero(InanimSprite):
             "rightKey": lambda delay: self.moveX( delay, "right" )
         }   # 定义需要连续响应键盘按键的键名和对应的函数列表
 
-        self.ammoCircle = pygame.transform.smoothscale( load("image/ammoCircle.png"), (40, 40) )
+        self.ammoCircle = loadImg("image/ammoCircle.png", scale=(40, 40))
         self.lumi = 0           # 明亮半径：在mist中将会起作用
         self.hitBack = 0
         self.spurtCanvas = None
-        self.checkList = pygame.sprite.Group()
+        self.checkList = GridGroup()
         self.preyList = []
         self.eventList = []
         self.weaponR = self.oriWeaponR
@@ -233,47 +234,47 @@ class Hero(InanimSprite):
         self.superPowerBar = HPBar(self.superPowerFull, blockVol=450, barOffset=2, color="yellow")
         self.superPowerManager = None
         if VHero.no>=0:
-            spicon = load(f"image/{self.name}/superPowerIcon.png").convert_alpha()
+            spicon = loadImg(f"image/{self.name}/superPowerIcon.png")
             self.superPowerIcon = pygame.transform.smoothscale( spicon, (spicon.get_width()//2, spicon.get_height()//2) )
 
         # 初始化hero的图片库------------------------------------
-        self.oriImgLeftList = [ load("image/"+self.name+"/heroLeft0.png").convert_alpha(), 
-            load("image/"+self.name+"/heroLeft2.png").convert_alpha(), load("image/"+self.name+"/heroLeft1.png").convert_alpha(), 
-            load("image/"+self.name+"/heroLeft2.png").convert_alpha(), load("image/"+self.name+"/heroLeft3.png").convert_alpha() ]
-        self.oriImgRightList = [ flip(self.oriImgLeftList[0], True, False), 
-            flip(self.oriImgLeftList[1], True, False), flip(self.oriImgLeftList[2], True, False), 
-            flip(self.oriImgLeftList[3], True, False), flip(self.oriImgLeftList[4], True, False) ]
-        self.oriImgJumpLeft = load("image/"+self.name+"/jumpLeft.png").convert_alpha()
-        self.oriImgJumpRight = flip(self.oriImgJumpLeft, True, False)
-        self.oriImgHittedLeft = load("image/"+self.name+"/hittedLeft.png").convert_alpha()
-        self.oriImgHittedRight = flip(self.oriImgHittedLeft, True, False)
-        self.oriWpJumpLeft = load("image/"+self.name+"/wpJump.png").convert_alpha()
-        self.oriWpJumpRight = flip(self.oriWpJumpLeft, True, False)
+        self.oriImgLeftList = [ loadImg("image/"+self.name+"/heroLeft0.png"), 
+            loadImg("image/"+self.name+"/heroLeft2.png"), loadImg("image/"+self.name+"/heroLeft1.png"), 
+            loadImg("image/"+self.name+"/heroLeft2.png"), loadImg("image/"+self.name+"/heroLeft3.png") ]
+        self.oriImgRightList = [ loadImg("image/"+self.name+"/heroLeft0.png", True), 
+            loadImg("image/"+self.name+"/heroLeft2.png", True), loadImg("image/"+self.name+"/heroLeft1.png", True), 
+            loadImg("image/"+self.name+"/heroLeft2.png", True), loadImg("image/"+self.name+"/heroLeft3.png", True) ]
+        self.oriImgJumpLeft = loadImg("image/"+self.name+"/jumpLeft.png")
+        self.oriImgJumpRight = loadImg("image/"+self.name+"/jumpLeft.png", True)
+        self.oriImgHittedLeft = loadImg("image/"+self.name+"/hittedLeft.png")
+        self.oriImgHittedRight = loadImg("image/"+self.name+"/hittedLeft.png", True)
+        self.oriWpJumpLeft = loadImg("image/"+self.name+"/wpJump.png")
+        self.oriWpJumpRight = loadImg("image/"+self.name+"/wpJump.png", True)
         self.imgLib = {
             "leftList": self.oriImgLeftList,
             "rightList": self.oriImgRightList,
-            "weaponLeft": load("image/"+self.name+"/weapon.png").convert_alpha(),
-            "weaponRight": flip(load("image/"+self.name+"/weapon.png").convert_alpha(), True, False),
-            "wpMoveLeft": load("image/"+self.name+"/wpMove.png").convert_alpha(),
-            "wpMoveRight": flip(load("image/"+self.name+"/wpMove.png").convert_alpha(), True, False),
-
-            "shootLeftList": [ load("image/"+self.name+"/shootLeft0.png").convert_alpha(), 
-                load("image/"+self.name+"/shootLeft1.png").convert_alpha(), 
-                load("image/"+self.name+"/shootLeft2.png").convert_alpha() ],
-            "shootRightList": [ flip(load("image/"+self.name+"/shootLeft0.png").convert_alpha(), True, False), 
-                flip(load("image/"+self.name+"/shootLeft1.png").convert_alpha(), True, False), 
-                flip(load("image/"+self.name+"/shootLeft2.png").convert_alpha(), True, False) ],
-            "wpAttLeft": [ load("image/"+self.name+"/wpAtt0.png").convert_alpha(), 
-                load("image/"+self.name+"/wpAtt1.png").convert_alpha(), 
-                load("image/"+self.name+"/wpAtt2.png").convert_alpha() ],
-            "wpAttRight": [ flip(load("image/"+self.name+"/wpAtt0.png").convert_alpha(), True, False), 
-                flip(load("image/"+self.name+"/wpAtt1.png").convert_alpha(), True, False), 
-                flip(load("image/"+self.name+"/wpAtt2.png").convert_alpha(), True, False) ],
+            "weaponLeft": loadImg("image/"+self.name+"/weapon.png"),
+            "weaponRight": loadImg("image/"+self.name+"/weapon.png", True),
+            "wpMoveLeft": loadImg("image/"+self.name+"/wpMove.png"),
+            "wpMoveRight": loadImg("image/"+self.name+"/wpMove.png", True),
+
+            "shootLeftList": [ loadImg("image/"+self.name+"/shootLeft0.png"), 
+                loadImg("image/"+self.name+"/shootLeft1.png"), 
+                loadImg("image/"+self.name+"/shootLeft2.png") ],
+            "shootRightList": [ loadImg("image/"+self.name+"/shootLeft0.png", True), 
+                loadImg("image/"+self.name+"/shootLeft1.png", True), 
+                loadImg("image/"+self.name+"/shootLeft2.png", True) ],
+            "wpAttLeft": [ loadImg("image/"+self.name+"/wpAtt0.png"), 
+                loadImg("image/"+self.name+"/wpAtt1.png"), 
+                loadImg("image/"+self.name+"/wpAtt2.png") ],
+            "wpAttRight": [ loadImg("image/"+self.name+"/wpAtt0.png", True), 
+                loadImg("image/"+self.name+"/wpAtt1.png", True), 
+                loadImg("image/"+self.name+"/wpAtt2.png", True) ],
             
-            "superPowerLeft": load("image/"+self.name+"/superPower.png").convert_alpha(),
-            "superPowerRight": flip(load("image/"+self.name+"/superPower.png").convert_alpha(), True, False),
-            "wpSuperPowerLeft": load("image/"+self.name+"/wpSuperPower.png").convert_alpha(),
-            "wpSuperPowerRight": flip(load("image/"+self.name+"/wpSuperPower.png").convert_alpha(), True, False),
+            "superPowerLeft": loadImg("image/"+self.name+"/superPower.png"),
+            "superPowerRight": loadImg("image/"+self.name+"/superPower.png", True),
+            "wpSuperPowerLeft": loadImg("image/"+self.name+"/wpSuperPower.png"),
+            "wpSuperPowerRight": loadImg("image/"+self.name+"/wpSuperPower.png", True),
 
             "jumpLeft": self.oriImgJumpLeft,
             "jumpRight": self.oriImgJumpRight,
@@ -283,16 +284,16 @@ class Hero(InanimSprite):
             "hittedLeft": self.oriImgHittedLeft,
             "hittedRight": self.oriImgHittedRight,
 
-            "infShootLeft": load("image/stg3/dead"+self.gender+"Vomit.png").convert_alpha(),
-            "infShootRight": flip(load("image/stg3/dead"+self.gender+"Vomit.png").convert_alpha(), True, False),
-            "infLeftList": [load("image/stg3/dead"+self.gender+"Wait.png").convert_alpha(), 
-                load("image/stg3/dead"+self.gender+"1.png").convert_alpha(), load("image/stg3/dead"+self.gender+"0.png").convert_alpha(), 
-                load("image/stg3/dead"+self.gender+"1.png").convert_alpha(), load("image/stg3/dead"+self.gender+"2.png").convert_alpha() ],
-            "infRightList": [flip(load("image/stg3/dead"+self.gender+"Wait.png").convert_alpha(), True, False), 
-                flip(load("image/stg3/dead"+self.gender+"1.png").convert_alpha(), True, False), 
-                flip(load("image/stg3/dead"+self.gender+"0.png").convert_alpha(), True, False), 
-                flip(load("image/stg3/dead"+self.gender+"1.png").convert_alpha(), True, False), 
-                flip(load("image/stg3/dead"+self.gender+"2.png").convert_alpha(), True, False) ]
+            "infShootLeft": loadImg("image/stg3/dead"+self.gender+"Vomit.png"),
+            "infShootRight": loadImg("image/stg3/dead"+self.gender+"Vomit.png", True),
+            "infLeftList": [loadImg("image/stg3/dead"+self.gender+"Wait.png"), 
+                loadImg("image/stg3/dead"+self.gender+"1.png"), loadImg("image/stg3/dead"+self.gender+"0.png"), 
+                loadImg("image/stg3/dead"+self.gender+"1.png"), loadImg("image/stg3/dead"+self.gender+"2.png") ],
+            "infRightList": [loadImg("image/stg3/dead"+self.gender+"Wait.png", True), 
+                loadImg("image/stg3/dead"+self.gender+"1.png", True), 
+                loadImg("image/stg3/dead"+self.gender+"0.png", True), 
+                loadImg("image/stg3/dead"+self.gender+"1.png", True), 
+                loadImg("image/stg3/dead"+self.gender+"2.png", True) ]
         }
         # generate shadows
         self.shadLib = {}
@@ -312,31 +313,31 @@ class Hero(InanimSprite):
         self.weapon = enemy.Ajunction( self.imgLib["weaponLeft"], getPos(self, self.weaponR["normal"][0][0], self.weaponR["normal"][0][1]) )
         self.wpPos = [ self.weaponR["normal"][0][0], self.weaponR["normal"][0][1], self.weaponR["normal"][0][2] ]   # 初始化为normal[0]
         # Jump dust imgs -----------------------------------------------
-        self.dustList = [load("image/stg2/alarm5.png").convert_alpha(), load("image/stg2/alarm4.png").convert_alpha(), 
-            load("image/stg2/alarm3.png").convert_alpha(), load("image/stg2/alarm2.png").convert_alpha(), 
-            load("image/stg2/alarm1.png").convert_alpha(), load("image/stg2/alarm0.png").convert_alpha()]
+        self.dustList = [loadImg("image/stg2/alarm5.png"), loadImg("image/stg2/alarm4.png"), 
+            loadImg("image/stg2/alarm3.png"), loadImg("image/stg2/alarm2.png"), 
+            loadImg("image/stg2/alarm1.png"), loadImg("image/stg2/alarm0.png")]
 
-        self.brand = load("image/"+self.name+"/brand.png").convert_alpha()
+        self.brand = loadImg("image/"+self.name+"/brand.png")
         self.jmpPos = [0,0]
         self.jmpInfo = ()
         self.jmpCap = (1+self.kNum)*self.kNum //2 # 单次跳跃的上升距离，将在初始化时计算得出
 
-        self.jmpSnd = pygame.mixer.Sound("audio/"+self.name+"/jump.wav")
+        self.jmpSnd = loadSnd("audio/"+self.name+"/jump.wav", "hero")
         self.oriJmpSnd = self.jmpSnd
-        self.shootSnd = pygame.mixer.Sound("audio/"+self.name+"/shoot.wav")
+        self.shootSnd = loadSnd("audio/"+self.name+"/shoot.wav", "hero")
         self.oriShootSnd = self.shootSnd
-        self.fruitSnd = pygame.mixer.Sound("audio/eatFruit.wav")
-        self.injureSnd = pygame.mixer.Sound("audio/injure"+self.gender+".wav")
+        self.fruitSnd = loadSnd("audio/eatFruit.wav", "hero")
+        self.injureSnd = loadSnd("audio/injure"+self.gender+".wav", "hero")
         # infection related
-        self.infSnd = pygame.mixer.Sound("audio/infect"+self.gender+".wav")
-        self.infJmp = pygame.mixer.Sound("audio/infJump"+self.gender+".wav")
-        self.coinSnd = pygame.mixer.Sound("audio/coin.wav")
-        self.reloadSnd = pygame.mixer.Sound("audio/reload.wav")
-        self.vomiSnd = pygame.mixer.Sound("audio/vomiSplash.wav")
+        self.infSnd = loadSnd("audio/infect"+self.gender+".wav", "hero")
+        self.infJmp = loadSnd("audio/infJump"+self.gender+".wav", "hero")
+        self.coinSnd = loadSnd("audio/coin.wav", "hero")
+        self.reloadSnd = loadSnd("audio/reload.wav", "hero")
+        self.vomiSnd = loadSnd("audio/vomiSplash.wav", "hero")
         # 开场语
         if self.category=="hero":
             VHero.voice.play(0)
-            self.superPowerVoice = pygame.mixer.Sound("audio/"+self.name+"/superPowerVoice.wav")
+            self.superPowerVoice = loadSnd("audio/"+self.name+"/superPowerVoice.wav", "hero")
         # 기존 속성들...
         self.copterActive = False  # 코프터 아이템 활성화 여부
         self.copterDuration = 0  # 코프터 아이템 지속 시간
@@ -344,7 +345,7 @@ class Hero(InanimSprite):
     def fallFly(self, keyLine, newLine, heightList, GRAVITY):
         self.rect.bottom += self.gravity  # 尝试将自身纵坐标减去重力值
         # 获得所有碰撞了的物体对象，并针对每一个碰撞了的item执行相应的响应动作。这里不会触发特殊砖块的效果。
-        for item in pygame.sprite.spritecollide(self, self.checkList, False, collide_mask):
+        for item in self.checkList.collide(self):
             if item.category in self.interactiveList:
                 item.interact(self)
         # 飞行状态不重复下落，逐步减缓重力。
@@ -401,6 +402,7 @@ class Hero(InanimSprite):
             pos_x = pos_x+10
         self.rect.left = pos_x-self.rect.width//2
         self.rect.bottom = tower.getTop( str(layer) )-12
+        self.checkList.bind(tower.wallGrid)
 
     def jump(self, keyLine):
         self.aground = False
@@ -442,17 +444,22 @@ class Hero(InanimSprite):
     def fall(self, keyLine, newLine, heightList, GRAVITY):
         self.rect.bottom += self.gravity  # 尝试将自身纵坐标减去重力值
         # 获得所有碰撞了的物体对象，并针对每一个碰撞了的item执行相应的响应动作
-        for item in pygame.sprite.spritecollide(self, self.checkList, False, collide_mask):
+        for item in self.checkList.collide(self):
             if item.category in self.interactiveList:
                 item.interact(self)
-        while getCld(self, self.checkList, ["lineWall","baseWall","specialWall","sideWall","blockStone","house"]):
+        cldList = getCld(self, self.checkList, ["lineWall","baseWall","specialWall","sideWall","blockStone","house"])
+        if cldList:
             if self.gravity>4:  # 速度过大，造成扬灰效果
                 self.jpCnt = 12
                 self.jmpPos[0] = self.rect.left + self.rect.width//2
                 self.jmpPos[1] = self.rect.bottom
-            # 如果和参数中的物体重合，则回退1高度
-            self.rect.bottom -= 1    # 循环-1，直到不再和任何物体重合为止，跳出循环
-            self.aground = True      # 这两个值反复设置没有关系，只要循环结束后保证两个值分别为true和1即可
+            # 砖块直接求出需要回退的高度；石块、小屋形状不规则，仍逐像素回退
+            walls = [ item for item in cldList if item.category not in ("blockStone","house") ]
+            self.rect.bottom -= landingShift(self, walls)
+            if len(walls) < len(cldList):
+                while getCld(self, self.checkList, ["lineWall","baseWall","specialWall","sideWall","blockStone","house"]):
+                    self.rect.bottom -= 1    # 循环-1，直到不再和任何物体重合为止，跳出循环
+            self.aground = True
             self.gravity = 0
         if (self.gravity<GRAVITY):
             self.gravity += 1
@@ -552,7 +559,7 @@ class Hero(InanimSprite):
         self.superPowerCnt += amount
         if self.superPowerCnt > self.superPowerFull:
             self.superPowerCnt = self.superPowerFull
-            pygame.mixer.Sound("audio/knight/superPowerCast.wav").play(0)
+            loadSnd("audio/knight/superPowerCast.wav", "hero").play(0)
             self.talk = [self.talkDic["fullCharge"][self.lgg], 90]
             if self.spurtCanvas:
                 self.spurtCanvas.addSpatters( 12, [3,5,7], [36,42,48], (255,200,100,240), getPos(self,0.5,0.5), False )
@@ -1009,7 +1016,7 @@ class Hero(InanimSprite):
             if self.category == "hero":
                 self.spurtCanvas.addHalo("deadHalo", 180)
             # Change dead image
-            self.image = load(f"image/{self.name}/defeat.png").convert_alpha()
+            self.image = loadImg(f"image/{self.name}/defeat.png")
             if self.status=="right":
                 self.image = flip(self.image, True, False)
             self.setRect()
@@ -1090,7 +1097,8 @@ class Hero(InanimSprite):
         if self.superPowerManager:
             self.superPowerManager.paint(screen)
         
-    def drawHeads(self, screen):
+    def drawHeads(self, screen, offset=(0,0)):
+        '''offset: 镜头的绘制偏移量（Camera.offset）。'''
         if self.health<=0:
             return
         # draw HP
@@ -1098,21 +1106,21 @@ class Hero(InanimSprite):
             self.bar.setColor("lightGreen")
         else:
             self.bar.setColor("green")
-        self.bar.paint(self, screen)
+        self.bar.paint(self, screen, offset=offset)
         if self.category=="hero":
             # draw loading bar
-            self.drawLDBar( screen )
+            self.drawLDBar( screen, offset=offset )
             # draw super power bar
             if self.superPowerCnt==self.superPowerFull:
-                self.drawSPBar( screen )
+                self.drawSPBar( screen, offset=offset )
             else:
-                self.superPowerBar.paint(self, screen, "superPower")
+                self.superPowerBar.paint(self, screen, "superPower", offset=offset)
         # Draw talk.
         if len(self.talk):
             txt = self.font.render( self.talk[0], True, (255,255,255) )
             rect = txt.get_rect()
-            rect.left = self.rect.left+self.rect.width//2-rect.width//2
-            rect.bottom = self.rect.top-24
+            rect.left = self.rect.left+self.rect.width//2-rect.width//2 +offset[0]
+            rect.bottom = self.rect.top-24 +offset[1]
             bg = pygame.Surface( (rect.width, rect.height) ).convert_alpha()
             bg.fill( (0,0,0,180) )
             screen.blit( bg, rect )
@@ -1145,17 +1153,17 @@ class Hero(InanimSprite):
         self.rect.left = tmpPos[0] - self.rect.width//2
         self.rect.bottom = tmpPos[1]
         
-    def drawLDBar(self, surface, height=10):
+    def drawLDBar(self, surface, height=10, offset=(0,0)):
         '''Shown when hero is reloading. 和monsters类似地，在self上方绘制环形蓝条。'''
-        x = self.rect.left+self.rect.width//2 -self.bar.barLen/2   # 中线减去血条长度的一半。
-        y = self.rect.top-height
+        x = self.rect.left+self.rect.width//2 -self.bar.barLen/2 +offset[0]  # 中线减去血条长度的一半。
+        y = self.rect.top-height +offset[1]
         # 画左侧弹药圆圈
         cRect = self.ammoCircle.get_rect()
         cRect.right = x+2
         cRect.top = y+self.bar.barH//2-cRect.height//2
         surface.blit( self.ammoCircle, cRect)
         # 显示数量信息
-        txt = self.font.render( f"{self.arrow}", True, (255,255,255) )
+        txt = renderText( self.font, f"{self.arrow}", (255,255,255) )
         trect = txt.get_rect()
         trect.left = cRect.left+cRect.width//2-trect.width//2
         trect.top = cRect.top+cRect.height//2-trect.height//2
@@ -1164,16 +1172,22 @@ class Hero(InanimSprite):
         if self.loading==self.LDFull:
             return False
         ld = max( self.loading, 0 )
-        start_angle = math.radians( 90 )
-        stop_angle = math.radians( 90+round( 360*(ld/self.LDFull) ) )
-        # Colors
-        lightColor, color, shadeColor = self.bar.colorSet["blue"]
-        pygame.draw.arc(surface, color, cRect, start_angle, stop_angle, width=4)
+        angle = round( 360*(ld/self.LDFull) )
+        key = (cRect.size, angle)
+        if key not in Hero.ldArcs:
+            start_angle = math.radians( 90 )
+            stop_angle = math.radians( 90+angle )
+            # Colors
+            lightColor, color, shadeColor = self.bar.colorSet["blue"]
+            arc = pygame.Surface( cRect.size, pygame.SRCALPHA )
+            pygame.draw.arc(arc, color, arc.get_rect(), start_angle, stop_angle, width=4)
+            Hero.ldArcs[key] = arc
+        surface.blit( Hero.ldArcs[key], cRect )
         return True
     
-    def drawSPBar(self, surface, height=10):
-        x = self.rect.left+self.rect.width//2 +self.bar.barLen/2   # 中线减去血条长度的一半。
-        y = self.rect.top-height
+    def drawSPBar(self, surface, height=10, offset=(0,0)):
+        x = self.rect.left+self.rect.width//2 +self.bar.barLen/2 +offset[0]  # 中线减去血条长度的一半。
+        y = self.rect.top-height +offset[1]
         # 画左侧弹药圆圈
         cRect = self.ammoCircle.get_rect()
         cRect.left = x+2
@@ -1187,7 +1201,8 @@ class Hero(InanimSprite):
         return True
 
     def _checkMove(self, back=0):
-        for each in self.checkList:
+        # 循环中会微调自身位置（横向不超过两次speed，纵向5），因此候选范围适当放宽
+        for each in self.checkList.near( maskRect(self).inflate(self.speed*4, 10) ):
             if ( collide_mask(self, each) ):
                 if each.category in ["sideWall","blockStone"]:
                     # 尝试身高坐标-5，再看是否还会碰撞。5以内的高度都可以自动踩上去
@@ -1209,14 +1224,6 @@ class Hero(InanimSprite):
         for prop in self.activeProps:
             prop.lift(dist)
     
-    def level(self, dist):
-        self.rect.left += dist
-        self.jmpPos[0] += dist
-        if self.superPowerManager:
-            self.superPowerManager.level(dist)
-        for prop in self.activeProps:
-            prop.level(dist)
-    
 
 # ==========================================================
 # ========================= Ammos ==========================
@@ -1232,15 +1239,13 @@ class Ammo(InanimSprite):  # 各种ammo的基本原型
             self.speed[0] = -self.speed[0]
         
         src = "image/"+hero.name+"/arrow_left.png" if (hero.name != "wizard") else "image/"+hero.name+"/arrow_left0.png"
-        self.image = load(src).convert_alpha()
-        if self.direct=="right":
-            self.image = flip(self.image, True, False)
-        self.mask = pygame.mask.from_surface(self.image)
+        self.image = loadImg(src, self.direct=="right")
+        self.mask = loadMask(src, self.direct=="right")
         self.rect = self.image.get_rect()   # initialize the position of the ammo.
         self.rect.left = pos[0]-self.rect.width//2
         self.rect.top = pos[1]-self.rect.height//2
-        self.hitSnd = pygame.mixer.Sound("audio/"+hero.name+"/hit.wav")
-        self.checkList = pygame.sprite.Group()
+        self.hitSnd = loadSnd("audio/"+hero.name+"/hit.wav", "hero")
+        self.checkList = GridGroup(hero.checkList.grid)
         for each in hero.checkList:
             if each.category in ("sideWall", "lineWall", "specialWall", "baseWall"):
                 self.checkList.add(each)
@@ -1264,7 +1269,7 @@ class Ammo(InanimSprite):  # 各种ammo的基本原型
         self.rect.left += self.speed[0]
         self.rect.top += self.speed[1]
         self.duration -= abs(self.speed[0])
-        if pygame.sprite.spritecollide(self, self.checkList, False, collide_mask) or self.rect.left>bg_size[0] or self.rect.right<0: # 撞上墙壁或砖块
+        if self.checkList.collide(self) or self.offScreen(bg_size): # 撞上墙壁或砖块
             self.erase(canvas)
             return False
         hitInfo = self.hitMonster(monsters)
@@ -1272,6 +1277,11 @@ class Ammo(InanimSprite):  # 各种ammo的基本原型
             self.erase(canvas)
             return hitInfo
 
+    def offScreen(self, bg_size):
+        '''是否已从屏幕左右两侧飞出。rect为世界坐标，经镜头换算后再与屏幕比较。'''
+        scr = CAMERA.toScreen(self.rect)
+        return scr.left>bg_size[0] or scr.right<0
+
     def hitMonster(self, monsters, single=True, r=0, chargeSP=True):
         """
         param single: True表示单一伤害。设为False则会对所有monster进行检测。
@@ -1327,14 +1337,14 @@ def makeCircle(r):
 class Javelin(Ammo):
     def __init__(self, hero, pos):
         Ammo.__init__(self, hero, pos, [6,-3], "bulletPlus", bldNum=4, push=5, duration=RANGE["SHORT"])  # speed[1] can be interpreted as gravity
-        self.oriImg = self.image.copy()
+        self.oriImg = self.image
         self.rotated = 0
 
     def fetch(self, bg_size):
-        pygame.mixer.Sound("audio/getItem.wav").play(0)
+        loadSnd("audio/getItem.wav", "hero").play(0)
         # 修改owner属性数量，设定substance的目的坐标
         self.owner.arrow += 1
-        substance = ChestContent("javelin", self.image, 1, getPos(self,0.5,0.5), self.owner.rect)
+        substance = ChestContent("javelin", self.image, 1, CAMERA.toScreen(getPos(self,0.5,0.5)), self.owner.rect, world=True)
         self.owner.eventList.append( substance )
         self.kill()
         del self
@@ -1354,15 +1364,16 @@ class Javelin(Ammo):
                     self.rotated += 5
                 elif self.speed[0]>0:
                     self.rotated -= 5
-                self.image = rot_center(self.oriImg, self.rotated, subsurf=False)
-                self.mask = pygame.mask.from_surface(self.image)
+                self.image = rotImg(self.oriImg, self.rotated, self.rotSteps, subsurf=False)
+                self.mask = getMask(self.image)
             if self.speed[1]<GRAVITY:  
                 self.speed[1] += 1     # 竖直速度增加
         # 撞上墙壁或砖块（stay），或者掉落出界（erase）
-        if self.rect.top>bg_size[1]:
+        scr = CAMERA.toScreen(self.rect)
+        if scr.top>bg_size[1]:
             self.erase(canvas)
             return False
-        elif pygame.sprite.spritecollide(self, self.checkList, False, collide_mask):
+        elif self.checkList.collide(self):
             self._explodeEffect(canvas)
             self.speed[1] = -3
             if self.speed[0]>0:
@@ -1383,7 +1394,7 @@ class Javelin(Ammo):
 class Fireball(Ammo):
     def __init__(self, hero, pos):
         Ammo.__init__(self, hero, pos, [6,0], "bulletPlus", bldNum=6, push=5, duration=RANGE["SHORT"])
-        self.imgList = [ load("image/"+hero.name+"/arrow_left0.png").convert_alpha(), load("image/"+hero.name+"/arrow_left1.png").convert_alpha() ]
+        self.imgList = [ loadImg("image/"+hero.name+"/arrow_left0.png"), loadImg("image/"+hero.name+"/arrow_left1.png") ]
         if self.direct == "right":
             for i in range( len(self.imgList) ):
                 self.imgList[i] = flip(self.imgList[i], True, False)
@@ -1397,7 +1408,7 @@ class Fireball(Ammo):
         canvas.addTrails( [1,2,3], [8,10,12], (250,140,100,240), getPos(self, choice([0.4,0.5,0.6]), choice([0.4,0.5,0.6])) )
         self.duration -= abs(self.speed[0])
         # 如果撞上墙壁/砖块或monster，则爆炸。
-        if pygame.sprite.spritecollide(self, self.checkList, False, collide_mask) or pygame.sprite.spritecollide(self, monsters, False, collide_mask):
+        if self.checkList.collide(self) or pygame.sprite.spritecollide(self, monsters, False, collide_mask):
             self.hitSnd.play(0)
             # 继续前进若干个speed[0]，使得爆炸能够影响更深的敌人
             self.rect.left += self.speed[0]*4
@@ -1405,7 +1416,7 @@ class Fireball(Ammo):
             self.hitMonster(monsters, single=False, r=34)
             self.erase(canvas)
             return
-        elif (self.rect.left>bg_size[0]) or (self.rect.right<0) or (self.duration<=0):
+        elif self.offScreen(bg_size) or (self.duration<=0):
             self.erase(canvas)
             return False
         if not delay%6:
@@ -1418,7 +1429,7 @@ class Fireball(Ammo):
 class Dart(Ammo):
     def __init__(self, hero, pos):
         Ammo.__init__(self, hero, pos, [6,0], "bulletPlus", bldNum=2, push=5, duration=RANGE["LONG"])
-        self.oriImg = self.image.copy()
+        self.oriImg = self.image
         self.rotated = 0
         self.attCnt = 0
     
@@ -1435,14 +1446,14 @@ class Dart(Ammo):
                 self.rotated -= 30
                 if self.rotated <= -360:
                     self.rotated = 0
-            self.image = rot_center(self.oriImg, self.rotated, subsurf=False)
-            self.mask = pygame.mask.from_surface(self.image)
-        if pygame.sprite.spritecollide(self, self.checkList, False, collide_mask):
+            self.image = rotImg(self.oriImg, self.rotated, self.rotSteps, subsurf=False)
+            self.mask = getMask(self.image)
+        if self.checkList.collide(self):
             # 弹回的情况：撞上墙壁或砖块
             self._explodeEffect(canvas)
             self.speed[0] = -self.speed[0]
             self.direct = "left" if self.direct=="right" else "right"
-        elif self.rect.left>bg_size[0] or self.rect.right<0 or self.duration<=0:
+        elif self.offScreen(bg_size) or self.duration<=0:
             # 消失的情况
             self.erase(canvas)
             return False
@@ -1485,7 +1496,8 @@ class HolyLight(Ammo):
                     self.duration = RANGE["SHORT"]
                     # find new tgt.
                     for innerEach in monsters:
-                        if not innerEach==self.lastTgt and innerEach.rect.bottom>0 and innerEach.rect.top<960:
+                        scr = CAMERA.toScreen(innerEach.rect)
+                        if not innerEach==self.lastTgt and scr.bottom>0 and scr.top<960:
                             dist = math.pow( getPos(innerEach,0.5,0.5)[0]-getPos(self,0.5,0.5)[0], 2 ) + math.pow( getPos(innerEach,0.5,0.5)[1]-getPos(self,0.5,0.5)[1], 2 )
                             if dist <= (180*180):
                                 self.newTgt = innerEach
@@ -1511,11 +1523,11 @@ class HolyLight(Ammo):
         self.duration -= max( abs(self.speed[0]), abs(self.speed[1]) )
         canvas.addTrails( [1,2,3], [6, 7, 8], (255,192,203,240), getPos(self, choice([0.4,0.5,0.6]), choice([0.4,0.5,0.6])) )
         # No matter what phase it is, when hit wall, stop it.
-        if pygame.sprite.spritecollide(self, self.checkList, False, collide_mask): # 撞上墙壁或砖块
+        if self.checkList.collide(self): # 撞上墙壁或砖块
             self.hitSnd.play(0)
             self.erase(canvas)
             return False
-        elif self.rect.left>bg_size[0] or self.rect.right<0 or self.duration<=0:
+        elif self.offScreen(bg_size) or self.duration<=0:
             self.erase(canvas)
             return False
         # Deal damage and continue the light when it hit monsters, if hit draw hit effect.
@@ -1546,6 +1558,7 @@ class Follower(Hero):
         self.onlayer = master.onlayer
         self.dmgReducDic["basic"] = master.dmgReducDic["basic"]
         # RENEW CHECKLIST
+        self.checkList.bind(tower.wallGrid)
         self.renewCheckList(tower.groupList["0"], clear=True)
         self.renewCheckList(tower.chestList)
         self.renewCheckList(tower.elemList)
@@ -1565,17 +1578,16 @@ class Follower(Hero):
                 self.shoot(tower, spurtCanvas)
             # 未重合,检查攻击范围内
             else:
-                for mons in tower.monsters:
-                    shootPos = getPos(self, 0.5,self.shootR)
+                shootPos = getPos(self, 0.5,self.shootR)
+                for mons in tower.targets.inRow(shootPos[1]):
                     rvPos = getPos(mons, 0.5,0)
-                    # 判断是否要shoot: mons在shoot的攻击范围内。
-                    if ( mons.rect.bottom > shootPos[1] > mons.rect.top ):
-                        if ( rvPos[0] > self.rect.right ) and self.status=="left":
-                            self.status = "right"
-                        elif ( rvPos[0] < self.rect.left ) and self.status=="right":
-                            self.status = "left"
-                        else:
-                            self.shoot(tower, spurtCanvas)
+                    # mons在shoot的攻击范围内：转向或射击
+                    if ( rvPos[0] > self.rect.right ) and self.status=="left":
+                        self.status = "right"
+                    elif ( rvPos[0] < self.rect.left ) and self.status=="right":
+                        self.status = "left"
+                    else:
+                        self.shoot(tower, spurtCanvas)
         # 如果在master之上，则下跳一层。
         if self.onlayer>self.master.onlayer:
             if not delay%80:
@@ -1753,11 +1765,8 @@ class Servant(Hero):
                     self.moveX(delay, "left")
                 elif self.rect.right<=self.master.rect.left+self.fd:
                     self.moveX(delay, "right")
-            # 寻找新的目标
-            pool = []
-            for mons in tower.monsters:
-                if not mons.category in ["blockStone","fan","webWall"] and ( mons.rect.bottom >= 0 ) and ( mons.rect.top <= spurtCanvas.rect.height ):
-                    pool.append(mons)
+            # 寻找新的目标：屏幕内的怪物（不含阻挡类）
+            pool = tower.targets.visible( exclude=("blockStone","fan","webWall") )
             if pool:
                 self.rival = choice(pool)
                 self.hunt_lost = self.hunt_lost_full    # 重置[目标丢失变量]
@@ -1797,25 +1806,22 @@ class SuperPowerManager:
     def lift(self, dist):
         return
     
-    def level(self, dist):
-        return
-    
 class SuperPowerManagerKnight(SuperPowerManager):
     def __init__(self, hero):
         SuperPowerManager.__init__(self, hero)
         self.arrowCount = 15
         self.arrowList = pygame.sprite.Group()
-        self.hitSnd = pygame.mixer.Sound("audio/knight/hit.wav")
-        pygame.mixer.Sound("audio/knight/superPowerCast.wav").play(0)
-        ori_img = load("image/knight/arrow_left.png").convert_alpha()
+        self.hitSnd = loadSnd("audio/knight/hit.wav", "hero")
+        loadSnd("audio/knight/superPowerCast.wav", "hero").play(0)
+        ori_img = loadImg("image/knight/arrow_left.png")
         # 生成15支箭
         rad = 400
         startX = getPos(self.caster,0.5,0)[0]-rad//2
         inter = rad//(self.arrowCount+1)
         for i in range(self.arrowCount):
-            pos = ( startX, randint(-90,0) )
+            pos = ( startX, randint(-90,0)-CAMERA.scroll[1] )    # 从屏幕上沿落下
             arrow = pygame.sprite.Sprite()
-            arrow.image = pygame.transform.rotate( ori_img, 90 )
+            arrow.image = rotImg( ori_img, 90, subsurf=False )
             arrow.rect = arrow.image.get_rect()
             arrow.rect.left, arrow.rect.bottom = pos
             # Speed and hitCount
@@ -1825,7 +1831,7 @@ class SuperPowerManagerKnight(SuperPowerManager):
             startX += inter
         # 前摇的装饰大箭
         self.ani_arrow = pygame.sprite.Sprite()
-        self.ani_arrow.image = pygame.transform.rotate( ori_img, 270 )
+        self.ani_arrow.image = rotImg( ori_img, 270, subsurf=False )
         self.ani_arrow.rect = arrow.image.get_rect()
         self.ani_arrow.rect.left, self.ani_arrow.rect.bottom = getPos(self.caster, 0.5, 0.5)
         self.ani_arrow.speed = -10
@@ -1841,14 +1847,14 @@ class SuperPowerManagerKnight(SuperPowerManager):
             del self.ani_arrow
             self.ani_arrow = None
             self.animationTime -= 1
-            pygame.mixer.Sound("audio/knight/superPowerEnforce.wav").play(0)
+            loadSnd("audio/knight/superPowerEnforce.wav", "hero").play(0)
             return False
         else:
             # 真正实现效果
             for arrow in self.arrowList:
                 canvas.addTrails( [1,3], [10,12,14], (250,240,0), getPos(arrow,0.5,0.1) )
                 arrow.rect.bottom += arrow.speed
-                if arrow.rect.top>=720:
+                if arrow.rect.top+CAMERA.scroll[1]>=720:
                     arrow.kill()
                     del arrow
                     continue
@@ -1890,9 +1896,9 @@ class SuperPowerManagerPrincess(SuperPowerManager):
         SuperPowerManager.__init__(self, hero)
         self.bulletCount = 8
         self.bulletList = pygame.sprite.Group()
-        self.hitSnd = pygame.mixer.Sound("audio/princess/hit.wav")
-        pygame.mixer.Sound("audio/princess/superPowerCast.wav").play(0)
-        self.ori_img = load("image/princess/arrow_left.png").convert_alpha()
+        self.hitSnd = loadSnd("audio/princess/hit.wav", "hero")
+        loadSnd("audio/princess/superPowerCast.wav", "hero").play(0)
+        self.ori_img = loadImg("image/princess/arrow_left.png")
         self.hitRad = 80
         self.per_dmg = 140
 
@@ -1932,7 +1938,7 @@ class SuperPowerManagerPrincess(SuperPowerManager):
             if bullet.rect.top>=tower.heightList[str(bullet.onlayer)]:
                 bullet.onlayer = max(bullet.onlayer-2, -1)
             # 判断出界
-            if bullet.rect.top>=720:
+            if bullet.rect.top+CAMERA.scroll[1]>=720:
                 bullet.kill()
                 del bullet
                 continue
@@ -1966,10 +1972,10 @@ class SuperPowerManagerPrince(SuperPowerManager):
         self.princeList = pygame.sprite.Group()
         self.direction = self.caster.status
         self.wave = 3
-        self.ori_img = load("image/prince/heroLeft1.png").convert_alpha()
+        self.ori_img = loadImg("image/prince/heroLeft1.png")
         self.shad_img = generateShadow( self.ori_img, color=(250,240,0,80) )
-        self.fadeSnd = pygame.mixer.Sound("audio/ccSilent.wav")
-        pygame.mixer.Sound("audio/prince/superPowerCast.wav").play(0)
+        self.fadeSnd = loadSnd("audio/ccSilent.wav", "hero")
+        loadSnd("audio/prince/superPowerCast.wav", "hero").play(0)
     
     def run(self, delay, tower, heroes, canvas):
         # 1秒内连续射出三波分身王子。 create princes.
@@ -2009,7 +2015,7 @@ class SuperPowerManagerPrince(SuperPowerManager):
                 prince.rect.left, prince.rect.bottom = posX-prince.rect.width//2, posY
                 prince.rectList = []    # 残影矩形队列
                 self.princeList.add( prince )
-            pygame.mixer.Sound("audio/knight/superPowerCast.wav").play(0)
+            loadSnd("audio/knight/superPowerCast.wav", "hero").play(0)
             self.wave -= 1
         # 移动所有已经生成的王子分身
         for prince in self.princeList:
@@ -2053,14 +2059,10 @@ class SuperPowerManagerPrince(SuperPowerManager):
         for each in self.princeList:
             each.rect.top += dist
     
-    def level(self, dist):
-        for each in self.princeList:
-            each.rect.left += dist
-    
 class SuperPowerManagerWizard(SuperPowerManager):
     def __init__(self, hero):
         SuperPowerManager.__init__(self, hero)
-        self.hitSnd = pygame.mixer.Sound("audio/wizard/hit.wav")
+        self.hitSnd = loadSnd("audio/wizard/hit.wav", "hero")
         self.lightningNum = 4
         self.lightningList = []
         self.colorSet = [(240,240,255), (200,200,255), (160,160,255), (80,80,255)]
@@ -2071,13 +2073,10 @@ class SuperPowerManagerWizard(SuperPowerManager):
         if (not delay%15) and self.lightningNum>0:
             # Find tgt.
             size = canvas.canvas.get_size()
-            tmpM = None
-            for m in tower.monsters:
-                if (0<getPos(m,0,0.5)[1]<size[1]) and (m!=self.lastTgt) and (tmpM==None or m.health>=tmpM.health):
-                    tmpM = m
+            tmpM = tower.targets.strongest( test=lambda m: 0<CAMERA.toScreen(getPos(m,0,0.5))[1]<size[1], exclude=self.lastTgt )
             # In case that no suitable tgt is found:
             if tmpM==None:
-                endPos = ( choice(tower.boundaries), randint(80,size[1]-80) )   # 空放时击打塔的两侧
+                endPos = ( choice(tower.boundaries), randint(80,size[1]-80)-CAMERA.scroll[1] )   # 空放时击打塔的两侧
                 self.lastTgt = None     # 轮空一次雷击，将lastTgt重置为空
             else:
                 endPos = getPos(tmpM, 0.5, 0.5)
@@ -2117,8 +2116,8 @@ class SuperPowerManagerWizard(SuperPowerManager):
 
     def paint(self, surface):
         for lightning in self.lightningList:
-            pygame.draw.lines(surface, choice(self.colorSet), False, lightning["pointlist1"], width=3)
-            pygame.draw.lines(surface, choice(self.colorSet), False, lightning["pointlist2"], width=4)
+            pygame.draw.lines(surface.surface, choice(self.colorSet), False, [surface.pos(p) for p in lightning["pointlist1"]], width=3)
+            pygame.draw.lines(surface.surface, choice(self.colorSet), False, [surface.pos(p) for p in lightning["pointlist2"]], width=4)
 
     def createZapPoints(self, startPos, endPos, zipDent=20):
         # zipDent: 闪电的折线密度，表示平均每n个像素发生一次偏折
@@ -2139,14 +2138,16 @@ class SuperPowerManagerWizard(SuperPowerManager):
         return pointList
     
 class SuperPowerManagerHuntress(SuperPowerManager):
+    rotSteps = ROT_STEPS    # 回旋镖旋转缓存的档数
+
     def __init__(self, hero):
         SuperPowerManager.__init__(self, hero)
         self.direction = self.caster.status
         self.cover = 4.8*RANGE["LONG"]
         self.covering = 0
-        self.ori_img = load("image/huntress/weapon.png").convert_alpha()
-        self.hitSnd = pygame.mixer.Sound("audio/knight/hit.wav")
-        pygame.mixer.Sound("audio/knight/superPowerCast.wav").play(0)
+        self.ori_img = loadImg("image/huntress/weapon.png")
+        self.hitSnd = loadSnd("audio/knight/hit.wav", "hero")
+        loadSnd("audio/knight/superPowerCast.wav", "hero").play(0)
         # boomerang
         self.boomerang = pygame.sprite.Sprite()
         self.boomerang.image = self.ori_img
@@ -2169,8 +2170,8 @@ class SuperPowerManagerHuntress(SuperPowerManager):
                 self.rotated -= 20
                 if self.rotated<=-360:
                     self.rotated = 0
-            self.boomerang.image = pygame.transform.rotate( self.ori_img, self.rotated )
-            self.mask = pygame.mask.from_surface(self.boomerang.image)
+            self.boomerang.image = rotImg( self.ori_img, self.rotated, self.rotSteps, subsurf=False )
+            self.mask = getMask(self.boomerang.image)
         # 处理位移
         self.boomerang.rect.left += self.boomerang.speed[0]
         self.covering += abs(self.boomerang.speed[0])
@@ -2224,19 +2225,14 @@ class SuperPowerManagerHuntress(SuperPowerManager):
         for rect in self.rectList:
             rect.top += dist
     
-    def level(self, dist):
-        self.boomerang.rect.left += dist
-        for rect in self.rectList:
-            rect.left += dist
-    
 class SuperPowerManagerPriest(SuperPowerManager):
     def __init__(self, hero):
         SuperPowerManager.__init__(self, hero)
         self.per_heal = 80      # 每次回复的量
         self.healCnt = 3        # 快速回复3次
         self.healRad = 260      # 治疗半径（实际计算距离，与显示的圆圈大小无关）
-        pygame.mixer.Sound("audio/knight/superPowerCast.wav").play(0)
-        self.ori_img = load("image/priest/cross.png").convert_alpha()
+        loadSnd("audio/knight/superPowerCast.wav", "hero").play(0)
+        self.ori_img = loadImg("image/priest/cross.png")
         # 金黄圣圈
         self.radius = 10
         self.width = 30
@@ -2283,12 +2279,12 @@ class SuperPowerManagerPriest(SuperPowerManager):
     def paint(self, surface):
         if self.width>1:
             pygame.draw.circle(
-                surface, (255,255,10), getPos(self.caster,0.5,0.5), self.radius, self.width
+                surface.surface, (255,255,10), surface.pos(getPos(self.caster,0.5,0.5)), self.radius, self.width
             )
         for rect, cnt, spd in self.iconList:
             surface.blit( self.ori_img, rect )
         for pos, r, spd in self.dotList:
-            pygame.draw.circle( surface, (255,255,10), pos, r )
+            pygame.draw.circle( surface.surface, (255,255,10), surface.pos(pos), r )
 
     def makeMark(self, pos, type="cross"):
         # dandomize a position that is on the edge.
@@ -2311,7 +2307,7 @@ class SuperPowerManagerKing(SuperPowerManager):
 
     def __init__(self, hero):
         SuperPowerManager.__init__(self, hero)
-        pygame.mixer.Sound("audio/knight/superPowerCast.wav").play(0)
+        loadSnd("audio/knight/superPowerCast.wav", "hero").play(0)
         # if king already has one servant, kill her
         if self.caster.serv:
             while self.caster.serv.health>0:
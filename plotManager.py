@@ -14,7 +14,8 @@ from random import choice, sample
 from database import MB, DT, REC_DATA, TB, RB
 import database
 from util import TextButton, ImgButton, Panel, RichText
-from util import generateShadow, drawRect
+from util import generateShadow, drawRect, MediaLibrary
+from soundBank import loadSnd
 
 
 VERSION = "KT_7.4.3"
@@ -276,21 +277,17 @@ class StgManager():
     # 绝对位置     endless     chp1    chp2       chp3        chp4        chp5       chp6       chp7
     compassPos = [(25,-120), (85,-10), (65,-90), (20,-210), (-120,-135), (-140,0), (-65,-40), (-30,-120) ]
     unlock_cost = 50
+    thumbSize = (90, 120)   # 左右两侧封面缩略图的尺寸
 
     # ====================================================================
     # Constructor of StgManager ------------------------------------------
     def __init__(self, width, height, font):
         self.delay = 0
-        # 初始化关卡封面
-        self.coverList = [pygame.image.load("image/cover1.jpg").convert(), pygame.image.load("image/cover2.jpg").convert(), pygame.image.load("image/cover3.jpg").convert(), 
-            pygame.image.load("image/cover4.jpg").convert(), pygame.image.load("image/cover5.jpg").convert(), pygame.image.load("image/cover6.jpg").convert(), 
-            pygame.image.load("image/cover7.jpg").convert() ]
-        self.endlessCover = pygame.image.load("image/coverEndless.jpg").convert()
-        # 封面缩略图
-        self.coverAbb = []
-        for each in self.coverList:
-            coverAbb = pygame.transform.smoothscale( each, (90, 120) )
-            self.coverAbb.append( coverAbb )
+        # 初始化关卡封面：这里只登记文件，用到时才解码（选关轮播预取当前及相邻章节，见prefetchCovers）。0号为无尽模式封面
+        self.covers = MediaLibrary(keep=4)
+        for stg in range(1, len(self.nameList)+1):
+            self.covers.add( stg, f"image/cover{stg}.jpg" )
+        self.covers.add( 0, "image/coverEndless.jpg" )
         # 初始化compass
         self.windowLeft = pygame.Surface( (width//2, height) ).convert_alpha()
         self.compass = pygame.image.load("image/compass.png").convert_alpha()
@@ -337,6 +334,17 @@ class StgManager():
         self.unlock_guide = RichText( (f"or spend _IMG_{self.unlock_cost}",f"或消耗 _IMG_{self.unlock_cost}"), 
                 pygame.image.load("image/gem0.png").convert_alpha(), font) 
         
+    def cover(self, stg, thumb=False):
+        '''第stg章的封面（0为无尽模式）。thumb为True时给出缩略图'''
+        return self.covers.get( stg, self.thumbSize if thumb else None )
+
+    def prefetchCovers(self, stg):
+        '''解码第stg章及其左右章节的封面和缩略图，切换章节时的动画要用到'''
+        for each in (stg-1, stg+1, stg):
+            if 1 <= each <= len(self.nameList):
+                self.covers.prefetch( [each] )
+                self.covers.prefetch( [each], self.thumbSize )
+
     def updateCompass(self, nxt):
         self.delay = (self.delay+1)%240
         # Compass
@@ -361,12 +369,12 @@ class StgManager():
     def purchaseChapter(self, stg):
         # check gems
         if REC_DATA["GEM"] < self.unlock_cost:
-            pygame.mixer.Sound("audio/alert.wav").play(0)
+            loadSnd("audio/alert.wav", "ui").play(0)
             return "lackGem"
         # currently only advent mode will be unlocked this way
         REC_DATA["CHAPTER_REC"][stg-1] = 0
         REC_DATA["GEM"] -= self.unlock_cost
-        pygame.mixer.Sound("audio/coin.wav").play(0)
+        loadSnd("audio/coin.wav", "ui").play(0)
         return "OK"
 
     def shiftStartChp(self):
@@ -740,13 +748,7 @@ class HeroBook():
     # Constructor of HeroManager -----------------------------------------
     def __init__(self, width, height, panel_font):
         # 检测英雄可用性
-        # 英雄解锁：Knight       Prince        Huntress       King
-        self.accList = [ True, False, False, False, False, False, False ]
-        i = 0   # i指示当前的英雄在accList中的序号。ie.1表示公主是否解锁。
-        for stgStar in REC_DATA["CHAPTER_REC"]:
-            i += 1
-            if int(stgStar)>0 and i<7: # 该关已通过任意难度，则该关卡对应的英雄已解锁
-                self.accList[i] = True
+        self.accList = self.checkAcc()
         self.heroList = []
         # name, acc,   hp, dmg, rDmg,   desc, note
         self.heroList.append( VHero( 
@@ -814,6 +816,7 @@ class HeroBook():
             (("","")), ("",""), ("-","-"), (("",""))
         )
         self.notFound = pygame.image.load("image/lock.png").convert_alpha()
+        self.activeImg = pygame.image.load("image/active.png")
         self.icons = {
             "HP": pygame.image.load("image/icon_hp.png").convert_alpha(),
             "DMG": pygame.image.load("image/icon_dmg.png").convert_alpha(),
@@ -831,8 +834,8 @@ class HeroBook():
         # curHero (heroNo):初始默认为0：骑士; 1：公主
         self.curHero = [ REC_DATA["SYS_SET"]["P1"], REC_DATA["SYS_SET"]["P2"] ]
         self.pointer = self.curHero[self.playerNo] # set pointer to the player1's hero
-        self.pageSnd = pygame.mixer.Sound("audio/page.wav")
-        self.chosenSnd = pygame.mixer.Sound("audio/victoryHorn.wav")
+        self.pageSnd = loadSnd("audio/page.wav", "ui")
+        self.chosenSnd = loadSnd("audio/victoryHorn.wav", "ui")
         # statistics
         self.update_total_level()
         # panel ======================================
@@ -944,7 +947,7 @@ class HeroBook():
             
             # check whether the current hero is chosen
             if self.pointer==self.curHero[self.playerNo]:
-                self.addSymm( pygame.image.load("image/active.png"), 40, -260 )
+                self.addSymm( self.activeImg, 40, -260 )
         # Unlock condition.
         self.addTXT( hero.note, fontSmall, language, (60,60,60), 0, dscRect.bottom-self.windowSize[1]//2-20)
         return (chosenAtt, AttBars[chosenAtt]) # 返回选中的属性项名称和其rect.
@@ -1004,9 +1007,29 @@ class HeroBook():
             return ( self.book[0], 0 )
 
     def update_total_level(self):
+        self.total_level = self.countLevel(self.accList)
+
+    # 以下几项只读存档，主页在英雄书建立之前也能使用 ---------------------
+    @staticmethod
+    def checkAcc():
+        # 英雄解锁：Knight       Prince        Huntress       King
+        accList = [ True, False, False, False, False, False, False ]
+        i = 0   # i指示当前的英雄在accList中的序号。ie.1表示公主是否解锁。
+        for stgStar in REC_DATA["CHAPTER_REC"]:
+            i += 1
+            if int(stgStar)>0 and i<7: # 该关已通过任意难度，则该关卡对应的英雄已解锁
+                accList[i] = True
+        return accList
+
+    @staticmethod
+    def countLevel(accList):
         # 未解锁的不参与计算（视为0）
-        lvl_list = [ REC_DATA["HEROES"][i][0] for i in range( len(REC_DATA["HEROES"]) ) if self.accList[i] ]
-        self.total_level = sum(lvl_list)
+        return sum( REC_DATA["HEROES"][i][0] for i in range( len(REC_DATA["HEROES"]) ) if accList[i] )
+
+    @staticmethod
+    def unusedSP():
+        '''是否有英雄还有可分配的技能点（VHero.SP与存档同步更新）'''
+        return any( lvex[2]>0 for lvex in REC_DATA["HEROES"] )
 
     def addTXT(self, txtList, font, language, color, x, y, align="center"):
         '''xy为正负（偏离屏幕中心点）像素值。确定了文字行的中心坐标。
@@ -1062,7 +1085,7 @@ class VHero():
         self.superPowerFull = superPowerFull
         self.note = note
         if not VHero.alloSnd:
-            VHero.alloSnd = pygame.mixer.Sound("audio/coin.wav")
+            VHero.alloSnd = loadSnd("audio/coin.wav", "ui")
             VHero.spBoard = pygame.image.load("image/ammoCircle.png").convert_alpha()
         # accessiblity
         self.acc = acc
@@ -1072,7 +1095,7 @@ class VHero():
             tag = name[0].lower()
             self.image = pygame.image.load("image/"+tag+"/"+tag+".png").convert_alpha()
             self.brand = pygame.image.load("image/"+tag+"/brand.png").convert_alpha()
-            self.voice = pygame.mixer.Sound("audio/"+tag+"/"+tag+"C.wav")
+            self.voice = loadSnd("audio/"+tag+"/"+tag+"C.wav", "ui")
             self.spIcon = pygame.image.load("image/"+tag+"/superPowerIcon.png").convert_alpha()
             # exp & level information
             lvex = REC_DATA["HEROES"][self.no]
@@ -1227,11 +1250,11 @@ class Bazaar():
     def buy_stone(self):
         # click on space
         if self.currentKey not in RB:
-            pygame.mixer.Sound("audio/alert.wav").play(0)
+            loadSnd("audio/alert.wav", "ui").play(0)
             return
         # check gems
         if REC_DATA["GEM"] < RB[self.currentKey].cost:
-            pygame.mixer.Sound("audio/alert.wav").play(0)
+            loadSnd("audio/alert.wav", "ui").play(0)
             return "lackGem"
         # increase stone
         try:
@@ -1244,7 +1267,7 @@ class Bazaar():
         for i in range(3):
             if self.onsale[i].tag == self.currentKey:
                 self.onsale[i] = RunestonePanel(self.fntSet[1], "")
-        pygame.mixer.Sound("audio/coin.wav").play(0)
+        loadSnd("audio/coin.wav", "ui").play(0)
 
         return "OK"
     
@@ -1279,11 +1302,11 @@ class Bazaar():
 
     def reroll(self):
         if REC_DATA["GEM"] >= self.reroll_cost:
-            pygame.mixer.Sound("audio/coin.wav").play(0)
+            loadSnd("audio/coin.wav", "ui").play(0)
             REC_DATA["GEM"] -= self.reroll_cost
             self.onsale = sample(self.stonePanels, 3)
         else:
-            pygame.mixer.Sound("audio/alert.wav").play(0)
+            loadSnd("audio/alert.wav", "ui").play(0)
             return "lackGem"
     
     # General ---------
@@ -1340,18 +1363,12 @@ class MyStonePanel(Panel):
         # real record is not updated here. On clicking: instantly updated. 
         # This just respond to animation.
         self.update_panel()
-        pygame.mixer.Sound("audio/coin.wav").play(0)
+        loadSnd("audio/coin.wav", "ui").play(0)
 
 
 # ==============================================================================================
 # ==============================================================================================
-import requests
-from bs4 import BeautifulSoup
-import zipfile
 import os
-import paramiko
-import pymysql      # 用于数据库访问
-import time         # 用于下载速度计时
 
 class Settings():
     # This is for three modules: settings, version, weblink
@@ -1402,6 +1419,7 @@ class Settings():
         #print(jpg_list)
         # 2.过滤文件名不合法的jpg文件，形成本次壁纸集
         self.paperList = []
+        self.papers = MediaLibrary(keep=2)      # 只解码正在使用的壁纸
         for jpg in jpg_list:
             try:
                 name_string = jpg.split(".")[0]
@@ -1411,8 +1429,9 @@ class Settings():
             except:
                 continue
             else:
-                # 读取jpg并加入列表中（字典：{壁纸名，特效号，surface对象}）
-                self.paperList.append( {"name": (EN, CN), "e": int(e), "p":pygame.image.load(f"image/titleBG/{jpg}")} )
+                # 登记jpg并加入列表中（字典：{壁纸名，特效号，文件名}），图片本身由paper()按需解码
+                self.paperList.append( {"name": (EN, CN), "e": int(e), "file": jpg} )
+                self.papers.add( jpg, f"image/titleBG/{jpg}" )
         # 3.判断以往的序号是否超出本次数量范围，若超出则重置为0
         if REC_DATA["SYS_SET"]["PAPERNO"]>=len(self.paperList):
             REC_DATA["SYS_SET"]["PAPERNO"] = 0
@@ -1539,6 +1558,10 @@ class Settings():
                             self.currentRect = k_dict[key_n]["rect"]
                             self.currentKey = k_dict[key_n]["tag"]
 
+    def paper(self, no):
+        '''第no张壁纸，已转换为屏幕的像素格式'''
+        return self.papers.get( self.paperList[no]["file"] )
+
     def drawFrame(self, key):
         rect = ( (20,key.top-2), (self.windowSize[0]-40,key.height+4) )
         pygame.draw.rect( self.window, (240,240,240), rect, 1 )
@@ -1666,4 +1689,4 @@ class AccountButton(Panel):
     def receiveExp(self, num, typ):
         #REC_DATA["GEM"] += 1
         self.reset()
-        pygame.mixer.Sound("audio/coin.wav").play(0)
+        loadSnd("audio/coin.wav", "ui").play(0)
@@ -14,8 +14,9 @@ from random import random, randint, choice
 from enemy import Missle    # for MissleGun in Chapter6
 from mapElems import Totem, Tracker, Porter
 from database import DMG_FREQ
-from util import InanimSprite, HPBar
+from util import InanimSprite, HPBar, CAMERA
 from util import getPos, generateShadow, getCld
+from soundBank import loadSnd
 
 
 # ==========================================================
@@ -115,9 +116,6 @@ class Prop(object):
     def lift(self, dist):
         return
     
-    def level(self, dist):
-        return
-    
 # CP 1
 class Cooler(Prop):
     def __init__(self, user):
@@ -181,8 +179,8 @@ class ToothRing(Prop):
 
     def paint(self, surface):
         for dot in self.critDots:
-            pygame.draw.circle( surface, (200,10,120), dot[0], dot[1]+1 )
-            pygame.draw.circle( surface, (180,0,100), dot[0], dot[1] )
+            pygame.draw.circle( surface.surface, (200,10,120), surface.pos(dot[0]), dot[1]+1 )
+            pygame.draw.circle( surface.surface, (180,0,100), surface.pos(dot[0]), dot[1] )
 
 
 # CP 2
@@ -190,7 +188,7 @@ class HerbalExtract(Prop):
     def __init__(self, user):
         Prop.__init__(self, "herbalExtract", 300, user)
         self.cureDots = []
-        self.user.bar.barBG.fill( (180,255,240,210) )
+        self.user.bar.setBG( (180,255,240,210) )
 
     def work(self):
         self.duration -= 1
@@ -211,21 +209,21 @@ class HerbalExtract(Prop):
                 self.duration = 0
         # 如果效果用完，或者英雄受到伤害，则终止回复效果。
         if self.duration <= 0 or self.user.hitFeedIndx:
-            self.user.bar.barBG.fill( (255,255,255,210) )
+            self.user.bar.setBG( (255,255,255,210) )
             self.erase()
             return
 
     def paint(self, surface):
         for dot in self.cureDots:
-            pygame.draw.circle( surface, (60,240,210), dot[0], dot[1]+1 )
-            pygame.draw.circle( surface, (30,190,160), dot[0], dot[1] )
+            pygame.draw.circle( surface.surface, (60,240,210), surface.pos(dot[0]), dot[1]+1 )
+            pygame.draw.circle( surface.surface, (30,190,160), surface.pos(dot[0]), dot[1] )
 
 class BlastingCap(Prop, InanimSprite):
     snd = None
 
     def __init__(self, owner, speed, onlayer):
         if not BlastingCap.snd:
-            BlastingCap.snd = pygame.mixer.Sound("audio/blastcap.wav")
+            BlastingCap.snd = loadSnd("audio/blastcap.wav", "hero")
         
         Prop.__init__(self, "blastingCap", 90, owner)
         InanimSprite.__init__(self, "blastingCap")
@@ -407,7 +405,7 @@ class Copter(Prop):
     def fallFly(self, keyLine, newLine, heightList, GRAVITY):
         self.user.rect.bottom += self.user.gravity  # 尝试将自身纵坐标减去重力值
         # 获得所有碰撞了的物体对象，并针对每一个碰撞了的item执行相应的响应动作。这里不会触发特殊砖块的效果。
-        for item in pygame.sprite.spritecollide(self.user, self.user.checkList, False, collide_mask):
+        for item in self.user.checkList.collide(self.user):
             if item.category in self.user.interactiveList:
                 item.interact(self.user)
         # 飞行状态不重复下落，逐步减缓重力。
@@ -433,8 +431,8 @@ class Pesticide(Prop):
     def __init__(self, user):
         Prop.__init__(self, "pesticide", 52, user)
         # Equip Sound:
-        pygame.mixer.Sound("audio/mecha.wav").play(0)
-        self.spraySnd = pygame.mixer.Sound("audio/pesticide.wav")
+        loadSnd("audio/mecha.wav", "hero").play(0)
+        self.spraySnd = loadSnd("audio/pesticide.wav", "hero")
         self.imgLeft = load("image/props/pesticideEquiped.png").convert_alpha()
         self.imgRight = flip(self.imgLeft, True, False)
         self.posR = (0.5,0.55)
@@ -562,16 +560,13 @@ class BattleTotem(Prop, Totem):
     def lift(self, dist):
         self.rect.bottom += dist
     
-    def level(self, dist):
-        self.rect.left += dist
-    
 
 # CP 6
 class SimpleArmor(Prop):
     def __init__(self, user):
         Prop.__init__(self, "simpleArmor", 240, user)
         # Equip Sound:
-        pygame.mixer.Sound("audio/mecha.wav").play(0)
+        loadSnd("audio/mecha.wav", "hero").play(0)
         self.imgLeft = load("image/props/simpleArmorEquiped.png").convert_alpha()
         self.imgRight = flip(self.imgLeft, True, False)
         self.posR = (0.5,0.55)
@@ -631,8 +626,8 @@ class SimpleArmor(Prop):
             w = min(self.blockLen, health)
             block = pygame.Rect( x+self.gap+offset, y+self.gap, w, self.barH-self.gap*2 )
             shadow = pygame.Rect( x+self.gap+offset, block.bottom-self.gap*2, w, self.gap*2 )
-            pygame.draw.rect( surface, color, block )
-            pygame.draw.rect( surface, shadeColor, shadow )
+            pygame.draw.rect( surface.surface, color, surface.rect(block) )
+            pygame.draw.rect( surface.surface, shadeColor, surface.rect(shadow) )
             health -= self.user.bar.blockVol
             offset += (self.blockLen+self.gap)
 
@@ -640,7 +635,7 @@ class MissleGun(Prop):
     def __init__(self, user):
         Prop.__init__(self, "missleGun", 4, user)
         # Equip Sound:
-        pygame.mixer.Sound("audio/mecha.wav").play(0)
+        loadSnd("audio/mecha.wav", "hero").play(0)
         self.imgLeft = load("image/props/missleGunEquiped.png").convert_alpha()
         self.imgRight = flip(self.imgLeft, True, False)
         self.posR = (0.5,0.55)
@@ -685,8 +680,10 @@ class MissleGun(Prop):
             # make ammo object
             scrnList = []
             goalieList = []
+            userBottom = CAMERA.toScreen(self.user.rect).bottom
             for each in tower.monsters:
-                if (each.rect.bottom>0) and (each.rect.top<2*self.user.rect.bottom):  # 大致地估算是否在屏幕范围内。
+                scr = CAMERA.toScreen(each.rect)
+                if (scr.bottom>0) and (scr.top<2*userBottom):  # 大致地估算是否在屏幕范围内。
                     # 优先攻击非地面生物
                     if each.manner!="GROUND" or each.manner=="CRAWL":
                         goalieList.append(each)
@@ -747,7 +744,7 @@ class RustedHorn(Prop):
         self.per_heal = 30      # 对于每名生效的敌人，为己方回复的HP
         self.healRad = 320      # 治疗和眩晕半径（实际计算距离，与显示的圆圈大小无关）
         self.stun_dur = 120     # 眩晕时长：2秒
-        pygame.mixer.Sound("audio/rustedHorn.wav").play(0)
+        loadSnd("audio/rustedHorn.wav", "hero").play(0)
         # 黄色光圈
         self.radius = 25
         self.width = self.duration
@@ -802,9 +799,9 @@ class RustedHorn(Prop):
     
     def paint(self, surface):
         if self.width>1:
-            pygame.draw.circle( surface, (255,220,20), getPos(self.user,0.5,0.5), self.radius, self.width )
+            pygame.draw.circle( surface.surface, (255,220,20), surface.pos(getPos(self.user,0.5,0.5)), self.radius, self.width )
         for pos, r, spd in self.dotList:
-            pygame.draw.circle( surface, (255,220,20), pos, r )
+            pygame.draw.circle( surface.surface, (255,220,20), surface.pos(pos), r )
     
     def makeMark(self, pos):
         # dandomize a position that is on the edge.
@@ -835,7 +832,7 @@ class DefenseTower(Prop, Porter):
         self.shootCnt = 0
         # For NPC hero:
         self.bar = HPBar(self.full, blockVol=300, color="orange")
-        self.snd = pygame.mixer.Sound("audio/healing.wav")
+        self.snd = loadSnd("audio/healing.wav", "hero")
 
     def hitted(self, damage, pushed, dmgType):
         if self.health<=0:
@@ -844,7 +841,7 @@ class DefenseTower(Prop, Porter):
         if (self.health < 0):
             self.health = 0
             # 音效
-            pygame.mixer.Sound("audio/wizard/hit.wav").play(0)
+            loadSnd("audio/wizard/hit.wav", "hero").play(0)
             return True
         self.hitFeedIndx = 6
 
@@ -889,16 +886,13 @@ class DefenseTower(Prop, Porter):
             self.hitFeedIndx -= 1
         return 0
 
-    def drawHeads(self, screen):
+    def drawHeads(self, screen, offset=(0,0)):
         # 画HP
         if self.hitFeedIndx:
             self.bar.setColor("yellow")
         else:
             self.bar.setColor("orange")
-        self.bar.paint(self, screen)
+        self.bar.paint(self, screen, offset=offset)
 
     def lift(self, dist):
         self.rect.bottom += dist
-    
-    def level(self, dist):
-        self.rect.left += dist
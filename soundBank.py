@@ -0,0 +1,122 @@
+"""
+soundBank.py:
+모든 효과음을 관리하는 사운드 뱅크입니다. 같은 wav 파일은 한 번만 불러오고 모든 사용자가 공유합니다.
+효과음은 용도별 채널 그룹(UI, 영웅, 몬스터, 환경음)에서 재생되므로, 한 프레임에 많은 타격음이 나더라도
+메뉴 소리나 보스의 울음소리가 밀려나지 않습니다.
+같은 소리의 동시 재생 수는 제한되며, 몇 밀리초 안에 반복된 재생은 하나로 합쳐집니다.
+"""
+import os
+import pygame
+
+# 各频道组预留的频道数。组内频道全部占用时，挤掉最早开始播放的那一个
+CHANNEL_GROUPS = { "ui": 2, "hero": 6, "monster": 8, "ambience": 2 }
+FREE_CHANNELS = 4       # 不属于任何组的频道，留给直接调用Sound.play()的代码
+VOICE_LIMIT = 3         # 同一个音效默认最多同时播放的声部数
+MERGE_MS = 10           # 同一音效在此间隔内的重复播放合并为一次（同一帧内的多次命中）
+
+
+class BankSound():
+    '''Shared handle of one wav for one channel group. Behaves like pygame.mixer.Sound for the calls the game makes
+    (play, stop, get_num_channels, get_length), but play() goes through the bank.'''
+    def __init__(self, bank, sound, group, limit):
+        self.bank = bank
+        self.sound = sound
+        self.group = group
+        self.limit = limit
+        self.lastPlay = None
+
+    def play(self, loops=0, maxtime=0, fade_ms=0):
+        return self.bank.play(self, loops, maxtime, fade_ms)
+
+    def stop(self):
+        self.sound.stop()
+
+    def get_num_channels(self):
+        return self.sound.get_num_channels()
+
+    def get_length(self):
+        return self.sound.get_length()
+
+
+class SoundBank():
+    def __init__(self, groups=CHANNEL_GROUPS, free=FREE_CHANNELS, mergeMs=MERGE_MS):
+        self.groups = groups
+        self.free = free
+        self.mergeMs = mergeMs
+        self.sounds = {}        # path -> pygame.mixer.Sound，每个文件只加载一次
+        self.handles = {}       # (path, group) -> BankSound
+        self.channels = {}      # group -> [ [Channel, 开始播放的时刻], ... ]，在第一次播放时建立（须在mixer初始化之后）
+        self.loads = 0
+        self.plays = 0
+        self.merged = 0
+        self.dropped = 0        # 因达到声部上限而放弃的播放
+        self.stolen = 0         # 组内频道已满，挤掉了正在播放的声音
+
+    def _load(self, path):
+        if path not in self.sounds:
+            self.sounds[path] = pygame.mixer.Sound(path)
+            self.loads += 1
+        return self.sounds[path]
+
+    def get(self, path, group="monster", limit=VOICE_LIMIT):
+        key = (path, group)
+        if key not in self.handles:
+            self.handles[key] = BankSound(self, self._load(path), group, limit)
+        return self.handles[key]
+
+    def preload(self, folder="audio"):
+        '''把folder下的所有wav预先读入内存，之后的get()不再访问磁盘。'''
+        for root, dirs, files in os.walk(folder):
+            for name in sorted(files):
+                if name.lower().endswith(".wav"):
+                    self._load( os.path.join(root, name).replace(os.sep, "/") )
+
+    def _initChannels(self):
+        total = sum(self.groups.values())
+        pygame.mixer.set_num_channels(total+self.free)
+        # 预留的频道不会被Sound.play()自动选用
+        pygame.mixer.set_reserved(total)
+        cid = 0
+        for group, num in self.groups.items():
+            self.channels[group] = [ [pygame.mixer.Channel(cid+i), 0] for i in range(num) ]
+            cid += num
+
+    def play(self, snd, loops=0, maxtime=0, fade_ms=0):
+        if not self.channels:
+            self._initChannels()
+        now = pygame.time.get_ticks()
+        if snd.lastPlay is not None and now-snd.lastPlay<self.mergeMs:
+            self.merged += 1
+            return None
+        if snd.sound.get_num_channels()>=snd.limit:
+            self.dropped += 1
+            return None
+        slots = self.channels[snd.group]
+        slot = None
+        for each in slots:
+            if not each[0].get_busy():
+                slot = each
+                break
+        if not slot:
+            slot = min(slots, key=lambda each: each[1])
+            self.stolen += 1
+        slot[0].play(snd.sound, loops, maxtime, fade_ms)
+        slot[1] = now
+        snd.lastPlay = now
+        self.plays += 1
+        return slot[0]
+
+    def stats(self):
+        return { "sounds": len(self.sounds), "loads": self.loads, "plays": self.plays,
+            "merged": self.merged, "dropped": self.dropped, "stolen": self.stolen,
+            "bytes": sum( self._size(snd) for snd in self.sounds.values() ) }
+
+    def _size(self, snd):
+        freq, fmt, chans = pygame.mixer.get_init()
+        return int( snd.get_length()*freq*chans*(abs(fmt)//8) )
+
+BANK = SoundBank()
+
+def loadSnd(path, group="monster", limit=VOICE_LIMIT):
+    '''从音效库中取出（必要时加载）共享的音效。group为播放所用的频道组："ui"、"hero"、"monster"或"ambience"'''
+    return BANK.get(path, group, limit)
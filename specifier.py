@@ -13,66 +13,156 @@ from mapElems import ChestContent, WebWall, House, Wall, Totem # will be used in
 import enemy
 
 from database import GRAVITY
-from util import getPos
+from util import getPos, loadImg, loadMask, CAMERA
+from soundBank import loadSnd
 
 
 # =====================================
-class Stg1Specifier():
+class Specifier():
+    '''
+    各章节Specifier的基类。每帧的怪物更新通过调度表完成：
+    handlers: category -> (handler, onScreen)，在__init__()中每章节登记一次，每个物体只需一次字典查找。
+    onScreen为True的类别只在进入屏幕（纵向）时才更新；屏幕外的这类物体被放入sleeping集合，
+    直到镜头发生纵向卷动或切换区域时才重新检查。
+    '''
     def __init__(self):
-        pass
-
-    def moveMons(self, model, item, heroes):
-        if item.category == "infernoFire":
-            item.update( model.delay, heroes, model.spurtCanvas )
-        elif item.category == "fire":
-            vib = item.update(model.delay, model.tower.groupList["0"], model.tower.groupList[str(item.onlayer)], model.tower.getTop(item.onlayer)+model.blockSize, heroes, model.spurtCanvas, model.bg_size ) 
-            if vib == "vib":
-                model._addVib(6)
-        elif item.category == "CrimsonDragon":
-            if item.activated:
-                model.spurtCanvas.addHalo( "monsHalo", 0 )
-                fire = item.update( model.delay, heroes, model.spurtCanvas )
-                if fire:
-                    model.tower.allElements["mons1"].add(fire)
-            elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-                item.activated = True
-                model.msgManager.addMsg( ("Danger Coming !","危险来临！"), type="ctr", duration=120 )
-        elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):  # moves only if they appears in the screen
-            if item.category == "tizilla":
-                item.move(model.delay, heroes)
-                item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-            elif item.category=="megaTizilla":
-                item.move(model.delay, heroes, model.spurtCanvas)
-                item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY)
-            elif item.category == "dragon":
-                fire = item.move(model.delay)
-                if fire:
-                    model.tower.allElements["mons1"].add(fire)
-            elif item.category == "dragonEgg":
-                if item.health>0:
-                    fire = item.move(model.delay, heroes)
-                    if fire:
-                        model.tower.allElements["mons1"].add(fire)
-                else:
-                    dragon = enemy.Dragon(model.tower.heightList[str(item.onlayer)], str(item.onlayer), model.tower.boundaries)
-                    dragon.rect.left = item.rect.left
-                    item.kill()
-                    model.tower.monsters.add( dragon )
-                    model.tower.allElements["mons1"].add( dragon )
-            elif item.category == "blockFire":
-                item.burn(model.delay, heroes, model.spurtCanvas)
-            elif item.category == "hellHound":
-                vib = item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-                if vib:
-                    model._addVib(8)
-                item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
+        self.handlers = {}
+        self.sleeping = set()
+        self.tops = {}          # onlayer -> tower.getTop(onlayer)，随stamp一并失效
+        self.stamp = None
+
+    def register(self, categories, handler, onScreen=False):
+        if isinstance(categories, str):
+            categories = (categories,)
+        for cat in categories:
+            self.handlers[cat] = (handler, onScreen)
+
+    def getTop(self, model, layer):
+        if layer not in self.tops:
+            self.tops[layer] = model.tower.getTop(layer)
+        return self.tops[layer]
+
+    def moveGroup(self, model, group, heroes, own={}):
+        '''Update every item of the group in its own order. `own` maps categories handled by the model itself to func(item).'''
+        # 休眠的物体自身不会移动，只有镜头纵向卷动或更换区域才可能使其进入屏幕
+        tower = model.tower
+        stamp = (tower, CAMERA.scroll[1])
+        if stamp!=self.stamp:
+            self.stamp = stamp
+            self.sleeping.clear()
+            self.tops.clear()
+        sleeping = self.sleeping
+        handlers = self.handlers
+        height = model.bg_size[1]
+        for item in group:
+            if item in sleeping:
+                continue
+            cat = item.category
+            if cat in own:
+                own[cat](item)
+                continue
+            entry = handlers.get(cat)
+            if not entry:
+                continue
+            if entry[1] and not self._inView(item.rect, height):
+                sleeping.add(item)
+                continue
+            entry[0](model, item, heroes)
+
+    def _inView(self, rect, height):
+        rect = CAMERA.toScreen(rect)
+        return ( rect.bottom >= 0 ) and ( rect.top <= height )
+
+    def _onScreen(self, model, item):
+        return self._inView(item.rect, model.bg_size[1])
+
+    def _bossOn(self, model, item):
+        '''Boss进入屏幕时激活并发出警告。返回Boss是否已激活（激活后每帧附带光环）'''
+        if item.activated:
+            model.spurtCanvas.addHalo( "monsHalo", 0 )
+            return True
+        if self._onScreen(model, item):
+            item.activated = True
+            model.msgManager.addMsg( ("Danger Coming !","危险来临！"), type="ctr", duration=120 )
+        return False
+
+    def _hellHound(self, model, item, heroes):
+        vib = item.fall( self.getTop(model, item.onlayer), model.tower.groupList, GRAVITY )
+        if vib:
+            model._addVib(8)
+        item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
 
     def paint(self, screen):
         return
 
-class Stg2Specifier():
+class Stg1Specifier(Specifier):
+    def __init__(self):
+        Specifier.__init__(self)
+        self.register("infernoFire", self._infernoFire)
+        self.register("fire", self._fire)
+        self.register("CrimsonDragon", self._crimsonDragon)
+        # moves only if they appears in the screen
+        self.register("tizilla", self._tizilla, onScreen=True)
+        self.register("megaTizilla", self._megaTizilla, onScreen=True)
+        self.register("dragon", self._dragon, onScreen=True)
+        self.register("dragonEgg", self._dragonEgg, onScreen=True)
+        self.register("blockFire", self._blockFire, onScreen=True)
+        self.register("hellHound", self._hellHound, onScreen=True)
+
+    def _infernoFire(self, model, item, heroes):
+        item.update( model.delay, heroes, model.spurtCanvas )
+
+    def _fire(self, model, item, heroes):
+        vib = item.update(model.delay, model.tower.groupList["0"], model.tower.groupList[str(item.onlayer)], self.getTop(model, item.onlayer)+model.blockSize, heroes, model.spurtCanvas, model.bg_size ) 
+        if vib == "vib":
+            model._addVib(6)
+
+    def _crimsonDragon(self, model, item, heroes):
+        if self._bossOn(model, item):
+            fire = item.update( model.delay, heroes, model.spurtCanvas )
+            if fire:
+                model.tower.allElements["mons1"].add(fire)
+
+    def _tizilla(self, model, item, heroes):
+        item.move(model.delay, heroes)
+        item.fall( self.getTop(model, item.onlayer), model.tower.groupList, GRAVITY )
+
+    def _megaTizilla(self, model, item, heroes):
+        item.move(model.delay, heroes, model.spurtCanvas)
+        item.fall( self.getTop(model, item.onlayer), model.tower.groupList, GRAVITY)
+
+    def _dragon(self, model, item, heroes):
+        fire = item.move(model.delay)
+        if fire:
+            model.tower.allElements["mons1"].add(fire)
+
+    def _dragonEgg(self, model, item, heroes):
+        if item.health>0:
+            fire = item.move(model.delay, heroes)
+            if fire:
+                model.tower.allElements["mons1"].add(fire)
+        else:
+            dragon = enemy.Dragon(model.tower.heightList[str(item.onlayer)], str(item.onlayer), model.tower.boundaries)
+            dragon.rect.left = item.rect.left
+            item.kill()
+            model.tower.monsters.add( dragon )
+            model.tower.allElements["mons1"].add( dragon )
+
+    def _blockFire(self, model, item, heroes):
+        item.burn(model.delay, heroes, model.spurtCanvas)
+
+class Stg2Specifier(Specifier):
     def __init__(self):
-        pass
+        Specifier.__init__(self)
+        self.register("column", self._column)
+        self.register("stone", self._stone)
+        self.register("GiantSpider", self._giantSpider)
+        self.register(("bat", "spider"), self._move, onScreen=True)
+        self.register("golem", self._golem, onScreen=True)
+        self.register("bowler", self._bowler, onScreen=True)
+        self.register("webWall", self._webWall, onScreen=True)
+        self.register("blockStone", self._blockStone, onScreen=True)
+        self.register("hellHound", self._hellHound, onScreen=True)
 
     def giveBlastingCap(self, hero, bg_size):
         hero.bagpack.incItem("blastingCap", 2)
@@ -80,68 +170,66 @@ class Stg2Specifier():
         substance = ChestContent("blastingCap", hero.bagpack.readItemByName("blastingCap")[1], 2, startPos, hero.slot.slotDic["bag"][1])
         hero.eventList.append( substance )
     
-    def moveMons(self, model, item, heroes):
-        if item.category == "column":
-            vib = item.update( heroes, model.avgLayer, model.tower.groupList, model.spurtCanvas )
-            if vib:
-                model._addVib(6)
-        elif item.category == "stone":
-            item.update(model.delay, model.tower.groupList["0"], model.tower.groupList[str(item.onlayer)], model.tower.getTop(item.onlayer)+model.tower.blockSize, heroes, model.spurtCanvas)
-        elif item.category == "GiantSpider":
-            if item.activated:
-                model.spurtCanvas.addHalo( "monsHalo", 0 )
-                web = item.move( model.delay, heroes, model.spurtCanvas )
-                if isinstance(web, list) and len(web)>2:
-                    for child in web:
-                        model.tower.allElements["mons0"].add(child)
-                        model.tower.monsters.add(child)
-                elif web:
-                    web = WebWall( web[1].left+web[1].width//2, web[1].top+web[1].height//2, 2, (0,0), fade=True)
-                    model.tower.allElements["dec1"].add(web)
-                    model.tower.monsters.add(web)
-                    for hero in heroes:
-                        hero.checkList.add(web)
-            elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-                item.activated = True
-                model.msgManager.addMsg( ("Danger Coming !","危险来临！"), type="ctr", duration=120 )
-        elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-            if item.category == "bat":
-                item.move( model.delay, heroes )
-            elif item.category == "golem":
-                more = item.move( model.delay, heroes )
-                if more:
-                    for each in more:
-                        model.tower.monsters.add( each )
-                        model.tower.allElements["mons1"].add( each )
-                if item.doom and ( item in model.tower.monsters ):
-                    model.tower.monsters.remove(item)
-            elif item.category == "bowler":
-                item.move(model.delay, heroes)
-                stone = item.throw(model.delay)
-                if stone:
-                    model.tower.allElements["mons1"].add(stone)
-                    model.tower.monsters.add(stone)
-            elif item.category == "webWall":
-                if not item.valid and ( item in model.tower.monsters ):
-                    model.tower.monsters.remove(item)
-                else:
-                    item.stick(heroes)
-            elif item.category == "blockStone":
-                item.checkExposion(model.spurtCanvas)
-            elif item.category == "spider":
-                item.move( model.delay, heroes )
-            elif item.category == "hellHound":
-                vib = item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-                if vib:
-                    model._addVib(8)
-                item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
-            
-    def paint(self, screen):
-        return
+    def _column(self, model, item, heroes):
+        vib = item.update( heroes, model.avgLayer, model.tower.groupList, model.spurtCanvas )
+        if vib:
+            model._addVib(6)
+
+    def _stone(self, model, item, heroes):
+        item.update(model.delay, model.tower.groupList["0"], model.tower.groupList[str(item.onlayer)], self.getTop(model, item.onlayer)+model.tower.blockSize, heroes, model.spurtCanvas)
+
+    def _giantSpider(self, model, item, heroes):
+        if self._bossOn(model, item):
+            web = item.move( model.delay, heroes, model.spurtCanvas )
+            if isinstance(web, list) and len(web)>2:
+                for child in web:
+                    model.tower.allElements["mons0"].add(child)
+                    model.tower.monsters.add(child)
+            elif web:
+                web = WebWall( web[1].left+web[1].width//2, web[1].top+web[1].height//2, 2, (0,0), fade=True)
+                model.tower.allElements["dec1"].add(web)
+                model.tower.monsters.add(web)
+                for hero in heroes:
+                    hero.checkList.add(web)
+
+    def _move(self, model, item, heroes):
+        item.move( model.delay, heroes )
+
+    def _golem(self, model, item, heroes):
+        more = item.move( model.delay, heroes )
+        if more:
+            for each in more:
+                model.tower.monsters.add( each )
+                model.tower.allElements["mons1"].add( each )
+        if item.doom and ( item in model.tower.monsters ):
+            model.tower.monsters.remove(item)
+
+    def _bowler(self, model, item, heroes):
+        item.move(model.delay, heroes)
+        stone = item.throw(model.delay)
+        if stone:
+            model.tower.allElements["mons1"].add(stone)
+            model.tower.monsters.add(stone)
+
+    def _webWall(self, model, item, heroes):
+        if not item.valid and ( item in model.tower.monsters ):
+            model.tower.monsters.remove(item)
+        else:
+            item.stick(heroes)
+
+    def _blockStone(self, model, item, heroes):
+        item.checkExposion(model.spurtCanvas)
 
-class Stg3Specifier():
+class Stg3Specifier(Specifier):
     def __init__(self, bg_size):
+        Specifier.__init__(self)
         self.mistGenerator = enemy.MistGenerator(bg_size)
+        self.register("Vampire", self._vampire)
+        self.register("specialWall", self._specialWall)
+        self.register("skeleton", self._skeleton, onScreen=True)
+        self.register("dead", self._dead, onScreen=True)
+        self.register("ghost", self._ghost, onScreen=True)
+        self.register("hellHound", self._hellHound, onScreen=True)
         
     def addSkeleton(self, delay, tower, avgLayer):
         # 每隔一段时间在屏幕范围内生成一波骷髅兵
@@ -170,56 +258,62 @@ class Stg3Specifier():
         else:
             self.mistGenerator.mistNum = 6
 
-    def moveMons(self, model, item, heroes):
-        if item.category == "Vampire":
-            if item.activated:
-                model.spurtCanvas.addHalo( "monsHalo", 0 )
-                babe = item.move( model.delay, heroes, model.tower.groupList, model.spurtCanvas )
-                if babe:      # create more minion.
-                    if babe[0] == "skeleton":
-                        mini = enemy.Skeleton(model.tower.groupList[str(item.onlayer)], model.tower.groupList["0"], model.tower.blockSize, item.onlayer)
-                        mini.birth[0] = babe[1][0]
-                    elif babe[0] == "dead":
-                        mini = enemy.Dead(model.tower.groupList[str(item.onlayer)], model.tower.groupList["0"], model.tower.blockSize, item.onlayer)
-                        mini.rect.left = babe[1][0]
-                    elif babe[0] == "ghost":
-                        mini = enemy.Ghost( model.tower.boundaries, babe[1][1], item.onlayer )
-                        mini.rect.left = babe[1][0]
-                    mini.coin = 0   # 召唤物coin价值为0
-                    model.spurtCanvas.addSpatters( 5, [3, 4], [9, 10, 11], (80,10,80,255), babe[1], True )
-                    model.tower.monsters.add( mini )
-                    model.tower.allElements["mons1"].add( mini )
-            elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-                item.activated = True
-                model.msgManager.addMsg( ("Danger Coming !","危险来临！"), type="ctr", duration=120 )
-        elif item.category == "specialWall" and hasattr(item, "clpCnt"):    # In case of endless model
+    def _vampire(self, model, item, heroes):
+        if self._bossOn(model, item):
+            babe = item.move( model.delay, heroes, model.tower.groupList, model.spurtCanvas )
+            if babe:      # create more minion.
+                if babe[0] == "skeleton":
+                    mini = enemy.Skeleton(model.tower.groupList[str(item.onlayer)], model.tower.groupList["0"], model.tower.blockSize, item.onlayer)
+                    mini.birth[0] = babe[1][0]
+                elif babe[0] == "dead":
+                    mini = enemy.Dead(model.tower.groupList[str(item.onlayer)], model.tower.groupList["0"], model.tower.blockSize, item.onlayer)
+                    mini.rect.left = babe[1][0]
+                elif babe[0] == "ghost":
+                    mini = enemy.Ghost( model.tower.boundaries, babe[1][1], item.onlayer )
+                    mini.rect.left = babe[1][0]
+                mini.coin = 0   # 召唤物coin价值为0
+                model.spurtCanvas.addSpatters( 5, [3, 4], [9, 10, 11], (80,10,80,255), babe[1], True )
+                model.tower.monsters.add( mini )
+                model.tower.allElements["mons1"].add( mini )
+
+    def _specialWall(self, model, item, heroes):
+        if hasattr(item, "clpCnt"):    # In case of endless model
+            moving = item.clpCnt
             item.collapse( GRAVITY, model.spurtCanvas )
-        elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-            if item.category == "skeleton":
-                if not item.popping:
-                    item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-                item.move( model.delay, heroes )
-            elif item.category == "dead":
-                item.move( model.delay, heroes, model.spurtCanvas )
-                item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-            elif item.category == "ghost":
-                signal = item.move(model.delay, heroes, model.spurtCanvas)
-                if signal=="rejoin" and item not in model.tower.monsters:
-                    model.tower.monsters.add( item )
-                elif signal=="out" and item in model.tower.monsters:
-                    model.tower.monsters.remove( item )
-            elif item.category == "hellHound":
-                vib = item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-                if vib:
-                    model._addVib(8)
-                item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
+            if moving:      # 坍塌中的砖块位置发生了变化，需在空间索引中重新登记
+                model.tower.wallGrid.add(item)
+
+    def _skeleton(self, model, item, heroes):
+        if not item.popping:
+            item.fall( self.getTop(model, item.onlayer), model.tower.groupList, GRAVITY )
+        item.move( model.delay, heroes )
+
+    def _dead(self, model, item, heroes):
+        item.move( model.delay, heroes, model.spurtCanvas )
+        item.fall( self.getTop(model, item.onlayer), model.tower.groupList, GRAVITY )
+
+    def _ghost(self, model, item, heroes):
+        signal = item.move(model.delay, heroes, model.spurtCanvas)
+        if signal=="rejoin" and item not in model.tower.monsters:
+            model.tower.monsters.add( item )
+        elif signal=="out" and item in model.tower.monsters:
+            model.tower.monsters.remove( item )
 
     def paint(self, screen):
         self.mistGenerator.paint(screen)
     
-class Stg4Specifier():
+class Stg4Specifier(Specifier):
     def __init__(self):
-        pass
+        Specifier.__init__(self)
+        self.register("MutatedFungus", self._mutatedFungus)
+        self.register(("snake", "fly"), self._move, onScreen=True)
+        self.register("slime", self._slime, onScreen=True)
+        self.register("worm", self._worm, onScreen=True)
+        self.register("nest", self._nest, onScreen=True)
+        self.register("blockOoze", self._blockOoze, onScreen=True)
+        self.register("miniFungus", self._miniFungus, onScreen=True)
+        self.register("house", self._house, onScreen=True)
+        self.register("hellHound", self._hellHound, onScreen=True)
 
     def altMap(self, tower):
         # 1 - Add Hut. First, check all the cluster of sequential 3 walls
@@ -239,8 +333,8 @@ class Stg4Specifier():
                 if wall.category in ("lineWall","specialWall") and wall.coord[0] in (hut_base.coord[0], hut_base.coord[0]+1):
                     new_brick = Wall(wall.rect.left,wall.rect.top,"lineWall",4,wall.coord)
                     wall.kill()
-                    new_brick.image = pygame.image.load("image/stg4/lineWall_alt.png").convert_alpha()
-                    new_brick.mask = pygame.mask.from_surface(new_brick.image)
+                    new_brick.image = loadImg("image/stg4/lineWall_alt.png")
+                    new_brick.mask = loadMask("image/stg4/lineWall_alt.png")
                     tower.allElements["dec1"].add(new_brick)    # For paint out and transform with the map
                     tower.groupList[str(new_brick.coord[1])].add(new_brick)
             # 随同工作2：将被遮盖的decor和chest重新加入Group，使之visible(NOTE:后期更新可以直接删除，hut自己会动态给出两个宝箱)
@@ -253,8 +347,10 @@ class Stg4Specifier():
         # 2 - random替换linewall
         for item in tower.allElements["dec1"]:
             if item.category=="lineWall" and random()<0.12:
-                item.image = pygame.image.load("image/stg4/lineWall_alt.png").convert_alpha()
-                item.mask = pygame.mask.from_surface(item.image)
+                item.image = loadImg("image/stg4/lineWall_alt.png")
+                item.mask = loadMask("image/stg4/lineWall_alt.png")
+        # 小屋和替换的砖块需要登记到空间索引中
+        tower.indexWalls()
     
     def get_wall_cluster(self, tower, n=3):
         cluster_list = []
@@ -285,77 +381,78 @@ class Stg4Specifier():
             spd[1] = randint(0,1)
         else:
             spd[1] = randint(-1,0)
-        sprout = enemy.MiniFungus( [startPos[0]-10,startPos[0]], startPos[1], spd )
+        x, y = CAMERA.toWorld(startPos)     # 从屏幕边缘生出
+        sprout = enemy.MiniFungus( [x-10,x], y, spd )
         tower.allElements["mons2"].add(sprout)
         tower.monsters.add(sprout)
     
-    def moveMons(self, model, item, heroes):
-        if item.category == "MutatedFungus":
-            if item.activated:
-                model.spurtCanvas.addHalo( "monsHalo", 0 )
-                miniFung = item.move( model.delay, heroes )
-                if miniFung:
-                    model.tower.allElements["mons2"].add(miniFung)
-                    model.tower.monsters.add(miniFung)
-            elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-                item.activated = True
-                model.msgManager.addMsg( ("Danger Coming !","危险来临！"), type="ctr", duration=120 )
-        elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-            if item.category == "snake":
-                item.move( model.delay, heroes )
-            elif item.category == "slime":
-                new = item.move(model.delay, heroes)
-                if new:
-                    model.tower.monsters.add(new)
-                    model.tower.allElements["mons1"].add(new)
-            elif item.category == "fly":
-                item.move(model.delay, heroes)
-            elif item.category == "worm":
-                keyLine = model.tower.getTop(item.onlayer)
-                item.move( model.delay, model.tower.groupList[str(item.onlayer)], keyLine, model.tower.groupList["0"], heroes, model.spurtCanvas, GRAVITY )
-            elif item.category == "nest":
-                more = item.move( model.delay, model.tower.monsters )
-                if more:
-                    for each in more:
-                        model.tower.monsters.add( each )
-                        model.tower.allElements["mons1"].add( each )
-            elif item.category == "blockOoze":
-                item.bubble( model.delay, heroes )
-            elif item.category == "miniFungus":
-                item.move(model.delay, heroes, model.spurtCanvas)
-            elif item.category == "house":
-                item.chim(model.spurtCanvas)
-            elif item.category == "hellHound":
-                vib = item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-                if vib:
-                    model._addVib(8)
-                item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
-
-    def paint(self, screen):
-        return
-
-class Stg5Specifier():
+    def _mutatedFungus(self, model, item, heroes):
+        if self._bossOn(model, item):
+            miniFung = item.move( model.delay, heroes )
+            if miniFung:
+                model.tower.allElements["mons2"].add(miniFung)
+                model.tower.monsters.add(miniFung)
+
+    def _move(self, model, item, heroes):
+        item.move( model.delay, heroes )
+
+    def _slime(self, model, item, heroes):
+        new = item.move(model.delay, heroes)
+        if new:
+            model.tower.monsters.add(new)
+            model.tower.allElements["mons1"].add(new)
+
+    def _worm(self, model, item, heroes):
+        keyLine = self.getTop(model, item.onlayer)
+        item.move( model.delay, model.tower.groupList[str(item.onlayer)], keyLine, model.tower.groupList["0"], heroes, model.spurtCanvas, GRAVITY )
+
+    def _nest(self, model, item, heroes):
+        more = item.move( model.delay, model.tower.monsters )
+        if more:
+            for each in more:
+                model.tower.monsters.add( each )
+                model.tower.allElements["mons1"].add( each )
+
+    def _blockOoze(self, model, item, heroes):
+        item.bubble( model.delay, heroes )
+
+    def _miniFungus(self, model, item, heroes):
+        item.move(model.delay, heroes, model.spurtCanvas)
+
+    def _house(self, model, item, heroes):
+        item.chim(model.spurtCanvas)
+
+class Stg5Specifier(Specifier):
     def __init__(self, bg_size, towerList):
+        Specifier.__init__(self)
+        self.register("FrostTitan", self._frostTitan)
+        self.register("snowball", self._snowball)
+        self.register("healTotem", self._healTotem)
+        self.register(("wolf", "iceTroll", "eagle", "iceSpirit"), self._move, onScreen=True)
+        self.register("hellHound", self._hellHound, onScreen=True)
         # 1.暴风雪控制器
         self.blizzardGenerator = enemy.blizzardGenerator(bg_size, 1500, 1000)
-        # 2.每个区域生成Heal Totem
-        totemNum = 3
+        # 2.每个区域生成Heal Totem：依次为3、4、5...个。区域延迟生成时，由model逐个调用addTotems()
+        self.totemNum = 3
         for tower in towerList:
-            if tower.layer<=6:
-                continue
-            # 给塔楼增加图腾数量属性
-            tower.totemNum = totemNum
-            tower.totemList = pygame.sprite.Group()
-            # 确定出现的层数
-            occList = sample(range(3, tower.layer, 2), totemNum)
-            for group in occList:
-                wallList = [aWall for aWall in tower.groupList[str(group)]]          # Group转化为list
-                wall = choice(wallList)
-                totem = Totem("healTotem", wall, group)
-                tower.monsters.add( totem )
-                tower.allElements["mons1"].add( totem )
-                tower.totemList.add( totem )
-            totemNum += 1
+            self.addTotems(tower)
+
+    def addTotems(self, tower):
+        if tower.layer<=6:
+            return
+        # 给塔楼增加图腾数量属性
+        tower.totemNum = self.totemNum
+        tower.totemList = pygame.sprite.Group()
+        # 确定出现的层数
+        occList = sample(range(3, tower.layer, 2), self.totemNum)
+        for group in occList:
+            wallList = [aWall for aWall in tower.groupList[str(group)]]          # Group转化为list
+            wall = choice(wallList)
+            totem = Totem("healTotem", wall, group)
+            tower.monsters.add( totem )
+            tower.allElements["mons1"].add( totem )
+            tower.totemList.add( totem )
+        self.totemNum += 1
     
     def updateBlizzard(self, heroes, wind, spurtCanvas, curArea):
         self.blizzardGenerator.storm(heroes, wind, spurtCanvas, curArea)
@@ -370,54 +467,51 @@ class Stg5Specifier():
             else:
                 msgManager.addMsg( (f"You've destroyed a [Heal Totem]! {tower.totemNum} more.",f"已摧毁一个【治疗图腾】！剩余{tower.totemNum}个。") )
             
-    def moveMons(self, model, item, heroes):
-        if item.category == "FrostTitan":
-            if item.activated:
-                model.spurtCanvas.addHalo( "monsHalo", 0 )
-                snowball = item.move( model.delay, heroes, model.spurtCanvas, model.bg_size )
-                if isinstance(snowball, enemy.SnowBall):
-                    model.tower.allElements["mons2"].add(snowball)
-                elif isinstance(snowball, enemy.IceSpirit):
-                    model.tower.allElements["mons2"].add(snowball)
-                    model.tower.monsters.add(snowball)
-            elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-                item.activated = True
-                model.msgManager.addMsg( ("Danger Coming !","危险来临！"), type="ctr", duration=120 )
-        elif item.category == "snowball":
-            balls = item.move(
-                model.delay, model.tower.groupList["0"], model.tower.groupList[str(item.onlayer)], 
-                model.tower.getTop(item.onlayer)+model.blockSize, heroes, model.spurtCanvas, GRAVITY
-            ) 
-            if balls:
-                model._addVib(6)
-                for each in balls:
-                    model.tower.allElements["mons2"].add( each )
-        elif item.category == "healTotem":
-            if not item.checkExposion(model.spurtCanvas):   # 检查摧毁
-                tracker = item.run(model.tower.monsters, model.spurtCanvas)
-                if tracker:
-                    model.tower.allElements["mons1"].add( tracker )
-        elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-            if item.category == "wolf":
-                item.move(model.delay, heroes, model.spurtCanvas)
-            elif item.category == "iceTroll":
-                item.move(model.delay, heroes, model.spurtCanvas)
-            elif item.category == "eagle":
-                item.move(model.delay, heroes, model.spurtCanvas)
-            elif item.category == "iceSpirit":
-                item.move(model.delay, heroes, model.spurtCanvas)
-            elif item.category == "hellHound":
-                vib = item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-                if vib:
-                    model._addVib(8)
-                item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
+    def _frostTitan(self, model, item, heroes):
+        if self._bossOn(model, item):
+            snowball = item.move( model.delay, heroes, model.spurtCanvas, model.bg_size )
+            if isinstance(snowball, enemy.SnowBall):
+                model.tower.allElements["mons2"].add(snowball)
+            elif isinstance(snowball, enemy.IceSpirit):
+                model.tower.allElements["mons2"].add(snowball)
+                model.tower.monsters.add(snowball)
+
+    def _snowball(self, model, item, heroes):
+        balls = item.move(
+            model.delay, model.tower.groupList["0"], model.tower.groupList[str(item.onlayer)], 
+            self.getTop(model, item.onlayer)+model.blockSize, heroes, model.spurtCanvas, GRAVITY
+        ) 
+        if balls:
+            model._addVib(6)
+            for each in balls:
+                model.tower.allElements["mons2"].add( each )
+
+    def _healTotem(self, model, item, heroes):
+        if not item.checkExposion(model.spurtCanvas):   # 检查摧毁
+            tracker = item.run(model.tower.monsters, model.spurtCanvas)
+            if tracker:
+                model.tower.allElements["mons1"].add( tracker )
+
+    def _move(self, model, item, heroes):
+        item.move(model.delay, heroes, model.spurtCanvas)
 
     def paint(self, screen):
         self.blizzardGenerator.paint(screen)
 
-class Stg6Specifier():
+class Stg6Specifier(Specifier):
     def __init__(self):
-        return
+        Specifier.__init__(self)
+        self.register("fire", self._fire)
+        self.register("missle", self._missle)
+        self.register("WarMachine", self._warMachine)
+        self.register("gunBullet", self._gunBullet)
+        # moves only if the item appears in the screen
+        self.register("dwarf", self._dwarf, onScreen=True)
+        self.register("gunner", self._gunner, onScreen=True)
+        self.register("lasercraft", self._lasercraft, onScreen=True)
+        self.register("fan", self._fan, onScreen=True)
+        self.register("drip", self._drip, onScreen=True)
+        self.register("hellHound", self._hellHound, onScreen=True)
 
     def addDrip(self, tower):
         # randomly select a  sidewall to place the drip
@@ -439,52 +533,55 @@ class Stg6Specifier():
         tower.allElements["mons0"].add(drip)
         tower.monsters.add(drip)
 
-    def moveMons(self, model, item, heroes):
-        if item.category == "fire":  # Warmachine's fireball.
-            item.update(model.delay, model.tower.groupList["0"], model.tower.groupList[str(item.onlayer)], model.tower.getTop(item.onlayer)+model.tower.blockSize, heroes, model.spurtCanvas, model.bg_size ) 
-        elif item.category == "missle":
-            item.update(model.delay, model.spurtCanvas)
-        elif item.category == "WarMachine":
-            if item.activated:
-                model.spurtCanvas.addHalo( "monsHalo", 0 )
-                fire = item.move( model.delay, heroes, model.spurtCanvas, model.tower )
-                if fire:
-                    model.tower.allElements["mons1"].add(fire)
-                    model._addVib(2)
-                    if fire.category=="missle":
-                        model.tower.monsters.add( fire )
-            elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-                item.activated = True
-                model.msgManager.addMsg( ("Danger Coming !","危险来临！"), type="ctr", duration=120 )
-        elif item.category == "gunBullet":
-            item.update(heroes, model.tower.groupList["0"], model.bg_size[0], model.spurtCanvas)
-        elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):  # moves only if the item appears in the screen
-            if item.category == "dwarf":
-                item.move(model.delay, heroes)
-            elif item.category == "gunner":
-                item.move(model.delay, heroes, model.screen)
-                item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-                # 拾取bullet，加入all然后清空。
-                if item.newBullet:
-                    model.tower.allElements["mons1"].add(item.newBullet)
-                    item.newBullet = None
-            elif item.category == "lasercraft":
-                item.move(model.delay, heroes, model.tower.layer)
-            elif item.category == "fan":
-                item.whirl(model.delay, heroes)
-            elif item.category == "drip":
-                item.update(model.delay, model.tower.monsters, heroes, model.spurtCanvas)
-            elif item.category == "hellHound":
-                vib = item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-                if vib:
-                    model._addVib(8)
-                item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
+    def _fire(self, model, item, heroes):      # Warmachine's fireball.
+        item.update(model.delay, model.tower.groupList["0"], model.tower.groupList[str(item.onlayer)], self.getTop(model, item.onlayer)+model.tower.blockSize, heroes, model.spurtCanvas, model.bg_size ) 
 
-    def paint(self, screen):
-        return
-    
-class Stg7Specifier():
+    def _missle(self, model, item, heroes):
+        item.update(model.delay, model.spurtCanvas)
+
+    def _warMachine(self, model, item, heroes):
+        if self._bossOn(model, item):
+            fire = item.move( model.delay, heroes, model.spurtCanvas, model.tower )
+            if fire:
+                model.tower.allElements["mons1"].add(fire)
+                model._addVib(2)
+                if fire.category=="missle":
+                    model.tower.monsters.add( fire )
+
+    def _gunBullet(self, model, item, heroes):
+        item.update(heroes, model.tower.groupList["0"], model.bg_size[0], model.spurtCanvas)
+
+    def _dwarf(self, model, item, heroes):
+        item.move(model.delay, heroes)
+
+    def _gunner(self, model, item, heroes):
+        item.move(model.delay, heroes, model.screen)
+        item.fall( self.getTop(model, item.onlayer), model.tower.groupList, GRAVITY )
+        # 拾取bullet，加入all然后清空。
+        if item.newBullet:
+            model.tower.allElements["mons1"].add(item.newBullet)
+            item.newBullet = None
+
+    def _lasercraft(self, model, item, heroes):
+        item.move(model.delay, heroes, model.tower.layer)
+
+    def _fan(self, model, item, heroes):
+        item.whirl(model.delay, heroes)
+
+    def _drip(self, model, item, heroes):
+        item.update(model.delay, model.tower.monsters, heroes, model.spurtCanvas)
+
+class Stg7Specifier(Specifier):
     def __init__(self, VServant):
+        Specifier.__init__(self)
+        self.register("log", self._log)
+        self.register("soulBlast", self._soulBlast)
+        self.register("Chicheng", self._chicheng)
+        self.register("stabber", self._stabber, onScreen=True)
+        self.register("guard", self._guard, onScreen=True)
+        self.register("flamen", self._flamen, onScreen=True)
+        self.register("assassin", self._assassin, onScreen=True)
+        self.register("hellHound", self._hellHound, onScreen=True)
         self.boss = None
         self.servant = None
         self.VServant = VServant
@@ -502,7 +599,7 @@ class Stg7Specifier():
         return True
 
     def checkWin(self):
-        if self.boss.health<=0:
+        if self.boss and self.boss.health<=0:     # boss所在的区域可能还未生成
             return True
         else:
             return False
@@ -537,53 +634,46 @@ class Stg7Specifier():
                 tower.allElements["mons1"].add( l )
                 self.log_cnt = randint(self.log_cnt_full-100, self.log_cnt_full+100)
     
-    def moveMons(self, model, item, heroes):
-        if item.category == "log":
-            vib = item.update(model.delay, heroes, model.tower.groupList, model.tower.getTop(item.onlayer), model.tower.boundaries, model.spurtCanvas)
+    def _log(self, model, item, heroes):
+        vib = item.update(model.delay, heroes, model.tower.groupList, self.getTop(model, item.onlayer), model.tower.boundaries, model.spurtCanvas)
+        if vib:
+            model._addVib(6)
+
+    def _soulBlast(self, model, item, heroes):
+        item.update(model.delay, 
+            model.tower.groupList["0"], 
+            model.tower.groupList[str(item.onlayer)], 
+            self.getTop(model, item.onlayer)+model.blockSize, 
+            heroes, 
+            model.spurtCanvas, 
+            model.bg_size )
+
+    def _chicheng(self, model, item, heroes):
+        if self._bossOn(model, item):
+            vib = item.fall( self.getTop(model, item.onlayer), model.tower.groupList, GRAVITY )
             if vib:
-                model._addVib(6)
-        elif item.category == "soulBlast":
-            item.update(model.delay, 
-                model.tower.groupList["0"], 
-                model.tower.groupList[str(item.onlayer)], 
-                model.tower.getTop(item.onlayer)+model.blockSize, 
-                heroes, 
-                model.spurtCanvas, 
-                model.bg_size )
-        elif item.category == "Chicheng":
-            if item.activated:
-                model.spurtCanvas.addHalo( "monsHalo", 0 )
-                vib = item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-                if vib:
-                    model._addVib(12)
-                item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
-            elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-                item.activated = True
-                model.msgManager.addMsg( ("Danger Coming !","危险来临！"), type="ctr", duration=120 )
-        elif ( item.rect.bottom >= 0 ) and ( item.rect.top <= model.bg_size[1] ):
-            if item.category == "stabber":
-                item.stab(model.delay, heroes )
-            elif item.category == "guard":
-                item.move(model.delay, heroes)
-                item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-            elif item.category == "flamen":
-                soulBlast = item.move(model.delay, heroes)
-                if soulBlast:
-                    model.tower.allElements["mons1"].add(soulBlast)
-            elif item.category == "assassin":
-                YRange = (model.tower.getTop("min"), model.tower.getTop("max"))
-                item.move(model.delay, heroes, YRange, model.spurtCanvas)
-            elif item.category == "hellHound":
-                vib = item.fall( model.tower.getTop(item.onlayer), model.tower.groupList, GRAVITY )
-                if vib:
-                    model._addVib(8)
-                item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
+                model._addVib(12)
+            item.move( heroes, model.spurtCanvas, model.tower.groupList, vib, GRAVITY )
 
-    def paint(self, screen):
-        return
-    
-class TutorialSpecifier():
+    def _stabber(self, model, item, heroes):
+        item.stab(model.delay, heroes )
+
+    def _guard(self, model, item, heroes):
+        item.move(model.delay, heroes)
+        item.fall( self.getTop(model, item.onlayer), model.tower.groupList, GRAVITY )
+
+    def _flamen(self, model, item, heroes):
+        soulBlast = item.move(model.delay, heroes)
+        if soulBlast:
+            model.tower.allElements["mons1"].add(soulBlast)
+
+    def _assassin(self, model, item, heroes):
+        YRange = (model.tower.getTop("min"), model.tower.getTop("max"))
+        item.move(model.delay, heroes, YRange, model.spurtCanvas)
+
+class TutorialSpecifier(Specifier):
     def __init__(self, hero, tower, VServant, tutor_on=True):
+        Specifier.__init__(self)
         self.tutor_on = tutor_on
         if tutor_on==True:
             self.tutorStep = 1  # 1:move left/right; 2:jump; 3:double jump; 4:shoot; 5:jump down; 6:use item; 7:shift item.
@@ -608,17 +698,17 @@ class TutorialSpecifier():
             }
             self.checkCD = 60   # 引入检测冷却时间，避免过快判断，结束教程步骤
             # Snds
-            self.progressSnd = pygame.mixer.Sound("audio/eatFruit.wav")
+            self.progressSnd = loadSnd("audio/eatFruit.wav", "ui")
             self.servantSnd = [
                 None,
-                pygame.mixer.Sound("audio/tutorial/tut1.wav"),
-                pygame.mixer.Sound("audio/tutorial/tut2.wav"),
-                pygame.mixer.Sound("audio/tutorial/tut3.wav"),
-                pygame.mixer.Sound("audio/tutorial/tut4.wav"),
-                pygame.mixer.Sound("audio/tutorial/tut5.wav"),
-                pygame.mixer.Sound("audio/tutorial/tut6.wav"),
-                pygame.mixer.Sound("audio/tutorial/tut7.wav"),
-                pygame.mixer.Sound("audio/tutorial/tut8.wav")
+                loadSnd("audio/tutorial/tut1.wav", "ui"),
+                loadSnd("audio/tutorial/tut2.wav", "ui"),
+                loadSnd("audio/tutorial/tut3.wav", "ui"),
+                loadSnd("audio/tutorial/tut4.wav", "ui"),
+                loadSnd("audio/tutorial/tut5.wav", "ui"),
+                loadSnd("audio/tutorial/tut6.wav", "ui"),
+                loadSnd("audio/tutorial/tut7.wav", "ui"),
+                loadSnd("audio/tutorial/tut8.wav", "ui")
             ]
             self.init_snd = False   # 标记第一次语音提示是否播放
 
@@ -689,9 +779,6 @@ class TutorialSpecifier():
         self.progressSnd.play(0)
         self.servantSnd[self.tutorStep].play(0)
 
-    def moveMons(self, model, item, heroes):
-        pass
-
     def paint(self, screen):
         if self.servant:
-            self.servant.drawHeads(screen)
+            self.servant.drawHeads(screen, offset=CAMERA.offset)
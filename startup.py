@@ -0,0 +1,145 @@
+"""
+startup.py:
+게임 시작 과정의 시간 추적기입니다. 각 생성자(구간)에 걸린 시간과, 그 사이에 불러온 모든 파일(이미지, 사운드, 글꼴)의
+로딩 시간을 기록하고, 첫 프레임이 화면에 나타나는 순간에 보고서를 저장합니다.
+환경 변수 KT_STARTUP에 .json/.csv 경로를 지정하면 켜집니다. headless.py menu 는 같은 추적으로 첫 프레임까지의 시간을 검사합니다.
+"""
+import os
+import time
+import json
+from contextlib import contextmanager
+import pygame
+
+STARTUP = os.environ.get("KT_STARTUP")     # 启动追踪的输出路径（.json/.csv），未设定则关闭
+TARGET_MS = 400                             # 首帧时间的目标（毫秒），headless.py menu 超出时返回1
+
+# 被追踪的加载函数：(模块, 属性名, 类别)。第一个参数为文件路径
+LOADERS = ( (pygame.image, "load", "image"), (pygame.mixer, "Sound", "sound"), (pygame.font, "Font", "font") )
+
+
+class StartupTrace():
+    '''记录从 begin() 到 end() 之间的各个区段和文件加载。区段用 with section(name) 包裹，可以嵌套；
+    文件的加载时间同时计入当时所在的最内层区段。未开启时各方法直接返回。'''
+
+    def __init__(self, path=None):
+        self.enabled = bool(path)
+        self.path = path
+        self.active = False
+        self.origin = 0
+        self.sections = []          # [名称, 深度, 开始(ms), 耗时(ms), 文件数, 文件耗时(ms)]，按开始的顺序
+        self.files = []             # (路径, 类别, 耗时(ms), 所在区段)
+        self.marks = []             # (名称, 自 begin() 起的毫秒数)
+        self._stack = []
+        self._saved = []
+
+    def now(self):
+        return (time.perf_counter()-self.origin)*1000
+
+    def begin(self):
+        if not self.enabled or self.active:
+            return
+        self.active = True
+        self.origin = time.perf_counter()
+        for (obj, name, kind) in LOADERS:
+            func = getattr(obj, name)
+            wrapper = self._wrap(func, kind)
+            self._saved.append( (obj, name, func, wrapper) )
+            setattr(obj, name, wrapper)
+
+    def _wrap(self, load, kind):
+        def wrapper(path, *args, **kw):
+            # 已经 from pygame.image import load 的模块会一直持有这个包装，结束追踪后直接转调
+            if not self.active:
+                return load(path, *args, **kw)
+            start = time.perf_counter()
+            res = load(path, *args, **kw)
+            ms = (time.perf_counter()-start)*1000
+            sec = self._stack[-1] if self._stack else None
+            self.files.append( (str(path), kind, ms, sec[0] if sec else "") )
+            if sec:
+                sec[4] += 1
+                sec[5] += ms
+            return res
+        return wrapper
+
+    @contextmanager
+    def section(self, name):
+        if not self.active:
+            yield
+            return
+        sec = [name, len(self._stack), self.now(), 0, 0, 0]
+        self.sections.append(sec)
+        self._stack.append(sec)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            sec[3] = self.now()-sec[2]
+            # 外层区段的文件统计包含内层
+            if self._stack:
+                self._stack[-1][4] += sec[4]
+                self._stack[-1][5] += sec[5]
+
+    def mark(self, name):
+        if self.active:
+            self.marks.append( (name, self.now()) )
+
+    def end(self, name="first frame"):
+        '''记下最后一个时刻，还原被包装的加载函数（其间被他人再次替换的除外），并按 path 保存。返回总毫秒数。'''
+        if not self.active:
+            return 0
+        self.mark(name)
+        self.active = False
+        for (obj, attr, func, wrapper) in self._saved:
+            if getattr(obj, attr) is wrapper:
+                setattr(obj, attr, func)
+        self._saved = []
+        if self.path:
+            self.dump(self.path)
+        return self.marks[-1][1]
+
+    def total(self):
+        return self.marks[-1][1] if self.marks else 0
+
+    def byKind(self):
+        '''各类文件的 (数量, 总耗时ms)'''
+        kinds = {}
+        for (path, kind, ms, sec) in self.files:
+            num, tot = kinds.get(kind, (0, 0))
+            kinds[kind] = (num+1, tot+ms)
+        return kinds
+
+    def report(self, top=10):
+        '''文本形式的报告：时刻、区段树、各类文件合计和最慢的 top 个文件。'''
+        lines = [ "%-36s %10s" % ("mark", "at(ms)") ]
+        lines += [ "%-36s %10.1f" % (name, at) for (name, at) in self.marks ]
+        lines.append( "%-36s %10s %10s %6s %10s" % ("section", "start(ms)", "total(ms)", "files", "files(ms)") )
+        for (name, depth, start, ms, num, fms) in self.sections:
+            lines.append( "%-36s %10.1f %10.1f %6d %10.1f" % ("  "*depth+name, start, ms, num, fms) )
+        for kind, (num, tot) in sorted(self.byKind().items()):
+            lines.append( "%-36s %10s %10.1f %6d" % ("all "+kind+" files", "", tot, num) )
+        lines.append( "%-36s %10s %10s" % ("slowest files", "ms", "section") )
+        for (path, kind, ms, sec) in sorted(self.files, key=lambda each: -each[2])[:top]:
+            lines.append( "%-36s %10.2f %10s" % (path, ms, sec) )
+        return "\n".join(lines)
+
+    def dump(self, path):
+        '''按扩展名导出为 .csv（每个区段、文件一行）或 .json'''
+        if path.endswith(".csv"):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write( "type,name,section,start,ms\n" )
+                for (name, at) in self.marks:
+                    f.write( "mark,%s,,%.3f,\n" % (name, at) )
+                for (name, depth, start, ms, num, fms) in self.sections:
+                    f.write( "section,%s,%d,%.3f,%.3f\n" % (name, depth, start, ms) )
+                for (fname, kind, ms, sec) in self.files:
+                    f.write( "%s,%s,%s,,%.3f\n" % (kind, fname, sec, ms) )
+        else:
+            data = { "marks": dict(self.marks), "kinds": { kind: {"files": num, "ms": round(tot, 3)} for kind, (num, tot) in self.byKind().items() },
+                "sections": [ {"name": name, "depth": depth, "start": round(start, 3), "ms": round(ms, 3), "files": num, "filesMs": round(fms, 3)}
+                                for (name, depth, start, ms, num, fms) in self.sections ],
+                "files": [ {"path": fname, "kind": kind, "ms": round(ms, 3), "section": sec} for (fname, kind, ms, sec) in self.files ] }
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+
+TRACE = StartupTrace(STARTUP)
@@ -0,0 +1,119 @@
+"""
+test_records.py:
+Record loading, migration, recovery and the background writer of database.py, on files in a temporary directory.
+Run from the repository root:  python -m pytest -q tests
+"""
+import os
+import sys
+import pickle
+import tempfile
+from copy import deepcopy
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# database 在导入时读取（必要时新建）当前目录下的 ./record.sav：在空的临时目录中导入，不碰真正的存档
+_cwd = os.getcwd()
+os.chdir(tempfile.mkdtemp())
+try:
+    import database
+    from database import REC_VERSION, RecWriter, example_rec_strucure, load_rec_data, read_rec, write_rec
+finally:
+    os.chdir(_cwd)
+
+
+def dump(path, obj):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+
+def oldRecord():
+    '''A version-0 record: no VERSION, GEM, TASK or STONE, the first chapter still locked, an older SYS_SET.'''
+    rec = deepcopy(example_rec_strucure)
+    for key in ("VERSION", "GEM", "TASK", "STONE"):
+        del rec[key]
+    rec["CHAPTER_REC"][0] = -1
+    rec["NICK_NAME"] = "veteran"
+    rec["HEROES"][2] = [5,120,1,2,0,1,0]
+    del rec["SYS_SET"]["TUTOR"]
+    return rec
+
+
+def test_version0_record_is_migrated(tmp_path):
+    path = str(tmp_path/"record.sav")
+    dump(path, oldRecord())
+    rec = read_rec(path)
+    assert rec["VERSION"] == REC_VERSION
+    assert rec["GEM"] == 0
+    assert rec["TASK"] == ["A-1", 0]
+    assert rec["STONE"] == {}
+    assert rec["CHAPTER_REC"][0] == 0
+    assert rec["SYS_SET"]["TUTOR"] == example_rec_strucure["SYS_SET"]["TUTOR"]
+    # 原有的数据保持不变
+    assert rec["NICK_NAME"] == "veteran"
+    assert rec["HEROES"][2] == [5,120,1,2,0,1,0]
+
+def test_truncated_record_falls_back_to_bak(tmp_path):
+    path = str(tmp_path/"record.sav")
+    first = deepcopy(example_rec_strucure)
+    first["GEM"] = 7
+    write_rec(first, path)
+    second = deepcopy(first)
+    second["GEM"] = 8
+    write_rec(second, path)         # first 成为 .bak
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:len(data)//2])
+    rec = load_rec_data(path)
+    assert rec["GEM"] == 7
+    assert os.path.exists(path+".corrupt")
+    assert read_rec(path)["GEM"] == 7   # 恢复的存档已重新写回
+
+def test_garbage_without_bak_gives_fresh_record(tmp_path):
+    path = str(tmp_path/"record.sav")
+    with open(path, "wb") as f:
+        f.write(b"\x00not a pickle at all\xff")
+    rec = load_rec_data(path)
+    assert rec == example_rec_strucure
+    assert os.path.exists(path+".corrupt")
+    assert read_rec(path) == example_rec_strucure
+
+def test_newer_record_is_moved_aside(tmp_path):
+    path = str(tmp_path/"record.sav")
+    future = deepcopy(example_rec_strucure)
+    future["VERSION"] = REC_VERSION+1
+    future["GEM"] = 99
+    dump(path, future)
+    with pytest.raises(ValueError):
+        read_rec(path)
+    rec = load_rec_data(path)
+    assert rec == example_rec_strucure
+    with open(path+".corrupt", "rb") as f:
+        assert pickle.load(f)["GEM"] == 99
+
+def test_quick_saves_are_coalesced(tmp_path):
+    path = str(tmp_path/"record.sav")
+    writer = RecWriter(path, delay=0.2)
+    rec = deepcopy(example_rec_strucure)
+    for gem in range(50):
+        rec["GEM"] = gem
+        writer.save(rec)
+    assert writer.flush(timeout=5)
+    assert writer.writes == 1
+    assert writer.coalesced == 49
+    assert read_rec(path)["GEM"] == 49
+
+def test_writer_survives_unpicklable_record(tmp_path):
+    path = str(tmp_path/"record.sav")
+    writer = RecWriter(path, delay=0)
+    bad = deepcopy(example_rec_strucure)
+    bad["GEM"] = lambda: 0
+    writer.save(bad)
+    assert writer.flush(timeout=5)
+    assert writer.error is not None
+    assert writer.writes == 0
+    good = deepcopy(example_rec_strucure)
+    good["GEM"] = 3
+    writer.save(good)
+    assert writer.flush(timeout=5)
+    assert read_rec(path)["GEM"] == 3
@@ -0,0 +1,35 @@
+"""
+test_startup.py:
+Time to the main menu's first frame, measured by `headless.py menu` on the dummy video driver (see startup.TRACE).
+Run from the repository root:  python -m pytest -q tests
+"""
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from startup import TARGET_MS
+
+
+def readBytes(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+def test_first_frame_within_target(tmp_path):
+    trace = str(tmp_path/"trace.json")
+    record = os.path.join(ROOT, "record.sav")
+    before = readBytes(record)
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    # 在独立进程中启动God：firstFrame()会替换pygame的部分函数，不影响其他测试
+    proc = subprocess.run( [sys.executable, "headless.py", "menu", "--startup", trace],
+                            cwd=ROOT, env=env, capture_output=True, text=True, timeout=120 )
+    assert proc.returncode == 0, proc.stdout[-2000:]+proc.stderr[-2000:]
+    with open(trace, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["marks"]["first frame"] <= TARGET_MS
+    # 菜单的启动过程不应写存档
+    assert readBytes(record) == before
@@ -7,12 +7,22 @@ UI 구성 요소(버튼, 패널, 텍스트 상자) 및 기타 다양한 게임 
 """
 import pygame
 import math
+import time
+import json
+import heapq
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
 from database import REC_DATA
+from soundBank import loadSnd
+
+ROT_STEPS = 72      # rotImg默认每圈的档数(5°一档)：现有旋转物体的步长(5/20/30/40/45°)都正好落在档位上
 
 
 # ====================================================
 # A more advanced BASIC Sprite class for this game, with lift() & level().
 class InanimSprite(pygame.sprite.Sprite):
+    rotSteps = ROT_STEPS    # 需要旋转的子类经rotImg取图时每圈的档数，可在子类中覆盖
+
     def __init__(self, category):
         pygame.sprite.Sprite.__init__(self)
         self.category = category
@@ -472,7 +482,7 @@ class MsgManager():
         self.frameColor = {"msg":(180,160,160), "dlg":(250,200,160), "item":(130,255,130)}
         self.frameGap = 4
         self.font = font
-        self.noticeSnd = pygame.mixer.Sound("audio/notice.wav")
+        self.noticeSnd = loadSnd("audio/notice.wav", "ui")
         self.msgStick = { "msg": pygame.image.load("image/tip.png").convert_alpha(), 
             "item": pygame.image.load("image/tip.png").convert_alpha()
         }
@@ -557,6 +567,10 @@ class MsgManager():
         # 供特殊标语使用。警告内容均为urgent。
         self.addMsg(self.alertDic[title], urgent=True)
 
+    def busy(self):
+        '''是否还有消息在显示或排队（菜单据此判断画面能否静止）'''
+        return bool( self.activeMsg or self.spareMsg or self.msgList or self.ctr_msg )
+
     def run(self, pause=False):
         # 若active位置为空，则取队列中第一个设为显示
         if self.activeMsg==None and len(self.msgList)>0:
@@ -680,39 +694,49 @@ class HPBar():
         """
         if not HPBar.iconG:
             HPBar.iconG = pygame.transform.smoothscale( pygame.image.load("image/goalie.png").convert_alpha(), (25,24) )
-        self.setColor(color)
         self.blockVol = blockVol    # 每个方格满时表示~滴血
         self.blockLen = blockLen    # 每个方格长度至多为~像素
         self.gap = gap
-        gapNum = math.ceil( full/self.blockVol )-1  # 格子中间间隔的数量
+        self.blockNum = math.ceil( full/self.blockVol )     # 方格的数量
+        gapNum = self.blockNum-1  # 格子中间间隔的数量
         self.barLen = full*self.blockLen/self.blockVol + gapNum*self.gap + self.gap*2     # 计算血条总长度+所有gap宽度
         self.barOffset = barOffset  # 血条底端离owner的距离
         # 外边框（白色半透底框）
         self.barH = barH
         self.barBG = pygame.Surface( (self.barLen, self.barH) ).convert_alpha()
-        self.barBG.fill( (255,255,255,210) )
+        self.setBG( (255,255,255,210) )
+        self.setColor(color)
         if icon:
             self.iconR = self.iconG.get_rect()
         else:
             self.iconR = None
             
-    def paint(self, owner, surface, data="health"):
+    def paint(self, owner, surface, data="health", offset=(0,0)):
+        '''offset: 绘制时的镜头偏移量（Camera.offset，即卷动加震动），owner的rect为世界坐标，不受影响。'''
         if data=="health":
             health = max( owner.health, 0 )
         elif data=="superPower":
             health = min( owner.superPowerCnt, owner.superPowerFull)
         
-        x = owner.rect.left+owner.rect.width//2 -self.barLen/2     # 中线减去血条长度的一半
-        y = owner.rect.top-self.barH-self.barOffset
+        x = owner.rect.left+owner.rect.width//2 -self.barLen/2 +offset[0]    # 中线减去血条长度的一半
+        y = owner.rect.top-self.barH-self.barOffset +offset[1]
         if self.iconR:
             # 画区域守卫的标志
             self.iconR.left = x -self.iconR.width
             self.iconR.top = y -10
             surface.blit( self.iconG, self.iconR )
-        # 画外边框
-        surface.blit( self.barBG, (x,y) )
-        # 画内部血格
-        offset = 0             # 用于计算每个方格的偏移值
+        if health > self.blockNum*self.blockVol:
+            # 超出血条容量（不应出现）：按原方式逐格绘制，方格会画到外边框之外
+            surface.blit( self.barBG, (x,y) )
+            self._drawBlocks( surface, x, y, health )
+            return
+        # 显示的数值或颜色变化时才重新合成血条
+        if (health, self.color) != self.shown:
+            self._render(health)
+        surface.blit( self.surf, (x,y) )
+
+    def _drawBlocks(self, surface, x, y, health, offset=0):
+        # 画内部血格。offset用于计算每个方格的偏移值
         while (health > 0):
             w = min(self.blockLen, health*self.blockLen//self.blockVol)     # w是当前的方格的血的宽度，最多为10。
             block = pygame.Rect( x+self.gap+offset, y+self.gap, w, self.barH-self.gap*2 )
@@ -723,10 +747,335 @@ class HPBar():
             pygame.draw.rect( surface, self.shadeColor, shadow )
             health -= self.blockVol
             offset += (self.blockLen+self.gap)
+
+    def _render(self, health):
+        '''外边框与满格部分直接从预先画好的整条中拷贝，只需另画最后一个不满的方格。'''
+        if self.color not in self.strips:
+            strip = self.barBG.copy()
+            self._drawBlocks( strip, 0, 0, self.blockNum*self.blockVol )
+            self.strips[self.color] = strip
+        strip = self.strips[self.color]
+        fullNum = int( health//self.blockVol )
+        split = self.gap + fullNum*(self.blockLen+self.gap)
+        # 先清零再以ADD方式blit，等同于原样拷贝像素（半透明底框不会与自身叠加混合）
+        self.surf.fill( (0,0,0,0) )
+        self.surf.blit( strip, (0,0), (0,0,split,self.barH), special_flags=pygame.BLEND_RGBA_ADD )
+        self.surf.blit( self.barBG, (split,0), (split,0,self.surf.get_width()-split,self.barH), special_flags=pygame.BLEND_RGBA_ADD )
+        self._drawBlocks( self.surf, 0, 0, health-fullNum*self.blockVol, offset=split-self.gap )
+        self.shown = (health, self.color)
     
     def setColor(self, color):
         self.lightColor, self.color, self.shadeColor = self.colorSet[color]
 
+    def setBG(self, rgba):
+        '''更换外边框（底框）的颜色。预先画好的血条随之作废'''
+        self.barBG.fill( rgba )
+        self.surf = pygame.Surface( self.barBG.get_size(), pygame.SRCALPHA )
+        self.strips = {}        # color -> 所有方格全满的整条血条
+        self.shown = None       # surf当前显示的(数值, 颜色)
+
+
+# 空间索引：均匀网格
+class SpatialGrid():
+    '''
+    以cellSize为边长的均匀网格，记录每个sprite覆盖的格子，用于在逐像素的mask检测之前快速筛出附近的sprite。
+    格子坐标按sprite的世界坐标计算；镜头卷动不改变任何rect，因此无需重新登记。
+    登记后自行移动位置的sprite（如正在坍塌的specialWall）需要再次调用add()；被kill()的sprite在查询时自动移除。
+    '''
+    def __init__(self, cellSize):
+        self.cellSize = cellSize
+        self.cells = {}         # (col,row) -> {sprite: None}
+        self.spriteCells = {}   # sprite -> 其所在的格子列表
+        self.seq = {}           # sprite -> 登记序号，查询结果按登记顺序返回
+        self.cnt = 0
+
+    def _span(self, rect):
+        s = self.cellSize
+        return [ (col, row) for col in range(rect.left//s, (rect.right-1)//s+1) 
+            for row in range(rect.top//s, (rect.bottom-1)//s+1) ]
+
+    def add(self, sprite):
+        '''登记sprite；若已登记，则按其当前位置重新登记'''
+        if sprite in self.spriteCells:
+            self._unlink(sprite)
+        else:
+            self.seq[sprite] = self.cnt
+            self.cnt += 1
+        span = self._span( maskRect(sprite) )
+        for cell in span:
+            self.cells.setdefault(cell, {})[sprite] = None
+        self.spriteCells[sprite] = span
+
+    def remove(self, sprite):
+        if sprite in self.spriteCells:
+            self._unlink(sprite)
+            self.spriteCells.pop(sprite)
+            self.seq.pop(sprite)
+
+    def _unlink(self, sprite):
+        for cell in self.spriteCells[sprite]:
+            bucket = self.cells[cell]
+            bucket.pop(sprite, None)
+            if not bucket:
+                self.cells.pop(cell)
+
+    def query(self, rect):
+        '''返回检测区域与rect重叠的所有已登记sprite（按登记顺序）'''
+        found = {}
+        for cell in self._span(rect):
+            if cell in self.cells:
+                found.update(self.cells[cell])
+        result = []
+        for sprite in found:
+            if not sprite.alive():
+                self.remove(sprite)
+            elif maskRect(sprite).colliderect(rect):
+                result.append(sprite)
+        result.sort(key=self.seq.get)
+        return result
+
+    def __contains__(self, sprite):
+        return sprite in self.spriteCells
+
+    def __len__(self):
+        return len(self.spriteCells)
+
+# 带空间索引的碰撞检测组
+class GridGroup(pygame.sprite.Group):
+    '''
+    与普通Group用法相同。绑定SpatialGrid后，已在网格中登记的成员通过网格筛选，
+    其余成员（宝箱、机关、蛛网等）仍逐个检测。未绑定网格时等同于普通Group。
+    '''
+    def __init__(self, grid=None):
+        pygame.sprite.Group.__init__(self)
+        self.grid = grid
+        self.loose = {}     # 不在网格中的成员
+
+    def bind(self, grid):
+        self.grid = grid
+        self.loose = { sprite: None for sprite in self if not (grid and sprite in grid) }
+
+    def add_internal(self, sprite, layer=None):
+        pygame.sprite.Group.add_internal(self, sprite, layer)
+        if not (self.grid and sprite in self.grid):
+            self.loose[sprite] = None
+
+    def remove_internal(self, sprite):
+        pygame.sprite.Group.remove_internal(self, sprite)
+        self.loose.pop(sprite, None)
+
+    def near(self, rect):
+        '''返回本组中检测区域与rect重叠的成员'''
+        if not self.grid:
+            return [ sprite for sprite in self if maskRect(sprite).colliderect(rect) ]
+        result = [ sprite for sprite in self.grid.query(rect) if (sprite in self.spritedict) and (sprite not in self.loose) ]
+        result += [ sprite for sprite in self.loose if maskRect(sprite).colliderect(rect) ]
+        return result
+
+    def collide(self, sprite):
+        '''等价于 spritecollide(sprite, self, False, collide_mask)'''
+        return [ each for each in self.near( maskRect(sprite) ) if pygame.sprite.collide_mask(sprite, each) ]
+
+# 记录成员变动次数的组
+class TrackedGroup(pygame.sprite.Group):
+    '''与普通Group用法相同；每次加入或移除（含kill()）成员时version加1，供TargetIndex判断快照是否过期。'''
+    def __init__(self, *sprites):
+        self.version = 0
+        pygame.sprite.Group.__init__(self, *sprites)
+
+    def add_internal(self, sprite, layer=None):
+        pygame.sprite.Group.add_internal(self, sprite, layer)
+        self.version += 1
+
+    def remove_internal(self, sprite):
+        pygame.sprite.Group.remove_internal(self, sprite)
+        self.version += 1
+
+# 区分静态成员的组
+class LayerGroup(pygame.sprite.Group):
+    '''与普通Group用法相同，成员按static(sprite)分为两类：static成员（如可预渲染到同一图层的砖块）与其余的loose成员。
+    loose按加入的顺序另行记录，供逐个绘制时直接遍历；static成员每次加入或移除（含kill()）时version加1，图层据此判断是否过期。'''
+    def __init__(self, static, *sprites):
+        self.static = static
+        self.loose = {}         # 非static的成员，按加入的顺序（只用键）
+        self.version = 0
+        pygame.sprite.Group.__init__(self, *sprites)
+
+    def add_internal(self, sprite, layer=None):
+        pygame.sprite.Group.add_internal(self, sprite, layer)
+        if self.static(sprite):
+            self.version += 1
+        else:
+            self.loose[sprite] = None
+
+    def remove_internal(self, sprite):
+        pygame.sprite.Group.remove_internal(self, sprite)
+        if self.static(sprite):
+            self.version += 1
+        else:
+            self.loose.pop(sprite, None)
+
+
+# ====================================================
+# 镜头：所有sprite都保存在世界坐标中，只在绘制时加上镜头的偏移量
+class Camera():
+    '''
+    塔楼随英雄的平移(scroll)与屏幕震动(shake)都只是绘制时的偏移量，不改变任何sprite的rect。世界坐标+scroll=屏幕坐标。
+    scroll与当前塔楼共用同一个列表（见follow()），因此每个区域各自记住自己的平移量。
+    AI、剔除等需要与屏幕范围比较的逻辑使用toScreen()/toWorld()，它们只按scroll换算，不含震动。
+    '''
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.scroll = [0,0]       # 当前塔楼的平移量
+        self.shake = (0,0)        # 当前的震动偏移量
+        self.vibration = 0        # 화면의 진동을 표시하는 카운트입니다.
+
+    def follow(self, tower):
+        '''切换到tower（进入新区域时）：此后的平移都记在该塔楼的scroll上。'''
+        self.scroll = tower.scroll
+
+    def pan(self, dx, dy):
+        self.scroll[0] += dx
+        self.scroll[1] += dy
+
+    @property
+    def offset(self):
+        '''绘制时加在世界坐标上的总偏移量'''
+        return ( self.scroll[0]+self.shake[0], self.scroll[1]+self.shake[1] )
+
+    def toScreen(self, item):
+        '''世界坐标 -> 屏幕坐标。item为Rect时返回平移后的新Rect，否则视为(x,y)，返回元组。'''
+        if isinstance(item, pygame.Rect):
+            return item.move(self.scroll)
+        return ( item[0]+self.scroll[0], item[1]+self.scroll[1] )
+
+    def toWorld(self, item):
+        '''屏幕坐标 -> 世界坐标，用法同toScreen()。'''
+        if isinstance(item, pygame.Rect):
+            return item.move(-self.scroll[0], -self.scroll[1])
+        return ( item[0]-self.scroll[0], item[1]-self.scroll[1] )
+
+    def addVib(self, dura):
+        # NOTE: dura should be an even number.
+        if self.vibration>dura: # 若当前的震动时长更长，则忽视本次请求
+            return
+        if self.vibration%2==0:
+            self.vibration = dura   # 当前为偶数，则直接替换
+        else:
+            self.vibration = dura+1 # 否则为奇数，则需要保持奇数，才能保证最后位置恢复
+
+    def vibrate(self):
+        '''每帧调用一次：偶数帧偏移4px，奇数帧归位。震动结束时偏移量必然为0。'''
+        if self.vibration > 0:
+            flunc = 4 if (self.vibration % 2 == 0) else 0
+            self.shake = (flunc, flunc)
+            self.vibration -= 1
+        else:
+            self.shake = (0,0)
+
+CAMERA = Camera()
+
+# 按镜头偏移绘制的屏幕
+class CameraView():
+    '''
+    包装真正的屏幕，供sprite的paint(surface)使用：blit()的目标位置加上offset，其余属性与方法都交给原surface。
+    直接用pygame.draw作画的paint()应画在view.surface上，并用view.pos()/view.rect()换算坐标。
+    '''
+    def __init__(self, surface, offset):
+        self.surface = surface
+        self.offset = offset
+
+    def blit(self, source, dest, area=None, special_flags=0):
+        return self.surface.blit( source, self.pos(dest), area, special_flags )
+
+    def pos(self, p):
+        return ( p[0]+self.offset[0], p[1]+self.offset[1] )
+
+    def rect(self, r):
+        return pygame.Rect(r).move(self.offset)
+
+    def __getattr__(self, name):
+        return getattr(self.surface, name)
+
+
+# ====================================================
+# 怪物目标索引
+class TargetIndex():
+    '''
+    英雄的AI和超级技能选择攻击目标时使用的怪物索引，避免每次都遍历整个tower.monsters。
+    快照（成员按组内顺序，及其中与屏幕纵向范围[0, height]重叠者，按CAMERA换算）在第一次查询时建立，之后直到下列情况之一才重建：
+    调用refresh()（塔楼平移和怪物移动之后，每帧由model调用），或组的成员有增减（见TrackedGroup）。
+    两次refresh()之间怪物的纵向位置不变、生命值只会减少，strongest()据此在堆中就地修正受伤怪物的位置。
+    所有查询结果都按组内顺序给出，与直接遍历组的结果一致。
+    '''
+    band = 60       # inRow()所用横条的高度（像素）
+
+    def __init__(self, group, height):
+        self.group = group
+        self.height = height
+        self._version = None        # 快照对应的group.version，None表示需要重建
+        self._members = []          # 组内全部怪物，按组内顺序
+        self._visible = []
+        self._heap = None           # [ (-生命值, -顺序, 怪物) ]，strongest()第一次调用时建立
+        self._bands = None          # 横条号 -> [怪物]，inRow()第一次调用时建立
+        self.builds = 0
+
+    def refresh(self):
+        self._version = None
+
+    def _snapshot(self):
+        if self._version==self.group.version:
+            return
+        self._version = self.group.version
+        self._members = self.group.sprites()
+        top = -CAMERA.scroll[1]    # 屏幕上沿的世界纵坐标
+        self._visible = [ m for m in self._members if m.rect.bottom>=top and m.rect.top<=top+self.height ]
+        self._heap = None
+        self._bands = None
+        self.builds += 1
+
+    def visible(self, exclude=()):
+        '''与屏幕纵向范围重叠的怪物；exclude为要排除的category。返回的列表不可修改。'''
+        self._snapshot()
+        if not exclude:
+            return self._visible
+        return [ m for m in self._visible if m.category not in exclude ]
+
+    def strongest(self, test=None, exclude=None):
+        '''屏幕内生命值最高、且满足test(m)的怪物（生命值相同时取组内靠后者），exclude为要跳过的某个怪物。没有则返回None。'''
+        self._snapshot()
+        if self._heap is None:
+            self._heap = [ (-m.health, -i, m) for (i, m) in enumerate(self._visible) ]
+            heapq.heapify(self._heap)
+        heap = self._heap
+        skipped = []
+        found = None
+        while heap:
+            health, i, m = heap[0]
+            if -health!=m.health:
+                # 本帧内受了伤：按当前生命值放回
+                heapq.heapreplace(heap, (-m.health, i, m))
+            elif m is exclude or (test and not test(m)):
+                skipped.append( heapq.heappop(heap) )
+            else:
+                found = m
+                break
+        for each in skipped:
+            heapq.heappush(heap, each)
+        return found
+
+    def inRow(self, y):
+        '''纵向范围跨过y（top<y<bottom）的全部怪物，包括屏幕外的。'''
+        self._snapshot()
+        if self._bands is None:
+            self._bands = {}
+            for m in self._members:
+                for no in range( m.rect.top//self.band, (m.rect.bottom-1)//self.band+1 ):
+                    self._bands.setdefault(no, []).append(m)
+        return [ m for m in self._bands.get(y//self.band, []) if m.rect.top<y<m.rect.bottom ]
+
 
 # ====================================================
 # Useful functions, most about Surface processing.
@@ -736,13 +1085,29 @@ def getPos(sprite, x=0.5, y=0.5):
     posY = round( sprite.rect.top + sprite.rect.height*y )
     return [posX, posY]
 
+def maskRect(sprite):
+    '''collide_mask实际检测的区域：以rect左上角为起点，以mask（没有则为image）的尺寸为大小'''
+    size = sprite.mask.get_size() if hasattr(sprite, "mask") else sprite.image.get_size()
+    return pygame.Rect(sprite.rect.topleft, size)
+
+RECT_SURFS = OrderedDict()     # (width, height, rgba) -> 填好颜色的面，供drawRect()重复使用
+RECT_CAPACITY = 64
+
 def drawRect(x, y, width, height, rgba, screen):
-    '''常用的画rectangle 的 surface函数'''
-    surf = pygame.Surface( (width, height) ).convert_alpha()
+    '''常用的画rectangle 的 surface函数。同尺寸同颜色的面只创建一次（菜单每帧都要画几十个）'''
+    key = (width, height, tuple(rgba))
+    surf = RECT_SURFS.get(key)
+    if surf is None:
+        surf = pygame.Surface( (width, height) ).convert_alpha()
+        surf.fill( rgba )
+        RECT_SURFS[key] = surf
+        if len(RECT_SURFS)>RECT_CAPACITY:
+            RECT_SURFS.popitem(last=False)
+    else:
+        RECT_SURFS.move_to_end(key)
     rect = surf.get_rect()
     rect.left = x
     rect.top = y
-    surf.fill( rgba )
     screen.blit( surf, rect )
     return rect
 
@@ -763,15 +1128,39 @@ def rot_center(image, angle, subsurf=True):
         rot_image = rot_image.subsurface(rot_rect).copy()
     return rot_image
 
+def rotImg(image, angle, steps=ROT_STEPS, subsurf=True):
+    '''rot_center()的缓存版本：angle吸附到最近的 360/steps 的整数倍，每张源图片的每一档只旋转一次。
+    结果登记到阴影缓存，之后对它的generateShadow()、getMask()也都只计算一次。image应是长期存在的图片（如loadImg、imgLib中的图片）。'''
+    lib = ASSETS.rotations.get(image)
+    if lib is None:
+        lib = ASSETS.rotations[image] = {}
+    frames = lib.get( (steps, subsurf) )
+    if frames is None:
+        frames = lib[(steps, subsurf)] = {}
+    # 保留角度的正负号：pygame对-330°与30°的光栅化结果略有不同，与原先rot_center(angle)保持逐像素一致
+    indx = round(angle*steps/360)
+    if abs(indx)>=steps:
+        indx %= steps
+    if indx not in frames:
+        frames[indx] = rot_center(image, indx*360/steps, subsurf)
+        ASSETS.shadows[frames[indx]] = {}
+    return frames[indx]
+
 def generateShadow(img, color=(10,10,10,80)):
-    '''根据给的单张image转化出阴影并返回'''
+    '''根据给的单张image转化出阴影并返回。所有alpha>0的像素被设为color，其余像素保持不变。
+    若img来自资源缓存（loadImg），结果会按(img, color)缓存，多次调用返回同一个Surface。'''
+    cache = ASSETS.shadows.get(img)
+    if cache is not None and tuple(color) in cache:
+        return cache[tuple(color)]
     shad = img.copy()
-    shad.lock()
-    for x in range(shad.get_width()):
-        for y in range(shad.get_height()):
-            if shad.get_at((x,y))[3]>0:
-                shad.set_at( (x,y), color )
-    shad.unlock()
+    # 带colorkey而无per-pixel alpha的画布：get_at()读到的alpha恒为255，即整幅都属于阴影
+    if img.get_colorkey() is not None and not (img.get_flags() & pygame.SRCALPHA):
+        mask = pygame.Mask(img.get_size(), fill=True)
+    else:
+        mask = pygame.mask.from_surface(img, 0)
+    mask.to_surface(shad, setcolor=color, unsetcolor=None)
+    if cache is not None:
+        cache[tuple(color)] = shad
     return shad
 
 def getCld(core, group, cateList):
@@ -779,8 +1168,393 @@ def getCld(core, group, cateList):
     Assistant function for many of hero's movement check, stone.fall, etc.
     '''
     spriteList = []
-    cldList = pygame.sprite.spritecollide(core, group, False, pygame.sprite.collide_mask)
+    if isinstance(group, GridGroup):
+        cldList = group.collide(core)
+    else:
+        cldList = pygame.sprite.spritecollide(core, group, False, pygame.sprite.collide_mask)
     for item in cldList:
         if item.category in cateList:
             spriteList.append(item)
-    return spriteList
\ No newline at end of file
+    return spriteList
+
+_solidMasks = {}    # id(mask) -> (mask, solidMask)。保存mask本身，避免id被复用
+
+def solidMask(mask, depth=256):
+    '''将砖块的mask在每一列中从最高的不透明点起向下填满，并向下延伸depth像素。结果按mask缓存。'''
+    key = id(mask)
+    if key in _solidMasks:
+        return _solidMasks[key][1]
+    width, height = mask.get_size()
+    solid = pygame.Mask( (width, height+depth) )
+    for x in range(width):
+        for y in range(height):
+            if mask.get_at((x,y)):
+                solid.draw( pygame.Mask((1, height+depth-y), fill=True), (x,y) )
+                break
+    if len(_solidMasks) >= 256:
+        _solidMasks.clear()
+    _solidMasks[key] = (mask, solid)
+    return solid
+
+def landingShift(sprite, walls):
+    '''
+    求出sprite向上回退多少像素后不再与walls中的任何砖块重叠（walls一般为已相撞的砖块）。
+    砖块视为自其顶边向下实心，因此重叠随上移单调减少，可用二分法在O(log h)次mask检测内求得。
+    '''
+    shift = 0
+    for wall in walls:
+        solid = solidMask(wall.mask)
+        offset = ( wall.rect.left-sprite.rect.left, wall.rect.top-sprite.rect.top )
+        if not sprite.mask.overlap(solid, (offset[0], offset[1]+shift)):
+            continue
+        lo = shift      # 仍重叠
+        hi = max( shift+1, sprite.rect.top+sprite.mask.get_size()[1]-wall.rect.top )  # 完全位于砖块上方，必不重叠
+        while hi-lo > 1:
+            mid = (lo+hi)//2
+            if sprite.mask.overlap(solid, (offset[0], offset[1]+mid)):
+                lo = mid
+            else:
+                hi = mid
+        shift = hi
+    return shift
+
+# ====================================================
+# Asset cache: 同一个文件只解码一次，之后的请求都返回共享的Surface/Mask（音效由soundBank.py管理）。
+# NOTE: 返回的对象是共享的，调用者不得原地修改（fill、set_at、blit到其上等）；需要修改时请先copy()。
+class AssetCache():
+    def __init__(self, capacity=96*1024*1024):
+        # 以 (kind, path, flip, scale) 为键，值为 (对象, 估算字节数)。OrderedDict的顺序即LRU顺序。
+        self.capacity = capacity
+        self.store = OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 缓存图片 -> {color: 阴影}。随源图片一起释放，因此不计入容量
+        self.shadows = WeakKeyDictionary()
+        # 任意Surface -> Mask（见getMask），同样随Surface释放；maskBuilds为实际调用from_surface的次数
+        self.masks = WeakKeyDictionary()
+        self.maskBuilds = 0
+        # 源图片 -> {(steps, subsurf): {档位: 旋转结果}}（见rotImg）
+        self.rotations = WeakKeyDictionary()
+
+    def _fetch(self, key, build):
+        if key in self.store:
+            self.hits += 1
+            self.store.move_to_end(key)
+            return self.store[key][0]
+        self.misses += 1
+        obj, size = build()
+        self.store[key] = (obj, size)
+        self.used += size
+        # 超出容量时从最久未使用的一端淘汰（刚放入的这一项始终保留）
+        while self.used > self.capacity and len(self.store) > 1:
+            _, (_, oldSize) = self.store.popitem(last=False)
+            self.used -= oldSize
+            self.evictions += 1
+        return obj
+
+    def image(self, path, flip=False, scale=None):
+        def build():
+            if scale or flip:
+                img = self.image(path)
+                if scale:
+                    img = pygame.transform.smoothscale(img, scale)
+                if flip:
+                    img = pygame.transform.flip(img, True, False)
+            else:
+                img = pygame.image.load(path).convert_alpha()
+            self.shadows[img] = {}
+            return img, img.get_width()*img.get_height()*img.get_bytesize()
+        return self._fetch( ("img", path, flip, scale), build )
+
+    def mask(self, path, flip=False, scale=None):
+        def build():
+            img = self.image(path, flip, scale)
+            return pygame.mask.from_surface(img), img.get_width()*img.get_height()//8
+        return self._fetch( ("mask", path, flip, scale), build )
+
+    def stats(self):
+        total = self.hits + self.misses
+        rotFrames = [ img for lib in self.rotations.values() for frames in lib.values() for img in frames.values() ]
+        return { "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            "entries": len(self.store), "bytes": self.used, "capacity": self.capacity, "maskBuilds": self.maskBuilds,
+            "rotFrames": len(rotFrames), "rotBytes": sum( img.get_width()*img.get_height()*img.get_bytesize() for img in rotFrames ),
+            "hitRate": (self.hits/total) if total else 0 }
+
+    def clear(self):
+        self.store.clear()
+        self.used = 0
+
+ASSETS = AssetCache()
+
+def loadImg(path, flip=False, scale=None):
+    '''从缓存中取出（必要时加载）convert_alpha后的图片。flip表示水平翻转，scale为目标尺寸(w,h)'''
+    return ASSETS.image(path, flip, scale)
+
+def loadMask(path, flip=False, scale=None):
+    '''与loadImg(path, flip, scale)对应的碰撞遮罩'''
+    return ASSETS.mask(path, flip, scale)
+
+def getMask(img):
+    '''img的碰撞mask。以Surface对象为键缓存，同一张图只生成一次（怪物各帧的图片都来自固定的imgLib）'''
+    mask = ASSETS.masks.get(img)
+    if mask is None:
+        mask = ASSETS.masks[img] = pygame.mask.from_surface(img)
+        ASSETS.maskBuilds += 1
+    return mask
+
+def assetStats():
+    return ASSETS.stats()
+
+
+# ====================================================
+# Media library: 壁纸、章节封面等不透明大图。启动时只登记文件名，用到时才解码并convert()为屏幕格式；
+# 缩放后的版本与原图一同缓存，超出keep张时整张（连同各尺寸）按LRU淘汰。返回的Surface同样是共享的。
+class MediaLibrary():
+    def __init__(self, keep=3):
+        self.keep = keep
+        self.paths = {}             # name -> 文件路径
+        self.store = OrderedDict()  # name -> {size或None: Surface}，顺序即LRU顺序
+        self.loads = 0
+        self.evictions = 0
+
+    def add(self, name, path):
+        self.paths[name] = path
+
+    def __contains__(self, name):
+        return name in self.paths
+
+    def get(self, name, size=None):
+        '''The picture `name` converted to the display format; `size` (w,h) gives a smoothscaled variant.'''
+        variants = self.store.get(name)
+        if variants is None:
+            variants = self.store[name] = { None: pygame.image.load(self.paths[name]).convert() }
+            self.loads += 1
+            while len(self.store) > self.keep:
+                self.store.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.store.move_to_end(name)
+        if size not in variants:
+            variants[size] = pygame.transform.smoothscale( variants[None], size )
+        return variants[size]
+
+    def prefetch(self, names, size=None):
+        '''Decode `names` ahead of use (e.g. the neighbours in a carousel). The last one ends up most recently used.'''
+        for name in names:
+            if name in self.paths:
+                self.get(name, size)
+
+    def stats(self):
+        return { "indexed": len(self.paths), "decoded": len(self.store), "loads": self.loads, "evictions": self.evictions,
+            "bytes": sum( img.get_width()*img.get_height()*img.get_bytesize() for variants in self.store.values() for img in variants.values() ) }
+
+
+# ====================================================
+# Text cache: 相同(字体, 文字, 颜色)的渲染结果只生成一次。返回的Surface是共享的，不得原地修改。
+class TextCache():
+    '''LRU cache in front of Font.render(). Strings made only of DIGITS (damage numbers, coins, counters)
+    are composed from per-glyph surfaces, so a new number costs a few blits instead of a full render.'''
+    DIGITS = "0123456789+-%/:"
+
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.store = OrderedDict()  # (font, text, antialias, color) -> Surface
+        self.glyphs = {}            # (font, char, antialias, color) -> (Surface, 前进宽度)
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0            # 实际调用Font.render的次数（含单个字形）
+
+    def render(self, font, text, antialias, color):
+        key = (font, text, antialias, tuple(color))
+        txt = self.store.get(key)
+        if txt is not None:
+            self.hits += 1
+            self.store.move_to_end(key)
+            return txt
+        self.misses += 1
+        if text and all( ch in self.DIGITS for ch in text ):
+            txt = self._compose(font, text, antialias, color)
+        else:
+            txt = font.render(text, antialias, color)
+            self.renders += 1
+        self.store[key] = txt
+        if len(self.store) > self.capacity:
+            self.store.popitem(last=False)
+        return txt
+
+    def _glyph(self, font, ch, antialias, color):
+        key = (font, ch, antialias, color)
+        if key not in self.glyphs:
+            self.glyphs[key] = ( font.render(ch, antialias, color), font.metrics(ch)[0][4] )
+            self.renders += 1
+        return self.glyphs[key]
+
+    def _compose(self, font, text, antialias, color):
+        glyphs = [ self._glyph(font, ch, antialias, color) for ch in text ]
+        width = sum( adv for (img, adv) in glyphs[:-1] ) + glyphs[-1][0].get_width()
+        txt = pygame.Surface( (width, font.get_height()), pygame.SRCALPHA )
+        x = 0
+        for (img, adv) in glyphs:
+            txt.blit(img, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)     # 直接取字形的像素，避免与透明底色混合而变暗
+            x += adv
+        return txt
+
+    def stats(self):
+        return { "entries": len(self.store), "glyphs": len(self.glyphs), "hits": self.hits, "misses": self.misses, "renders": self.renders }
+
+TEXTS = TextCache()
+
+def renderText(font, text, color, antialias=True):
+    '''从缓存中取出（必要时渲染）文字Surface，参数与Font.render()相同'''
+    return TEXTS.render(font, text, antialias, color)
+
+
+# ====================================================
+# 地图上漂浮的伤害/治疗数字。每条都存活相同的帧数，因此总是按加入的顺序到期：
+# 用一个循环复用的槽位数组存放，过期只需前移head，不必在列表中查找删除。
+class FloatMsgs():
+    def __init__(self, life=60, capacity=64):
+        self.life = life
+        self.slots = [ [None, "", 0, None] for _ in range(capacity) ]     # [pos, text, 倒计时, color]
+        self.head = 0       # 最早加入的条目所在的槽位
+        self.size = 0
+
+    def add(self, pos, text, color=(255,255,255)):
+        if self.size == len(self.slots):
+            # 槽位用尽：按时间顺序展开后扩容一倍
+            self.slots = self.slots[self.head:] + self.slots[:self.head] + [ [None, "", 0, None] for _ in range(self.size) ]
+            self.head = 0
+        slot = self.slots[ (self.head+self.size) % len(self.slots) ]
+        slot[0], slot[1], slot[2], slot[3] = pos, text, self.life, color
+        self.size += 1
+
+    def expire(self):
+        '''倒计时已经减为0的条目出列'''
+        while self.size and self.slots[self.head][2] <= 0:
+            self.head = (self.head+1) % len(self.slots)
+            self.size -= 1
+
+    def clear(self):
+        self.head = self.size = 0
+
+    def __iter__(self):
+        n = len(self.slots)
+        for i in range(self.size):
+            yield self.slots[ (self.head+i) % n ]
+
+    def __len__(self):
+        return self.size
+
+
+# ====================================================
+# Frame profiler: 主循环各阶段的帧时间统计，默认关闭（见 model.PROFILE）。
+class FrameProfiler():
+    '''按名称记录主循环中各阶段的耗时。每帧以 startFrame() 开始、endFrame() 结束，
+    中间每个阶段结束时调用 mark(name)，该名称记下自上一次 mark 以来的耗时。
+    未开启时各方法直接返回，几乎没有开销。'''
+
+    def __init__(self, enabled=False, window=600):
+        self.enabled = enabled
+        self.window = window        # 滚动统计(p50/p95/p99)所用的帧数
+        self.names = []             # 按首次出现的顺序排列的阶段名
+        self.rows = []              # 每帧一个 {name: 毫秒}，含 "frame" 总耗时，用于结束时导出
+        self.overlay = False
+        self._cur = {}
+        self._last = self._start = 0
+        self._lines = []            # overlay 文本缓存，每隔 30 帧刷新一次
+        self.counters = {}          # 计数器名 -> [读取累计值的函数, 上一帧的累计值]，每帧记录增量
+
+    def track(self, name, getter):
+        '''登记一个计数器：getter()返回累计值（如ASSETS.maskBuilds），每帧记下其增量'''
+        self.counters[name] = [getter, getter()]
+
+    def startFrame(self):
+        if not self.enabled:
+            return
+        self._cur = {}
+        self._start = self._last = time.perf_counter()
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        # 同一帧内同名阶段可出现多次，耗时累加
+        self._cur[name] = self._cur.get(name, 0) + (now-self._last)*1000
+        self._last = now
+        if name not in self.names:
+            self.names.append(name)
+
+    def endFrame(self):
+        if not self.enabled:
+            return
+        self._cur["frame"] = (time.perf_counter()-self._start)*1000
+        for name, pair in self.counters.items():
+            total = pair[0]()
+            self._cur[name] = total-pair[1]
+            pair[1] = total
+        self.rows.append(self._cur)
+        if self.overlay and len(self.rows)%30==0:
+            self._refresh()
+
+    def _refresh(self):
+        self._lines = [ ("ms", "p50", "p95", "p99") ] + [
+            (name,)+tuple( "%.2f" % val for val in self.percentiles(name) ) for name in self.names+["frame"]
+        ] + [ (name, "%d" % total, "", "") for name, total in self.counts(self.rows[-self.window:]).items() ]
+
+    def percentiles(self, name, rows=None, qs=(50, 95, 99)):
+        '''该阶段耗时的分位数（毫秒），默认取最近 window 帧；未出现该阶段的帧按 0 计'''
+        if rows is None:
+            rows = self.rows[-self.window:]
+        vals = sorted( row.get(name, 0) for row in rows )
+        if not vals:
+            return tuple(0 for q in qs)
+        return tuple( vals[min(len(vals)-1, len(vals)*q//100)] for q in qs )
+
+    def toggle(self):
+        if self.enabled:
+            self.overlay = not self.overlay
+            self._lines = []
+
+    def paint(self, surface, font, pos=(10,110)):
+        if not (self.enabled and self.overlay):
+            return
+        if not self._lines:     # 刚打开时立即生成一次文本
+            self._refresh()
+        x, y = pos
+        drawRect( x-4, y-4, 232, len(self._lines)*(font.get_linesize())+8, (0,0,0,160), surface )
+        for line in self._lines:
+            # 比例字体下按列对齐：名称左对齐，数值右对齐
+            surface.blit( font.render(line[0], True, (255,255,120)), (x, y) )
+            for i, cell in enumerate(line[1:]):
+                txt = font.render(cell, True, (255,255,120))
+                surface.blit( txt, (x+120+i*45-txt.get_width(), y) )
+            y += font.get_linesize()
+
+    def summary(self, rows=None):
+        keys = self.names+["frame"]
+        return { name: dict(zip(("p50","p95","p99"), self.percentiles(name, rows))) for name in keys }
+
+    def counts(self, rows=None):
+        '''各计数器在rows（默认整局）内的增量之和'''
+        if rows is None:
+            rows = self.rows
+        return { name: sum( row.get(name, 0) for row in rows ) for name in self.counters }
+
+    def dump(self, path):
+        '''按扩展名导出为 .csv（每帧一行）或 .json（整局分位数 + 每帧数据）'''
+        if not (self.enabled and self.rows):
+            return
+        keys = self.names+["frame"]
+        counters = list(self.counters)
+        if path.endswith(".csv"):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write( ",".join(["no"]+keys+counters)+"\n" )
+                for i, row in enumerate(self.rows):
+                    f.write( ",".join( [str(i)]+["%.3f" % row.get(name, 0) for name in keys]+[str(row.get(name, 0)) for name in counters] )+"\n" )
+        else:
+            data = { "frames": len(self.rows), "summary": self.summary(self.rows), "counts": self.counts(self.rows),
+                "rows": [ [round(row.get(name, 0), 3) for name in keys]+[row.get(name, 0) for name in counters] for row in self.rows ], "columns": keys+counters }
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)